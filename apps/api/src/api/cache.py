@@ -6,6 +6,8 @@ Shared thin wrapper around Redis for the API service.
 - Lazy-initializes a single redis.Redis client (reused across requests)
 - All cache operations are SILENT on Redis failure — never break requests
 - Uses the same REDIS_URL env var as Celery
+- acache_get / acache_set: the same on a redis.asyncio client, for code
+  running on the event loop (async routes and services)
 
 Usage:
     from api.cache import cache_get, cache_set, cache_delete
@@ -13,6 +15,9 @@ Usage:
     val = cache_get("my:key")           # None if missing or Redis down
     cache_set("my:key", obj, ttl=3600)  # silently ignored if Redis down
     cache_delete("my:key")
+
+    val = await acache_get("my:key")
+    await acache_set("my:key", obj, ttl_seconds=3600)
 """
 
 import json
@@ -20,12 +25,15 @@ import logging
 from typing import Any, Optional
 
 import redis as _redis
+import redis.asyncio as _aioredis
 
+from .metrics import CACHE_REQUESTS
 from .settings import settings
 
 logger = logging.getLogger(__name__)
 
 _redis_client: Optional[_redis.Redis] = None
+_async_redis_client: Optional[_aioredis.Redis] = None
 
 
 def get_redis() -> _redis.Redis:
@@ -41,6 +49,19 @@ def get_redis() -> _redis.Redis:
     return _redis_client
 
 
+def get_async_redis() -> _aioredis.Redis:
+    """Lazy-initialize a shared redis.asyncio client (for event-loop code)."""
+    global _async_redis_client
+    if _async_redis_client is None:
+        _async_redis_client = _aioredis.from_url(
+            settings.REDIS_URL,
+            decode_responses=True,
+            socket_connect_timeout=2,
+            socket_timeout=2,
+        )
+    return _async_redis_client
+
+
 def cache_get(key: str) -> Optional[Any]:
     """
     Retrieve a value from the cache.
@@ -49,9 +70,14 @@ def cache_get(key: str) -> Optional[Any]:
     try:
         raw = get_redis().get(key)
         if raw is not None:
-            return json.loads(raw)
+            value = json.loads(raw)
+            CACHE_REQUESTS.labels(result="hit").inc()
+            return value
     except Exception as exc:
+        CACHE_REQUESTS.labels(result="error").inc()
         logger.debug("cache_get miss (Redis error): %s — %s", key, exc)
+        return None
+    CACHE_REQUESTS.labels(result="miss").inc()
     return None
 
 
@@ -72,3 +98,27 @@ def cache_delete(key: str) -> None:
         get_redis().delete(key)
     except Exception as exc:
         logger.debug("cache_delete failed: %s — %s", key, exc)
+
+
+async def acache_get(key: str) -> Optional[Any]:
+    """cache_get without blocking the event loop."""
+    try:
+        raw = await get_async_redis().get(key)
+        if raw is not None:
+            value = json.loads(raw)
+            CACHE_REQUESTS.labels(result="hit").inc()
+            return value
+    except Exception as exc:
+        CACHE_REQUESTS.labels(result="error").inc()
+        logger.debug("acache_get miss (Redis error): %s — %s", key, exc)
+        return None
+    CACHE_REQUESTS.labels(result="miss").inc()
+    return None
+
+
+async def acache_set(key: str, value: Any, ttl_seconds: int = 3600) -> None:
+    """cache_set without blocking the event loop."""
+    try:
+        await get_async_redis().setex(key, ttl_seconds, json.dumps(value, default=str))
+    except Exception as exc:
+        logger.debug("acache_set failed: %s — %s", key, exc)
@@ -5,11 +5,13 @@ BEFORE: Every db_conn() call opened a new TCP connection (~200ms each).
 AFTER:  Connections come from a warm pool (~0ms acquisition).
 """
 
-from contextlib import contextmanager
-from typing import Any, Dict, Iterable, Optional
+import asyncio
+import inspect
+from contextlib import asynccontextmanager, contextmanager
+from typing import Any, Dict, Iterable, List, Optional
 import psycopg
 from psycopg import sql
-from psycopg_pool import ConnectionPool
+from psycopg_pool import AsyncConnectionPool, ConnectionPool
 from .settings import settings
 import logging
 
@@ -75,6 +77,76 @@ def db_conn_autocommit():
             yield cur
 
 
+# ============================================================================
+# ASYNC CONNECTION POOL
+# For `async def` routes. The sync pool above blocks the event loop for the
+# whole query (every other request on the Uvicorn worker waits with it);
+# these connections are awaited instead. Same sizing rules as the sync pool —
+# the two pools together stay well under the Postgres connection limit.
+# ============================================================================
+
+_async_pool: AsyncConnectionPool | None = None
+_async_pool_lock: asyncio.Lock | None = None
+
+
+async def get_async_pool() -> AsyncConnectionPool:
+    """Get or create (and open) the async connection pool (lazy singleton)."""
+    global _async_pool, _async_pool_lock
+    if _async_pool is None:
+        if _async_pool_lock is None:
+            _async_pool_lock = asyncio.Lock()
+        async with _async_pool_lock:
+            if _async_pool is None:
+                pool = AsyncConnectionPool(
+                    conninfo=settings.DATABASE_URL,
+                    min_size=2,
+                    max_size=10,
+                    max_idle=300,
+                    max_lifetime=1800,
+                    timeout=10,
+                    open=False,
+                )
+                await pool.open()
+                _async_pool = pool
+    return _async_pool
+
+
+async def close_async_pool() -> None:
+    global _async_pool
+    pool, _async_pool = _async_pool, None
+    if pool is not None:
+        await pool.close()
+
+
+@asynccontextmanager
+async def adb_conn():
+    """
+    Async twin of db_conn() for `async def` routes:
+        async with adb_conn() as (conn, cur):
+            await aset_rls(cur, account_id)
+            await cur.execute(...)
+            row = await afetchone_dict(cur)
+
+    One transaction per block (autocommit off, so SET LOCAL / RLS applies),
+    committed on success and rolled back on error.
+    """
+    pool = await get_async_pool()
+    async with pool.connection() as conn:
+        await conn.set_autocommit(False)  # Required for SET LOCAL (RLS)
+        async with conn.cursor() as cur:
+            yield conn, cur
+        await conn.commit()
+
+
+def _rls_statements(account_id: str, user_id: str | None, user_role: str | None):
+    stmts = [sql.SQL("SET LOCAL app.current_account_id TO {}").format(sql.Literal(account_id))]
+    if user_id:
+        stmts.append(sql.SQL("SET LOCAL app.current_user_id TO {}").format(sql.Literal(user_id)))
+    if user_role:
+        stmts.append(sql.SQL("SET LOCAL app.current_user_role TO {}").format(sql.Literal(user_role)))
+    return stmts
+
+
 def set_rls(conn_or_cur, account_id: str, user_id: str | None = None,
             user_role: str | None = None):
     """
@@ -88,17 +160,20 @@ def set_rls(conn_or_cur, account_id: str, user_id: str | None = None,
     else:
         cur = conn_or_cur
 
-    cur.execute(
-        sql.SQL("SET LOCAL app.current_account_id TO {}").format(sql.Literal(account_id))
-    )
-    if user_id:
-        cur.execute(
-            sql.SQL("SET LOCAL app.current_user_id TO {}").format(sql.Literal(user_id))
-        )
-    if user_role:
-        cur.execute(
-            sql.SQL("SET LOCAL app.current_user_role TO {}").format(sql.Literal(user_role))
-        )
+    for stmt in _rls_statements(account_id, user_id, user_role):
+        cur.execute(stmt)
+
+
+async def aset_rls(conn_or_cur, account_id: str, user_id: str | None = None,
+                   user_role: str | None = None):
+    """set_rls() for an adb_conn() cursor (same SET LOCAL statements)."""
+    if isinstance(conn_or_cur, tuple):
+        conn, cur = conn_or_cur
+    else:
+        cur = conn_or_cur
+
+    for stmt in _rls_statements(account_id, user_id, user_role):
+        await cur.execute(stmt)
 
 
 def fetchone_dict(cur) -> Optional[Dict[str, Any]]:
@@ -113,3 +188,46 @@ def fetchall_dicts(cur) -> Iterable[Dict[str, Any]]:
     cols = [desc.name for desc in cur.description]
     for row in cur.fetchall():
         yield dict(zip(cols, row))
+
+
+async def afetchone_dict(cur) -> Optional[Dict[str, Any]]:
+    row = await cur.fetchone()
+    if row is None:
+        return None
+    cols = [desc.name for desc in cur.description]
+    return dict(zip(cols, row))
+
+
+async def afetchall_dicts(cur) -> List[Dict[str, Any]]:
+    cols = [desc.name for desc in cur.description]
+    return [dict(zip(cols, row)) for row in await cur.fetchall()]
+
+
+# Names that mean "this code checks out a connection from the blocking pool"
+BLOCKING_DB_HELPERS = frozenset({"db_conn", "db_conn_autocommit", "get_pool"})
+
+
+def _iter_routes(routes):
+    for route in routes:
+        nested = getattr(route, "original_router", None)  # included router (newer FastAPI)
+        if nested is not None:
+            yield from _iter_routes(nested.routes)
+        else:
+            yield route
+
+
+def find_blocking_async_routes(routes) -> List[str]:
+    """
+    "METHODS /path (module.function)" for every `async def` endpoint whose
+    own body uses the blocking pool. Sync helpers nested inside an endpoint
+    are not flagged — they are expected to run via run_in_threadpool().
+    """
+    found = []
+    for route in _iter_routes(routes):
+        endpoint = getattr(route, "endpoint", None)
+        if endpoint is None or not inspect.iscoroutinefunction(endpoint):
+            continue
+        if BLOCKING_DB_HELPERS & set(endpoint.__code__.co_names):
+            methods = ",".join(sorted(getattr(route, "methods", None) or ()))
+            found.append(f"{methods} {route.path} ({endpoint.__module__}.{endpoint.__qualname__})")
+    return found
@@ -5,8 +5,10 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from .settings import settings
+from .metrics import HTTP_REQUEST_SECONDS, route_template
 from .middleware.authn import AuthContextMiddleware, RateLimitMiddleware
 from .routes.health import router as health_router
+from .routes.metrics import router as metrics_router
 from .routes.reports import router as reports_router
 from .routes.report_data import router as report_data_router
 from .routes.account import router as account_router
@@ -76,9 +78,16 @@ app.add_middleware(AuthContextMiddleware)
 @app.middleware("http")
 async def timing_middleware(request, call_next):
     start = _time.perf_counter()
-    response = await call_next(request)
-    elapsed = _time.perf_counter() - start
-    
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+    finally:
+        elapsed = _time.perf_counter() - start
+        HTTP_REQUEST_SECONDS.labels(
+            method=request.method, route=route_template(request.scope), status=status
+        ).observe(elapsed)
+
     level = logging.WARNING if elapsed > 1.0 else logging.DEBUG
     logging.getLogger("api.timing").log(
         level,
@@ -90,6 +99,7 @@ async def timing_middleware(request, call_next):
 
 # Routes
 app.include_router(health_router)
+app.include_router(metrics_router)
 app.include_router(auth_router)
 app.include_router(apikeys_router)
 app.include_router(webhooks_router)
@@ -124,12 +134,31 @@ app.include_router(company_router, prefix="/v1/company", tags=["company"])
 # Prevents "connection already closed" errors in logs during deployment roll.
 @app.on_event("shutdown")
 async def _shutdown_pool():
-    from .db import get_pool
+    from .db import close_async_pool, get_pool
     try:
         pool = get_pool()
         pool.close()
     except Exception:
         pass  # Pool may not have been initialized yet
+    try:
+        await close_async_pool()
+    except Exception:
+        pass
+
+
+# ── Blocking-pool check ──────────────────────────────────────────────────────
+# An `async def` route that uses db_conn() stalls the whole event loop for the
+# duration of its queries. Flag any at startup: they should use adb_conn(),
+# move the DB work into run_in_threadpool(), or be a plain `def`.
+@app.on_event("startup")
+async def _check_blocking_routes():
+    from .db import find_blocking_async_routes
+    blocking = find_blocking_async_routes(app.routes)
+    if blocking:
+        logging.getLogger("api.db").warning(
+            "%d async route(s) use the blocking DB pool:\n  %s",
+            len(blocking), "\n  ".join(blocking),
+        )
 
 
 # Root
@@ -0,0 +1,151 @@
+"""
+Prometheus metrics for the API (prometheus_client) — served on GET /metrics.
+
+The vendor metric names match the worker's worker/metrics.py so one dashboard
+covers both deployments (tell them apart by the scrape job). Metrics are per
+process; with several Uvicorn workers each scrape sees one.
+
+    mr_http_request_duration_seconds{method, route, status}   histogram (route = path template)
+    mr_db_pool_connections{pool, state}                       gauge (size, available, waiting)
+    mr_db_pool_requests_total{pool}                           counter
+    mr_db_pool_wait_seconds_total{pool}                       counter (time spent waiting for a connection)
+    mr_db_pool_request_errors_total{pool}                     counter (timeouts / failures getting one)
+    mr_cache_requests_total{result}                           counter (api/cache.py: hit, miss, error)
+    mr_rate_limit_decisions_total{result}                     counter (allowed, rejected, error)
+    mr_vendor_request_duration_seconds{vendor}                histogram
+    mr_vendor_requests_total{vendor, status}                  counter (status="429" = rate limited)
+
+The pool series are read from psycopg_pool's own stats at scrape time
+(_DbPoolCollector), so scraping never creates a pool.
+
+Usage:
+    from ..metrics import track_vendor_call
+
+    with track_vendor_call("sitex") as call:
+        response = await client.get(...)
+        call["status"] = response.status_code
+"""
+
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Histogram,
+    disable_created_metrics,
+    generate_latest,
+)
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+from prometheus_client.registry import Collector
+
+CONTENT_TYPE = CONTENT_TYPE_LATEST
+
+# Same buckets as the worker, so the shared vendor histogram lines up
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# No *_created series: dashboards only use the counters themselves
+disable_created_metrics()
+
+
+def render(registry: CollectorRegistry = REGISTRY) -> str:
+    """Prometheus text exposition of this process's metrics."""
+    return generate_latest(registry).decode()
+
+
+# ============================================================================
+# METRICS
+# ============================================================================
+
+HTTP_REQUEST_SECONDS = Histogram(
+    "mr_http_request_duration_seconds", "API request latency by route template.",
+    ("method", "route", "status"), buckets=DEFAULT_BUCKETS,
+)
+CACHE_REQUESTS = Counter(
+    "mr_cache_requests_total", "api/cache.py lookups by result (hit, miss, error).", ("result",)
+)
+RATE_LIMIT_DECISIONS = Counter(
+    "mr_rate_limit_decisions_total", "Per-account API rate limiter outcomes (allowed, rejected, error).",
+    ("result",),
+)
+VENDOR_REQUEST_SECONDS = Histogram(
+    "mr_vendor_request_duration_seconds", "Outbound vendor API call latency.", ("vendor",),
+    buckets=DEFAULT_BUCKETS,
+)
+VENDOR_REQUESTS = Counter(
+    "mr_vendor_requests_total", "Outbound vendor API calls by HTTP status (or 'error').",
+    ("vendor", "status"),
+)
+
+
+def route_template(scope: Dict[str, Any]) -> str:
+    """The matched route's path template ('/v1/reports/{report_id}'), never the raw path."""
+    route = scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
+
+
+@contextmanager
+def track_vendor_call(vendor: str) -> Iterator[Dict[str, Any]]:
+    """Time one vendor HTTP call; set call["status"] to the response status."""
+    call: Dict[str, Any] = {"status": None}
+    started = time.perf_counter()
+    try:
+        yield call
+    except Exception:
+        if call["status"] is None:
+            call["status"] = "error"
+        raise
+    finally:
+        VENDOR_REQUEST_SECONDS.labels(vendor=vendor).observe(time.perf_counter() - started)
+        VENDOR_REQUESTS.labels(vendor=vendor, status=call["status"] or "unknown").inc()
+
+
+class _DbPoolCollector(Collector):
+    """psycopg_pool stats for the sync and async pools, read at scrape time."""
+
+    def describe(self):
+        # Lets REGISTRY.register() check names without calling collect() at import
+        return self._families()
+
+    def collect(self):
+        # Read the pools' own counters; never create a pool just to scrape it
+        from . import db
+
+        connections, requests, wait, errors = families = self._families()
+        for name, pool in (("sync", db._pool), ("async", db._async_pool)):
+            if pool is None:
+                continue
+            stats = pool.get_stats()
+            connections.add_metric((name, "size"), stats.get("pool_size", 0))
+            connections.add_metric((name, "available"), stats.get("pool_available", 0))
+            connections.add_metric((name, "waiting"), stats.get("requests_waiting", 0))
+            requests.add_metric((name,), stats.get("requests_num", 0))
+            wait.add_metric((name,), stats.get("requests_wait_ms", 0) / 1000.0)
+            errors.add_metric((name,), stats.get("requests_errors", 0))
+        return families
+
+    @staticmethod
+    def _families():
+        connections = GaugeMetricFamily(
+            "mr_db_pool_connections",
+            "Postgres pool connections (size, available, waiting requests).",
+            labels=("pool", "state"),
+        )
+        requests = CounterMetricFamily(
+            "mr_db_pool_requests", "Connections requested from the pool.", labels=("pool",)
+        )
+        wait = CounterMetricFamily(
+            "mr_db_pool_wait_seconds", "Time spent waiting for a pooled connection.",
+            labels=("pool",),
+        )
+        errors = CounterMetricFamily(
+            "mr_db_pool_request_errors", "Pool requests that failed (e.g. timed out).",
+            labels=("pool",),
+        )
+        return [connections, requests, wait, errors]
+
+
+REGISTRY.register(_DbPoolCollector())
@@ -5,20 +5,27 @@ Changes from original:
 - All DB access uses connection pool (was: raw psycopg.connect per call)
 - Blacklist checks fail CLOSED on DB error (was: fail open — security hole)
 - Rate limit caches account limit in Redis (was: DB query per request)
+- Rate limit is pure ASGI on redis.asyncio: one GCRA Lua call per request,
+  weighted by route, rejecting before the handler runs
 - Debug logging removed from production paths
+- Resolved auth context cached by token hash (services/auth_cache.py):
+  the common request makes no DB round trips; revocations are published
 """
 
 from fastapi import Request
+from fastapi.concurrency import run_in_threadpool
 from starlette.middleware.base import BaseHTTPMiddleware
 from starlette.responses import JSONResponse
-from typing import Optional
-import redis
+from typing import Optional, Tuple
+import math
 import time
-import hashlib
 import logging
+import redis.asyncio as _aioredis
 from ..settings import settings
 from ..auth import verify_jwt, hash_api_key
 from ..db import db_conn_autocommit
+from ..metrics import RATE_LIMIT_DECISIONS
+from ..services import auth_cache
 
 logger = logging.getLogger(__name__)
 
@@ -29,6 +36,7 @@ logger = logging.getLogger(__name__)
 
 _PUBLIC_PREFIXES = (
     "/health",
+    "/metrics",  # METRICS_TOKEN-gated in the route itself (404 in production without one)
     "/docs",
     "/redoc",
     "/openapi",
@@ -80,6 +88,7 @@ class AuthContextMiddleware(BaseHTTPMiddleware):
 
         acct: Optional[str] = None
         claims: Optional[dict] = None
+        user_info: Optional[dict] = None
 
         # ── 1) Try Authorization header (Bearer JWT or API key) ──────────
         auth = request.headers.get("Authorization", "")
@@ -90,27 +99,16 @@ class AuthContextMiddleware(BaseHTTPMiddleware):
             claims = verify_jwt(token, settings.JWT_SECRET)
             if claims and claims.get("account_id"):
                 # FIX (M2): Blacklist check fails CLOSED — deny on DB error
-                if _is_token_blacklisted(token):
+                ctx = await _jwt_context(token, claims)
+                if ctx is None:
                     return JSONResponse(
                         status_code=401,
                         content={"detail": "Token has been invalidated"},
                     )
-                acct = claims["account_id"]
+                acct, user_info = ctx["account_id"], ctx["user"]
             else:
                 # JWT failed — try API key
-                key_hash = hash_api_key(token)
-                try:
-                    with db_conn_autocommit() as cur:
-                        cur.execute(
-                            "SELECT account_id FROM api_keys "
-                            "WHERE key_hash=%s AND is_active=TRUE",
-                            (key_hash,),
-                        )
-                        row = cur.fetchone()
-                        if row:
-                            acct = row[0]
-                except Exception as e:
-                    logger.error(f"API key lookup failed: {e}")
+                acct = await _api_key_account(token)
 
         # ── 2) Cookie fallback (mr_token) ────────────────────────────────
         if not acct:
@@ -119,12 +117,13 @@ class AuthContextMiddleware(BaseHTTPMiddleware):
                 claims = verify_jwt(cookie_token, settings.JWT_SECRET)
                 if claims and claims.get("account_id"):
                     # FIX (M2): Fail closed on blacklist check error
-                    if _is_token_blacklisted(cookie_token):
+                    ctx = await _jwt_context(cookie_token, claims)
+                    if ctx is None:
                         return JSONResponse(
                             status_code=401,
                             content={"detail": "Session has expired"},
                         )
-                    acct = claims["account_id"]
+                    acct, user_info = ctx["account_id"], ctx["user"]
 
         # ── 3) Demo header fallback ──────────────────────────────────────
         if not acct:
@@ -139,35 +138,97 @@ class AuthContextMiddleware(BaseHTTPMiddleware):
 
         request.state.account_id = acct
 
-        # ── Fetch user info (single pooled connection) ───────────────────
-        user_info = {"account_id": acct, "role": "USER"}
-
-        if claims and claims.get("user_id"):
-            try:
-                with db_conn_autocommit() as cur:
-                    cur.execute(
-                        "SELECT id, email, role, is_platform_admin FROM users "
-                        "WHERE id=%s::uuid AND account_id=%s::uuid",
-                        (claims["user_id"], acct),
-                    )
-                    user_row = cur.fetchone()
-                    if user_row:
-                        user_info = {
-                            "id": str(user_row[0]),
-                            "email": user_row[1],
-                            "role": (user_row[2] or "USER").upper(),
-                            "is_platform_admin": bool(user_row[3])
-                            if user_row[3] is not None
-                            else False,
-                            "account_id": acct,
-                        }
-            except Exception as e:
-                logger.error(f"User info fetch failed: {e}")
+        if user_info is None:
+            user_info, _ = await run_in_threadpool(_fetch_user_info, claims, acct)
 
         request.state.user = user_info
         return await call_next(request)
 
 
+async def _jwt_context(token: str, claims: dict) -> Optional[dict]:
+    """
+    {"account_id", "user"} for a verified JWT, or None if it is blacklisted
+    (or the blacklist can't be checked). Served from the auth-context cache
+    when possible; DB resolution runs off the event loop.
+    """
+    key = auth_cache.jwt_key(token)
+    ctx = await auth_cache.get(key)
+    if ctx is not None:
+        return ctx
+    epoch = auth_cache.epoch()
+    if await run_in_threadpool(_is_token_blacklisted, token):
+        return None
+    acct = claims["account_id"]
+    user_info, cacheable = await run_in_threadpool(_fetch_user_info, claims, acct)
+    ctx = {"account_id": acct, "user": user_info}
+    if cacheable:
+        await auth_cache.put(key, ctx, epoch)
+    return ctx
+
+
+async def _api_key_account(token: str) -> Optional[str]:
+    """account_id for an active API key, or None. Misses are not cached."""
+    key_hash = hash_api_key(token)
+    key = auth_cache.api_key_key(key_hash)
+    ctx = await auth_cache.get(key)
+    if ctx is not None:
+        return ctx["account_id"]
+    epoch = auth_cache.epoch()
+    acct = await run_in_threadpool(_lookup_api_key, key_hash)
+    if acct:
+        await auth_cache.put(key, {"account_id": acct, "user": None}, epoch)
+    return acct
+
+
+def _lookup_api_key(key_hash: str) -> Optional[str]:
+    try:
+        with db_conn_autocommit() as cur:
+            cur.execute(
+                "SELECT account_id FROM api_keys "
+                "WHERE key_hash=%s AND is_active=TRUE",
+                (key_hash,),
+            )
+            row = cur.fetchone()
+            if row:
+                return str(row[0])
+    except Exception as e:
+        logger.error(f"API key lookup failed: {e}")
+    return None
+
+
+def _fetch_user_info(claims: Optional[dict], acct: str) -> Tuple[dict, bool]:
+    """
+    request.state.user for these claims, and whether it may be cached
+    (False when the users lookup failed and the default was used).
+    """
+    user_info = {"account_id": acct, "role": "USER"}
+
+    if claims and claims.get("user_id"):
+        try:
+            with db_conn_autocommit() as cur:
+                cur.execute(
+                    "SELECT id, email, role, is_platform_admin FROM users "
+                    "WHERE id=%s::uuid AND account_id=%s::uuid",
+                    (claims["user_id"], acct),
+                )
+                user_row = cur.fetchone()
+                if user_row:
+                    user_info = {
+                        "id": str(user_row[0]),
+                        "email": user_row[1],
+                        "role": (user_row[2] or "USER").upper(),
+                        "is_platform_admin": bool(user_row[3])
+                        if user_row[3] is not None
+                        else False,
+                        "account_id": acct,
+                    }
+        except Exception as e:
+            logger.error(f"User info fetch failed: {e}")
+            return user_info, False
+
+    return user_info, True
+
+
 def _is_token_blacklisted(token: str) -> bool:
     """
     Check if a JWT is blacklisted.
@@ -176,7 +237,7 @@ def _is_token_blacklisted(token: str) -> bool:
     This prevents logged-out tokens from being accepted during DB hiccups.
     Returns True (blacklisted / deny) on any error.
     """
-    token_hash = hashlib.sha256(token.encode()).hexdigest()
+    token_hash = auth_cache.token_hash(token)
     try:
         with db_conn_autocommit() as cur:
             cur.execute(
@@ -190,73 +251,159 @@ def _is_token_blacklisted(token: str) -> bool:
         return True  # Fail CLOSED — deny on error
 
 
-class RateLimitMiddleware(BaseHTTPMiddleware):
-    """
-    Per-account rate limiter using Redis.
+# ============================================================================
+# Rate limiting
+# ============================================================================
 
-    FIX (H2): Account rate limit is cached in Redis (5 min TTL)
-    instead of querying the database on every request.
-    """
+# GCRA per account, in one Redis round trip. The account's limit is cached in
+# KEYS[2] (ratelimit_config:<acct>); when it is missing the script returns
+# {-1} and the caller loads it from the DB and retries.
+# KEYS[1] GCRA state (theoretical arrival time, ms), KEYS[2] cached limit
+# ARGV[1] cost, ARGV[2] period (ms)
+# Returns {allowed (0|1), limit, remaining, retry_after_ms, reset_ms}
+GCRA_LUA = """
+local limit = tonumber(redis.call('GET', KEYS[2]))
+if not limit then return {-1} end
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+local period = tonumber(ARGV[2])
+local interval = period / limit
+local cost = math.min(tonumber(ARGV[1]), limit)
+
+local tat = math.max(tonumber(redis.call('GET', KEYS[1])) or now, now)
+local new_tat = tat + cost * interval
+if new_tat - now > period then
+  local remaining = math.floor((period - (tat - now)) / interval)
+  return {0, limit, remaining, math.ceil(new_tat - period - now), math.ceil(tat - now)}
+end
+redis.call('SET', KEYS[1], new_tat, 'PX', math.ceil(new_tat - now))
+local remaining = math.floor((period - (new_tat - now)) / interval)
+return {1, limit, remaining, 0, math.ceil(new_tat - now)}
+"""
 
-    def __init__(self, app):
-        super().__init__(app)
-        self.r = redis.from_url(settings.REDIS_URL)
+RATE_LIMIT_PERIOD_MS = 60_000
+RATE_LIMIT_DEFAULT = 60  # requests/minute when accounts.api_rate_limit is unset
+RATE_LIMIT_CONFIG_TTL_S = 300
+RATE_LIMIT_REDIS_RETRY_S = 5.0
 
-    async def dispatch(self, request: Request, call_next):
-        path = request.url.path
-        if path.startswith(("/health", "/openapi", "/docs", "/redoc")):
-            return await call_next(request)
+# Requests debit this many units of the account's per-minute budget
+# (default 1). Matched on the raw path: the limiter runs before routing.
+ROUTE_COSTS = {
+    ("POST", "/v1/branding/sample-pdf"): 10,   # PDFShift render
+    ("POST", "/v1/branding/sample-jpg"): 10,
+    ("POST", "/v1/property/reports"): 5,       # SiteX + comparables + PDF
+    ("POST", "/v1/reports"): 5,                # enqueues a report run
+    ("POST", "/v1/property/comparables"): 3,   # SimplyRETS ladder
+    ("POST", "/v1/property/search"): 2,        # SiteX lookup
+    ("POST", "/v1/property/search-by-apn"): 2,
+}
 
-        acct = getattr(request.state, "account_id", None)
-        if not acct:
-            return await call_next(request)
+_RATE_LIMIT_SKIP = ("/health", "/metrics", "/openapi", "/docs", "/redoc")
 
-        # ── Get rate limit from Redis cache (not DB) ─────────────────────
-        limit_key = f"ratelimit_config:{acct}"
-        cached_limit = self.r.get(limit_key)
-
-        if cached_limit is not None:
-            limit = int(cached_limit)
-        else:
-            # Cache miss — fetch from DB (pooled), cache for 5 minutes
-            limit = 60  # default
-            try:
-                with db_conn_autocommit() as cur:
-                    cur.execute(
-                        "SELECT api_rate_limit FROM accounts WHERE id=%s",
-                        (acct,),
-                    )
-                    row = cur.fetchone()
-                    if row and row[0]:
-                        limit = int(row[0])
-            except Exception:
-                pass  # Use default 60 if DB fails
-            self.r.setex(limit_key, 300, str(limit))  # Cache 5 min
-
-        # ── Token bucket check ───────────────────────────────────────────
-        now = int(time.time())
-        minute = now - (now % 60)
-        key = f"ratelimit:{acct}:{minute}"
-        count = self.r.incr(key)
-        if count == 1:
-            self.r.expire(key, 60)
-
-        remaining = max(0, limit - count)
-        reset = 60 - (now - minute)
-
-        response = await call_next(request)
-        response.headers["X-RateLimit-Limit"] = str(limit)
-        response.headers["X-RateLimit-Remaining"] = str(remaining)
-        response.headers["X-RateLimit-Reset"] = str(reset)
-
-        if count > limit:
-            return JSONResponse(
+
+def route_cost(method: str, path: str) -> int:
+    return ROUTE_COSTS.get((method, path.rstrip("/") or "/"), 1)
+
+
+class RateLimitMiddleware:
+    """
+    Per-account rate limiter (pure ASGI, redis.asyncio).
+
+    One Lua call per request: GCRA against the account's per-minute budget,
+    debited by route_cost(). Over-limit requests get 429 BEFORE the handler
+    runs. The account's limit (accounts.api_rate_limit) stays cached in
+    Redis for 5 minutes; only a miss touches the DB (off the event loop).
+
+    Fails OPEN on Redis errors — a Redis blip should not take the API down.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self._redis: Optional[_aioredis.Redis] = None
+        self._script = None
+        self._down_until = 0.0
+
+    def _get_redis(self):
+        if self._redis is None:
+            self._redis = _aioredis.from_url(
+                settings.REDIS_URL,
+                decode_responses=True,
+                socket_connect_timeout=1,
+                socket_timeout=1,
+            )
+            self._script = self._redis.register_script(GCRA_LUA)
+        return self._redis
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"].startswith(_RATE_LIMIT_SKIP):
+            return await self.app(scope, receive, send)
+
+        acct = scope.get("state", {}).get("account_id")
+        if not acct or time.monotonic() < self._down_until:
+            return await self.app(scope, receive, send)
+
+        try:
+            decision = await self._check(str(acct), route_cost(scope["method"], scope["path"]))
+        except Exception as e:
+            RATE_LIMIT_DECISIONS.labels(result="error").inc()
+            self._down_until = time.monotonic() + RATE_LIMIT_REDIS_RETRY_S
+            logger.warning(f"Rate limiter unavailable (allowing requests): {e}")
+            return await self.app(scope, receive, send)
+
+        allowed, limit, remaining, retry_after_ms, reset_ms = decision
+        headers = {
+            "X-RateLimit-Limit": str(limit),
+            "X-RateLimit-Remaining": str(max(0, remaining)),
+            "X-RateLimit-Reset": str(math.ceil(reset_ms / 1000)),
+        }
+
+        if not allowed:
+            RATE_LIMIT_DECISIONS.labels(result="rejected").inc()
+            retry_after = max(1, math.ceil(retry_after_ms / 1000))
+            response = JSONResponse(
                 status_code=429,
                 content={
                     "error": "rate_limit_exceeded",
                     "message": f"Rate limit of {limit} requests/minute exceeded",
-                    "retry_after": reset,
+                    "retry_after": retry_after,
                 },
-                headers=dict(response.headers),
+                headers={**headers, "Retry-After": str(retry_after)},
+            )
+            return await response(scope, receive, send)
+
+        RATE_LIMIT_DECISIONS.labels(result="allowed").inc()
+        raw_headers = [(k.lower().encode(), v.encode()) for k, v in headers.items()]
+
+        async def send_with_headers(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = list(message.get("headers", [])) + raw_headers
+            await send(message)
+
+        await self.app(scope, receive, send_with_headers)
+
+    async def _check(self, acct: str, cost: int):
+        redis = self._get_redis()
+        keys = [f"ratelimit:gcra:{acct}", f"ratelimit_config:{acct}"]
+        args = [cost, RATE_LIMIT_PERIOD_MS]
+        result = await self._script(keys=keys, args=args)
+        if result[0] == -1:
+            # Config miss — fetch from DB (pooled, in a thread), cache for 5 minutes
+            limit = await run_in_threadpool(_account_rate_limit, acct)
+            await redis.set(keys[1], str(limit), ex=RATE_LIMIT_CONFIG_TTL_S)
+            result = await self._script(keys=keys, args=args)
+        return [int(v) for v in result]
+
+
+def _account_rate_limit(acct: str) -> int:
+    try:
+        with db_conn_autocommit() as cur:
+            cur.execute(
+                "SELECT api_rate_limit FROM accounts WHERE id=%s",
+                (acct,),
             )
-        return response
+            row = cur.fetchone()
+            if row and row[0]:
+                return int(row[0])
+    except Exception:
+        pass  # Use the default if the DB fails
+    return RATE_LIMIT_DEFAULT
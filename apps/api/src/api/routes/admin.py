@@ -14,6 +14,7 @@ from zoneinfo import ZoneInfo
 from ..db import db_conn, set_rls
 from ..deps.admin import get_admin_user
 from ..services import get_monthly_usage, resolve_plan_for_account, evaluate_report_limit
+from ..services import auth_cache
 from ..services.schedule_utils import compute_next_run
 from ..services.email import send_role_invite_email
 from ..services.invite_service import (
@@ -154,6 +155,76 @@ def get_admin_metrics(_admin: dict = Depends(get_admin_user)):
         }
 
 
+@router.get("/metrics/stages")
+def get_admin_stage_metrics(
+    days: int = Query(7, ge=1, le=90),
+    report_type: Optional[str] = None,
+    _admin: dict = Depends(get_admin_user)
+):
+    """
+    Per-stage timing percentiles for report runs (report_generation_stages).
+
+    A stage that runs more than once in a run (e.g. data_fetch) is summed per
+    run before the percentiles are taken.
+
+    Args:
+        days: Window in days (1-90, default 7)
+        report_type: Only runs of this report type
+
+    Returns:
+        - stages: Array of {stage, runs, p50_ms, p95_ms, avg_ms, max_ms, failures},
+          in pipeline order
+    """
+
+    with db_conn() as (conn, cur):
+        # Set admin role for RLS bypass
+        set_rls(cur, _admin.get("account_id", ""), user_role="ADMIN")
+
+        cur.execute("""
+            WITH per_run AS (
+                SELECT
+                    report_generation_id,
+                    stage,
+                    SUM(duration_ms) AS ms,
+                    BOOL_AND(ok) AS ok,
+                    MIN(started_offset_ms) AS offset_ms
+                FROM report_generation_stages
+                WHERE created_at >= NOW() - make_interval(days => %s)
+                  AND (%s::text IS NULL OR report_type = %s::text)
+                GROUP BY report_generation_id, stage
+            )
+            SELECT
+                stage,
+                COUNT(*) AS runs,
+                percentile_cont(0.5) WITHIN GROUP (ORDER BY ms) AS p50,
+                percentile_cont(0.95) WITHIN GROUP (ORDER BY ms) AS p95,
+                AVG(ms) AS avg_ms,
+                MAX(ms) AS max_ms,
+                COUNT(*) FILTER (WHERE NOT ok) AS failures
+            FROM per_run
+            GROUP BY stage
+            ORDER BY AVG(offset_ms), stage
+        """, (days, report_type, report_type))
+        stages = [
+            {
+                "stage": row[0],
+                "runs": row[1],
+                "p50_ms": int(row[2] or 0),
+                "p95_ms": int(row[3] or 0),
+                "avg_ms": int(row[4] or 0),
+                "max_ms": int(row[5] or 0),
+                "failures": row[6] or 0,
+            }
+            for row in cur.fetchall()
+        ]
+
+        return {
+            "days": days,
+            "report_type": report_type,
+            "stages": stages
+        }
+
+
 @router.get("/metrics/timeseries")
 def get_admin_timeseries(
     days: int = Query(30, ge=1, le=90),
@@ -2209,6 +2280,7 @@ def update_user(
             raise HTTPException(status_code=404, detail="User not found")
 
         conn.commit()
+        auth_cache.revoke_user(row[0])
 
         return {
             "ok": True,
@@ -11,7 +11,7 @@ from typing import List, Optional
 from datetime import datetime, timedelta
 import logging
 
-from ..db import db_conn, fetchone_dict, fetchall_dicts
+from ..db import adb_conn, afetchone_dict, afetchall_dicts
 from .admin import get_admin_user
 
 logger = logging.getLogger(__name__)
@@ -108,9 +108,9 @@ async def get_overview_stats(_admin: dict = Depends(get_admin_user)):
     """
     Get high-level dashboard metrics.
     """
-    with db_conn() as (conn, cur):
+    async with adb_conn() as (conn, cur):
         # Totals
-        cur.execute(
+        await cur.execute(
             """
             SELECT 
                 COUNT(*) as total_reports,
@@ -120,10 +120,10 @@ async def get_overview_stats(_admin: dict = Depends(get_admin_user)):
             FROM consumer_reports
             """
         )
-        totals = fetchone_dict(cur)
+        totals = await afetchone_dict(cur)
         
         # Today
-        cur.execute(
+        await cur.execute(
             """
             SELECT 
                 COUNT(*) as reports_today,
@@ -133,35 +133,35 @@ async def get_overview_stats(_admin: dict = Depends(get_admin_user)):
             WHERE DATE(created_at) = CURRENT_DATE
             """
         )
-        today = fetchone_dict(cur)
+        today = await afetchone_dict(cur)
         
         # This week
-        cur.execute(
+        await cur.execute(
             """
             SELECT COUNT(*) as week_count FROM consumer_reports
             WHERE created_at >= DATE_TRUNC('week', CURRENT_DATE)
             """
         )
-        week = fetchone_dict(cur)
+        week = await afetchone_dict(cur)
         
         # This month
-        cur.execute(
+        await cur.execute(
             """
             SELECT COUNT(*) as month_count FROM consumer_reports
             WHERE created_at >= DATE_TRUNC('month', CURRENT_DATE)
             """
         )
-        month = fetchone_dict(cur)
+        month = await afetchone_dict(cur)
         
         # Previous month for trend
-        cur.execute(
+        await cur.execute(
             """
             SELECT COUNT(*) as prev_month_count FROM consumer_reports
             WHERE created_at >= DATE_TRUNC('month', CURRENT_DATE - INTERVAL '1 month')
             AND created_at < DATE_TRUNC('month', CURRENT_DATE)
             """
         )
-        prev_month = fetchone_dict(cur)
+        prev_month = await afetchone_dict(cur)
     
     total = totals.get("total_reports") or 0
     prev_month_count = prev_month.get("prev_month_count") or 0
@@ -192,8 +192,8 @@ async def get_daily_metrics(
     """
     Get daily metrics for charting.
     """
-    with db_conn() as (conn, cur):
-        cur.execute(
+    async with adb_conn() as (conn, cur):
+        await cur.execute(
             """
             SELECT 
                 DATE(created_at) as date,
@@ -213,7 +213,7 @@ async def get_daily_metrics(
             """,
             (days,)
         )
-        rows = fetchall_dicts(cur)
+        rows = await afetchall_dicts(cur)
     
     return [DailyMetric(
         date=str(r["date"]),
@@ -243,8 +243,8 @@ async def get_agent_leaderboard(
     if sort_by not in valid_sorts:
         sort_by = "total_reports"
     
-    with db_conn() as (conn, cur):
-        cur.execute(
+    async with adb_conn() as (conn, cur):
+        await cur.execute(
             f"""
             SELECT 
                 u.id as agent_id,
@@ -270,7 +270,7 @@ async def get_agent_leaderboard(
             """,
             (limit,)
         )
-        rows = fetchall_dicts(cur)
+        rows = await afetchall_dicts(cur)
     
     return [AgentLeaderboard(
         agent_id=str(r["agent_id"]),
@@ -292,8 +292,8 @@ async def get_hourly_distribution(_admin: dict = Depends(get_admin_user)):
     Get hourly report distribution (last 30 days).
     Useful for understanding peak load times.
     """
-    with db_conn() as (conn, cur):
-        cur.execute(
+    async with adb_conn() as (conn, cur):
+        await cur.execute(
             """
             SELECT 
                 EXTRACT(HOUR FROM created_at)::integer as hour,
@@ -305,7 +305,7 @@ async def get_hourly_distribution(_admin: dict = Depends(get_admin_user)):
             ORDER BY hour
             """
         )
-        rows = fetchall_dicts(cur)
+        rows = await afetchall_dicts(cur)
     
     return [HourlyDistribution(
         hour=r["hour"],
@@ -319,14 +319,14 @@ async def get_device_breakdown(_admin: dict = Depends(get_admin_user)):
     """
     Get device type breakdown.
     """
-    with db_conn() as (conn, cur):
-        cur.execute(
+    async with adb_conn() as (conn, cur):
+        await cur.execute(
             "SELECT COUNT(*) as total FROM consumer_reports WHERE device_type IS NOT NULL"
         )
-        total_row = fetchone_dict(cur)
+        total_row = await afetchone_dict(cur)
         total = total_row.get("total") or 0
         
-        cur.execute(
+        await cur.execute(
             """
             SELECT 
                 COALESCE(device_type, 'unknown') as device_type,
@@ -336,7 +336,7 @@ async def get_device_breakdown(_admin: dict = Depends(get_admin_user)):
             ORDER BY count DESC
             """
         )
-        rows = fetchall_dicts(cur)
+        rows = await afetchall_dicts(cur)
     
     return [DeviceBreakdown(
         device_type=r["device_type"] or "unknown",
@@ -359,9 +359,9 @@ async def get_recent_reports(
     if status and status not in valid_statuses:
         status = None
     
-    with db_conn() as (conn, cur):
+    async with adb_conn() as (conn, cur):
         if status:
-            cur.execute(
+            await cur.execute(
                 """
                 SELECT 
                     cr.id,
@@ -381,7 +381,7 @@ async def get_recent_reports(
                 (status, limit)
             )
         else:
-            cur.execute(
+            await cur.execute(
                 """
                 SELECT 
                     cr.id,
@@ -399,7 +399,7 @@ async def get_recent_reports(
                 """,
                 (limit,)
             )
-        rows = fetchall_dicts(cur)
+        rows = await afetchall_dicts(cur)
     
     return [RecentReport(
         id=str(r["id"]),
@@ -421,8 +421,8 @@ async def get_conversion_funnel(
     """
     Get conversion funnel metrics.
     """
-    with db_conn() as (conn, cur):
-        cur.execute(
+    async with adb_conn() as (conn, cur):
+        await cur.execute(
             """
             SELECT 
                 COUNT(*) as total_requests,
@@ -436,7 +436,7 @@ async def get_conversion_funnel(
             """,
             (days,)
         )
-        data = fetchone_dict(cur)
+        data = await afetchone_dict(cur)
     
     total = data.get("total_requests") or 1
     
@@ -457,3 +457,42 @@ async def get_conversion_funnel(
         ]
     }
 
+
+
+@router.get("/vendor-rate-limit")
+async def get_vendor_rate_limit_stats(_admin: dict = Depends(get_admin_user)):
+    """
+    Wait time per caller on the shared SimplyRETS token bucket
+    (worker and API callers alike).
+    """
+    from ..services.vendor_rate_limit import simplyrets_limiter
+
+    return {
+        "vendor": "simplyrets",
+        "rpm": round(simplyrets_limiter.rate * 60),
+        "burst": simplyrets_limiter.burst,
+        "callers": await simplyrets_limiter.wait_stats(),
+    }
+
+
+@router.get("/sitex-cache")
+async def get_sitex_cache_stats(_admin: dict = Depends(get_admin_user)):
+    """
+    SiteX property cache hit/miss counters (memory LRU + Redis tiers,
+    including negative not-found / multi-match entries) for this API process.
+    """
+    from ..services.sitex import cache_stats
+
+    return cache_stats()
+
+
+@router.get("/vendor-single-flight")
+async def get_vendor_single_flight_stats(_admin: dict = Depends(get_admin_user)):
+    """
+    Request coalescing counters for this API process: vendor calls made
+    (leaders) vs. duplicate lookups that shared one (coalesced in process,
+    remote_coalesced across workers).
+    """
+    from ..services.single_flight import simplyrets_flight, sitex_flight
+
+    return {flight.name: dict(flight.stats) for flight in (sitex_flight, simplyrets_flight)}
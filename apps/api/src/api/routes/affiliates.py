@@ -6,6 +6,7 @@ Performance: Duplicate routes removed, queries optimized
 """
 
 from fastapi import APIRouter, Depends, HTTPException, Request, BackgroundTasks, UploadFile, File
+from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel, EmailStr
 import csv
 import io
@@ -254,72 +255,80 @@ async def bulk_invite_agents(
     CSV columns: name (required), email (required),
     city, phone, job_title, company_name, license_number (all optional).
     """
-    with db_conn() as (conn, cur):
-        if not verify_affiliate_account(cur, account_id):
-            raise HTTPException(
-                status_code=403,
-                detail="Only industry affiliates can invite agents",
-            )
+    content = await file.read()
+    try:
+        text = content.decode("utf-8-sig")
+    except UnicodeDecodeError:
+        text = content.decode("latin-1")
+
+    # One insert per CSV row on the blocking pool — keep it off the event loop
+    def _invite_rows():
+        with db_conn() as (conn, cur):
+            if not verify_affiliate_account(cur, account_id):
+                raise HTTPException(
+                    status_code=403,
+                    detail="Only industry affiliates can invite agents",
+                )
 
-        inviter_name, company_name = _get_inviter_info(cur, account_id, request)
+            inviter_name, company_name = _get_inviter_info(cur, account_id, request)
+
+            reader = csv.DictReader(io.StringIO(text))
+            errors: list[dict] = []
+            invited = 0
+            total_rows = 0
+            email_tasks: list[tuple[str, str]] = []
+
+            for idx, row in enumerate(reader, start=2):
+                total_rows += 1
+                row = {k.strip().lower(): (v.strip() if v else "") for k, v in row.items()}
+
+                email = row.get("email", "").strip().lower()
+                name = row.get("name", "")
+
+                if not email:
+                    errors.append({"row": idx, "email": "", "reason": "email is required"})
+                    continue
+                if not EMAIL_RE.match(email):
+                    errors.append({"row": idx, "email": email, "reason": "invalid email format"})
+                    continue
+                if not name:
+                    errors.append({"row": idx, "email": email, "reason": "name is required"})
+                    continue
+
+                try:
+                    parts = name.strip().split(None, 1)
+                    fn = parts[0] if parts else name.strip()
+                    ln = parts[1] if len(parts) > 1 else ""
+                    result = create_invited_user(
+                        cur,
+                        role="sponsored_agent",
+                        email=email,
+                        first_name=fn,
+                        last_name=ln,
+                        phone=row.get("phone") or None,
+                        job_title=row.get("job_title") or None,
+                        company_name=row.get("company_name") or None,
+                        license_number=row.get("license_number") or None,
+                        account_name=name,
+                        sponsor_account_id=account_id,
+                    )
+                    email_tasks.append(
+                        (result["email"], result["token"], fn)
+                    )
+                    invited += 1
+                except ValueError as e:
+                    errors.append({"row": idx, "email": email, "reason": str(e)})
+                except Exception as e:
+                    logger.error(f"Failed to create agent for {email}: {e}")
+                    errors.append({"row": idx, "email": email, "reason": str(e)})
 
-        content = await file.read()
-        try:
-            text = content.decode("utf-8-sig")
-        except UnicodeDecodeError:
-            text = content.decode("latin-1")
-
-        reader = csv.DictReader(io.StringIO(text))
-        errors: list[dict] = []
-        invited = 0
-        total_rows = 0
-        email_tasks: list[tuple[str, str]] = []
-
-        for idx, row in enumerate(reader, start=2):
-            total_rows += 1
-            row = {k.strip().lower(): (v.strip() if v else "") for k, v in row.items()}
-
-            email = row.get("email", "").strip().lower()
-            name = row.get("name", "")
-
-            if not email:
-                errors.append({"row": idx, "email": "", "reason": "email is required"})
-                continue
-            if not EMAIL_RE.match(email):
-                errors.append({"row": idx, "email": email, "reason": "invalid email format"})
-                continue
-            if not name:
-                errors.append({"row": idx, "email": email, "reason": "name is required"})
-                continue
+            conn.commit()
 
-            try:
-                parts = name.strip().split(None, 1)
-                fn = parts[0] if parts else name.strip()
-                ln = parts[1] if len(parts) > 1 else ""
-                result = create_invited_user(
-                    cur,
-                    role="sponsored_agent",
-                    email=email,
-                    first_name=fn,
-                    last_name=ln,
-                    phone=row.get("phone") or None,
-                    job_title=row.get("job_title") or None,
-                    company_name=row.get("company_name") or None,
-                    license_number=row.get("license_number") or None,
-                    account_name=name,
-                    sponsor_account_id=account_id,
-                )
-                email_tasks.append(
-                    (result["email"], result["token"], fn)
-                )
-                invited += 1
-            except ValueError as e:
-                errors.append({"row": idx, "email": email, "reason": str(e)})
-            except Exception as e:
-                logger.error(f"Failed to create agent for {email}: {e}")
-                errors.append({"row": idx, "email": email, "reason": str(e)})
+        return inviter_name, company_name, total_rows, invited, errors, email_tasks
 
-        conn.commit()
+    inviter_name, company_name, total_rows, invited, errors, email_tasks = (
+        await run_in_threadpool(_invite_rows)
+    )
 
     for email_addr, token, fn in email_tasks:
         try:
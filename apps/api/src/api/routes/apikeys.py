@@ -3,6 +3,7 @@ from pydantic import BaseModel
 import psycopg
 from ..settings import settings
 from ..auth import new_api_key
+from ..services import auth_cache
 from .reports import require_account_id  # temporary; will be replaced by real auth check
 
 router = APIRouter(prefix="/v1")
@@ -44,7 +45,10 @@ def list_keys(request: Request, account_id: str = Depends(require_account_id)):
 def revoke_key(key_id: str, request: Request, account_id: str = Depends(require_account_id)):
     with psycopg.connect(settings.DATABASE_URL, autocommit=True) as conn:
         with conn.cursor() as cur:
-            cur.execute("UPDATE api_keys SET is_active=FALSE WHERE id=%s AND account_id=%s", (key_id, account_id))
+            cur.execute("UPDATE api_keys SET is_active=FALSE WHERE id=%s AND account_id=%s RETURNING key_hash", (key_id, account_id))
+            row = cur.fetchone()
+    if row:
+        auth_cache.revoke_api_key(row[0])
     return
 
 
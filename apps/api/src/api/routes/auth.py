@@ -7,6 +7,7 @@ import secrets
 from datetime import datetime, timedelta
 from ..settings import settings
 from ..auth import sign_jwt, check_password, hash_password, verify_jwt
+from ..services import auth_cache
 import hashlib
 from ..services.email import (
     send_password_reset_email,
@@ -177,6 +178,9 @@ def logout(request: Request, response: Response):
                 logger.info(f"Token blacklisted for user {user_id}")
             except Exception as e:
                 logger.error(f"Failed to blacklist token: {e}")
+            # Drop the cached auth context everywhere (blacklist alone would
+            # only be consulted once the cache entry expired)
+            auth_cache.revoke_token(token_hash)
     
     # Clear the cookie
     response.delete_cookie(
@@ -7,9 +7,10 @@ V3.1: Unified with worker email template for single source of truth.
 """
 
 from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
 from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, EmailStr
-from typing import Optional
+from typing import Optional, Union
 import io
 import os
 import httpx
@@ -311,6 +312,21 @@ def get_branding_for_account(cur, account_id: str) -> dict:
     }
 
 
+def _render_sample_html_for(
+    body: Union[SamplePdfRequest, SampleJpgRequest], account_id: str, user_id: Optional[str]
+) -> str:
+    """Blocking sample render (pooled db_conn + template) — run in the threadpool."""
+    with db_conn() as (conn, cur):
+        return _render_sample_html(
+            cur,
+            account_id=account_id,
+            user_id=user_id,
+            report_type=body.report_type,
+            city=body.city,
+            theme_id=body.theme_id,
+        )
+
+
 @router.post("/sample-pdf")
 async def generate_sample_pdf(
     body: SamplePdfRequest,
@@ -343,15 +359,7 @@ async def generate_sample_pdf(
 
     # Render HTML via the worker's MarketReportBuilder (synchronous — same code
     # path as production, just with canned `report_data`).
-    with db_conn() as (conn, cur):
-        html_content = _render_sample_html(
-            cur,
-            account_id=account_id,
-            user_id=user_id,
-            report_type=report_type,
-            city=body.city,
-            theme_id=body.theme_id,
-        )
+    html_content = await run_in_threadpool(_render_sample_html_for, body, account_id, user_id)
     print(f"[Branding PDF] Rendered HTML for {report_type}: {len(html_content)} chars")
 
     # Ship HTML to PDFShift. `source` accepts raw HTML as well as URLs.
@@ -434,15 +442,7 @@ async def generate_sample_jpg(
     user = getattr(request.state, "user", None)
     user_id = user.get("id") if user else None
 
-    with db_conn() as (conn, cur):
-        html_content = _render_sample_html(
-            cur,
-            account_id=account_id,
-            user_id=user_id,
-            report_type=report_type,
-            city=body.city,
-            theme_id=body.theme_id,
-        )
+    html_content = await run_in_threadpool(_render_sample_html_for, body, account_id, user_id)
     print(f"[Branding JPG] Rendered HTML for {report_type}: {len(html_content)} chars")
 
     try:
@@ -575,6 +575,13 @@ def _build_fallback_test_email(report_type: str, branding: dict, metrics: dict)
 </html>'''
 
 
+def _load_test_email_branding(account_id: str) -> dict:
+    """Verify the affiliate account and load its branding (blocking — threadpool)."""
+    with db_conn() as (conn, cur):
+        verify_affiliate_account(cur, account_id)
+        return get_branding_for_account(cur, account_id)
+
+
 @router.post("/test-email")
 async def send_test_email(
     body: TestEmailRequest,
@@ -600,9 +607,7 @@ async def send_test_email(
         )
     
     # Verify affiliate account and get branding
-    with db_conn() as (conn, cur):
-        verify_affiliate_account(cur, account_id)
-        branding = get_branding_for_account(cur, account_id)
+    branding = await run_in_threadpool(_load_test_email_branding, account_id)
     
     brand_name = branding.get("brand_display_name") or "Your Brand"
     primary_color = branding.get("primary_color") or "#7C3AED"
@@ -12,8 +12,8 @@ import json
 import re
 import logging
 
-from ..db import db_conn, set_rls
-from ..services.agent_code import get_agent_by_code, increment_landing_page_visits
+from ..db import adb_conn
+from ..services.agent_code import aget_agent_by_code, aincrement_landing_page_visits
 from ..services.sitex import lookup_property
 
 logger = logging.getLogger(__name__)
@@ -155,8 +155,8 @@ async def get_landing_page_info(
             is_demo=True,
         )
 
-    with db_conn() as (conn, cur):
-        agent = get_agent_by_code(cur, agent_code)
+    async with adb_conn() as (conn, cur):
+        agent = await aget_agent_by_code(cur, agent_code)
         
         if not agent:
             raise HTTPException(status_code=404, detail="Agent not found")
@@ -165,7 +165,7 @@ async def get_landing_page_info(
             raise HTTPException(status_code=410, detail="This page is currently unavailable")
         
         # Track visit
-        increment_landing_page_visits(conn, cur, agent_code)
+        await aincrement_landing_page_visits(conn, cur, agent_code)
         
         primary = agent.get("primary_color") or agent.get("landing_page_theme_color") or "#8B5CF6"
         accent = agent.get("accent_color") or primary
@@ -196,9 +196,9 @@ async def search_property(
     Search for properties by address.
     Consumer enters their address, we find matching properties.
     """
-    with db_conn() as (conn, cur):
+    async with adb_conn() as (conn, cur):
         # Validate agent exists
-        agent = get_agent_by_code(cur, agent_code)
+        agent = await aget_agent_by_code(cur, agent_code)
         if not agent:
             raise HTTPException(status_code=404, detail="Invalid agent code")
         
@@ -259,8 +259,8 @@ async def request_report(
     if payload.delivery_method == "email" and not payload.email:
         raise HTTPException(status_code=422, detail="Email required for email delivery")
 
-    with db_conn() as (conn, cur):
-        agent = get_agent_by_code(cur, agent_code)
+    async with adb_conn() as (conn, cur):
+        agent = await aget_agent_by_code(cur, agent_code)
         
         if not agent:
             raise HTTPException(status_code=404, detail="Invalid agent code")
@@ -271,23 +271,23 @@ async def request_report(
         agent_id = agent.get("id")
         account_id = agent.get("account_id")
         
-        cur.execute(
+        await cur.execute(
             "SELECT sms_credits FROM accounts WHERE id = %s",
             (account_id,)
         )
-        result = cur.fetchone()
+        result = await cur.fetchone()
         sms_credits = result[0] if result else 0
         
         ip = request.client.host if request.client else None
         if ip:
-            cur.execute(
+            await cur.execute(
                 """
                 SELECT COUNT(*) FROM consumer_reports 
                 WHERE ip_address = %s AND created_at > NOW() - INTERVAL '1 hour'
                 """,
                 (ip,)
             )
-            recent_count = cur.fetchone()[0]
+            recent_count = (await cur.fetchone())[0]
             if recent_count >= 5:
                 raise HTTPException(status_code=429, detail="Too many requests. Please try again later.")
         
@@ -314,7 +314,7 @@ async def request_report(
         property_data = {k: v for k, v in property_data.items() if v is not None}
         
         # Create consumer_report record (tracks the generated PDF/data)
-        cur.execute(
+        await cur.execute(
             """
             INSERT INTO consumer_reports (
                 agent_id, agent_code, consumer_phone, consumer_email,
@@ -350,11 +350,11 @@ async def request_report(
                 device_type,
             )
         )
-        report_id = cur.fetchone()[0]
+        report_id = (await cur.fetchone())[0]
 
         # Also write to unified leads table
         full_address = f"{payload.property_address}, {payload.property_city}, {payload.property_state} {payload.property_zip}"
-        cur.execute(
+        await cur.execute(
             """
             INSERT INTO leads (
                 account_id, name, email, phone, message,
@@ -379,7 +379,7 @@ async def request_report(
             )
         )
 
-        conn.commit()
+        await conn.commit()
         
         try:
             from celery import current_app
@@ -406,8 +406,8 @@ async def request_report(
 @router.get("/{agent_code}/settings")
 async def get_landing_page_settings(agent_code: str):
     """Get landing page settings for the agent."""
-    with db_conn() as (conn, cur):
-        agent = get_agent_by_code(cur, agent_code)
+    async with adb_conn() as (conn, cur):
+        agent = await aget_agent_by_code(cur, agent_code)
         
         if not agent:
             raise HTTPException(status_code=404, detail="Agent not found")
@@ -17,6 +17,7 @@ from datetime import datetime, timedelta, timezone
 from typing import Literal, Optional
 
 from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.concurrency import run_in_threadpool
 from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, EmailStr, Field
 
@@ -214,40 +215,14 @@ def update_landing_page_analytics(cur, report_id: str, ip_address: str):
 # ============================================================================
 
 
-@router.post("/leads/capture", response_model=LeadCaptureResponse)
-async def capture_lead(payload: LeadCaptureInput, request: Request):
+def _store_captured_lead(payload: LeadCaptureInput, client_ip: str, user_agent: str) -> Optional[dict]:
     """
-    PUBLIC endpoint - Capture a lead from QR scan or direct link.
-    
-    No authentication required. This is called by the public property report page.
-    
-    Anti-spam checks (in order):
-    1. Honeypot check (website field should be empty)
-    2. Find property_report by short_code
-    3. is_active check
-    4. expires_at check
-    5. max_leads check
-    6. access_code check
-    7. IP block list check
-    8. Rate limit check (5 per hour per IP)
-    9. Duplicate email check (silent success)
-    10. Store lead + send SMS notification
+    Run the DB-side capture checks (steps 2-9) and store the lead.
+
+    Blocking (pooled db_conn) — capture_lead runs it in the threadpool so the
+    SMS send never holds a connection. Returns None for a duplicate email
+    (silent success), else the lead plus what the SMS notification needs.
     """
-    # Get client IP for rate limiting and blocking
-    client_ip = get_client_ip(request)
-    user_agent = request.headers.get("User-Agent", "")[:500]  # Limit length
-    
-    # SUCCESS response for bots/invalid - don't reveal anything
-    silent_success = LeadCaptureResponse(
-        success=True,
-        message="Thank you! We'll be in touch soon."
-    )
-    
-    # 1. Honeypot check - "website" field should always be empty
-    if payload.website:
-        logger.warning(f"Honeypot triggered from IP {client_ip}")
-        return silent_success  # Silently ignore bot submissions
-    
     with db_conn() as (conn, cur):
         # 2. Find property report by short_code (no RLS - public endpoint)
         cur.execute("""
@@ -323,7 +298,7 @@ async def capture_lead(payload: LeadCaptureInput, request: Request):
         # 9. Duplicate email check (silent success - don't reveal existing leads)
         if check_duplicate_email(cur, payload.email, str(report_id)):
             logger.info(f"Duplicate email submission: {payload.email[:3]}*** to report {report_id}")
-            return silent_success
+            return None
         
         # 10. All checks passed - check plan and create lead
         if not lead_capture_enabled:
@@ -367,59 +342,110 @@ async def capture_lead(payload: LeadCaptureInput, request: Request):
         
         # Update landing page analytics
         update_landing_page_analytics(cur, str(report_id), client_ip)
-        
-        # Send SMS notification if credits available
-        sms_sent = False
+
+        # Get agent's phone number when an SMS notification can be sent
+        agent_phone = None
         if sms_credits and sms_credits > 0 and twilio_is_configured():
-            # Get agent's phone number
             cur.execute("""
                 SELECT phone FROM users WHERE id = %s
             """, (user_id,))
-            
+
             user_row = cur.fetchone()
             agent_phone = user_row[0] if user_row else None
-            
-            if agent_phone:
-                formatted_phone = format_phone_e164(agent_phone)
-                
-                if formatted_phone:
-                    try:
-                        full_address = f"{property_address}, {property_city}, {property_state}"
-                        
-                        await send_lead_notification_sms(
-                            to_phone=formatted_phone,
-                            lead_name=payload.name,
-                            property_address=full_address,
-                            lead_phone=payload.phone,
-                            lead_email=payload.email,
-                        )
-                        
-                        # Decrement SMS credits
-                        cur.execute("""
-                            UPDATE accounts
-                            SET sms_credits = sms_credits - 1
-                            WHERE id = %s AND sms_credits > 0
-                        """, (account_id,))
-                        
-                        # Update lead with SMS sent timestamp
-                        cur.execute("""
-                            UPDATE leads
-                            SET sms_sent_at = NOW()
-                            WHERE id = %s::uuid
-                        """, (lead_id,))
-                        
-                        sms_sent = True
-                        logger.info(f"SMS notification sent for lead {lead_id}")
-                        
-                    except TwilioSMSError as e:
-                        logger.error(f"Failed to send SMS for lead {lead_id}: {e}")
-                else:
-                    logger.warning(f"Agent phone number invalid format: {agent_phone[:4]}***")
-            else:
+            if not agent_phone:
                 logger.warning(f"No phone number found for user {user_id}")
-        
+
+        conn.commit()
+
+    return {
+        "lead_id": lead_id,
+        "account_id": account_id,
+        "agent_phone": agent_phone,
+        "full_address": f"{property_address}, {property_city}, {property_state}",
+    }
+
+
+def _record_lead_sms(account_id: str, lead_id: str) -> None:
+    """Decrement SMS credits and stamp the lead after its notification went out."""
+    with db_conn() as (conn, cur):
+        # Decrement SMS credits
+        cur.execute("""
+            UPDATE accounts
+            SET sms_credits = sms_credits - 1
+            WHERE id = %s AND sms_credits > 0
+        """, (account_id,))
+
+        # Update lead with SMS sent timestamp
+        cur.execute("""
+            UPDATE leads
+            SET sms_sent_at = NOW()
+            WHERE id = %s::uuid
+        """, (lead_id,))
         conn.commit()
+
+
+@router.post("/leads/capture", response_model=LeadCaptureResponse)
+async def capture_lead(payload: LeadCaptureInput, request: Request):
+    """
+    PUBLIC endpoint - Capture a lead from QR scan or direct link.
+    
+    No authentication required. This is called by the public property report page.
+    
+    Anti-spam checks (in order):
+    1. Honeypot check (website field should be empty)
+    2. Find property_report by short_code
+    3. is_active check
+    4. expires_at check
+    5. max_leads check
+    6. access_code check
+    7. IP block list check
+    8. Rate limit check (5 per hour per IP)
+    9. Duplicate email check (silent success)
+    10. Store lead + send SMS notification
+    """
+    # Get client IP for rate limiting and blocking
+    client_ip = get_client_ip(request)
+    user_agent = request.headers.get("User-Agent", "")[:500]  # Limit length
+    
+    # SUCCESS response for bots/invalid - don't reveal anything
+    silent_success = LeadCaptureResponse(
+        success=True,
+        message="Thank you! We'll be in touch soon."
+    )
     
+    # 1. Honeypot check - "website" field should always be empty
+    if payload.website:
+        logger.warning(f"Honeypot triggered from IP {client_ip}")
+        return silent_success  # Silently ignore bot submissions
+    
+    lead = await run_in_threadpool(_store_captured_lead, payload, client_ip, user_agent)
+    if lead is None:
+        return silent_success
+    lead_id = lead["lead_id"]
+
+    # Send SMS notification if credits available
+    agent_phone = lead["agent_phone"]
+    if agent_phone:
+        formatted_phone = format_phone_e164(agent_phone)
+
+        if formatted_phone:
+            try:
+                await send_lead_notification_sms(
+                    to_phone=formatted_phone,
+                    lead_name=payload.name,
+                    property_address=lead["full_address"],
+                    lead_phone=payload.phone,
+                    lead_email=payload.email,
+                )
+
+                await run_in_threadpool(_record_lead_sms, lead["account_id"], lead_id)
+                logger.info(f"SMS notification sent for lead {lead_id}")
+
+            except TwilioSMSError as e:
+                logger.error(f"Failed to send SMS for lead {lead_id}: {e}")
+        else:
+            logger.warning(f"Agent phone number invalid format: {agent_phone[:4]}***")
+
     return LeadCaptureResponse(
         success=True,
         message="Thank you! We'll be in touch soon."
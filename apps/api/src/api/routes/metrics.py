@@ -0,0 +1,27 @@
+import secrets
+
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import Response
+
+from ..metrics import CONTENT_TYPE, render
+from ..settings import settings
+
+router = APIRouter()
+
+
+@router.get("/metrics", include_in_schema=False)
+def metrics(request: Request):
+    """
+    Prometheus scrape endpoint (see api/metrics.py).
+
+    Exposes route templates, vendor volumes and pool stats, so it needs
+    METRICS_TOKEN; without one it is served only outside production (404
+    in production, like /dev-files).
+    """
+    if settings.METRICS_TOKEN:
+        expected = f"Bearer {settings.METRICS_TOKEN}"
+        if not secrets.compare_digest(request.headers.get("authorization", ""), expected):
+            raise HTTPException(status_code=401, detail="Invalid metrics token")
+    elif settings.ENVIRONMENT == "production":
+        raise HTTPException(status_code=404, detail="Not Found")
+    return Response(content=render(), media_type=CONTENT_TYPE)
@@ -14,7 +14,7 @@ from datetime import datetime
 import json
 import logging
 
-from ..db import db_conn, fetchone_dict, fetchall_dicts
+from ..db import adb_conn, afetchone_dict
 
 logger = logging.getLogger(__name__)
 
@@ -120,8 +120,8 @@ async def get_report_data(
     Get report data as JSON for client-side rendering.
     Tracks view analytics.
     """
-    with db_conn() as (conn, cur):
-        cur.execute(
+    async with adb_conn() as (conn, cur):
+        await cur.execute(
             """
             SELECT 
                 cr.*,
@@ -136,7 +136,7 @@ async def get_report_data(
             """,
             (str(report_id),)
         )
-        report = fetchone_dict(cur)
+        report = await afetchone_dict(cur)
     
     if not report:
         raise HTTPException(404, "Report not found")
@@ -272,15 +272,15 @@ async def get_report_data(
     
     # Fetch branding for viewer
     branding_data = None
-    with db_conn() as (conn, cur):
-        cur.execute("""
+    async with adb_conn() as (conn, cur):
+        await cur.execute("""
             SELECT a.primary_color, a.secondary_color, a.logo_url
             FROM accounts a
             JOIN users u ON u.account_id = a.id
             WHERE u.id = %s
             LIMIT 1
         """, (str(report.get("agent_id")),))
-        brand_row = cur.fetchone()
+        brand_row = await cur.fetchone()
         if brand_row:
             branding_data = {
                 "primary_color": brand_row[0] or "#6366f1",
@@ -311,24 +311,24 @@ async def generate_pdf_on_demand(
     Generate PDF on demand when user clicks download.
     Returns existing PDF URL if already generated.
     """
-    with db_conn() as (conn, cur):
-        cur.execute(
+    async with adb_conn() as (conn, cur):
+        await cur.execute(
             "SELECT id, pdf_url, property_data, comparables, agent_id FROM consumer_reports WHERE id = %s",
             (str(report_id),)
         )
-        report = fetchone_dict(cur)
+        report = await afetchone_dict(cur)
     
     if not report:
         raise HTTPException(404, "Report not found")
     
     # Return existing PDF if available
     if report.get("pdf_url"):
-        with db_conn() as (conn, cur):
-            cur.execute(
+        async with adb_conn() as (conn, cur):
+            await cur.execute(
                 "UPDATE consumer_reports SET pdf_requested_count = pdf_requested_count + 1 WHERE id = %s",
                 (str(report_id),)
             )
-            conn.commit()
+            await conn.commit()
         return {"pdf_url": report["pdf_url"], "status": "ready"}
     
     # Queue PDF generation (Celery task)
@@ -354,12 +354,12 @@ async def check_pdf_status(report_id: UUID):
     """
     Check if PDF has been generated (for polling).
     """
-    with db_conn() as (conn, cur):
-        cur.execute(
+    async with adb_conn() as (conn, cur):
+        await cur.execute(
             "SELECT pdf_url FROM consumer_reports WHERE id = %s",
             (str(report_id),)
         )
-        report = fetchone_dict(cur)
+        report = await afetchone_dict(cur)
     
     if not report:
         raise HTTPException(404, "Report not found")
@@ -379,13 +379,13 @@ async def track_analytics(
     """
     Track user interactions (tab changes, agent clicks, etc.)
     """
-    with db_conn() as (conn, cur):
+    async with adb_conn() as (conn, cur):
         # Validate report exists
-        cur.execute(
+        await cur.execute(
             "SELECT 1 FROM consumer_reports WHERE id = %s",
             (str(report_id),)
         )
-        if not cur.fetchone():
+        if not await cur.fetchone():
             raise HTTPException(404, "Report not found")
     
     # Track event
@@ -399,9 +399,9 @@ async def track_analytics(
     )
     
     # Update report record for quick stats
-    with db_conn() as (conn, cur):
+    async with adb_conn() as (conn, cur):
         if event.event_type == "agent_click":
-            cur.execute(
+            await cur.execute(
                 """
                 UPDATE consumer_reports 
                 SET agent_contact_clicked = true, 
@@ -410,9 +410,9 @@ async def track_analytics(
                 """,
                 (event.event_data.get("contact_type"), str(report_id))
             )
-            conn.commit()
+            await conn.commit()
         elif event.event_type == "tab_change":
-            cur.execute(
+            await cur.execute(
                 """
                 UPDATE consumer_reports 
                 SET tabs_viewed = tabs_viewed || %s::jsonb
@@ -420,7 +420,7 @@ async def track_analytics(
                 """,
                 (json.dumps([event.event_data.get("tab")]), str(report_id))
             )
-            conn.commit()
+            await conn.commit()
     
     return {"success": True}
 
@@ -432,8 +432,8 @@ async def track_analytics(
 async def track_view(report_id: str, ip: str, user_agent: str, device_type: str):
     """Track page view and update counters."""
     try:
-        with db_conn() as (conn, cur):
-            cur.execute(
+        async with adb_conn() as (conn, cur):
+            await cur.execute(
                 """
                 UPDATE consumer_reports SET
                     view_count = view_count + 1,
@@ -444,16 +444,16 @@ async def track_view(report_id: str, ip: str, user_agent: str, device_type: str)
                 """,
                 (device_type, report_id)
             )
-            conn.commit()
+            await conn.commit()
             
-            cur.execute(
+            await cur.execute(
                 """
                 INSERT INTO report_analytics (report_id, event_type, ip_address, user_agent, device_type)
                 VALUES (%s, 'view', %s, %s, %s)
                 """,
                 (report_id, ip, user_agent, device_type)
             )
-            conn.commit()
+            await conn.commit()
     except Exception as e:
         logger.error(f"Failed to track view: {e}")
 
@@ -462,15 +462,15 @@ async def track_event(report_id: str, event_type: str, event_data: dict,
                       ip: str = None, user_agent: str = None, session_id: str = None):
     """Track analytics event."""
     try:
-        with db_conn() as (conn, cur):
-            cur.execute(
+        async with adb_conn() as (conn, cur):
+            await cur.execute(
                 """
                 INSERT INTO report_analytics (report_id, event_type, event_data, ip_address, user_agent, session_id)
                 VALUES (%s, %s, %s, %s, %s, %s)
                 """,
                 (report_id, event_type, json.dumps(event_data), ip, user_agent, session_id)
             )
-            conn.commit()
+            await conn.commit()
     except Exception as e:
         logger.error(f"Failed to track event: {e}")
 
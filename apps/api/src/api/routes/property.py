@@ -7,13 +7,15 @@ Integrates with SiteX Pro for property data and SimplyRETS for comparable sales.
 
 import json
 import logging
+import os
 import random
 import string
+import time
 from datetime import datetime
-from math import radians, cos, sin, asin, sqrt
 from typing import Any, Dict, List, Literal, Optional
 
 from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel, Field
 
 
@@ -25,17 +27,11 @@ from pydantic import BaseModel, Field
 def haversine_distance(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
     """
     Calculate the great-circle distance between two points in miles.
-    Uses the Haversine formula.
+    Uses the Haversine formula (see services/spatial.py for bulk queries).
     """
-    lat1, lon1, lat2, lon2 = map(radians, [lat1, lon1, lat2, lon2])
-    dlat = lat2 - lat1
-    dlon = lon2 - lon1
-    a = sin(dlat / 2) ** 2 + cos(lat1) * cos(lat2) * sin(dlon / 2) ** 2
-    c = 2 * asin(sqrt(a))
-    miles = 3956 * c  # Earth radius in miles
-    return miles
-
-from ..db import db_conn, fetchall_dicts, fetchone_dict, set_rls
+    return haversine_miles(lat1, lon1, lat2, lon2)
+
+from ..db import adb_conn, aset_rls, db_conn, fetchall_dicts, fetchone_dict, set_rls
 from ..services import get_full_plan_usage
 from ..services.sitex import (
     PropertyData,
@@ -46,18 +42,27 @@ from ..services.sitex import (
     lookup_property_by_apn,
 )
 from ..services.simplyrets import (
+    PAGE_SIZE as SIMPLYRETS_PAGE_SIZE,
     fetch_properties as simplyrets_fetch_properties,
     build_comparables_params,
     normalize_listing,
 )
 from ..worker_client import enqueue_property_report
 from ..services.qr_service import generate_qr_code
+from ..services.spatial import SpatialIndex, haversine_miles
 from ..services.property_stats import get_agent_stats, get_affiliate_stats
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/v1/property", tags=["property"])
 
+# Comparables ladder: fetch one superset (loosest envelope) and evaluate every
+# ladder level locally, instead of one SimplyRETS round trip per level.
+COMPS_SINGLE_FETCH = os.getenv("COMPS_SINGLE_FETCH", "true").lower() == "true"
+# One SimplyRETS page at most: fetch_properties clamps larger limits, which
+# would hide a truncated superset from the page-full check below
+COMPS_SUPERSET_LIMIT = min(int(os.getenv("COMPS_SUPERSET_LIMIT", "500")), SIMPLYRETS_PAGE_SIZE)
+
 
 # =============================================================================
 # PROPERTY TYPE MAPPING (SiteX UseCode -> SimplyRETS type + subtype)
@@ -192,6 +197,46 @@ def post_filter_by_property_type(
     return filtered
 
 
+def listing_matches_params(listing: Dict, params: Dict[str, Any]) -> bool:
+    """
+    Apply one ladder level's SimplyRETS range/subtype filters to a raw listing
+    locally (area, beds, baths, subtype). Status, type and location are shared
+    by every level, so the superset query already applied them.
+
+    Like the vendor filter, a listing missing a filtered field does not match.
+    """
+    prop = listing.get("property") or {}
+
+    def _in_range(value, lo_key: str, hi_key: str) -> bool:
+        lo, hi = params.get(lo_key), params.get(hi_key)
+        if lo is None and hi is None:
+            return True
+        if value is None:
+            return False
+        try:
+            value = float(value)
+        except (TypeError, ValueError):
+            return False
+        return (lo is None or value >= lo) and (hi is None or value <= hi)
+
+    baths = prop.get("bathrooms")
+    if baths is None:
+        baths = prop.get("bathsFull")
+
+    if not _in_range(prop.get("area"), "minarea", "maxarea"):
+        return False
+    if not _in_range(prop.get("bedrooms"), "minbeds", "maxbeds"):
+        return False
+    if not _in_range(baths, "minbaths", "maxbaths"):
+        return False
+    subtype = params.get("subtype")
+    if subtype:
+        listing_subtype = prop.get("subType") or prop.get("subTypeText") or ""
+        if listing_subtype.lower() != subtype.lower():
+            return False
+    return True
+
+
 # =============================================================================
 # SCHEMAS
 # =============================================================================
@@ -240,6 +285,9 @@ class ComparablesRequest(BaseModel):
     sqft_variance: float = Field(default=0.20, ge=0.0, le=0.50, description="SQFT +/- variance (0.20 = 20%). 0 = no sqft filter.")
     status: Literal["Closed", "Active", "All"] = "Active"
     limit: int = Field(default=15, ge=1, le=50)
+    # Fetch one superset and evaluate the fallback ladder locally
+    # (None = server default, COMPS_SINGLE_FETCH)
+    single_fetch: Optional[bool] = None
 
 
 # SearchParamsUsed - Now using simple dict in ComparablesResponse
@@ -265,6 +313,10 @@ class ComparablesResponse(BaseModel):
     comp_ladder_level: Optional[str] = None
     comp_confidence_grade: Optional[str] = None
     comp_confidence_reason: Optional[str] = None
+    # "single_fetch" (one superset, levels evaluated locally) or "sequential"
+    comp_ladder_mode: Optional[str] = None
+    # Per-level timings: [{level, source: vendor|local, ms, candidates, matched}]
+    comp_ladder_timings: Optional[List[dict]] = None
 
 
 class PropertyReportCreate(BaseModel):
@@ -487,7 +539,7 @@ async def get_comparables(payload: ComparablesRequest, request: Request):
     4. Return comparables with search metadata
     """
     # Auth required
-    require_account_id(request)
+    account_id = require_account_id(request)
     
     # Use values directly from payload - frontend already has property details from Step 1
     # NO SiteX call needed here - SimplyRETS is all we need for comparables
@@ -587,22 +639,36 @@ async def get_comparables(payload: ComparablesRequest, request: Request):
 
             return p
 
-        def _filter_distance(raw: List[Dict], radius: float) -> List[Dict]:
-            """Post-filter by radius if coordinates known."""
+        def _nearby(candidates: List[Dict], radius: float) -> Dict[int, float]:
+            """id(listing) -> miles for every located candidate within radius."""
+            index = SpatialIndex(candidates)
+            return {
+                id(candidates[pos]): d
+                for pos, d in index.within(subject_lat, subject_lng, radius)
+            }
+
+        def _filter_distance(raw: List[Dict], radius: float,
+                             nearby: Optional[Dict[int, float]] = None) -> List[Dict]:
+            """
+            Post-filter by radius if coordinates known. `nearby` is a
+            precomputed _nearby() over a pool containing raw (at least this
+            radius); without it the index is built over raw.
+            """
             if not (subject_lat and subject_lng):
                 return raw
+            if nearby is None:
+                nearby = _nearby(raw, radius)
             out = []
             for lst in raw:
                 geo = lst.get("geo", {})
-                clat, clng = geo.get("lat"), geo.get("lng")
-                if clat and clng:
-                    d = haversine_distance(subject_lat, subject_lng, clat, clng)
-                    if d <= radius:
-                        lst["_distance_miles"] = round(d, 2)
-                        out.append(lst)
-                else:
+                if not (geo.get("lat") and geo.get("lng")):
                     lst["_distance_miles"] = None
                     out.append(lst)
+                    continue
+                d = nearby.get(id(lst))
+                if d is not None and d <= radius:
+                    lst["_distance_miles"] = round(d, 2)
+                    out.append(lst)
             out.sort(key=lambda x: x.get("_distance_miles") or 999)
             return out
 
@@ -624,16 +690,58 @@ async def get_comparables(payload: ComparablesRequest, request: Request):
         best_listings: List[Dict] = []   # best seen across all levels
         fallback_level_used = "L0:strict"
         total_before_filter = 0
+        ladder_timings: List[Dict[str, Any]] = []
+
+        # Single-fetch mode: the loosest envelope (no sqft, beds±(1+2), no
+        # baths, no subtype — a superset of every level) in one request. If
+        # the vendor page is full the superset may be truncated, so fall back
+        # to per-level fetches to keep results identical.
+        superset: Optional[List[Dict]] = None
+        use_single_fetch = COMPS_SINGLE_FETCH if payload.single_fetch is None else payload.single_fetch
+        if use_single_fetch:
+            superset_params = _build_params(None, 2, False, True)
+            superset_params["limit"] = COMPS_SUPERSET_LIMIT
+            t0 = time.perf_counter()
+            superset = await simplyrets_fetch_properties(
+                superset_params, limit=COMPS_SUPERSET_LIMIT,
+                account_id=account_id, caller="api.comparables",
+            )
+            ladder_timings.append({
+                "level": "superset",
+                "source": "vendor",
+                "ms": round((time.perf_counter() - t0) * 1000, 1),
+                "candidates": len(superset),
+                "matched": len(superset),
+            })
+            logger.warning(f"Comps single-fetch superset: {len(superset)} raw, params={superset_params}")
+            if len(superset) >= COMPS_SUPERSET_LIMIT:
+                logger.warning("Comps superset hit the page limit — evaluating ladder with per-level fetches")
+                superset = None
+        ladder_mode = "single_fetch" if superset is not None else "sequential"
+
+        # One spatial query over the superset serves every ladder level
+        superset_nearby: Optional[Dict[int, float]] = None
+        if superset is not None and subject_lat and subject_lng:
+            superset_nearby = _nearby(superset, max(level[-1] for level in ladder))
 
         for label, sqft_var, extra_beds, incl_sub, use_city, radius in ladder:
             params = _build_params(sqft_var, extra_beds, incl_sub, use_city)
             logger.warning(f"Comps fallback {label}: params={params}")
 
-            raw = await simplyrets_fetch_properties(params, limit=payload.limit * 4)
-            logger.warning(f"Comps fallback {label}: SimplyRETS returned {len(raw)} raw")
+            t0 = time.perf_counter()
+            if superset is not None:
+                raw = [c for c in superset if listing_matches_params(c, params)][:payload.limit * 4]
+                source = "local"
+            else:
+                raw = await simplyrets_fetch_properties(
+                    params, limit=payload.limit * 4,
+                    account_id=account_id, caller="api.comparables",
+                )
+                source = "vendor"
+            logger.warning(f"Comps fallback {label}: {len(raw)} raw ({source})")
 
             # Distance filter (radius widens at later levels)
-            filtered = _filter_distance(raw, radius)
+            filtered = _filter_distance(raw, radius, superset_nearby)
             # Always post-filter by property type to keep comps same type as subject.
             # incl_sub only controls whether we send the subtype param to SimplyRETS
             # (to avoid over-filtering by the API at looser levels); we still enforce
@@ -641,6 +749,13 @@ async def get_comparables(payload: ComparablesRequest, request: Request):
             filtered = post_filter_by_property_type(filtered, sr_subtype)
 
             total_before_filter = len(raw)
+            ladder_timings.append({
+                "level": label,
+                "source": source,
+                "ms": round((time.perf_counter() - t0) * 1000, 1),
+                "candidates": len(raw),
+                "matched": len(filtered),
+            })
 
             # Always keep the best (most) results seen across all ladder levels
             if len(filtered) > len(best_listings):
@@ -766,6 +881,8 @@ async def get_comparables(payload: ComparablesRequest, request: Request):
             comp_ladder_level=fallback_level_used,
             comp_confidence_grade=_conf_grade,
             comp_confidence_reason=_conf_reason,
+            comp_ladder_mode=ladder_mode,
+            comp_ladder_timings=ladder_timings,
         )
         
     except Exception as e:
@@ -961,105 +1078,110 @@ async def create_property_report(payload: PropertyReportCreate, request: Request
     account_id = require_account_id(request)
     user_id = require_user_id(request)
     
-    with db_conn() as (conn, cur):
-        set_rls((conn, cur), account_id)
-        
-        # 1. Check plan limits
-        plan_usage = get_full_plan_usage(cur, account_id)
-        property_status = plan_usage["limits"]["property_reports"]
-        if not property_status["can_proceed"]:
-            raise HTTPException(
-                status_code=429,
-                detail={
-                    "error": "property_report_limit_reached",
-                    "message": (
-                        f"Property report limit reached "
-                        f"({property_status['used']}/{property_status['limit']}). "
-                        f"Upgrade for more."
-                    ),
-                    "product": "property_reports",
-                    "used": property_status["used"],
-                    "limit": property_status["limit"],
-                }
-            )
-        
-        # 2. Determine address input (new vs legacy format)
-        # New format: property_address, property_city, property_state, property_zip
-        # Legacy format: address, city_state_zip
-        lookup_address = payload.property_address or payload.address
-        lookup_csz = payload.city_state_zip or ""
-        
-        if payload.property_city and payload.property_state:
-            lookup_csz = f"{payload.property_city}, {payload.property_state} {payload.property_zip or ''}"
-        
-        # Use provided sitex_data or lookup via SiteX
-        property_data = None
-        sitex_data = payload.sitex_data
-        
-        if not sitex_data and lookup_address:
-            try:
-                property_data = await lookup_property(lookup_address, lookup_csz)
-                if property_data:
-                    sitex_data = property_data.model_dump()
-            except SiteXError as e:
-                logger.warning(f"SiteX lookup failed: {e}")
-        
-        # Extract address components (from sitex_data, property_data, or payload)
-        if sitex_data:
-            prop_address = sitex_data.get("street") or sitex_data.get("full_address", "").split(",")[0] or payload.property_address or lookup_address
-            prop_city = sitex_data.get("city") or payload.property_city or ""
-            prop_state = sitex_data.get("state") or payload.property_state or "CA"
-            prop_zip = sitex_data.get("zip_code") or payload.property_zip or ""
-            prop_county = sitex_data.get("county")
-            apn = payload.apn or sitex_data.get("apn")
-            owner_name = payload.owner_name or sitex_data.get("owner_name")
-            legal_desc = sitex_data.get("legal_description")
-            prop_type = sitex_data.get("property_type")
-        elif property_data:
-            prop_address = property_data.street or lookup_address.split(",")[0].strip()
-            prop_city = property_data.city or payload.property_city or ""
-            prop_state = property_data.state or payload.property_state or "CA"
-            prop_zip = property_data.zip_code or payload.property_zip or ""
-            prop_county = property_data.county
-            apn = payload.apn or property_data.apn
-            owner_name = payload.owner_name or property_data.owner_name
-            legal_desc = property_data.legal_description
-            prop_type = property_data.property_type
-            sitex_data = property_data.model_dump()
-        else:
-            # Parse from input
-            prop_address = payload.property_address or (lookup_address.split(",")[0].strip() if lookup_address else "")
-            prop_city = payload.property_city or ""
-            prop_state = payload.property_state or "CA"
-            prop_zip = payload.property_zip or ""
-            
-            # Try to parse legacy city_state_zip if new fields not provided
-            if not prop_city and lookup_csz:
-                csz_parts = lookup_csz.split(",")
-                prop_city = csz_parts[0].strip() if csz_parts else ""
-                if len(csz_parts) > 1:
-                    state_zip = csz_parts[1].strip().split()
-                    prop_state = state_zip[0] if state_zip else "CA"
-                    prop_zip = state_zip[1] if len(state_zip) > 1 else ""
-            
-            prop_county = None
-            apn = payload.apn
-            owner_name = payload.owner_name
-            legal_desc = None
-            prop_type = None
-        
+    # 1. Check plan limits (shared sync usage helpers, run off the event loop)
+    def _property_report_limit():
+        with db_conn() as (conn, cur):
+            set_rls((conn, cur), account_id)
+            return get_full_plan_usage(cur, account_id)["limits"]["property_reports"]
+
+    property_status = await run_in_threadpool(_property_report_limit)
+    if not property_status["can_proceed"]:
+        raise HTTPException(
+            status_code=429,
+            detail={
+                "error": "property_report_limit_reached",
+                "message": (
+                    f"Property report limit reached "
+                    f"({property_status['used']}/{property_status['limit']}). "
+                    f"Upgrade for more."
+                ),
+                "product": "property_reports",
+                "used": property_status["used"],
+                "limit": property_status["limit"],
+            }
+        )
+    
+    # 2. Determine address input (new vs legacy format)
+    # New format: property_address, property_city, property_state, property_zip
+    # Legacy format: address, city_state_zip
+    lookup_address = payload.property_address or payload.address
+    lookup_csz = payload.city_state_zip or ""
+    
+    if payload.property_city and payload.property_state:
+        lookup_csz = f"{payload.property_city}, {payload.property_state} {payload.property_zip or ''}"
+    
+    # Use provided sitex_data or lookup via SiteX (no DB connection is held
+    # while SiteX answers)
+    property_data = None
+    sitex_data = payload.sitex_data
+    
+    if not sitex_data and lookup_address:
+        try:
+            property_data = await lookup_property(lookup_address, lookup_csz)
+            if property_data:
+                sitex_data = property_data.model_dump()
+        except SiteXError as e:
+            logger.warning(f"SiteX lookup failed: {e}")
+    
+    # Extract address components (from sitex_data, property_data, or payload)
+    if sitex_data:
+        prop_address = sitex_data.get("street") or sitex_data.get("full_address", "").split(",")[0] or payload.property_address or lookup_address
+        prop_city = sitex_data.get("city") or payload.property_city or ""
+        prop_state = sitex_data.get("state") or payload.property_state or "CA"
+        prop_zip = sitex_data.get("zip_code") or payload.property_zip or ""
+        prop_county = sitex_data.get("county")
+        apn = payload.apn or sitex_data.get("apn")
+        owner_name = payload.owner_name or sitex_data.get("owner_name")
+        legal_desc = sitex_data.get("legal_description")
+        prop_type = sitex_data.get("property_type")
+    elif property_data:
+        prop_address = property_data.street or lookup_address.split(",")[0].strip()
+        prop_city = property_data.city or payload.property_city or ""
+        prop_state = property_data.state or payload.property_state or "CA"
+        prop_zip = property_data.zip_code or payload.property_zip or ""
+        prop_county = property_data.county
+        apn = payload.apn or property_data.apn
+        owner_name = payload.owner_name or property_data.owner_name
+        legal_desc = property_data.legal_description
+        prop_type = property_data.property_type
+        sitex_data = property_data.model_dump()
+    else:
+        # Parse from input
+        prop_address = payload.property_address or (lookup_address.split(",")[0].strip() if lookup_address else "")
+        prop_city = payload.property_city or ""
+        prop_state = payload.property_state or "CA"
+        prop_zip = payload.property_zip or ""
+        
+        # Try to parse legacy city_state_zip if new fields not provided
+        if not prop_city and lookup_csz:
+            csz_parts = lookup_csz.split(",")
+            prop_city = csz_parts[0].strip() if csz_parts else ""
+            if len(csz_parts) > 1:
+                state_zip = csz_parts[1].strip().split()
+                prop_state = state_zip[0] if state_zip else "CA"
+                prop_zip = state_zip[1] if len(state_zip) > 1 else ""
+        
+        prop_county = None
+        apn = payload.apn
+        owner_name = payload.owner_name
+        legal_desc = None
+        prop_type = None
+    
+    async with adb_conn() as (conn, cur):
+        await aset_rls((conn, cur), account_id)
+
         # 3. Create report record (short_code auto-generated by trigger)
         # Check if selected_pages column exists (for backwards compatibility)
-        cur.execute("""
+        await cur.execute("""
             SELECT EXISTS (
                 SELECT 1 FROM information_schema.columns 
                 WHERE table_name = 'property_reports' AND column_name = 'selected_pages'
             )
         """)
-        has_selected_pages_column = cur.fetchone()[0]
+        has_selected_pages_column = (await cur.fetchone())[0]
         
         if has_selected_pages_column:
-            cur.execute("""
+            await cur.execute("""
                 INSERT INTO property_reports (
                     account_id,
                     user_id,
@@ -1113,7 +1235,7 @@ async def create_property_report(payload: PropertyReportCreate, request: Request
             ))
         else:
             # Fallback: insert without selected_pages column
-            cur.execute("""
+            await cur.execute("""
                 INSERT INTO property_reports (
                     account_id,
                     user_id,
@@ -1164,17 +1286,17 @@ async def create_property_report(payload: PropertyReportCreate, request: Request
                 json.dumps(payload.comparables) if payload.comparables else None,
             ))
         
-        row = cur.fetchone()
+        row = await cur.fetchone()
         report_id, short_code, status, created_at = row
         
         # 4. Set status to processing (QR code generation removed — CMA page is the lead funnel now)
-        cur.execute("""
+        await cur.execute("""
             UPDATE property_reports
             SET status = 'processing'
             WHERE id = %s::uuid
         """, (report_id,))
         
-        conn.commit()
+        await conn.commit()
         
         # 5. Queue PDF generation via Celery
         try:
@@ -1183,12 +1305,12 @@ async def create_property_report(payload: PropertyReportCreate, request: Request
         except Exception as e:
             logger.error(f"Failed to enqueue property report: {e}")
             # Update status to failed
-            cur.execute("""
+            await cur.execute("""
                 UPDATE property_reports
                 SET status = 'failed'
                 WHERE id = %s::uuid
             """, (report_id,))
-            conn.commit()
+            await conn.commit()
         
         full_address = f"{prop_address}, {prop_city}, {prop_state} {prop_zip}".strip(", ")
         
@@ -1598,11 +1720,11 @@ async def regenerate_qr_code(report_id: str, request: Request):
     """
     account_id = require_account_id(request)
     
-    with db_conn() as (conn, cur):
-        set_rls((conn, cur), account_id)
+    async with adb_conn() as (conn, cur):
+        await aset_rls((conn, cur), account_id)
         
         # First verify report exists and get current data
-        cur.execute("""
+        await cur.execute("""
             SELECT 
                 id::text,
                 accent_color
@@ -1610,7 +1732,7 @@ async def regenerate_qr_code(report_id: str, request: Request):
             WHERE id = %s::uuid AND account_id = %s::uuid
         """, (report_id, account_id))
         
-        row = cur.fetchone()
+        row = await cur.fetchone()
         
         if not row:
             raise HTTPException(status_code=404, detail="Property report not found")
@@ -1626,11 +1748,11 @@ async def regenerate_qr_code(report_id: str, request: Request):
         
         for _ in range(max_attempts):
             candidate = ''.join(random.choice(chars) for _ in range(8))
-            cur.execute(
+            await cur.execute(
                 "SELECT 1 FROM property_reports WHERE short_code = %s",
                 (candidate,)
             )
-            if not cur.fetchone():
+            if not await cur.fetchone():
                 new_short_code = candidate
                 break
         
@@ -1648,7 +1770,7 @@ async def regenerate_qr_code(report_id: str, request: Request):
         )
         
         # Update the report
-        cur.execute("""
+        await cur.execute("""
             UPDATE property_reports
             SET short_code = %s,
                 qr_code_url = %s,
@@ -1657,8 +1779,8 @@ async def regenerate_qr_code(report_id: str, request: Request):
             RETURNING short_code, qr_code_url
         """, (new_short_code, new_qr_url, report_id, account_id))
         
-        updated = cur.fetchone()
-        conn.commit()
+        updated = await cur.fetchone()
+        await conn.commit()
     
     logger.info(f"Regenerated QR code for report {report_id}: {new_short_code}")
     
@@ -11,6 +11,7 @@ cursor-wire-caching fixes:
 """
 
 from fastapi import APIRouter, Request, HTTPException
+from fastapi.concurrency import run_in_threadpool
 import logging
 import time as _time
 from ..settings import settings
@@ -37,6 +38,82 @@ except ImportError:
     logger.warning("Stripe SDK not installed")
 
 
+def _apply_subscription_plan(account_id: str, price_id: str, subscription: dict) -> bool:
+    """Set plan_slug and billing state for a created/updated subscription.
+
+    Blocking (pooled db_conn) — the webhook runs it in the threadpool.
+    Returns False when the price maps to no plan.
+    """
+    # FIX (cursor-wire-caching): use pooled db_conn() instead of raw psycopg.connect()
+    with db_conn() as (conn, cur):
+        plan_slug = get_plan_slug_for_stripe_price(cur, price_id)
+        if not plan_slug:
+            logger.warning(f"Stripe webhook: no plan found for price_id={price_id}")
+            return False
+
+        # Update plan_slug
+        cur.execute("""
+            UPDATE accounts
+            SET plan_slug = %s
+            WHERE id = %s::uuid
+        """, (plan_slug, account_id))
+
+        if cur.rowcount > 0:
+            logger.info(f"Updated account {account_id} to plan '{plan_slug}' (price: {price_id})")
+        else:
+            logger.warning(f"Account {account_id} not found for subscription update")
+
+        # Update subscription billing state
+        update_account_billing_state(cur, account_id=account_id, subscription=subscription)
+    return True
+
+
+def _apply_subscription_deleted(account_id: str, subscription: dict) -> None:
+    """Schedule or apply the free downgrade for a canceled subscription.
+
+    Blocking (pooled db_conn) — the webhook runs it in the threadpool.
+    """
+    period_end = subscription.get("current_period_end")  # Unix timestamp
+    has_remaining_time = period_end and period_end > _time.time()
+
+    with db_conn() as (conn, cur):
+        if has_remaining_time:
+            # Paid time remains — schedule a future downgrade instead
+            # of yanking access mid-cycle.
+            cur.execute("""
+                UPDATE accounts
+                SET plan_downgrade_at = to_timestamp(%s),
+                    plan_downgrade_to = 'free',
+                    billing_status = 'cancel_at_period_end'
+                WHERE id = %s::uuid
+            """, (period_end, account_id))
+
+            if cur.rowcount > 0:
+                logger.info(
+                    f"Deferred downgrade for account {account_id} "
+                    f"until {period_end} (paid period still active)"
+                )
+            else:
+                logger.warning(f"Account {account_id} not found for deferred downgrade")
+        else:
+            # Period already ended — downgrade immediately
+            cur.execute("""
+                UPDATE accounts
+                SET plan_slug = 'free',
+                    plan_downgrade_at = NULL,
+                    plan_downgrade_to = NULL
+                WHERE id = %s::uuid
+            """, (account_id,))
+
+            if cur.rowcount > 0:
+                logger.info(f"Downgraded account {account_id} to 'free' (subscription canceled, period ended)")
+            else:
+                logger.warning(f"Account {account_id} not found for subscription cancellation")
+
+            # Clear subscription billing state only on immediate downgrade
+            update_account_billing_state(cur, account_id=account_id, subscription=None)
+
+
 @router.post("/webhooks/stripe")
 async def stripe_webhook(req: Request):
     """
@@ -100,27 +177,8 @@ async def stripe_webhook(req: Request):
             return {"received": True}
 
         try:
-            # FIX (cursor-wire-caching): use pooled db_conn() instead of raw psycopg.connect()
-            with db_conn() as (conn, cur):
-                plan_slug = get_plan_slug_for_stripe_price(cur, price_id)
-                if not plan_slug:
-                    logger.warning(f"Stripe webhook: no plan found for price_id={price_id}")
-                    return {"received": True}
-
-                # Update plan_slug
-                cur.execute("""
-                    UPDATE accounts
-                    SET plan_slug = %s
-                    WHERE id = %s::uuid
-                """, (plan_slug, account_id))
-
-                if cur.rowcount > 0:
-                    logger.info(f"Updated account {account_id} to plan '{plan_slug}' (price: {price_id})")
-                else:
-                    logger.warning(f"Account {account_id} not found for subscription update")
-
-                # Update subscription billing state
-                update_account_billing_state(cur, account_id=account_id, subscription=subscription)
+            if not await run_in_threadpool(_apply_subscription_plan, account_id, price_id, subscription):
+                return {"received": True}
 
             # FIX (cursor-wire-caching): invalidate plan catalog cache so the next
             # call to get_plan_catalog() re-fetches fresh Stripe data.
@@ -141,46 +199,7 @@ async def stripe_webhook(req: Request):
             return {"received": True}
 
         try:
-            period_end = subscription.get("current_period_end")  # Unix timestamp
-            has_remaining_time = period_end and period_end > _time.time()
-
-            with db_conn() as (conn, cur):
-                if has_remaining_time:
-                    # Paid time remains — schedule a future downgrade instead
-                    # of yanking access mid-cycle.
-                    cur.execute("""
-                        UPDATE accounts
-                        SET plan_downgrade_at = to_timestamp(%s),
-                            plan_downgrade_to = 'free',
-                            billing_status = 'cancel_at_period_end'
-                        WHERE id = %s::uuid
-                    """, (period_end, account_id))
-
-                    if cur.rowcount > 0:
-                        logger.info(
-                            f"Deferred downgrade for account {account_id} "
-                            f"until {period_end} (paid period still active)"
-                        )
-                    else:
-                        logger.warning(f"Account {account_id} not found for deferred downgrade")
-                else:
-                    # Period already ended — downgrade immediately
-                    cur.execute("""
-                        UPDATE accounts
-                        SET plan_slug = 'free',
-                            plan_downgrade_at = NULL,
-                            plan_downgrade_to = NULL
-                        WHERE id = %s::uuid
-                    """, (account_id,))
-
-                    if cur.rowcount > 0:
-                        logger.info(f"Downgraded account {account_id} to 'free' (subscription canceled, period ended)")
-                    else:
-                        logger.warning(f"Account {account_id} not found for subscription cancellation")
-
-                    # Clear subscription billing state only on immediate downgrade
-                    update_account_billing_state(cur, account_id=account_id, subscription=None)
-
+            await run_in_threadpool(_apply_subscription_deleted, account_id, subscription)
             invalidate_plan_cache()
             logger.info("Plan catalog cache invalidated after subscription cancellation")
 
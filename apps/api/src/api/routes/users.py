@@ -14,6 +14,7 @@ from typing import Optional
 from datetime import datetime
 from ..db import db_conn
 from ..auth import check_password, hash_password, sign_jwt
+from ..services import auth_cache
 from ..settings import settings
 
 router = APIRouter(prefix="/v1")
@@ -398,6 +399,7 @@ def change_email(body: EmailChangeRequest, request: Request, response: Response)
 
         updated_row = cur.fetchone()
         conn.commit()
+        auth_cache.revoke_user(user_id)
 
         # Fetch tier flags for a complete JWT (same claims as login)
         cur.execute("""
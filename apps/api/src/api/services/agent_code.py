@@ -93,44 +93,36 @@ def validate_agent_code(code: str) -> bool:
 
 # ── Lookup helpers ────────────────────────────────────────────────────
 
-def get_agent_by_code(cursor, agent_code: str) -> Optional[dict]:
+_AGENT_BY_CODE_SQL = """
+    SELECT 
+        u.id,
+        u.account_id,
+        u.first_name,
+        u.last_name,
+        CONCAT(u.first_name, ' ', u.last_name) as full_name,
+        u.email,
+        u.phone,
+        u.company_name,
+        COALESCE(u.photo_url, u.avatar_url) as photo_url,
+        u.license_number,
+        u.agent_code,
+        u.landing_page_headline,
+        u.landing_page_subheadline,
+        u.landing_page_theme_color,
+        u.landing_page_enabled,
+        u.landing_page_visits,
+        a.logo_url,
+        a.primary_color,
+        a.website_url,
+        u.job_title,
+        a.secondary_color
+    FROM users u
+    JOIN accounts a ON a.id = u.account_id
+    WHERE LOWER(u.agent_code) = LOWER(%s)
     """
-    Look up an agent by their unique code (case-insensitive so old
-    uppercase codes and new lowercase codes both resolve).
-    Joins accounts to pull branding (logo, primary_color).
-    """
-    cursor.execute(
-        """
-        SELECT 
-            u.id,
-            u.account_id,
-            u.first_name,
-            u.last_name,
-            CONCAT(u.first_name, ' ', u.last_name) as full_name,
-            u.email,
-            u.phone,
-            u.company_name,
-            COALESCE(u.photo_url, u.avatar_url) as photo_url,
-            u.license_number,
-            u.agent_code,
-            u.landing_page_headline,
-            u.landing_page_subheadline,
-            u.landing_page_theme_color,
-            u.landing_page_enabled,
-            u.landing_page_visits,
-            a.logo_url,
-            a.primary_color,
-            a.website_url,
-            u.job_title,
-            a.secondary_color
-        FROM users u
-        JOIN accounts a ON a.id = u.account_id
-        WHERE LOWER(u.agent_code) = LOWER(%s)
-        """,
-        (agent_code,),
-    )
-    row = cursor.fetchone()
-    
+
+
+def _agent_from_row(row) -> Optional[dict]:
     if not row:
         return None
     
@@ -159,14 +151,38 @@ def get_agent_by_code(cursor, agent_code: str) -> Optional[dict]:
     }
 
 
+def get_agent_by_code(cursor, agent_code: str) -> Optional[dict]:
+    """
+    Look up an agent by their unique code (case-insensitive so old
+    uppercase codes and new lowercase codes both resolve).
+    Joins accounts to pull branding (logo, primary_color).
+    """
+    cursor.execute(_AGENT_BY_CODE_SQL, (agent_code,))
+    return _agent_from_row(cursor.fetchone())
+
+
+async def aget_agent_by_code(cursor, agent_code: str) -> Optional[dict]:
+    """get_agent_by_code() for an adb_conn() cursor."""
+    await cursor.execute(_AGENT_BY_CODE_SQL, (agent_code,))
+    return _agent_from_row(await cursor.fetchone())
+
+
+_INCREMENT_VISITS_SQL = (
+    "UPDATE users SET landing_page_visits = landing_page_visits + 1 "
+    "WHERE LOWER(agent_code) = LOWER(%s)"
+)
+
+
 def increment_landing_page_visits(conn, cursor, agent_code: str) -> None:
     """
     Increment the visit counter for an agent's landing page
     (case-insensitive match so historical uppercase codes still work).
     """
-    cursor.execute(
-        "UPDATE users SET landing_page_visits = landing_page_visits + 1 "
-        "WHERE LOWER(agent_code) = LOWER(%s)",
-        (agent_code,),
-    )
+    cursor.execute(_INCREMENT_VISITS_SQL, (agent_code,))
     conn.commit()
+
+
+async def aincrement_landing_page_visits(conn, cursor, agent_code: str) -> None:
+    """increment_landing_page_visits() for an adb_conn() connection."""
+    await cursor.execute(_INCREMENT_VISITS_SQL, (agent_code,))
+    await conn.commit()
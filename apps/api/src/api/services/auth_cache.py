@@ -0,0 +1,378 @@
+"""
+Auth-context cache for AuthContextMiddleware.
+
+Every authenticated request used to run up to three pooled queries before the
+route started (jwt_blacklist check, api_keys hash lookup, users row). The
+resolved context — {"account_id", "user"} — is now cached by token hash in
+two tiers:
+
+- In-process LRU (AUTH_CACHE_LOCAL_TTL_S, AUTH_CACHE_LRU_SIZE): zero round
+  trips. Only used while this process is subscribed to the revocation
+  channel; if the subscription drops, the LRU is cleared and bypassed.
+- Redis (mr:auth:ctx:<key>, AUTH_CACHE_TTL_S): shared by all API workers.
+
+Keys: "jwt:<sha256(token)>" (the jwt_blacklist.token_hash) and
+"key:<api_keys.key_hash>". Failed lookups are never cached.
+
+Revocation stays immediate. revoke_token() (logout), revoke_api_key() (key
+deactivation) and revoke_user() (role / platform-admin / email changes):
+  1. set a revocation marker (mr:auth:revoked:<kind>:<id>) for one TTL, so a
+     request that resolved from the DB before the revocation can't write the
+     stale context back (the store script checks the markers atomically);
+  2. delete the Redis entries;
+  3. PUBLISH on mr:auth:revoked — every process evicts from its LRU.
+A process-local epoch guards the same race for the LRU.
+If Redis fails part-way, the revocation is retried once, then in a
+background thread until it lands or AUTH_CACHE_TTL_S has passed (the stale
+entry has expired by then). Until it lands, other workers can still serve
+the revoked context from Redis for up to AUTH_CACHE_TTL_S — the failure is
+logged at error level and counted in stats["revocation_failures"].
+
+Fails OPEN to the database: on any Redis error the middleware simply
+resolves from the DB as before (the blacklist check still fails closed).
+
+Usage:
+    from api.services import auth_cache
+
+    key = auth_cache.jwt_key(token)
+    ctx = await auth_cache.get(key)
+    if ctx is None:
+        epoch = auth_cache.epoch()
+        ctx = resolve_from_db(...)
+        await auth_cache.put(key, ctx, epoch)
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional
+
+import redis as _redis
+import redis.asyncio as _aioredis
+
+from ..cache import get_redis
+from ..settings import settings
+
+logger = logging.getLogger(__name__)
+
+AUTH_CACHE_ENABLED = os.getenv("AUTH_CACHE_ENABLED", "true").lower() == "true"
+AUTH_CACHE_TTL_S = int(os.getenv("AUTH_CACHE_TTL_S", "300"))
+AUTH_CACHE_LOCAL_TTL_S = float(os.getenv("AUTH_CACHE_LOCAL_TTL_S", "30"))
+AUTH_CACHE_LRU_SIZE = int(os.getenv("AUTH_CACHE_LRU_SIZE", "10000"))
+REDIS_RETRY_S = 5.0          # skip the Redis tier this long after an error
+REVOKE_RETRY_MAX_S = 10.0    # background revocation retry backoff cap
+LISTENER_BACKOFF_MAX_S = 30.0
+
+PREFIX = "mr:auth"
+CHANNEL = f"{PREFIX}:revoked"
+
+# KEYS[1] ctx key, KEYS[2] ctx revocation marker,
+# KEYS[3] user revocation marker, KEYS[4] user's ctx-key set
+# ARGV[1] JSON context, ARGV[2] ttl seconds, ARGV[3] "1" when the context has a user
+# Returns 1 if stored, 0 if a revocation is in flight
+STORE_LUA = """
+if redis.call('EXISTS', KEYS[2]) == 1 then return 0 end
+if ARGV[3] == '1' and redis.call('EXISTS', KEYS[3]) == 1 then return 0 end
+redis.call('SET', KEYS[1], ARGV[1], 'EX', ARGV[2])
+if ARGV[3] == '1' then
+  redis.call('SADD', KEYS[4], KEYS[1])
+  redis.call('EXPIRE', KEYS[4], ARGV[2])
+end
+return 1
+"""
+
+stats = {"local_hits": 0, "redis_hits": 0, "misses": 0, "stored": 0,
+         "revocations": 0, "redis_errors": 0, "revocation_failures": 0}
+
+
+def token_hash(token: str) -> str:
+    """sha256 of a JWT — the same hash jwt_blacklist stores."""
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+def jwt_key(token: str) -> str:
+    return f"jwt:{token_hash(token)}"
+
+
+def api_key_key(key_hash: str) -> str:
+    return f"key:{key_hash}"
+
+
+def _ctx_key(key: str) -> str:
+    return f"{PREFIX}:ctx:{key}"
+
+
+def _marker(kind: str, ident: str) -> str:
+    return f"{PREFIX}:revoked:{kind}:{ident}"
+
+
+def _user_set(user_id: str) -> str:
+    return f"{PREFIX}:user:{user_id}"
+
+
+def _user_id(ctx: Dict) -> Optional[str]:
+    return (ctx.get("user") or {}).get("id")
+
+
+# ── In-process tier ──────────────────────────────────────────────────────────
+
+class _LocalCache:
+    """TTL'd LRU, evicted by the revocation listener thread."""
+
+    def __init__(self, maxsize: int, ttl_s: float):
+        self.maxsize = maxsize
+        self.ttl_s = ttl_s
+        self.epoch = 0
+        self._data: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Dict]:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            expires, ctx = item
+            if expires < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return ctx
+
+    def set(self, key: str, ctx: Dict, epoch: int) -> None:
+        with self._lock:
+            if epoch != self.epoch:
+                return  # something was revoked while this context was resolved
+            self._data[key] = (time.monotonic() + self.ttl_s, ctx)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def evict(self, kind: str, ident: str) -> None:
+        with self._lock:
+            self.epoch += 1
+            if kind == "ctx":
+                self._data.pop(ident, None)
+            else:
+                for key in [k for k, (_, ctx) in self._data.items() if _user_id(ctx) == ident]:
+                    del self._data[key]
+
+    def clear(self) -> None:
+        with self._lock:
+            self.epoch += 1
+            self._data.clear()
+
+
+_local = _LocalCache(AUTH_CACHE_LRU_SIZE, AUTH_CACHE_LOCAL_TTL_S)
+_listening = False                 # LRU is only trusted while subscribed
+_listener_thread: Optional[threading.Thread] = None
+_listener_lock = threading.Lock()
+
+
+def _handle_message(data: str) -> None:
+    kind, _, ident = data.partition(":")
+    if kind in ("ctx", "user") and ident:
+        _local.evict(kind, ident)
+
+
+def _listen() -> None:
+    """Revocation subscriber (daemon thread): evicts LRU entries on PUBLISH."""
+    global _listening
+    backoff = 1.0
+    while True:
+        pubsub = None
+        try:
+            client = _redis.from_url(settings.REDIS_URL, decode_responses=True,
+                                     socket_connect_timeout=2, health_check_interval=30)
+            pubsub = client.pubsub()
+            pubsub.subscribe(CHANNEL)
+            for message in pubsub.listen():
+                if message["type"] == "subscribe":
+                    _local.clear()
+                    _listening = True
+                    backoff = 1.0
+                elif message["type"] == "message":
+                    _handle_message(message["data"])
+        except Exception as exc:
+            logger.debug("auth cache: revocation listener disconnected: %s", exc)
+        finally:
+            # Revocations may be missed from here on — stop trusting the LRU
+            _listening = False
+            _local.clear()
+            if pubsub is not None:
+                try:
+                    pubsub.close()
+                except Exception:
+                    pass
+        time.sleep(backoff)
+        backoff = min(backoff * 2, LISTENER_BACKOFF_MAX_S)
+
+
+def _ensure_listener() -> None:
+    global _listener_thread
+    if _listener_thread is not None:
+        return
+    with _listener_lock:
+        if _listener_thread is None:
+            _listener_thread = threading.Thread(target=_listen, name="auth-cache-revocations",
+                                                daemon=True)
+            _listener_thread.start()
+
+
+# ── Redis tier ───────────────────────────────────────────────────────────────
+
+_aredis: Optional[_aioredis.Redis] = None
+_store_script = None
+_redis_down_until = 0.0
+
+
+def _get_aredis() -> Optional[_aioredis.Redis]:
+    global _aredis, _store_script
+    if time.monotonic() < _redis_down_until:
+        return None
+    if _aredis is None:
+        _aredis = _aioredis.from_url(
+            settings.REDIS_URL,
+            decode_responses=True,
+            socket_connect_timeout=1,
+            socket_timeout=1,
+        )
+        _store_script = _aredis.register_script(STORE_LUA)
+    return _aredis
+
+
+def _redis_failed(exc: Exception) -> None:
+    global _redis_down_until
+    stats["redis_errors"] += 1
+    _redis_down_until = time.monotonic() + REDIS_RETRY_S
+    logger.debug("auth cache: Redis unavailable (resolving from DB): %s", exc)
+
+
+# ── Public API ───────────────────────────────────────────────────────────────
+
+def epoch() -> int:
+    """Capture before resolving from the DB; pass to put()."""
+    return _local.epoch
+
+
+async def get(key: str) -> Optional[Dict]:
+    """Cached {"account_id", "user"} for a token key, or None."""
+    if not AUTH_CACHE_ENABLED:
+        return None
+    _ensure_listener()
+    if _listening:
+        ctx = _local.get(key)
+        if ctx is not None:
+            stats["local_hits"] += 1
+            return ctx
+
+    redis = _get_aredis()
+    if redis is not None:
+        start_epoch = _local.epoch
+        try:
+            raw = await redis.get(_ctx_key(key))
+        except Exception as exc:
+            _redis_failed(exc)
+            raw = None
+        if raw is not None:
+            ctx = json.loads(raw)
+            stats["redis_hits"] += 1
+            if _listening:
+                _local.set(key, ctx, start_epoch)
+            return ctx
+    stats["misses"] += 1
+    return None
+
+
+async def put(key: str, ctx: Dict, resolved_epoch: int) -> None:
+    """Cache a context resolved from the DB (skipped if revoked meanwhile)."""
+    if not AUTH_CACHE_ENABLED:
+        return
+    if _listening:
+        _local.set(key, ctx, resolved_epoch)
+    redis = _get_aredis()
+    if redis is None:
+        return
+    user_id = _user_id(ctx) or ""
+    try:
+        stored = await _store_script(
+            keys=[_ctx_key(key), _marker("ctx", key), _marker("user", user_id), _user_set(user_id)],
+            args=[json.dumps(ctx), AUTH_CACHE_TTL_S, "1" if user_id else "0"],
+        )
+        stats["stored"] += int(stored or 0)
+    except Exception as exc:
+        _redis_failed(exc)
+
+
+def _apply_revocation(kind: str, ident: str) -> None:
+    """Marker, delete, publish. Raises on Redis errors."""
+    r = get_redis()
+    r.set(_marker(kind, ident), "1", ex=AUTH_CACHE_TTL_S)
+    if kind == "ctx":
+        r.delete(_ctx_key(ident))
+    else:
+        members = r.smembers(_user_set(ident))
+        r.delete(_user_set(ident), *members)
+    r.publish(CHANNEL, f"{kind}:{ident}")
+
+
+def _retry_revocation(kind: str, ident: str, deadline: float) -> None:
+    """Background retries until the revocation lands or the entry has expired."""
+    delay = 0.5
+    while time.monotonic() < deadline:
+        time.sleep(min(delay, max(0.0, deadline - time.monotonic())))
+        try:
+            _apply_revocation(kind, ident)
+        except Exception:
+            delay = min(delay * 2, REVOKE_RETRY_MAX_S)
+            continue
+        logger.info("auth cache: %s revocation applied after retrying", kind)
+        return
+    logger.warning("auth cache: gave up retrying a %s revocation (cached entry has expired)", kind)
+
+
+def _retry_later(kind: str, ident: str, deadline: float) -> None:
+    threading.Thread(target=_retry_revocation, args=(kind, ident, deadline),
+                     name="auth-cache-revoke-retry", daemon=True).start()
+
+
+def _revoke(kind: str, ident: str) -> None:
+    """Sync (called from plain-def routes): marker, delete, publish."""
+    stats["revocations"] += 1
+    _local.evict(kind, ident)  # this process, right away
+    if not AUTH_CACHE_ENABLED:
+        return
+    deadline = time.monotonic() + AUTH_CACHE_TTL_S
+    for _ in range(2):
+        try:
+            _apply_revocation(kind, ident)
+            return
+        except Exception as exc:
+            error = exc
+    # Other workers may keep serving the revoked context from Redis (or, if
+    # they missed the PUBLISH, their LRU) until this lands or the entry expires
+    stats["revocation_failures"] += 1
+    logger.error(
+        "auth cache: %s revocation failed (%s); the cached context may still "
+        "authenticate for up to %ss — retrying in the background",
+        kind, error, AUTH_CACHE_TTL_S,
+    )
+    _retry_later(kind, ident, deadline)
+
+
+def revoke_token(hashed_token: str) -> None:
+    """A JWT was blacklisted (logout). Takes token_hash(token)."""
+    _revoke("ctx", f"jwt:{hashed_token}")
+
+
+def revoke_api_key(key_hash: str) -> None:
+    """An API key was deactivated."""
+    _revoke("ctx", api_key_key(key_hash))
+
+
+def revoke_user(user_id: str) -> None:
+    """A user's cached fields changed (role, platform admin, email, status)."""
+    _revoke("user", str(user_id))
@@ -12,6 +12,7 @@ Provides email sending functionality for:
 import logging
 from typing import Optional, Dict, Any, List
 import httpx
+from ..metrics import track_vendor_call
 from ..settings import settings
 
 logger = logging.getLogger(__name__)
@@ -99,12 +100,14 @@ class EmailService:
 
         try:
             async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    SENDGRID_API_URL,
-                    headers=self._headers(),
-                    json=payload,
-                    timeout=30.0,
-                )
+                with track_vendor_call("sendgrid") as call:
+                    response = await client.post(
+                        SENDGRID_API_URL,
+                        headers=self._headers(),
+                        json=payload,
+                        timeout=30.0,
+                    )
+                    call["status"] = response.status_code
 
                 if response.status_code in (200, 201, 202):
                     logger.info(f"Email sent via SendGrid to {to}: {subject}")
@@ -136,13 +139,14 @@ class EmailService:
         payload = self._build_payload(to, subject, html, text, reply_to, tags)
 
         try:
-            with httpx.Client() as client:
+            with httpx.Client() as client, track_vendor_call("sendgrid") as call:
                 response = client.post(
                     SENDGRID_API_URL,
                     headers=self._headers(),
                     json=payload,
                     timeout=30.0,
                 )
+                call["status"] = response.status_code
 
                 if response.status_code in (200, 201, 202):
                     logger.info(f"Email sent via SendGrid to {to}: {subject}")
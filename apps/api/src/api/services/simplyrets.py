@@ -8,11 +8,18 @@ Auth: HTTP Basic Auth with SIMPLYRETS_USERNAME and SIMPLYRETS_PASSWORD
 Base URL: https://api.simplyrets.com
 """
 
+import copy
+import hashlib
+import json
 import os
 import logging
 from typing import Dict, List, Optional
 import httpx
 
+from ..metrics import track_vendor_call
+from .single_flight import simplyrets_flight
+from .vendor_rate_limit import simplyrets_limiter
+
 logger = logging.getLogger(__name__)
 
 # SimplyRETS Configuration - MUST match worker env vars
@@ -20,21 +27,32 @@ BASE_URL = os.getenv("SIMPLYRETS_BASE_URL", "https://api.simplyrets.com")
 USERNAME = os.getenv("SIMPLYRETS_USERNAME", "simplyrets")
 PASSWORD = os.getenv("SIMPLYRETS_PASSWORD", "simplyrets")
 TIMEOUT = float(os.getenv("SIMPLYRETS_TIMEOUT_S", "30"))
+PAGE_SIZE = 500  # SimplyRETS max per request
 
 # Log configuration on startup (mask password) - use WARNING so it shows in Render logs
 logger.warning(f"SimplyRETS configured: URL={BASE_URL}, User={USERNAME}, Timeout={TIMEOUT}s")
 
 
-async def fetch_properties(params: Dict, limit: Optional[int] = None) -> List[Dict]:
+async def fetch_properties(
+    params: Dict,
+    limit: Optional[int] = None,
+    account_id: Optional[str] = None,
+    caller: str = "api",
+) -> List[Dict]:
     """
     Fetch properties from SimplyRETS API.
     
     This is an async version of the worker's fetch_properties function.
     Uses HTTP Basic Auth (same as the working worker implementation).
+    Every request first takes a token from the rate-limit bucket shared
+    with the worker (see services/vendor_rate_limit.py). Concurrent calls
+    with identical params share one request (services/single_flight.py).
     
     Args:
         params: SimplyRETS query parameters (q, status, type, minbeds, etc.)
         limit: Maximum number of results to return
+        account_id: Account the call is made for (fair-share slice)
+        caller: Label for per-caller wait metrics
         
     Returns:
         List of property dictionaries from SimplyRETS
@@ -42,21 +60,44 @@ async def fetch_properties(params: Dict, limit: Optional[int] = None) -> List[Di
     # Apply limit to params
     query_params = {**params}
     if limit:
-        query_params["limit"] = min(limit, 500)  # SimplyRETS max per request
+        query_params["limit"] = min(limit, PAGE_SIZE)
     
     # Ensure we always include type=RES to exclude rentals
     if "type" not in query_params:
         query_params["type"] = "RES"
     
+    # Concurrent identical queries (any API worker) share one request; each
+    # caller gets its own copies of the listing dicts, since callers annotate them
+    flight_key = hashlib.sha1(
+        json.dumps(query_params, sort_keys=True, default=str).encode()
+    ).hexdigest()
+    return await simplyrets_flight.do(
+        flight_key,
+        lambda: _fetch(query_params, account_id, caller),
+        copy=_copy_listings,
+    )
+
+
+def _copy_listings(listings: List[Dict]) -> List[Dict]:
+    # Deep: listings nest property/address/geo/mls dicts and a photos list
+    return copy.deepcopy(listings)
+
+
+async def _fetch(query_params: Dict, account_id: Optional[str], caller: str) -> List[Dict]:
+    """One rate-limited GET /properties."""
     logger.warning(f"SimplyRETS request: GET /properties params={query_params}")
+
+    await simplyrets_limiter.acquire(account_id=account_id, caller=caller)
     
     async with httpx.AsyncClient(timeout=TIMEOUT) as client:
         try:
-            response = await client.get(
-                f"{BASE_URL}/properties",
-                params=query_params,
-                auth=(USERNAME, PASSWORD),  # HTTP Basic Auth - CRITICAL!
-            )
+            with track_vendor_call("simplyrets") as call:
+                response = await client.get(
+                    f"{BASE_URL}/properties",
+                    params=query_params,
+                    auth=(USERNAME, PASSWORD),  # HTTP Basic Auth - CRITICAL!
+                )
+                call["status"] = response.status_code
             
             # Log response status
             logger.warning(f"SimplyRETS response: status={response.status_code}")
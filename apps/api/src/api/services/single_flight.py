@@ -0,0 +1,211 @@
+"""
+Request coalescing (single-flight) for vendor lookups.
+
+When an agent shares a lead page, dozens of consumers can search the same
+address within seconds, and every one of them used to fire its own SiteX
+request before the first answer reached the cache. A SingleFlight makes
+concurrent identical calls share ONE in-flight request:
+
+- In process: the first caller for a key starts the call as a task; callers
+  that arrive while it runs await the same task. The task is shielded, so a
+  caller that disconnects never cancels the lookup for the others.
+- Across Uvicorn workers (RedisSingleFlight): the leader also takes a short
+  Redis lock (SET NX PX) for the key. Workers that lose the race poll for
+  the leader's answer — the caller's own cache lookup (`recheck`), or a
+  short-lived result slot in Redis — instead of calling the vendor.
+
+Only successful answers are shared across workers; if the leader fails, its
+lock is released and the next waiter makes the call itself. Fails OPEN on
+Redis errors (like vendor_rate_limit.py): no lock just means no cross-worker
+coalescing.
+
+Usage:
+    from api.services.single_flight import RedisSingleFlight
+
+    sitex_flight = RedisSingleFlight("sitex")
+    data = await sitex_flight.do(key, lambda: client.search_by_address(...),
+                                 recheck=lambda: _get_cached(key))  # async cache read
+"""
+
+import asyncio
+import json
+import logging
+import os
+import time
+import uuid
+from typing import Any, Awaitable, Callable, Dict, Optional, TypeVar
+
+import redis.asyncio as _aioredis
+
+from ..settings import settings
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+SINGLE_FLIGHT_REDIS_ENABLED = os.getenv("SINGLE_FLIGHT_REDIS_ENABLED", "true").lower() == "true"
+# Longer than the vendor timeouts (30s), so a live leader's lock never lapses
+SINGLE_FLIGHT_LOCK_TTL_S = float(os.getenv("SINGLE_FLIGHT_LOCK_TTL_S", "35"))
+SINGLE_FLIGHT_RESULT_TTL_S = int(os.getenv("SINGLE_FLIGHT_RESULT_TTL_S", "10"))
+POLL_INTERVAL_S = 0.1
+
+# Delete the lock only if we still own it
+RELEASE_LUA = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+  return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+class SingleFlight:
+    """Coalesce concurrent identical async calls within this process."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self.stats: Dict[str, int] = {"calls": 0, "leaders": 0, "coalesced": 0}
+
+    async def do(
+        self,
+        key: str,
+        fn: Callable[[], Awaitable[T]],
+        copy: Optional[Callable[[T], T]] = None,
+        **lead_kwargs: Any,
+    ) -> T:
+        """
+        Return fn()'s result, sharing one in-flight call among concurrent
+        callers with the same key. With a copy function every caller gets
+        its own copy(result) (for results callers mutate). Exceptions
+        propagate to every caller.
+        """
+        self.stats["calls"] += 1
+        task = self._inflight.get(key)
+        if task is None:
+            self.stats["leaders"] += 1
+            task = asyncio.ensure_future(self._lead(key, fn, **lead_kwargs))
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._done(key, t))
+        else:
+            self.stats["coalesced"] += 1
+        result = await asyncio.shield(task)
+        return copy(result) if copy is not None else result
+
+    def _done(self, key: str, task: asyncio.Task) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            task.exception()  # retrieved, even if every caller went away
+
+    async def _lead(self, key: str, fn: Callable[[], Awaitable[T]], **_kwargs: Any) -> T:
+        return await fn()
+
+
+class RedisSingleFlight(SingleFlight):
+    """SingleFlight that also coalesces across processes through a Redis lock."""
+
+    def __init__(
+        self,
+        name: str,
+        lock_ttl_s: float = SINGLE_FLIGHT_LOCK_TTL_S,
+        result_ttl_s: int = SINGLE_FLIGHT_RESULT_TTL_S,
+        enabled: bool = SINGLE_FLIGHT_REDIS_ENABLED,
+    ):
+        super().__init__(name)
+        self.lock_ttl_s = lock_ttl_s
+        self.result_ttl_s = result_ttl_s
+        self.enabled = enabled
+        self._redis: Optional[_aioredis.Redis] = None
+        self._release = None
+        self.stats.update({"remote_coalesced": 0, "redis_errors": 0})
+
+    def _key(self, kind: str, key: str) -> str:
+        return f"mr:singleflight:{self.name}:{kind}:{key}"
+
+    def _get_redis(self) -> _aioredis.Redis:
+        if self._redis is None:
+            self._redis = _aioredis.from_url(
+                settings.REDIS_URL,
+                decode_responses=True,
+                socket_connect_timeout=2,
+                socket_timeout=2,
+            )
+            self._release = self._redis.register_script(RELEASE_LUA)
+        return self._redis
+
+    async def _lead(
+        self,
+        key: str,
+        fn: Callable[[], Awaitable[T]],
+        recheck: Optional[Callable[[], Awaitable[Optional[T]]]] = None,
+    ) -> T:
+        """
+        Run fn() once across all workers. `recheck` (async — it runs every
+        POLL_INTERVAL_S while waiting) reads the answer another worker's
+        leader left behind (e.g. the caller's own cache); without it
+        the result is published to a short-lived Redis slot (must be JSON),
+        and only when another worker registered as waiting for it.
+        """
+        if not self.enabled:
+            return await fn()
+
+        token = uuid.uuid4().hex
+        lock_key = self._key("lock", key)
+        result_key = self._key("result", key)
+        waiters_key = self._key("waiters", key)
+        deadline = time.monotonic() + self.lock_ttl_s + 1
+        waiting = acquired = False
+        try:
+            redis = self._get_redis()
+            while True:
+                if await redis.set(lock_key, token, nx=True, px=int(self.lock_ttl_s * 1000)):
+                    acquired = True
+                    break
+                # Another worker is fetching this key — wait for its answer
+                if not waiting and recheck is None:
+                    pipe = redis.pipeline(transaction=False)
+                    pipe.incr(waiters_key)
+                    pipe.expire(waiters_key, int(self.lock_ttl_s) + 1)
+                    await pipe.execute()
+                    waiting = True
+                if recheck is not None:
+                    found = await recheck()
+                else:
+                    raw = await redis.get(result_key)
+                    found = json.loads(raw) if raw is not None else None
+                if found is not None:
+                    self.stats["remote_coalesced"] += 1
+                    return found
+                if time.monotonic() >= deadline:
+                    logger.warning("%s single-flight: gave up waiting on %s", self.name, key)
+                    break
+                await asyncio.sleep(POLL_INTERVAL_S)
+        except Exception as exc:
+            self.stats["redis_errors"] += 1
+            logger.debug("%s single-flight: Redis unavailable (calling directly): %s", self.name, exc)
+        if not acquired:
+            return await fn()
+
+        try:
+            result = await fn()
+            if recheck is None:
+                try:
+                    pipe = redis.pipeline(transaction=True)
+                    pipe.get(waiters_key)
+                    pipe.delete(waiters_key)
+                    waiters, _ = await pipe.execute()
+                    if waiters:
+                        await redis.set(result_key, json.dumps(result, default=str),
+                                        ex=self.result_ttl_s)
+                except Exception as exc:
+                    logger.debug("%s single-flight: failed to publish %s: %s", self.name, key, exc)
+            return result
+        finally:
+            try:
+                await self._release(keys=[lock_key], args=[token])
+            except Exception as exc:
+                logger.debug("%s single-flight: failed to release %s: %s", self.name, key, exc)
+
+
+sitex_flight = RedisSingleFlight("sitex")
+simplyrets_flight = RedisSingleFlight("simplyrets")
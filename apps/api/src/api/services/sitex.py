@@ -18,13 +18,19 @@ Environment Variables Required:
 import httpx
 import logging
 import hashlib
+import re
 import time
 import asyncio
-from typing import Optional, Dict, Any
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional
 from pydantic import BaseModel, Field
 from datetime import datetime, timedelta
 import os
 
+from ..cache import acache_get, acache_set
+from ..metrics import track_vendor_call
+from .single_flight import sitex_flight
+
 logger = logging.getLogger(__name__)
 
 
@@ -155,17 +161,19 @@ class SiteXTokenManager:
         logger.info("Refreshing SiteX access token...")
         
         try:
-            response = await self._client.post(
-                self.config.token_url,
-                data={
-                    "grant_type": "client_credentials",
-                    "client_id": self.config.client_id,
-                    "client_secret": self.config.client_secret,
-                },
-                headers={
-                    "Content-Type": "application/x-www-form-urlencoded"
-                }
-            )
+            with track_vendor_call("sitex_token") as call:
+                response = await self._client.post(
+                    self.config.token_url,
+                    data={
+                        "grant_type": "client_credentials",
+                        "client_id": self.config.client_id,
+                        "client_secret": self.config.client_secret,
+                    },
+                    headers={
+                        "Content-Type": "application/x-www-form-urlencoded"
+                    }
+                )
+                call["status"] = response.status_code
             response.raise_for_status()
             
             data = response.json()
@@ -353,13 +361,15 @@ class SiteXClient:
         token = await self._token_manager.get_token()
         
         try:
-            response = await self._client.get(
-                self.config.search_url,
-                params=params,
-                headers={
-                    "Authorization": f"Bearer {token}"
-                }
-            )
+            with track_vendor_call("sitex") as call:
+                response = await self._client.get(
+                    self.config.search_url,
+                    params=params,
+                    headers={
+                        "Authorization": f"Bearer {token}"
+                    }
+                )
+                call["status"] = response.status_code
             response.raise_for_status()
             return response.json()
             
@@ -370,11 +380,13 @@ class SiteXClient:
                 self._token_manager._token = None
                 token = await self._token_manager.get_token()
                 
-                response = await self._client.get(
-                    self.config.search_url,
-                    params=params,
-                    headers={"Authorization": f"Bearer {token}"}
-                )
+                with track_vendor_call("sitex") as call:
+                    response = await self._client.get(
+                        self.config.search_url,
+                        params=params,
+                        headers={"Authorization": f"Bearer {token}"}
+                    )
+                    call["status"] = response.status_code
                 response.raise_for_status()
                 return response.json()
             raise SiteXError(f"SiteX API error: {e}")
@@ -558,38 +570,144 @@ class SiteXClient:
 # CACHING LAYER
 # =============================================================================
 
-# Simple in-memory cache (use Redis in production)
-_property_cache: Dict[str, tuple] = {}  # key -> (PropertyData, expiry_timestamp)
+# Two tiers:
+#   1. A small in-process LRU (SITEX_CACHE_LRU_SIZE entries) — no network hop
+#      for the addresses a Uvicorn worker just served
+#   2. Redis (api/cache.py), shared by every API worker and surviving deploys
+#
+# Not-found and multi-match answers are cached too (negative entries, shorter
+# SITEX_NEGATIVE_TTL_S) so repeated lead-page searches for a bad address don't
+# hit SiteX every time. Transient SiteX errors are never cached.
+#
+# Both tiers fail open: a Redis error is a miss, never a failed lookup.
+
 CACHE_VERSION = "v3"
 CACHE_TTL_HOURS = 24
+SITEX_NEGATIVE_TTL_S = int(os.getenv("SITEX_NEGATIVE_TTL_S", "3600"))
+SITEX_CACHE_LRU_SIZE = int(os.getenv("SITEX_CACHE_LRU_SIZE", "512"))
+
+NOT_FOUND = "not_found"
+MULTI_MATCH = "multi_match"
+
+_lru: "OrderedDict[str, tuple]" = OrderedDict()  # key -> (PropertyData | negative kind, expiry)
+_cache_stats: Dict[str, int] = {
+    "lru_hits": 0,
+    "redis_hits": 0,
+    "negative_hits": 0,
+    "misses": 0,
+    "stores": 0,
+    "negative_stores": 0,
+}
+
+# Spelled-out street words -> USPS abbreviations, so "123 North Main Street"
+# and "123 n main st." share a cache entry
+_ADDRESS_ABBREVIATIONS = {
+    "street": "st", "avenue": "ave", "av": "ave", "road": "rd", "drive": "dr",
+    "boulevard": "blvd", "lane": "ln", "court": "ct", "place": "pl",
+    "circle": "cir", "terrace": "ter", "parkway": "pkwy", "highway": "hwy",
+    "trail": "trl", "square": "sq",
+    "north": "n", "south": "s", "east": "e", "west": "w",
+    "northeast": "ne", "northwest": "nw", "southeast": "se", "southwest": "sw",
+    "apartment": "apt", "suite": "ste",
+}
+_ADDRESS_PUNCT = re.compile(r"[.,]")
+_ADDRESS_UNIT = re.compile(r"#\s*")
+
+
+def normalize_address(text: str) -> str:
+    """Canonical form of an address or city/state/ZIP line for cache keys."""
+    text = _ADDRESS_UNIT.sub("# ", _ADDRESS_PUNCT.sub(" ", (text or "").lower()))
+    return " ".join(_ADDRESS_ABBREVIATIONS.get(w, w) for w in text.split())
 
 
 def _get_cache_key(address: str, city_state_zip: str = "") -> str:
     """Generate cache key"""
-    normalized = f"{address.lower().strip()}|{city_state_zip.lower().strip()}"
+    normalized = f"{normalize_address(address)}|{normalize_address(city_state_zip)}"
     hash_key = hashlib.md5(normalized.encode()).hexdigest()[:16]
     return f"{CACHE_VERSION}:{hash_key}"
 
 
-def _get_cached(key: str) -> Optional[PropertyData]:
-    """Get from cache if not expired"""
-    if key in _property_cache:
-        data, expiry = _property_cache[key]
+def _redis_key(key: str) -> str:
+    return f"sitex:{key}"
+
+
+def _lru_put(key: str, value: Any, ttl_s: int):
+    _lru[key] = (value, time.time() + ttl_s)
+    _lru.move_to_end(key)
+    while len(_lru) > SITEX_CACHE_LRU_SIZE:
+        _lru.popitem(last=False)
+
+
+async def _get_cached(key: str, record: bool = True) -> Optional[Any]:
+    """
+    PropertyData, NOT_FOUND / MULTI_MATCH for a cached negative answer, or
+    None on a miss. record=False (single-flight polling) skips the counters.
+    """
+    entry = _lru.get(key)
+    if entry is not None:
+        value, expiry = entry
         if time.time() < expiry:
-            logger.debug(f"Cache hit: {key}")
-            return data
+            _lru.move_to_end(key)
+            if record:
+                _cache_stats["negative_hits" if isinstance(value, str) else "lru_hits"] += 1
+            logger.debug(f"Cache hit (memory): {key}")
+            return value
+        del _lru[key]
+
+    cached = await acache_get(_redis_key(key))
+    if cached is not None:
+        try:
+            if cached.get("negative"):
+                value, ttl_s, stat = cached["negative"], SITEX_NEGATIVE_TTL_S, "negative_hits"
+            else:
+                value, ttl_s = PropertyData(**cached["data"]), CACHE_TTL_HOURS * 3600
+                stat = "redis_hits"
+        except Exception as e:
+            logger.warning(f"Discarding unreadable SiteX cache entry {key}: {e}")
         else:
-            del _property_cache[key]
+            # The memory tier may outlive the Redis TTL by up to one TTL; fine
+            # for property facts that change on the order of months
+            _lru_put(key, value, ttl_s)
+            if record:
+                _cache_stats[stat] += 1
+            logger.debug(f"Cache hit (redis): {key}")
+            return value
+
+    if record:
+        _cache_stats["misses"] += 1
     return None
 
 
-def _set_cache(key: str, data: PropertyData):
+async def _set_cache(key: str, data: PropertyData):
     """Set cache with TTL"""
-    expiry = time.time() + (CACHE_TTL_HOURS * 3600)
-    _property_cache[key] = (data, expiry)
+    ttl_s = CACHE_TTL_HOURS * 3600
+    _lru_put(key, data, ttl_s)
+    await acache_set(_redis_key(key), {"data": data.model_dump()}, ttl_seconds=ttl_s)
+    _cache_stats["stores"] += 1
     logger.debug(f"Cached: {key}")
 
 
+async def _set_negative(key: str, kind: str):
+    """Remember that SiteX had no single answer for this key (NOT_FOUND / MULTI_MATCH)."""
+    _lru_put(key, kind, SITEX_NEGATIVE_TTL_S)
+    await acache_set(_redis_key(key), {"negative": kind}, ttl_seconds=SITEX_NEGATIVE_TTL_S)
+    _cache_stats["negative_stores"] += 1
+    logger.debug(f"Cached negative ({kind}): {key}")
+
+
+def cache_stats() -> Dict[str, Any]:
+    """Hit/miss counters for this API process."""
+    lookups = sum(_cache_stats[k] for k in ("lru_hits", "redis_hits", "negative_hits", "misses"))
+    hits = lookups - _cache_stats["misses"]
+    return {
+        "pid": os.getpid(),
+        **_cache_stats,
+        "hit_rate": round(hits / lookups, 3) if lookups else None,
+        "lru_size": len(_lru),
+        "lru_capacity": SITEX_CACHE_LRU_SIZE,
+    }
+
+
 # =============================================================================
 # PUBLIC API
 # =============================================================================
@@ -607,6 +725,41 @@ async def get_sitex_client() -> SiteXClient:
     return _client
 
 
+async def _search_and_cache(
+    cache_key: str, search: Callable[[SiteXClient], Awaitable[PropertyData]]
+) -> Any:
+    """
+    Run one SiteX search and cache the answer. Returns PropertyData, or
+    NOT_FOUND / MULTI_MATCH (cached as negative entries); transient
+    SiteXErrors propagate uncached.
+    """
+    try:
+        data = await search(await get_sitex_client())
+    except SiteXNotFoundError:
+        await _set_negative(cache_key, NOT_FOUND)
+        return NOT_FOUND
+    except SiteXMultiMatchError:
+        await _set_negative(cache_key, MULTI_MATCH)
+        return MULTI_MATCH
+    await _set_cache(cache_key, data)
+    return data
+
+
+async def _coalesced_search(
+    cache_key: str, search: Callable[[SiteXClient], Awaitable[PropertyData]]
+) -> Any:
+    """
+    _search_and_cache shared by concurrent identical lookups: in this process
+    they await one task; other API workers wait on the Redis lock and pick
+    the answer up from the cache (services/single_flight.py).
+    """
+    return await sitex_flight.do(
+        cache_key,
+        lambda: _search_and_cache(cache_key, search),
+        recheck=lambda: _get_cached(cache_key, record=False),
+    )
+
+
 async def lookup_property(
     address: str,
     city_state_zip: str = "",
@@ -639,34 +792,36 @@ async def lookup_property(
     # Check cache
     cache_key = _get_cache_key(address, city_state_zip)
     if use_cache:
-        cached = _get_cached(cache_key)
-        if cached:
+        cached = await _get_cached(cache_key)
+        if isinstance(cached, PropertyData):
             return cached
+        if cached is not None:
+            logger.info(f"SiteX lookup skipped (cached {cached}): {address}, {city_state_zip}")
+            return None
     
-    # Lookup via SiteX
+    # Lookup via SiteX (concurrent identical lookups share one request)
+    def search(client: SiteXClient):
+        return client.search_by_address(address, city_state_zip)
+
     try:
-        client = await get_sitex_client()
-        data = await client.search_by_address(address, city_state_zip)
-        
-        # Cache successful result
-        _set_cache(cache_key, data)
-        
+        if use_cache:
+            result = await _coalesced_search(cache_key, search)
+        else:
+            result = await _search_and_cache(cache_key, search)
+    except SiteXError as e:
+        logger.error(f"SiteX error: {e}")
+        return None
+
+    if isinstance(result, PropertyData):
         logger.info(f"SiteX lookup successful: {address}")
-        return data
-        
-    except SiteXNotFoundError:
+        return result
+    if result == NOT_FOUND:
         logger.warning(f"Property not found: {address}, {city_state_zip}")
-        return None
-        
-    except SiteXMultiMatchError as e:
-        logger.warning(f"Multiple matches for: {address}. Returning first match.")
+    else:
         # For now, return None - caller can handle multi-match if needed
         # In UI, you might want to show a picker
-        return None
-        
-    except SiteXError as e:
-        logger.error(f"SiteX error: {e}")
-        return None
+        logger.warning(f"Multiple matches for: {address}. Returning first match.")
+    return None
 
 
 async def lookup_property_by_apn(fips: str, apn: str) -> Optional[PropertyData]:
@@ -680,22 +835,25 @@ async def lookup_property_by_apn(fips: str, apn: str) -> Optional[PropertyData]:
     Returns:
         PropertyData or None
     """
-    cache_key = f"{CACHE_VERSION}:apn:{fips}:{apn}"
+    cache_key = f"{CACHE_VERSION}:apn:{fips.strip()}:{apn.strip().upper()}"
     
-    cached = _get_cached(cache_key)
-    if cached:
+    cached = await _get_cached(cache_key)
+    if isinstance(cached, PropertyData):
         return cached
+    if cached is not None:
+        return None
     
     try:
-        client = await get_sitex_client()
-        data = await client.search_by_apn(fips, apn)
-        _set_cache(cache_key, data)
-        return data
-        
+        result = await _coalesced_search(cache_key, lambda client: client.search_by_apn(fips, apn))
     except SiteXError as e:
         logger.error(f"SiteX APN lookup error: {e}")
         return None
 
+    if isinstance(result, PropertyData):
+        return result
+    logger.error(f"SiteX APN lookup error: {result} (FIPS={fips}, APN={apn})")
+    return None
+
 
 # =============================================================================
 # CLEANUP
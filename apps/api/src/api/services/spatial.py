@@ -0,0 +1,207 @@
+"""
+Spatial index for comparable-property searches.
+
+Comp searches used to compute haversine_distance against every candidate
+listing in a Python loop (API get_comparables, once per ladder level) or per
+comp (worker process_consumer_report). SpatialIndex is built once over a
+candidate pool and answers the two questions comp selection asks:
+
+- within(lat, lng, radius): every item inside the radius, nearest first
+- nearest(lat, lng, k):     the k nearest items (optionally capped by radius)
+
+Items are bucketed into a fixed lat/lng grid (DEFAULT_CELL_DEG, ~3.5 mi), so a
+query only measures the items in the cells its bounding box touches, and the
+haversine distances for those are computed in one vectorized NumPy pass. That
+keeps county-sized pools (tens of thousands of listings) interactive.
+
+Semantics match the loops they replace: the same 3956-mile earth radius, an
+item "has coordinates" only when both lat and lng are present and non-zero
+(the old `if clat and clng` guard), radius checks use the unrounded distance,
+and equal distances keep input order. Items without coordinates are never
+returned by queries; callers decide what to do with index.unlocated.
+
+The grid is a plain equirectangular bucketing — fine for the US markets we
+serve, not for queries that cross the antimeridian.
+
+This is the API copy of apps/worker/src/worker/compute/spatial.py (separate
+deployments) — change both together; tests/test_spatial_index.py
+fails if anything after this paragraph differs.
+
+NumPy is a dependency of both apps (pyproject.toml). The Python-list fallback
+only keeps the module importable where it isn't installed (e.g. a bare test
+environment) — identical results, just without the speedup.
+"""
+
+from math import asin, cos, floor, pi, radians, sin, sqrt
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # pure-Python fallback below
+    np = None
+
+EARTH_RADIUS_MILES = 3956.0
+MILES_PER_DEG_LAT = EARTH_RADIUS_MILES * pi / 180.0
+DEFAULT_CELL_DEG = 0.05
+
+Coords = Tuple[float, float]
+
+
+def listing_coords(listing: Dict[str, Any]) -> Optional[Coords]:
+    """(lat, lng) of a SimplyRETS listing, or None when either is missing or zero."""
+    geo = listing.get("geo") or {}
+    lat, lng = geo.get("lat"), geo.get("lng")
+    if not (lat and lng):
+        return None
+    try:
+        return float(lat), float(lng)
+    except (TypeError, ValueError):
+        return None
+
+
+def haversine_miles(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+    """Great-circle distance between two points in miles."""
+    lat1, lng1, lat2, lng2 = map(radians, (lat1, lng1, lat2, lng2))
+    a = sin((lat2 - lat1) / 2) ** 2 + cos(lat1) * cos(lat2) * sin((lng2 - lng1) / 2) ** 2
+    return 2 * EARTH_RADIUS_MILES * asin(sqrt(a))
+
+
+def _haversine_many(lat: float, lng: float, lats, lngs):
+    """Distances in miles from one point to arrays (or lists) of points."""
+    if np is None:
+        return [haversine_miles(lat, lng, la, ln) for la, ln in zip(lats, lngs)]
+    lat1, lng1 = radians(lat), radians(lng)
+    lat2 = np.radians(lats)
+    a = (np.sin((lat2 - lat1) / 2) ** 2
+         + cos(lat1) * np.cos(lat2) * np.sin((np.radians(lngs) - lng1) / 2) ** 2)
+    return 2 * EARTH_RADIUS_MILES * np.arcsin(np.sqrt(a))
+
+
+class SpatialIndex:
+    """Grid-bucketed point index over a sequence of items (see module docstring)."""
+
+    def __init__(
+        self,
+        items: Sequence[Any],
+        coords: Callable[[Any], Optional[Coords]] = listing_coords,
+        cell_deg: float = DEFAULT_CELL_DEG,
+    ):
+        self.items = list(items)
+        self.cell_deg = cell_deg
+        self.unlocated: List[int] = []   # positions of items without coordinates
+
+        positions: List[int] = []
+        lats: List[float] = []
+        lngs: List[float] = []
+        cells: Dict[Tuple[int, int], List[int]] = {}
+        for pos, item in enumerate(self.items):
+            c = coords(item)
+            if c is None:
+                self.unlocated.append(pos)
+                continue
+            cells.setdefault(self._cell(*c), []).append(len(positions))
+            positions.append(pos)
+            lats.append(c[0])
+            lngs.append(c[1])
+
+        self._n = len(positions)
+        if np is not None:
+            self._pos = np.asarray(positions, dtype=np.int64)
+            self._lat = np.asarray(lats, dtype=np.float64)
+            self._lng = np.asarray(lngs, dtype=np.float64)
+            self._cells = {k: np.asarray(v, dtype=np.int64) for k, v in cells.items()}
+        else:
+            self._pos, self._lat, self._lng, self._cells = positions, lats, lngs, cells
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    @property
+    def located(self) -> int:
+        return self._n
+
+    # ── internals ──────────────────────────────────────────────────────────
+
+    def _cell(self, lat: float, lng: float) -> Tuple[int, int]:
+        return floor(lat / self.cell_deg), floor(lng / self.cell_deg)
+
+    def _candidate_rows(self, lat: float, lng: float, radius: float):
+        """Rows (into the located arrays) in grid cells overlapping the radius' bounding box."""
+        dlat = radius / MILES_PER_DEG_LAT
+        widest = cos(radians(min(abs(lat) + dlat, 89.9)))
+        dlng = radius / (MILES_PER_DEG_LAT * widest)
+        if dlng >= 180:
+            return self._all_rows()
+        i0, j0 = self._cell(lat - dlat, lng - dlng)
+        i1, j1 = self._cell(lat + dlat, lng + dlng)
+        if (i1 - i0 + 1) * (j1 - j0 + 1) > len(self._cells):
+            # Box spans more cells than are occupied: scan the occupied ones
+            keys = [k for k in self._cells if i0 <= k[0] <= i1 and j0 <= k[1] <= j1]
+        else:
+            keys = [(i, j) for i in range(i0, i1 + 1) for j in range(j0, j1 + 1)
+                    if (i, j) in self._cells]
+        if len(keys) == len(self._cells):
+            return self._all_rows()
+        if np is None:
+            return [r for k in keys for r in self._cells[k]]
+        if not keys:
+            return np.empty(0, dtype=np.int64)
+        return np.concatenate([self._cells[k] for k in keys])
+
+    def _all_rows(self):
+        return np.arange(self._n) if np is not None else list(range(self._n))
+
+    def _rank(self, lat: float, lng: float, rows, radius: Optional[float]) -> List[Tuple[int, float]]:
+        """(position, miles) for rows within radius (None = all), nearest first, ties by position."""
+        if np is None:
+            pairs = [
+                (self._pos[r], d)
+                for r, d in zip(rows, _haversine_many(
+                    lat, lng, [self._lat[r] for r in rows], [self._lng[r] for r in rows]))
+                if radius is None or d <= radius
+            ]
+            pairs.sort(key=lambda p: (p[1], p[0]))
+            return pairs
+        if len(rows) == 0:
+            return []
+        dist = _haversine_many(lat, lng, self._lat[rows], self._lng[rows])
+        pos = self._pos[rows]
+        if radius is not None:
+            keep = dist <= radius
+            dist, pos = dist[keep], pos[keep]
+        order = np.lexsort((pos, dist))
+        return list(zip(pos[order].tolist(), dist[order].tolist()))
+
+    # ── queries ────────────────────────────────────────────────────────────
+
+    def within(self, lat: float, lng: float, radius: float) -> List[Tuple[int, float]]:
+        """(position, miles) of every located item within radius miles, nearest first."""
+        if not self._n:
+            return []
+        return self._rank(lat, lng, self._candidate_rows(lat, lng, radius), radius)
+
+    def nearest(
+        self, lat: float, lng: float, k: int, max_radius: Optional[float] = None
+    ) -> List[Tuple[int, float]]:
+        """(position, miles) of the k nearest located items, optionally within max_radius."""
+        if k <= 0 or not self._n:
+            return []
+        radius = self.cell_deg * MILES_PER_DEG_LAT
+        while True:
+            if max_radius is not None and radius >= max_radius:
+                return self.within(lat, lng, max_radius)[:k]
+            rows = self._candidate_rows(lat, lng, radius)
+            if len(rows) == self._n:
+                # The box already covers every item: rank them all
+                return self._rank(lat, lng, rows, max_radius)[:k]
+            hits = self._rank(lat, lng, rows, radius)
+            if len(hits) >= k:
+                return hits[:k]
+            radius *= 2
+
+    def distances(self, lat: float, lng: float) -> List[Optional[float]]:
+        """Miles from (lat, lng) to every item, in input order (None when unlocated)."""
+        out: List[Optional[float]] = [None] * len(self.items)
+        for pos, d in self._rank(lat, lng, self._all_rows(), None):
+            out[pos] = d
+        return out
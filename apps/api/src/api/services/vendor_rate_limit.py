@@ -0,0 +1,193 @@
+"""
+Shared vendor rate limiter (Redis token bucket) — API side.
+
+SimplyRETS enforces one request budget per credential, and the worker and
+the API spend it together. This module is the async twin of the worker's
+worker/vendors/rate_limit.py: the Lua script and the Redis key layout are
+IDENTICAL so both deployments debit the same bucket (mr:ratelimit:<name>:*).
+
+- Global bucket: SIMPLYRETS_RPM tokens/minute, capacity SIMPLYRETS_BURST.
+- Fair share: each account active within SIMPLYRETS_FAIR_WINDOW_S gets an
+  equal slice of the rate.
+- Wait metrics: per-caller wait time in mr:ratelimit:<name>:wait:<caller>.
+
+Fails OPEN on Redis errors (like api/cache.py) — an interactive comparables
+search should never break because Redis blinked.
+
+Usage:
+    from api.services.vendor_rate_limit import simplyrets_limiter
+
+    await simplyrets_limiter.acquire(account_id=acct, caller="api.comparables")
+"""
+
+import asyncio
+import logging
+import os
+import random
+import time
+from typing import Dict, Optional
+
+import redis.asyncio as _aioredis
+
+from ..settings import settings
+
+logger = logging.getLogger(__name__)
+
+RPM = int(os.getenv("SIMPLYRETS_RPM", "60"))
+BURST = int(os.getenv("SIMPLYRETS_BURST", "10"))
+FAIR_WINDOW_S = float(os.getenv("SIMPLYRETS_FAIR_WINDOW_S", "15"))
+MAX_SLEEP_S = 2.0
+SHARED_ACCOUNT = "_shared"
+
+# MUST match TOKEN_BUCKET_LUA in apps/worker/src/worker/vendors/rate_limit.py
+# KEYS[1] global bucket hash, KEYS[2] active-accounts zset, KEYS[3] account bucket hash
+# ARGV[1] rate (tokens/sec), ARGV[2] burst, ARGV[3] account id, ARGV[4] fair window (ms)
+# Returns {granted (0|1), wait_ms, active_accounts}
+TOKEN_BUCKET_LUA = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+local rate = tonumber(ARGV[1]) / 1000.0
+local burst = tonumber(ARGV[2])
+local account = ARGV[3]
+local window = tonumber(ARGV[4])
+
+redis.call('ZADD', KEYS[2], now, account)
+redis.call('ZREMRANGEBYSCORE', KEYS[2], '-inf', now - window)
+redis.call('PEXPIRE', KEYS[2], window * 2)
+local active = math.max(1, redis.call('ZCARD', KEYS[2]))
+
+local share_rate = rate / active
+local share_cap = math.max(1, burst / active)
+
+local function refill(key, r, cap)
+  local vals = redis.call('HMGET', key, 'tokens', 'ts')
+  local tokens = tonumber(vals[1]) or cap
+  local ts = tonumber(vals[2]) or now
+  return math.min(cap, tokens + math.max(0, now - ts) * r)
+end
+
+local g = refill(KEYS[1], rate, burst)
+local a = refill(KEYS[3], share_rate, share_cap)
+
+local granted = 0
+local wait = 0
+if g >= 1 and a >= 1 then
+  g = g - 1
+  a = a - 1
+  granted = 1
+else
+  local wait_g = 0
+  local wait_a = 0
+  if g < 1 then wait_g = math.ceil((1 - g) / rate) end
+  if a < 1 then wait_a = math.ceil((1 - a) / share_rate) end
+  wait = math.max(wait_g, wait_a)
+end
+
+redis.call('HSET', KEYS[1], 'tokens', g, 'ts', now)
+redis.call('HSET', KEYS[3], 'tokens', a, 'ts', now)
+local ttl = math.ceil(burst / rate) * 2 + 1000
+redis.call('PEXPIRE', KEYS[1], ttl)
+redis.call('PEXPIRE', KEYS[3], math.max(ttl, window * 2))
+return {granted, wait, active}
+"""
+
+
+class SharedTokenBucket:
+    """Async cross-process token bucket stored in Redis."""
+
+    def __init__(self, name: str, rpm: int, burst: int, max_wait_s: float = 30.0):
+        self.name = name
+        self.rate = max(rpm, 1) / 60.0
+        self.burst = max(burst, 1)
+        self.max_wait_s = max_wait_s
+        self._redis: Optional[_aioredis.Redis] = None
+        self._script = None
+
+    def _key(self, *parts: str) -> str:
+        return ":".join(("mr:ratelimit", self.name) + parts)
+
+    def _get_script(self):
+        if self._script is None:
+            self._redis = _aioredis.from_url(
+                settings.REDIS_URL,
+                decode_responses=True,
+                socket_connect_timeout=2,
+                socket_timeout=2,
+            )
+            self._script = self._redis.register_script(TOKEN_BUCKET_LUA)
+        return self._script
+
+    async def acquire(self, account_id: Optional[str] = None, caller: str = "api") -> float:
+        """
+        Wait for a token and return the seconds waited.
+
+        Gives up waiting after max_wait_s and lets the call through — the
+        vendor's own 429 handling is a better failure mode for an
+        interactive request than an unbounded stall.
+        """
+        account = str(account_id or SHARED_ACCOUNT)
+        started = time.perf_counter()
+        while True:
+            try:
+                granted, wait_ms, _active = await self._get_script()(
+                    keys=[
+                        self._key("bucket"),
+                        self._key("active"),
+                        self._key("acct", account),
+                    ],
+                    args=[self.rate, self.burst, account, int(FAIR_WINDOW_S * 1000)],
+                )
+            except Exception as exc:
+                logger.debug("Shared %s limiter unavailable (allowing): %s", self.name, exc)
+                return time.perf_counter() - started
+
+            if int(granted):
+                break
+            if time.perf_counter() - started >= self.max_wait_s:
+                logger.warning(
+                    "%s limiter: caller=%s gave up waiting after %.1fs",
+                    self.name, caller, self.max_wait_s,
+                )
+                break
+            await asyncio.sleep(min(int(wait_ms) / 1000.0, MAX_SLEEP_S) + random.uniform(0, 0.05))
+
+        waited = time.perf_counter() - started
+        await self._record_wait(caller, waited)
+        return waited
+
+    async def _record_wait(self, caller: str, waited: float) -> None:
+        """Accumulate per-caller wait metrics. Never raises."""
+        if waited >= 1.0:
+            logger.info("%s limiter: caller=%s waited %.2fs for a token", self.name, caller, waited)
+        try:
+            key = self._key("wait", caller)
+            pipe = self._redis.pipeline(transaction=False)
+            pipe.sadd(self._key("callers"), caller)
+            pipe.hincrby(key, "calls", 1)
+            if waited >= 0.01:
+                pipe.hincrby(key, "waited_calls", 1)
+                pipe.hincrbyfloat(key, "wait_ms_total", round(waited * 1000, 1))
+            await pipe.execute()
+        except Exception as exc:
+            logger.debug("%s limiter: failed to record wait metrics: %s", self.name, exc)
+
+    async def wait_stats(self) -> Dict[str, Dict[str, float]]:
+        """
+        Per-caller wait metrics (worker and API callers alike):
+        calls, waited_calls, wait_ms_total, avg_wait_ms. {} if Redis is down.
+        """
+        try:
+            self._get_script()
+            stats: Dict[str, Dict[str, float]] = {}
+            for caller in await self._redis.smembers(self._key("callers")):
+                h = {k: float(v) for k, v in (await self._redis.hgetall(self._key("wait", caller))).items()}
+                calls = h.get("calls", 0.0)
+                h["avg_wait_ms"] = round(h.get("wait_ms_total", 0.0) / calls, 1) if calls else 0.0
+                stats[caller] = h
+            return stats
+        except Exception as exc:
+            logger.debug("%s limiter: failed to read wait metrics: %s", self.name, exc)
+            return {}
+
+
+simplyrets_limiter = SharedTokenBucket("simplyrets", RPM, BURST)
@@ -37,6 +37,11 @@ class Settings(BaseSettings):
     EMAIL_FROM_ADDRESS: str = "TrendyReports <noreply@trendyreports.io>"
     EMAIL_REPLY_TO: str = "support@trendyreports.io"
 
+    # Prometheus scrape token for GET /metrics. Scrapes must send
+    # "Authorization: Bearer <token>"; when empty, /metrics is disabled (404)
+    # in production and open elsewhere (local dev / staging).
+    METRICS_TOKEN: str = ""
+
     class Config:
         env_file = ".env"
 
@@ -0,0 +1,62 @@
+"""
+Tests for the async DB helpers in db.py: aset_rls() issues the same SET LOCAL
+statements as set_rls(), and find_blocking_async_routes() flags async routes
+that still use the blocking pool (and none in the real app).
+"""
+import asyncio
+from unittest.mock import AsyncMock, MagicMock
+
+from fastapi import APIRouter, FastAPI
+from fastapi.concurrency import run_in_threadpool
+
+from api.db import aset_rls, db_conn, find_blocking_async_routes, set_rls
+
+
+def test_aset_rls_matches_set_rls():
+    sync_cur = MagicMock()
+    set_rls(sync_cur, "acct-1", user_id="user-1", user_role="admin")
+
+    async_cur = MagicMock()
+    async_cur.execute = AsyncMock()
+    asyncio.run(aset_rls((MagicMock(), async_cur), "acct-1", user_id="user-1", user_role="admin"))
+
+    sync_stmts = [c.args[0] for c in sync_cur.execute.call_args_list]
+    async_stmts = [c.args[0] for c in async_cur.execute.await_args_list]
+    assert len(async_stmts) == 3
+    assert async_stmts == sync_stmts
+
+
+def test_blocking_async_route_is_flagged():
+    router = APIRouter(prefix="/v1")
+
+    @router.get("/blocking")
+    async def blocking():
+        with db_conn() as (conn, cur):
+            cur.execute("SELECT 1")
+
+    @router.get("/threadpool")
+    async def threadpool():
+        def _query():
+            with db_conn() as (conn, cur):
+                cur.execute("SELECT 1")
+        await run_in_threadpool(_query)
+
+    @router.get("/sync")
+    def sync_route():
+        with db_conn() as (conn, cur):
+            cur.execute("SELECT 1")
+
+    app = FastAPI()
+    app.include_router(router)
+
+    found = find_blocking_async_routes(app.routes)
+    assert len(found) == 1
+    assert found[0].startswith("GET ")
+    assert "/blocking" in found[0]
+    assert "blocking" in found[0].split("(")[1]
+
+
+def test_app_has_no_blocking_async_routes():
+    from api.main import app
+
+    assert find_blocking_async_routes(app.routes) == []
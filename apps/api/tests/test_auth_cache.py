@@ -0,0 +1,111 @@
+"""
+Tests for the auth-context cache (services/auth_cache.py) and its use in
+AuthContextMiddleware.
+
+Redis is mocked or bypassed: covers the in-process tier, revocation
+(local eviction, the resolve/revoke race, what gets published, retrying a
+revocation Redis failed to take) and that a
+cached JWT needs no DB round trips while a blacklisted one is never cached.
+"""
+import asyncio
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from api.middleware import authn
+from api.services import auth_cache
+
+CLAIMS = {"account_id": "acct-1", "user_id": "user-1"}
+USER = {"id": "user-1", "email": "a@example.com", "role": "ADMIN",
+        "is_platform_admin": False, "account_id": "acct-1"}
+
+
+@pytest.fixture
+def local_only(monkeypatch):
+    """LRU tier on (as if subscribed), Redis tier off."""
+    monkeypatch.setattr(auth_cache, "_local", auth_cache._LocalCache(100, 30))
+    monkeypatch.setattr(auth_cache, "_listening", True)
+    monkeypatch.setattr(auth_cache, "_ensure_listener", lambda: None)
+    monkeypatch.setattr(auth_cache, "_get_aredis", lambda: None)
+    monkeypatch.setattr(auth_cache, "get_redis", MagicMock(side_effect=ConnectionError("down")))
+    monkeypatch.setattr(auth_cache, "_retry_later", lambda *args: None)
+
+
+def test_cached_jwt_skips_the_database(local_only):
+    blacklist = MagicMock(return_value=False)
+    fetch = MagicMock(return_value=(USER, True))
+    with patch.object(authn, "_is_token_blacklisted", blacklist), \
+            patch.object(authn, "_fetch_user_info", fetch):
+        first = asyncio.run(authn._jwt_context("tok", CLAIMS))
+        second = asyncio.run(authn._jwt_context("tok", CLAIMS))
+
+    assert first == second == {"account_id": "acct-1", "user": USER}
+    assert blacklist.call_count == 1
+    assert fetch.call_count == 1
+
+
+def test_blacklisted_or_failed_lookups_are_not_cached(local_only):
+    with patch.object(authn, "_is_token_blacklisted", return_value=True):
+        assert asyncio.run(authn._jwt_context("tok", CLAIMS)) is None
+    # users lookup failed → default context served, but not remembered
+    with patch.object(authn, "_is_token_blacklisted", return_value=False), \
+            patch.object(authn, "_fetch_user_info", return_value=({"account_id": "acct-1", "role": "USER"}, False)):
+        asyncio.run(authn._jwt_context("tok", CLAIMS))
+    assert asyncio.run(auth_cache.get(auth_cache.jwt_key("tok"))) is None
+
+
+def test_revocations_evict_and_win_the_race(local_only):
+    key = auth_cache.jwt_key("tok")
+    ctx = {"account_id": "acct-1", "user": USER}
+
+    epoch = auth_cache.epoch()
+    asyncio.run(auth_cache.put(key, ctx, epoch))
+    auth_cache.revoke_token(auth_cache.token_hash("tok"))  # logout
+    assert asyncio.run(auth_cache.get(key)) is None
+
+    # A request that resolved before the logout must not write it back
+    asyncio.run(auth_cache.put(key, ctx, epoch))
+    assert asyncio.run(auth_cache.get(key)) is None
+
+    # Published by another process: a role change for the user
+    asyncio.run(auth_cache.put(key, ctx, auth_cache.epoch()))
+    auth_cache._handle_message("user:user-1")
+    assert asyncio.run(auth_cache.get(key)) is None
+
+
+def test_revoke_publishes_marker_delete_and_message(monkeypatch):
+    r = MagicMock()
+    r.smembers.return_value = {"mr:auth:ctx:jwt:abc"}
+    monkeypatch.setattr(auth_cache, "get_redis", lambda: r)
+
+    auth_cache.revoke_api_key("hash1")
+    r.set.assert_called_with("mr:auth:revoked:ctx:key:hash1", "1", ex=auth_cache.AUTH_CACHE_TTL_S)
+    r.delete.assert_called_with("mr:auth:ctx:key:hash1")
+    r.publish.assert_called_with(auth_cache.CHANNEL, "ctx:key:hash1")
+
+    auth_cache.revoke_user("user-1")
+    r.delete.assert_called_with("mr:auth:user:user-1", "mr:auth:ctx:jwt:abc")
+    r.publish.assert_called_with(auth_cache.CHANNEL, "user:user-1")
+
+
+def test_failed_revocation_is_logged_and_retried(monkeypatch, caplog):
+    r = MagicMock()
+    r.set.side_effect = [ConnectionError("down"), ConnectionError("down"),
+                         ConnectionError("still down"), True]
+    monkeypatch.setattr(auth_cache, "get_redis", lambda: r)
+    monkeypatch.setattr(auth_cache.time, "sleep", lambda s: None)
+    retries = []
+    monkeypatch.setattr(auth_cache, "_retry_later", lambda *args: retries.append(args))
+    failures = auth_cache.stats["revocation_failures"]
+
+    with caplog.at_level("ERROR", logger=auth_cache.__name__):
+        auth_cache.revoke_token("abc")
+    assert r.set.call_count == 2                     # tried, retried once inline
+    assert auth_cache.stats["revocation_failures"] == failures + 1
+    assert "revocation failed" in caplog.text
+
+    (args,) = retries                                # then keeps trying in the background
+    auth_cache._retry_revocation(*args)
+    assert r.set.call_count == 4
+    r.delete.assert_called_with("mr:auth:ctx:jwt:abc")
+    r.publish.assert_called_with(auth_cache.CHANNEL, "ctx:jwt:abc")
@@ -0,0 +1,112 @@
+"""
+Tests for the comparables fallback ladder (routes/property.py:get_comparables).
+
+The single-fetch mode pulls one superset and evaluates every ladder level
+locally; it must pick the same level and comps as walking the ladder with a
+vendor request per level. The fake vendor below applies the same range /
+subtype filters SimplyRETS does.
+"""
+import asyncio
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from api.routes import property as prop_routes
+from api.routes.property import ComparablesRequest, listing_matches_params
+
+
+def _listing(i, area, beds, baths, subtype="SingleFamilyResidence"):
+    return {
+        "mlsId": i,
+        "listPrice": 500_000 + i,
+        "property": {"area": area, "bedrooms": beds, "bathrooms": baths, "subType": subtype},
+        "address": {"full": f"{i} Main St", "city": "La Verne", "postalCode": "91750"},
+        "geo": {},
+        "mls": {"status": "Active"},
+    }
+
+
+# Thin market: only 2 strict matches, 5+ once sqft widens to ±50% and beds ±2
+LISTINGS = [
+    _listing(1, 1500, 3, 2),
+    _listing(2, 1550, 3, 2),
+    _listing(3, 1100, 3, 2),             # sqft ±30%
+    _listing(4, 950, 4, 3),              # sqft ±50%
+    _listing(5, 2200, 2, 1),             # sqft ±50%
+    _listing(6, 1500, 5, 4),             # beds ±2 (L4)
+    _listing(7, 1500, 3, 2, "Condominium"),  # wrong subtype: post-filtered everywhere
+    _listing(8, None, 3, 2),             # no area: only levels without a sqft filter
+]
+
+
+def _run(single_fetch, listings=LISTINGS, **subject):
+    calls = []
+
+    async def fake_fetch(params, limit=None, **_kwargs):
+        calls.append(dict(params))
+        return [dict(x) for x in listings if listing_matches_params(x, params)][:limit]
+
+    payload = ComparablesRequest(
+        address="100 Main St", city_state_zip="La Verne, CA 91750",
+        beds=3, baths=2, sqft=1500, property_type="SFR",
+        sqft_variance=0.10, single_fetch=single_fetch, **subject,
+    )
+    request = SimpleNamespace(state=SimpleNamespace(account_id="acct-1"))
+    with patch.object(prop_routes, "simplyrets_fetch_properties", new=fake_fetch):
+        resp = asyncio.run(prop_routes.get_comparables(payload, request))
+    return resp, calls
+
+
+def test_single_fetch_matches_sequential_ladder():
+    seq, seq_calls = _run(single_fetch=False)
+    one, one_calls = _run(single_fetch=True)
+
+    assert seq.success and one.success
+    assert one.comp_ladder_level == seq.comp_ladder_level == "L3:sqft+50%,beds+1"
+    assert one.comp_confidence_grade == seq.comp_confidence_grade
+    assert [c["mls_id"] for c in one.comparables] == [c["mls_id"] for c in seq.comparables]
+    assert one.search_params == seq.search_params
+
+    assert len(seq_calls) == 4 and seq.comp_ladder_mode == "sequential"
+    assert len(one_calls) == 1 and one.comp_ladder_mode == "single_fetch"
+
+
+def test_single_fetch_reports_per_level_timings():
+    resp, _ = _run(single_fetch=True)
+    levels = [t["level"] for t in resp.comp_ladder_timings]
+    assert levels == ["superset", "L0:strict", "L1:no-subtype", "L2:sqft+30%", "L3:sqft+50%,beds+1"]
+    assert resp.comp_ladder_timings[0]["source"] == "vendor"
+    assert {t["source"] for t in resp.comp_ladder_timings[1:]} == {"local"}
+    assert all(t["ms"] >= 0 for t in resp.comp_ladder_timings)
+
+
+def test_full_superset_page_falls_back_to_sequential():
+    with patch.object(prop_routes, "COMPS_SUPERSET_LIMIT", 3):
+        resp, calls = _run(single_fetch=True)
+    assert resp.comp_ladder_mode == "sequential"
+    assert len(calls) == 1 + 4   # superset + one fetch per level walked
+    assert resp.comp_ladder_level == "L3:sqft+50%,beds+1"
+
+
+def test_radius_filter_same_in_both_modes():
+    # Spread the listings ~0.4 mi apart going north; #3 has no coordinates
+    located = []
+    for n, listing in enumerate(LISTINGS):
+        located.append(dict(listing, geo={} if listing["mlsId"] == 3
+                            else {"lat": 34.10 + 0.006 * n, "lng": -117.77}))
+    subject = {"latitude": 34.10, "longitude": -117.77, "radius_miles": 1.0}
+    seq, _ = _run(single_fetch=False, listings=located, **subject)
+    one, _ = _run(single_fetch=True, listings=located, **subject)
+
+    assert one.comp_ladder_level == seq.comp_ladder_level
+    assert [c["mls_id"] for c in one.comparables] == [c["mls_id"] for c in seq.comparables]
+    distances = [c["distance_miles"] for c in one.comparables]
+    assert distances == [c["distance_miles"] for c in seq.comparables]
+    assert all(d is None or d <= 3.0 for d in distances)
+    assert distances[-1] is None   # no coordinates: kept, sorted last
+
+
+def test_listing_matches_params_missing_field_fails_filter():
+    listing = _listing(9, None, 3, 2)
+    assert not listing_matches_params(listing, {"minarea": 1000, "maxarea": 2000})
+    assert listing_matches_params(listing, {"minbeds": 2, "maxbeds": 4})
+    assert not listing_matches_params(listing, {"subtype": "Condominium"})
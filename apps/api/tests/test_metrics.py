@@ -0,0 +1,85 @@
+"""
+Tests for the Prometheus metrics in api/metrics.py: request latency is labelled
+by route template (never the raw path), vendor calls record status / errors,
+the exposition format is well formed, and METRICS_TOKEN gates GET /metrics
+(unset: 404 in production).
+"""
+import pytest
+from prometheus_client import CollectorRegistry, Histogram
+
+from api import metrics
+from api.settings import settings
+
+
+def _lines(text, prefix):
+    return [line for line in text.splitlines() if line.startswith(prefix)]
+
+
+def test_request_latency_by_route_template(api_client, monkeypatch):
+    monkeypatch.setattr(settings, "ENVIRONMENT", "development")  # open without a token
+    api_client.get("/health")
+    api_client.get("/health/no-such-path/123")  # public prefix: a 404, not a 401
+
+    body = api_client.get("/metrics").text
+    counts = _lines(body, "mr_http_request_duration_seconds_count")
+    assert 'mr_http_request_duration_seconds_count{method="GET",route="/health",status="200"}' in " ".join(counts)
+    assert any('route="unmatched"' in line and 'status="404"' in line for line in counts)
+    assert not any("no-such-path" in line for line in body.splitlines())
+
+
+def test_vendor_call_records_status_and_errors():
+    with metrics.track_vendor_call("test_vendor") as call:
+        call["status"] = 429
+    with pytest.raises(TimeoutError):
+        with metrics.track_vendor_call("test_vendor"):
+            raise TimeoutError
+
+    body = metrics.render()
+    assert 'mr_vendor_requests_total{status="429",vendor="test_vendor"} 1.0' in body
+    assert 'mr_vendor_requests_total{status="error",vendor="test_vendor"} 1.0' in body
+    assert 'mr_vendor_request_duration_seconds_count{vendor="test_vendor"} 2.0' in body
+
+
+def test_histogram_exposition_is_cumulative():
+    registry = CollectorRegistry()
+    h = Histogram("mr_test_seconds", "Test.", ("op",), buckets=(0.1, 1.0), registry=registry)
+    for v in (0.05, 0.5, 5.0):
+        h.labels(op='a"b').observe(v)
+    body = metrics.render(registry)
+    assert '# TYPE mr_test_seconds histogram' in body
+    assert _lines(body, "mr_test_seconds_bucket") == [
+        'mr_test_seconds_bucket{le="0.1",op="a\\"b"} 1.0',
+        'mr_test_seconds_bucket{le="1.0",op="a\\"b"} 2.0',
+        'mr_test_seconds_bucket{le="+Inf",op="a\\"b"} 3.0',
+    ]
+    assert 'mr_test_seconds_count{op="a\\"b"} 3.0' in body
+
+
+def test_db_pool_collector_reads_pool_stats(monkeypatch):
+    from api import db
+
+    pool = type("Pool", (), {"get_stats": lambda self: {
+        "pool_size": 4, "pool_available": 1, "requests_waiting": 2,
+        "requests_num": 10, "requests_wait_ms": 1500, "requests_errors": 1,
+    }})()
+    monkeypatch.setattr(db, "_pool", pool)
+    body = metrics.render()
+    assert 'mr_db_pool_connections{pool="sync",state="waiting"} 2.0' in body
+    assert 'mr_db_pool_requests_total{pool="sync"} 10.0' in body
+    assert 'mr_db_pool_wait_seconds_total{pool="sync"} 1.5' in body
+
+
+def test_metrics_token(api_client, monkeypatch):
+    monkeypatch.setattr(settings, "METRICS_TOKEN", "scrape-secret")
+    assert api_client.get("/metrics").status_code == 401
+    ok = api_client.get("/metrics", headers={"Authorization": "Bearer scrape-secret"})
+    assert ok.status_code == 200
+    assert ok.headers["content-type"] == metrics.CONTENT_TYPE
+
+
+def test_metrics_without_token_is_closed_in_production(api_client, monkeypatch):
+    monkeypatch.setattr(settings, "METRICS_TOKEN", "")
+    monkeypatch.setattr(settings, "ENVIRONMENT", "production")
+    assert api_client.get("/metrics").status_code == 404
+    monkeypatch.setattr(settings, "ENVIRONMENT", "development")
+    assert api_client.get("/metrics").status_code == 200
@@ -0,0 +1,89 @@
+"""
+Tests for the per-account API rate limiter (middleware/authn.py
+RateLimitMiddleware).
+
+The GCRA Lua script needs a real Redis; here the script is a mock, covering
+rejection before the handler runs, route cost weights, the limit-config
+miss path and fail-open on Redis errors.
+"""
+import asyncio
+import json
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from api.middleware import authn
+
+
+def _run(middleware, path="/v1/me", method="GET", account_id="acct-1"):
+    calls, sent = [], []
+
+    async def handler(scope, receive, send):
+        calls.append(scope["path"])
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b"{}"})
+
+    async def receive():
+        return {"type": "http.request", "body": b""}
+
+    async def send(message):
+        sent.append(message)
+
+    middleware.app = handler
+    scope = {"type": "http", "method": method, "path": path, "headers": [],
+             "query_string": b"", "state": {"account_id": account_id}}
+    asyncio.run(middleware(scope, receive, send))
+    start = sent[0]
+    headers = {k.decode(): v.decode() for k, v in start["headers"]}
+    body = b"".join(m.get("body", b"") for m in sent[1:])
+    return calls, start["status"], headers, body
+
+
+def _limiter(*results):
+    middleware = authn.RateLimitMiddleware(None)
+    middleware._redis = MagicMock(set=AsyncMock())
+    middleware._script = AsyncMock(side_effect=list(results))
+    return middleware
+
+
+def test_over_limit_is_rejected_before_the_handler():
+    middleware = _limiter([0, 60, 0, 2500, 60000])
+    calls, status, headers, body = _run(middleware)
+    assert calls == []
+    assert status == 429
+    assert headers["retry-after"] == "3"
+    assert headers["x-ratelimit-remaining"] == "0"
+    assert json.loads(body) == {
+        "error": "rate_limit_exceeded",
+        "message": "Rate limit of 60 requests/minute exceeded",
+        "retry_after": 3,
+    }
+
+
+def test_allowed_request_gets_headers_and_route_cost():
+    middleware = _limiter([1, 60, 49, 0, 11000])
+    calls, status, headers, _ = _run(middleware, path="/v1/branding/sample-pdf", method="POST")
+    assert calls == ["/v1/branding/sample-pdf"]
+    assert status == 200
+    assert headers["x-ratelimit-limit"] == "60"
+    assert headers["x-ratelimit-remaining"] == "49"
+    assert headers["x-ratelimit-reset"] == "11"
+    assert middleware._script.await_args.kwargs["args"] == [10, 60_000]
+    assert authn.route_cost("GET", "/v1/me") == 1
+
+
+def test_limit_config_miss_loads_from_db_once():
+    middleware = _limiter([-1], [1, 120, 119, 0, 500])
+    with patch.object(authn, "_account_rate_limit", return_value=120) as load:
+        calls, status, headers, _ = _run(middleware)
+    load.assert_called_once_with("acct-1")
+    middleware._redis.set.assert_awaited_once_with("ratelimit_config:acct-1", "120",
+                                                   ex=authn.RATE_LIMIT_CONFIG_TTL_S)
+    assert status == 200 and headers["x-ratelimit-limit"] == "120"
+
+
+def test_redis_errors_fail_open():
+    middleware = _limiter(ConnectionError("redis down"))
+    calls, status, _, _ = _run(middleware)
+    assert calls == ["/v1/me"] and status == 200
+    # ...and Redis is left alone for a few seconds
+    calls, status, _, _ = _run(middleware)
+    assert status == 200 and middleware._script.await_count == 1
@@ -0,0 +1,138 @@
+"""
+Tests for request coalescing (services/single_flight.py).
+
+The Redis lock needs a real Redis for end-to-end behaviour; here the client
+is a mock, covering the follower path (answer found via recheck or the
+published result slot) and fail-open on Redis errors.
+"""
+import asyncio
+import json
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from api.services.single_flight import RedisSingleFlight, SingleFlight
+
+
+def _counting_fn(result, delay=0.05, exc=None):
+    calls = []
+
+    async def fn():
+        calls.append(1)
+        await asyncio.sleep(delay)
+        if exc is not None:
+            raise exc
+        return result
+
+    return fn, calls
+
+
+def test_concurrent_calls_share_one_execution():
+    flight = SingleFlight("test")
+    fn, calls = _counting_fn([{"mlsId": 1}])
+
+    async def burst():
+        return await asyncio.gather(*[
+            flight.do("k", fn, copy=lambda rows: [dict(r) for r in rows]) for _ in range(10)
+        ])
+
+    results = asyncio.run(burst())
+    assert len(calls) == 1
+    assert all(r == [{"mlsId": 1}] for r in results)
+    # copy=: every caller can annotate its own listings
+    assert len({id(r[0]) for r in results}) == 10
+    assert flight.stats == {"calls": 10, "leaders": 1, "coalesced": 9}
+
+
+def test_exception_reaches_every_caller_and_is_not_remembered():
+    flight = SingleFlight("test")
+    fn, calls = _counting_fn(None, exc=RuntimeError("vendor down"))
+
+    async def burst():
+        return await asyncio.gather(*[flight.do("k", fn) for _ in range(3)],
+                                    return_exceptions=True)
+
+    results = asyncio.run(burst())
+    assert all(isinstance(r, RuntimeError) for r in results)
+    assert len(calls) == 1
+    asyncio.run(burst())
+    assert len(calls) == 2   # the next burst calls again
+
+
+def test_cancelled_caller_does_not_cancel_the_shared_call():
+    flight = SingleFlight("test")
+    fn, calls = _counting_fn("ok", delay=0.1)
+
+    async def scenario():
+        leader = asyncio.ensure_future(flight.do("k", fn))
+        await asyncio.sleep(0.01)
+        follower = asyncio.ensure_future(flight.do("k", fn))
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        return await follower
+
+    assert asyncio.run(scenario()) == "ok"
+    assert len(calls) == 1
+
+
+def _flight_with_redis(set_results, get_result=None):
+    flight = RedisSingleFlight("test", lock_ttl_s=5)
+    redis = MagicMock()
+    redis.set = AsyncMock(side_effect=set_results)
+    redis.get = AsyncMock(return_value=get_result)
+    redis.pipeline.return_value.execute = AsyncMock(return_value=[None, 0])
+    flight._redis = redis
+    flight._release = AsyncMock()
+    return flight, redis
+
+
+def test_other_worker_holds_lock_answer_read_via_recheck():
+    flight, _ = _flight_with_redis([False, False])
+    fn, calls = _counting_fn("mine")
+    answers = iter([None, "theirs"])
+
+    async def recheck():
+        return next(answers)
+
+    result = asyncio.run(flight.do("k", fn, recheck=recheck))
+    assert result == "theirs"
+    assert calls == []
+    assert flight.stats["remote_coalesced"] == 1
+
+
+def test_other_worker_holds_lock_answer_read_from_result_slot():
+    flight, redis = _flight_with_redis([False], get_result=json.dumps([{"mlsId": 7}]))
+    fn, calls = _counting_fn([])
+
+    assert asyncio.run(flight.do("k", fn)) == [{"mlsId": 7}]
+    assert calls == []
+    redis.pipeline.return_value.incr.assert_called_once()   # registered as a waiter
+
+
+def test_leader_releases_its_lock_even_on_failure():
+    flight, _ = _flight_with_redis([True])
+    fn, calls = _counting_fn(None, exc=RuntimeError("boom"))
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(flight.do("k", fn))
+    assert len(calls) == 1
+    flight._release.assert_awaited_once()
+
+
+def test_redis_errors_fail_open():
+    flight, _ = _flight_with_redis(ConnectionError("redis down"))
+    fn, calls = _counting_fn("direct")
+
+    assert asyncio.run(flight.do("k", fn)) == "direct"
+    assert len(calls) == 1
+    assert flight.stats["redis_errors"] == 1
+
+
+def test_simplyrets_copies_are_independent_down_to_nested_fields():
+    from api.services.simplyrets import _copy_listings
+
+    listings = [{"mlsId": 1, "property": {"bedrooms": 3}, "photos": ["a.jpg"]}]
+    mine, theirs = _copy_listings(listings), _copy_listings(listings)
+    mine[0]["property"]["distance_miles"] = 0.4
+    mine[0]["photos"].append("b.jpg")
+    assert theirs == listings == [{"mlsId": 1, "property": {"bedrooms": 3}, "photos": ["a.jpg"]}]
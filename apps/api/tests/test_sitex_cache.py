@@ -0,0 +1,127 @@
+"""
+Tests for the two-tier SiteX property cache (services/sitex.py).
+
+Redis is replaced by a dict behind acache_get/acache_set; these tests cover the
+tier order, negative caching of not-found / multi-match answers, address
+normalization and the LRU bound.
+"""
+import asyncio
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from api.services import sitex
+from api.services.single_flight import SingleFlight
+from api.services.sitex import (
+    PropertyData,
+    SiteXError,
+    SiteXMultiMatchError,
+    SiteXNotFoundError,
+    lookup_property,
+    lookup_property_by_apn,
+    normalize_address,
+)
+
+
+@pytest.fixture
+def fake_sitex():
+    redis_store = {}
+    client = AsyncMock()
+    with patch.object(sitex, "acache_get", AsyncMock(side_effect=lambda k: redis_store.get(k))), \
+            patch.object(sitex, "acache_set",
+                         AsyncMock(side_effect=lambda k, v, ttl_seconds=0: redis_store.__setitem__(k, v))), \
+            patch.object(sitex, "get_sitex_client", AsyncMock(return_value=client)), \
+            patch.object(sitex, "_lru", sitex.OrderedDict()), \
+            patch.object(sitex, "sitex_flight", SingleFlight("sitex")), \
+            patch.dict(sitex._cache_stats, {k: 0 for k in sitex._cache_stats}):
+        yield client, redis_store
+
+
+def _prop(**kw):
+    return PropertyData(full_address="714 Vine St, Anaheim, CA 92805", apn="035-202-10", **kw)
+
+
+def test_positive_hit_served_from_memory_then_redis(fake_sitex):
+    client, redis_store = fake_sitex
+    client.search_by_address.return_value = _prop(bedrooms=3)
+
+    first = asyncio.run(lookup_property("714 Vine St", "Anaheim, CA 92805"))
+    again = asyncio.run(lookup_property("714 Vine St", "Anaheim, CA 92805"))
+    assert first.bedrooms == again.bedrooms == 3
+    assert client.search_by_address.await_count == 1
+    assert sitex.cache_stats()["lru_hits"] == 1
+
+    # A fresh process (empty memory tier) still hits Redis
+    sitex._lru.clear()
+    from_redis = asyncio.run(lookup_property("714 Vine St", "Anaheim, CA 92805"))
+    assert from_redis == first
+    assert client.search_by_address.await_count == 1
+    assert sitex.cache_stats()["redis_hits"] == 1
+    assert len(redis_store) == 1
+
+
+def test_normalized_address_variants_share_an_entry(fake_sitex):
+    client, _ = fake_sitex
+    client.search_by_address.return_value = _prop()
+
+    asyncio.run(lookup_property("714 North Vine Street", "Anaheim, CA 92805"))
+    asyncio.run(lookup_property("714  n. VINE st", "anaheim ca 92805"))
+    asyncio.run(lookup_property("714 N Vine St, Anaheim, CA 92805"))
+    assert client.search_by_address.await_count == 1
+    assert normalize_address("12 Oak Avenue, Apt #4") == "12 oak ave apt # 4"
+
+
+@pytest.mark.parametrize("exc", [
+    SiteXNotFoundError("No property found"),
+    SiteXMultiMatchError("2 matches", locations=[]),
+])
+def test_not_found_and_multi_match_are_negatively_cached(fake_sitex, exc):
+    client, redis_store = fake_sitex
+    client.search_by_address.side_effect = exc
+
+    assert asyncio.run(lookup_property("1 Nowhere Ln", "Anaheim, CA 92805")) is None
+    sitex._lru.clear()
+    assert asyncio.run(lookup_property("1 Nowhere Lane", "Anaheim, CA 92805")) is None
+    assert client.search_by_address.await_count == 1
+    assert sitex.cache_stats()["negative_hits"] == 1
+    assert list(redis_store.values())[0]["negative"] in (sitex.NOT_FOUND, sitex.MULTI_MATCH)
+
+
+def test_transient_errors_are_not_cached(fake_sitex):
+    client, redis_store = fake_sitex
+    client.search_by_apn.side_effect = SiteXError("SiteX request failed: timeout")
+
+    assert asyncio.run(lookup_property_by_apn("06059", "035-202-10")) is None
+    assert asyncio.run(lookup_property_by_apn("06059", "035-202-10")) is None
+    assert client.search_by_apn.await_count == 2
+    assert redis_store == {}
+
+
+def test_lru_is_bounded(fake_sitex):
+    client, _ = fake_sitex
+    client.search_by_apn.return_value = _prop()
+    with patch.object(sitex, "SITEX_CACHE_LRU_SIZE", 3):
+        for i in range(5):
+            asyncio.run(lookup_property_by_apn("06059", f"000-000-0{i}"))
+    assert len(sitex._lru) == 3
+    assert list(sitex._lru)[0].endswith("000-000-02")
+
+
+def test_concurrent_identical_lookups_share_one_request(fake_sitex):
+    client, _ = fake_sitex
+
+    async def slow_search(*_args):
+        await asyncio.sleep(0.05)
+        return _prop()
+
+    client.search_by_address.side_effect = slow_search
+
+    async def burst():
+        return await asyncio.gather(*[
+            lookup_property("714 Vine St", "Anaheim, CA 92805") for _ in range(20)
+        ])
+
+    results = asyncio.run(burst())
+    assert all(r is not None and r.apn == "035-202-10" for r in results)
+    assert client.search_by_address.await_count == 1
+    assert sitex.sitex_flight.stats["coalesced"] == 19
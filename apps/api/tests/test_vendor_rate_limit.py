@@ -0,0 +1,63 @@
+"""
+Tests for the shared SimplyRETS token bucket (services/vendor_rate_limit.py).
+
+The Lua script itself needs a real Redis; these tests cover the client-side
+loop: waiting on a denied token, fail-open on Redis errors, and the
+max-wait escape hatch.
+"""
+import asyncio
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from api.services.vendor_rate_limit import SharedTokenBucket
+
+
+def _bucket_with_script(responses, max_wait_s=30.0):
+    bucket = SharedTokenBucket("test", rpm=60, burst=10, max_wait_s=max_wait_s)
+    script = AsyncMock(side_effect=responses)
+    bucket._script = script
+    bucket._redis = MagicMock()
+    bucket._redis.pipeline.return_value.execute = AsyncMock()
+    return bucket, script
+
+
+def test_acquire_granted_immediately():
+    bucket, script = _bucket_with_script([[1, 0, 1]])
+    waited = asyncio.run(bucket.acquire(account_id="acct-1", caller="test"))
+    assert waited < 0.5
+    assert script.await_count == 1
+    keys = script.await_args.kwargs["keys"]
+    assert keys == [
+        "mr:ratelimit:test:bucket",
+        "mr:ratelimit:test:active",
+        "mr:ratelimit:test:acct:acct-1",
+    ]
+
+
+def test_acquire_sleeps_for_advertised_wait_then_retries():
+    bucket, script = _bucket_with_script([[0, 250, 2], [1, 0, 2]])
+    with patch("api.services.vendor_rate_limit.asyncio.sleep", new=AsyncMock()) as sleep:
+        asyncio.run(bucket.acquire(account_id="acct-1"))
+    assert script.await_count == 2
+    slept = sleep.await_args.args[0]
+    assert 0.25 <= slept < 0.31
+
+
+def test_acquire_without_account_uses_shared_slice():
+    bucket, script = _bucket_with_script([[1, 0, 1]])
+    asyncio.run(bucket.acquire())
+    assert script.await_args.kwargs["keys"][2] == "mr:ratelimit:test:acct:_shared"
+    assert script.await_args.kwargs["args"][2] == "_shared"
+
+
+def test_acquire_fails_open_when_redis_errors():
+    bucket, script = _bucket_with_script(ConnectionError("redis down"))
+    waited = asyncio.run(bucket.acquire(account_id="acct-1"))
+    assert waited < 0.5
+    assert script.await_count == 1
+
+
+def test_acquire_gives_up_after_max_wait():
+    bucket, script = _bucket_with_script([[0, 10, 1]] * 50, max_wait_s=0.0)
+    with patch("api.services.vendor_rate_limit.asyncio.sleep", new=AsyncMock()):
+        asyncio.run(bucket.acquire(account_id="acct-1"))
+    assert script.await_count == 1
@@ -2,9 +2,18 @@ import os
 import ssl
 from celery import Celery
 from celery.schedules import crontab
+from celery.signals import (
+    task_postrun,
+    task_prerun,
+    task_retry,
+    worker_init,
+    worker_process_shutdown,
+)
+from kombu import Queue
 
 REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
 CELERY_RESULT_URL = os.getenv("CELERY_RESULT_URL", REDIS_URL)
+WEBHOOK_QUEUE = os.getenv("WEBHOOK_QUEUE", "webhooks")  # same default as webhooks.py
 
 # For Celery, we need to strip the ssl_cert_reqs from the URL
 # and configure it via broker_use_ssl and redis_backend_use_ssl parameters
@@ -40,7 +49,12 @@ config_updates = {
     "enable_utc": True,
     "task_routes": {
         "ping": {"queue": "celery"},
+        # Outbound webhooks have their own queue (see webhooks.py). A worker
+        # started without -Q consumes every queue in task_queues; run a
+        # dedicated one with `-Q webhooks` to isolate slow endpoints.
+        "deliver_webhook_event": {"queue": WEBHOOK_QUEUE},
     },
+    "task_queues": (Queue("celery"), Queue(WEBHOOK_QUEUE)),
     "task_time_limit": 300,
     # Celery Beat schedule for periodic tasks
     "beat_schedule": {
@@ -48,6 +62,16 @@ config_updates = {
             "task": "keep_alive_ping",
             "schedule": 300.0,  # Every 5 minutes
         },
+        "sync-listing-store": {
+            "task": "sync_listing_store",
+            # Incremental MLS sync for tracked markets (see listing_store.py)
+            "schedule": float(os.getenv("LISTING_STORE_SYNC_INTERVAL_S", "900")),
+        },
+        "precompute-market-metrics": {
+            "task": "precompute_market_metrics",
+            # Per-market results / pricing baselines for schedules (see market_metrics.py)
+            "schedule": float(os.getenv("MARKET_METRICS_INTERVAL_S", "3600")),
+        },
     },
 }
 
@@ -62,3 +86,26 @@ celery.conf.update(**config_updates)
 from . import tasks  # noqa
 from .property_tasks import property_report  # noqa - property report generation tasks
 
+
+
+@worker_init.connect
+def _warm_templates(**_kwargs):
+    """Precompile report templates in the main worker process, before the
+    prefork pool forks, so every child starts with them compiled."""
+    from .template_env import warmup
+    warmup()
+
+
+# Prometheus metrics: children time tasks into the multiprocess files; the
+# main process serves them on WORKER_METRICS_PORT (see metrics.py)
+from . import metrics as _metrics  # noqa: E402
+
+task_prerun.connect(_metrics.on_task_prerun, weak=False)
+task_postrun.connect(_metrics.on_task_postrun, weak=False)
+task_retry.connect(_metrics.on_task_retry, weak=False)
+worker_process_shutdown.connect(_metrics.on_process_shutdown, weak=False)
+
+
+@worker_init.connect
+def _start_metrics_sidecar(**_kwargs):
+    _metrics.start_metrics_server()
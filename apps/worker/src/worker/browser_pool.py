@@ -0,0 +1,257 @@
+"""
+Persistent Chromium pool for Playwright PDF rendering.
+
+render_pdf_playwright and pdf_adapter._generate_via_playwright used to run
+sync_playwright() + chromium.launch() for every report and tear it all down
+afterwards. Browser cold start was the largest fixed cost of the PDF stage.
+
+Each worker process now keeps one long-lived browser (per thread — Playwright's
+sync API objects must stay on the thread that created them) and every render
+only opens a page, in a BrowserContext that is reused for renders with the same
+options:
+
+- Context recycling: a context is closed and replaced after
+  PDF_CONTEXT_MAX_PAGES renders (sheds cache and leaked memory)
+- No state between renders: contexts are shared across reports of any
+  account, so every checkout clears cookies and permissions, and the page's
+  localStorage / sessionStorage is cleared before it closes. Only the HTTP
+  cache (fonts, CSS — public assets) carries over.
+- Browser recycling: the browser is relaunched after PDF_BROWSER_MAX_PAGES
+  renders or PDF_BROWSER_MAX_AGE_S seconds
+- Crash detection: a "disconnected" browser is dropped and relaunched; a
+  render that fails because the browser died is retried once on a fresh one
+- Health checks: every checkout verifies the browser is still connected;
+  health() reports pool state for debugging
+
+The pool is closed at process exit (atexit).
+
+Usage:
+    from .browser_pool import browser_page
+
+    with browser_page(device_scale_factor=2) as page:
+        page.goto(url, wait_until="networkidle")
+        page.pdf(path=out)
+"""
+
+import atexit
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional, Tuple
+
+PDF_BROWSER_MAX_PAGES = int(os.getenv("PDF_BROWSER_MAX_PAGES", "100"))
+PDF_BROWSER_MAX_AGE_S = int(os.getenv("PDF_BROWSER_MAX_AGE_S", "3600"))
+PDF_CONTEXT_MAX_PAGES = int(os.getenv("PDF_CONTEXT_MAX_PAGES", "20"))
+
+CHROMIUM_ARGS = ["--disable-dev-shm-usage", "--no-first-run", "--disable-extensions"]
+
+# Web storage is per origin, so it is cleared from the rendered page itself
+# (a no-op for about:blank / set_content pages that never touched it)
+_CLEAR_STORAGE_JS = "() => { try { localStorage.clear(); sessionStorage.clear(); } catch (e) {} }"
+
+
+def _is_crash(exc: BaseException) -> bool:
+    msg = str(exc).lower()
+    return any(s in msg for s in (
+        "target closed",
+        "browser has been closed",
+        "target page, context or browser has been closed",
+        "browser closed",
+        "connection closed",
+    ))
+
+
+class BrowserPool:
+    """One Playwright driver + Chromium, recycled by page count and age."""
+
+    def __init__(self):
+        self._pw = None
+        self._browser = None
+        self._launched_at = 0.0
+        self._pages = 0           # renders on the current browser
+        self._launches = 0
+        self._crashes = 0
+        # context options key -> (context, renders on it)
+        self._contexts: Dict[Tuple, list] = {}
+
+    # ── lifecycle ──────────────────────────────────────────────────────────
+
+    def _launch(self) -> None:
+        from playwright.sync_api import sync_playwright
+
+        if self._pw is None:
+            self._pw = sync_playwright().start()
+        started = time.perf_counter()
+        browser = self._pw.chromium.launch(headless=True, args=CHROMIUM_ARGS)
+        browser.on("disconnected", lambda _b: self._on_disconnected(browser))
+        self._browser = browser
+        self._launched_at = time.monotonic()
+        self._pages = 0
+        self._contexts = {}
+        self._launches += 1
+        print(f"🎭 Browser pool: launched Chromium {browser.version} "
+              f"in {(time.perf_counter() - started) * 1000:.0f}ms (pid={os.getpid()})")
+
+    def _on_disconnected(self, browser) -> None:
+        # Only a browser we still consider live counts as a crash
+        if browser is self._browser:
+            self._crashes += 1
+            self._browser = None
+            self._contexts = {}
+            print("⚠️  Browser pool: Chromium disconnected — will relaunch on next render")
+
+    def _close_browser(self) -> None:
+        browser, self._browser, self._contexts = self._browser, None, {}
+        if browser is not None:
+            try:
+                browser.close()
+            except Exception as e:
+                print(f"⚠️  Browser pool: error closing Chromium: {e}")
+
+    def close(self) -> None:
+        self._close_browser()
+        pw, self._pw = self._pw, None
+        if pw is not None:
+            try:
+                pw.stop()
+            except Exception as e:
+                print(f"⚠️  Browser pool: error stopping Playwright: {e}")
+
+    def _healthy(self) -> bool:
+        return self._browser is not None and self._browser.is_connected()
+
+    def _ensure_browser(self):
+        if self._browser is not None:
+            expired = (
+                self._pages >= PDF_BROWSER_MAX_PAGES
+                or time.monotonic() - self._launched_at >= PDF_BROWSER_MAX_AGE_S
+            )
+            if expired:
+                print(f"♻️  Browser pool: recycling Chromium after {self._pages} renders")
+                self._close_browser()
+            elif not self._healthy():
+                print("⚠️  Browser pool: Chromium unhealthy — relaunching")
+                self._crashes += 1
+                self._close_browser()
+        if self._browser is None:
+            self._launch()
+        return self._browser
+
+    def _context(self, options: Dict):
+        key = tuple(sorted(options.items()))
+        entry = self._contexts.get(key)
+        if entry is not None and entry[1] >= PDF_CONTEXT_MAX_PAGES:
+            try:
+                entry[0].close()
+            except Exception:
+                pass
+            entry = None
+        if entry is None:
+            entry = [self._browser.new_context(**options), 0]
+            self._contexts[key] = entry
+        entry[1] += 1
+        return entry[0]
+
+    # ── checkout ───────────────────────────────────────────────────────────
+
+    @contextmanager
+    def page(self, **context_options):
+        """
+        Yield a fresh page in a pooled context. The page is always closed; a
+        failure caused by a dead browser drops it so the next checkout relaunches.
+        """
+        self._ensure_browser()  # recycle / relaunch before checkout
+        context = self._context(context_options)
+        # The previous render may have been another account's (or navigated
+        # to the /print page): start without its cookies or permissions
+        context.clear_cookies()
+        context.clear_permissions()
+        page = context.new_page()
+        self._pages += 1
+        try:
+            yield page
+        except Exception as e:
+            # (a "disconnected" event has already dropped and counted it)
+            if self._browser is not None and (_is_crash(e) or not self._healthy()):
+                self._crashes += 1
+                self._close_browser()
+            raise
+        finally:
+            try:
+                if not page.is_closed():
+                    page.evaluate(_CLEAR_STORAGE_JS)
+            except Exception:
+                pass
+            try:
+                if not page.is_closed():
+                    page.close()
+            except Exception:
+                pass
+
+    def health(self) -> Dict:
+        return {
+            "pid": os.getpid(),
+            "connected": self._healthy(),
+            "version": self._browser.version if self._healthy() else None,
+            "age_s": round(time.monotonic() - self._launched_at, 1) if self._browser else None,
+            "pages_rendered": self._pages,
+            "open_contexts": len(self._contexts),
+            "launches": self._launches,
+            "crashes": self._crashes,
+        }
+
+
+_local = threading.local()
+_pools = []
+_pools_lock = threading.Lock()
+
+
+def get_pool() -> BrowserPool:
+    """This thread's pool (a forked child never reuses its parent's browser)."""
+    pool = getattr(_local, "pool", None)
+    if pool is None or getattr(_local, "pid", None) != os.getpid():
+        pool = BrowserPool()
+        _local.pool, _local.pid = pool, os.getpid()
+        with _pools_lock:
+            _pools.append((os.getpid(), pool))
+    return pool
+
+
+@contextmanager
+def browser_page(**context_options) -> Iterator:
+    """Pooled page for one render (see module docstring)."""
+    with get_pool().page(**context_options) as page:
+        yield page
+
+
+def render_with_retry(render, **context_options):
+    """
+    Run render(page) on a pooled page. If the browser crashed mid-render,
+    retry once on a freshly launched browser.
+    """
+    try:
+        with browser_page(**context_options) as page:
+            return render(page)
+    except Exception as e:
+        if not _is_crash(e):
+            raise
+        print(f"⚠️  Browser pool: render hit a crashed browser ({e}) — retrying once")
+        with browser_page(**context_options) as page:
+            return render(page)
+
+
+def health() -> Optional[Dict]:
+    """Health of this thread's pool, or None if it never launched a browser."""
+    pool = getattr(_local, "pool", None)
+    return pool.health() if pool is not None and pool._launches else None
+
+
+@atexit.register
+def _shutdown() -> None:
+    with _pools_lock:
+        pools = [pool for pid, pool in _pools if pid == os.getpid()]
+        _pools.clear()
+    for pool in pools:
+        if pool._pw is not None:
+            pool.close()
@@ -3,6 +3,9 @@ Compute pipeline for processing MLS data:
 - extract: normalize raw SimplyRETS records
 - validate: filter out bad/edge rows
 - calc: compute market snapshot metrics
+- frame: columnar ListingFrame (NumPy when available) for vectorized metrics
+- spatial: grid-bucketed SpatialIndex for radius / k-nearest comp searches
+- pipeline: single-pass extract → validate → city/rental filter → status buckets
 """
 
 
@@ -1,37 +1,33 @@
-import statistics
 from typing import List, Dict
-from datetime import datetime, timedelta, timezone
+from datetime import datetime, timedelta
+
+from .frame import ListingFrame
 
 def snapshot_metrics(rows: List[Dict]) -> Dict:
-    active  = [r for r in rows if r["status"]=="Active"]
-    pending = [r for r in rows if r["status"]=="Pending"]
-    closed  = [r for r in rows if r["status"]=="Closed"]
-    med = lambda xs: statistics.median(xs) if xs else 0
-    avg = lambda xs: (sum(xs)/len(xs)) if xs else 0
-    
-    # Handle timezone-aware/naive datetimes for new7 calculation
-    new7 = []
-    for r in rows:
-        d = r.get("list_date")
-        if d:
-            now = datetime.now(timezone.utc) if d.tzinfo else datetime.now()
-            if d >= now - timedelta(days=7):
-                new7.append(r)
+    # Reuse the pipeline's frame when handed BucketedListings
+    frame = rows.frame if hasattr(rows, "frame") else ListingFrame(rows)
+    active  = frame.status_is("Active")
+    closed  = frame.status_is("Closed")
+    n_active  = frame.count(active)
+    n_pending = frame.count(frame.status_is("Pending"))
+    n_closed  = frame.count(closed)
+
+    # Frame dates are timezone-naive (aware dates are stripped, like extract._iso)
+    new7 = frame.count(frame.since("list_date", datetime.now() - timedelta(days=7)))
 
-    moi  = round(len(active)/len(closed),2) if len(closed)>0 else 999.0
-    ctl  = avg([r["close_to_list_ratio"] for r in closed if r.get("close_to_list_ratio")])
+    moi  = round(n_active/n_closed,2) if n_closed>0 else 999.0
+    ctl  = frame.mean("close_to_list_ratio", closed, default=0)
 
     return {
-        "total_active": len(active),
-        "total_pending": len(pending),
-        "total_closed": len(closed),
-        "new_listings_7d": len(new7),
-        "median_list_price": round(med([r["list_price"] for r in active if r.get("list_price")])),
-        "median_close_price": round(med([r["close_price"] for r in closed if r.get("close_price")])),
-        "avg_dom": round(avg([r["days_on_market"] for r in rows if r.get("days_on_market")]) or 0,1),
-        "avg_price_per_sqft": round(avg([r["price_per_sqft"] for r in active if r.get("price_per_sqft")]) or 0),
+        "total_active": n_active,
+        "total_pending": n_pending,
+        "total_closed": n_closed,
+        "new_listings_7d": new7,
+        "median_list_price": round(frame.median("list_price", active, default=0)),
+        "median_close_price": round(frame.median("close_price", closed, default=0)),
+        "avg_dom": round(frame.mean("days_on_market", default=0) or 0,1),
+        "avg_price_per_sqft": round(frame.mean("price_per_sqft", active, default=0) or 0),
         "close_to_list_ratio": round(ctl or 100.0,1),
         "months_of_inventory": moi,
-        "absorption_rate": round((len(closed)/len(active)*100),2) if len(active)>0 else 0.0
+        "absorption_rate": round((n_closed/n_active*100),2) if n_active>0 else 0.0
     }
-
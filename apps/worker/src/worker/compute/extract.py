@@ -1,5 +1,5 @@
 from datetime import datetime
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, Iterator, List, Optional
 
 class PropertyDataExtractor:
     """
@@ -16,7 +16,10 @@ class PropertyDataExtractor:
         self.raw = raw
 
     def run(self) -> List[Dict[str, Any]]:
-        out=[]
+        return list(self.iter_rows())
+
+    def iter_rows(self) -> Iterator[Dict[str, Any]]:
+        """Generator form of run(): one flat row per parseable raw listing (see compute/pipeline.py)."""
         for p in self.raw:
             try:
                 addr = p.get("address",{}) ; pr = p.get("property",{}) ; mls=p.get("mls",{}) ; sales=p.get("sales",{})
@@ -67,7 +70,7 @@ class PropertyDataExtractor:
                 }
                 property_subtype = subtype_map.get(raw_subtype, raw_subtype or "Other")
                 
-                out.append({
+                row = {
                     "mls_id": p.get("mlsId"),
                     "list_date": list_date,
                     "close_date": close_date,
@@ -87,10 +90,10 @@ class PropertyDataExtractor:
                     "bedrooms": beds,
                     "bathrooms": baths,
                     "street_address": street,
-                })
+                }
             except Exception:
                 continue
-        return out
+            yield row
 
 def _iso(s: Optional[str]):
     """
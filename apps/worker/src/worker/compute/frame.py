@@ -0,0 +1,265 @@
+"""
+Columnar listing frame for report metrics.
+
+Report builders and snapshot_metrics used to compute every median, average,
+quartile and per-status count with Python loops over lists of dicts. A
+ListingFrame is built once per report (see BucketedListings.frame) and holds
+the metric columns as NumPy arrays:
+
+- prices, sqft, DOM, beds: int64 + validity mask
+- PPSF, close-to-list, baths: float64 + validity mask
+- list/close dates: int64 epoch microseconds (timezone stripped, like extract._iso)
+- status: int8 categorical codes; property subtype: int32 codes + labels
+
+Builders express their filters as boolean masks and call the vectorized
+reducers (median/mean/count/sorted_values), so county-level pulls of 10k+
+listings don't spike worker CPU.
+
+Semantics match the list code they replace: a value "counts" for a metric
+only when present and non-zero (the old `if l.get("x")` guard), medians match
+statistics.median (int for an odd count of ints), and results are plain
+Python numbers so result_json stays JSON-serializable.
+
+NumPy is a worker dependency (pyproject.toml). The Python-list fallback only
+keeps the module importable where it isn't installed (e.g. a bare test
+environment) — identical results, just without the speedup.
+"""
+
+import statistics
+from datetime import date, datetime
+from typing import Dict, Iterable, List, Optional, Sequence
+
+try:
+    import numpy as np
+except ImportError:  # pure-Python fallback below
+    np = None
+
+_EPOCH = datetime(1970, 1, 1)
+_MICRO = datetime(1970, 1, 1, 0, 0, 0, 1) - _EPOCH
+
+STATUS_CODES = {"Active": 0, "Pending": 1, "Closed": 2}
+STATUS_OTHER = 3
+
+INT_COLUMNS = ("list_price", "close_price", "sqft", "days_on_market", "bedrooms")
+FLOAT_COLUMNS = ("price_per_sqft", "close_to_list_ratio", "bathrooms")
+DATE_COLUMNS = ("list_date", "close_date")
+
+
+def _to_micros(d) -> Optional[int]:
+    """Naive epoch microseconds for a datetime/date; None when missing or unparseable."""
+    if d is None:
+        return None
+    if isinstance(d, datetime):
+        if d.tzinfo is not None:
+            d = d.replace(tzinfo=None)
+    elif isinstance(d, date):
+        d = datetime(d.year, d.month, d.day)
+    else:
+        return None
+    return (d - _EPOCH) // _MICRO
+
+
+def _num(v, cast):
+    if v is None:
+        return None
+    try:
+        return cast(v)
+    except (TypeError, ValueError):
+        return None
+
+
+def subtype_label(row: Dict) -> str:
+    """Property-type bucket used by the snapshot breakdown."""
+    return row.get("property_subtype") or row.get("property_type") or "Other"
+
+
+class ListingFrame:
+    """Column store over a list of extracted listing rows (rows are not copied)."""
+
+    def __init__(self, rows: Iterable[Dict]):
+        self.rows: List[Dict] = rows if isinstance(rows, list) else list(rows)
+        self.n = len(self.rows)
+        self._values: Dict[str, Sequence] = {}
+        self._valid: Dict[str, Sequence] = {}
+
+        for col in INT_COLUMNS:
+            self._add_column(col, [_num(r.get(col), int) for r in self.rows], "int64")
+        for col in FLOAT_COLUMNS:
+            self._add_column(col, [_num(r.get(col), float) for r in self.rows], "float64")
+        for col in DATE_COLUMNS:
+            self._add_column(col, [_to_micros(r.get(col)) for r in self.rows], "int64")
+
+        # "price" = list price, else close price (price-band analysis)
+        lp_has = self.has("list_price")
+        lp, cp = self._values["list_price"], self._values["close_price"]
+        if np is not None:
+            self._values["price"] = np.where(lp_has, lp, cp)
+            self._valid["price"] = lp_has | self._valid["close_price"]
+        else:
+            self._values["price"] = [a if h else b for a, b, h in zip(lp, cp, lp_has)]
+            self._valid["price"] = [h or v for h, v in zip(lp_has, self._valid["close_price"])]
+
+        status = [STATUS_CODES.get(r.get("status"), STATUS_OTHER) for r in self.rows]
+        labels: Dict[str, int] = {}
+        subtype = [labels.setdefault(subtype_label(r), len(labels)) for r in self.rows]
+        self.subtype_labels: List[str] = list(labels)
+        if np is not None:
+            self.status = np.array(status, dtype=np.int8)
+            self.subtype = np.array(subtype, dtype=np.int32)
+        else:
+            self.status = status
+            self.subtype = subtype
+
+    def _add_column(self, name: str, raw: List, dtype: str) -> None:
+        valid = [v is not None for v in raw]
+        filled = [0 if v is None else v for v in raw]
+        if np is not None:
+            self._values[name] = np.array(filled, dtype=dtype)
+            self._valid[name] = np.array(valid, dtype=bool)
+        else:
+            self._values[name] = filled
+            self._valid[name] = valid
+
+    # ── masks ──────────────────────────────────────────────────────────────
+
+    def everything(self):
+        return np.ones(self.n, dtype=bool) if np is not None else [True] * self.n
+
+    def status_is(self, status: str):
+        code = STATUS_CODES.get(status, STATUS_OTHER)
+        if np is not None:
+            return self.status == code
+        return [s == code for s in self.status]
+
+    def has(self, col: str):
+        """Present and non-zero — the old `if l.get(col)` guard."""
+        vals, valid = self._values[col], self._valid[col]
+        if np is not None:
+            return valid & (vals != 0)
+        return [ok and v != 0 for v, ok in zip(vals, valid)]
+
+    def missing(self, col: str):
+        valid = self._valid[col]
+        if np is not None:
+            return ~valid
+        return [not ok for ok in valid]
+
+    def since(self, date_col: str, cutoff: datetime):
+        """Rows whose date column is on/after cutoff (missing dates never match)."""
+        c = _to_micros(cutoff)
+        vals, valid = self._values[date_col], self._valid[date_col]
+        if np is not None:
+            return valid & (vals >= c)
+        return [ok and v >= c for v, ok in zip(vals, valid)]
+
+    def between(self, col: str, lo, hi):
+        """lo <= value < hi, with missing values treated as 0."""
+        vals = self._values[col]
+        if np is not None:
+            return (vals >= lo) & (vals < hi)
+        return [lo <= v < hi for v in vals]
+
+    def in_group(self, code: int):
+        if np is not None:
+            return self.subtype == code
+        return [g == code for g in self.subtype]
+
+    @staticmethod
+    def all_of(*masks):
+        if np is not None:
+            out = masks[0]
+            for m in masks[1:]:
+                out = out & m
+            return out
+        return [all(t) for t in zip(*masks)]
+
+    @staticmethod
+    def any_of(*masks):
+        if np is not None:
+            out = masks[0]
+            for m in masks[1:]:
+                out = out | m
+            return out
+        return [any(t) for t in zip(*masks)]
+
+    # ── reducers ───────────────────────────────────────────────────────────
+
+    def count(self, mask) -> int:
+        if np is not None:
+            return int(np.count_nonzero(mask))
+        return sum(1 for m in mask if m)
+
+    def _selected(self, col: str, mask):
+        """Values of col where mask holds and the value counts (present, non-zero)."""
+        m = self.has(col) if mask is None else self.all_of(mask, self.has(col))
+        vals = self._values[col]
+        if np is not None:
+            return vals[m]
+        return [v for v, keep in zip(vals, m) if keep]
+
+    def values(self, col: str, mask=None) -> List:
+        """Counted values in row order, as Python numbers."""
+        vals = self._selected(col, mask)
+        return vals.tolist() if np is not None else vals
+
+    def sorted_values(self, col: str, mask=None) -> List:
+        vals = self._selected(col, mask)
+        return np.sort(vals).tolist() if np is not None else sorted(vals)
+
+    def median(self, col: str, mask=None, default=0.0):
+        """statistics.median of counted values; default when there are none."""
+        vals = self._selected(col, mask)
+        n = len(vals)
+        if not n:
+            return default
+        if np is None:
+            return statistics.median(vals)
+        mid = n // 2
+        if n % 2:
+            return np.partition(vals, mid)[mid].item()
+        part = np.partition(vals, (mid - 1, mid))
+        return (part[mid - 1].item() + part[mid].item()) / 2
+
+    def mean(self, col: str, mask=None, default=0.0):
+        """Average of counted values; default when there are none."""
+        vals = self._selected(col, mask)
+        n = len(vals)
+        if not n:
+            return default
+        total = vals.sum().item() if np is not None else sum(vals)
+        return total / n
+
+    def min(self, col: str, mask=None):
+        vals = self._selected(col, mask)
+        if not len(vals):
+            return None
+        return vals.min().item() if np is not None else min(vals)
+
+    def max(self, col: str, mask=None):
+        vals = self._selected(col, mask)
+        if not len(vals):
+            return None
+        return vals.max().item() if np is not None else max(vals)
+
+    def take(self, mask) -> List[Dict]:
+        """Original row dicts where mask holds, in row order."""
+        if np is not None:
+            return [self.rows[i] for i in np.flatnonzero(mask).tolist()]
+        return [r for r, keep in zip(self.rows, mask) if keep]
+
+    def take_top(self, mask, col: str, limit: Optional[int] = None) -> List[Dict]:
+        """
+        Rows where mask holds, highest col first (missing counts as 0).
+        Stable like sorted(..., reverse=True): ties keep row order.
+        """
+        vals = self._values[col]
+        if np is not None:
+            idx = np.flatnonzero(mask)
+            idx = idx[np.argsort(-vals[idx], kind="stable")]
+            order = idx.tolist()
+        else:
+            order = [i for i, keep in enumerate(mask) if keep]
+            order.sort(key=vals.__getitem__, reverse=True)
+        if limit is not None:
+            order = order[:limit]
+        return [self.rows[i] for i in order]
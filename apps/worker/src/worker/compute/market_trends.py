@@ -22,6 +22,7 @@ Field names from extract.py output:
   - "city"            → str
 """
 
+import contextvars
 import logging
 import statistics
 from concurrent.futures import ThreadPoolExecutor, as_completed
@@ -113,9 +114,11 @@ def fetch_and_compute_market_trends(
 
     try:
         with ThreadPoolExecutor(max_workers=3) as executor:
-            fut_closed = executor.submit(_fetch_closed)
-            fut_active = executor.submit(_fetch_active)
-            fut_pending = executor.submit(_fetch_pending)
+            # copy_context() carries the caller's rate_limit_scope (account
+            # attribution for the shared SimplyRETS limiter) into each thread.
+            fut_closed = executor.submit(contextvars.copy_context().run, _fetch_closed)
+            fut_active = executor.submit(contextvars.copy_context().run, _fetch_active)
+            fut_pending = executor.submit(contextvars.copy_context().run, _fetch_pending)
 
             raw_closed = fut_closed.result(timeout=90)
             raw_active = fut_active.result(timeout=90)
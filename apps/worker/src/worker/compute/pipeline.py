@@ -0,0 +1,181 @@
+"""
+Single-pass listing pipeline: extract → validate → city filter → rental
+exclusion → status bucketing.
+
+PropertyDataExtractor.run() used to build a list, filter_valid() copied it,
+and every report builder then re-scanned the copy with several list
+comprehensions (city filter, Active/Pending/Closed splits). For 1,000+
+listing metros that was many passes over large dicts.
+
+Here each stage is a generator, so a row flows through the whole chain once
+and lands directly in a BucketedListings accumulator. Report builders accept
+that accumulator in place of a plain list and read the pre-split buckets
+instead of filtering again. Rows are never copied — every bucket holds
+references to the same dicts.
+
+Usage:
+    from .compute.pipeline import stream_listings
+
+    listings = stream_listings(extracted_rows, city=city)      # rows already extracted
+    listings = stream_listings(raw, city=city, extract=True)   # raw SimplyRETS dicts
+    build_result_json(report_type, listings, context)
+"""
+
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from .extract import PropertyDataExtractor
+from .frame import ListingFrame
+from .validate import iter_valid
+
+# Rental guard (see report_builders._exclude_rentals)
+RENTAL_STATUSES = {"lease", "for lease", "for rent", "rent"}
+MIN_SALE_PRICE = 50_000   # anything below this is almost certainly a rental
+
+
+def city_key(city: Optional[str]) -> Optional[str]:
+    """
+    Normalized city to filter on, or None when no city filter applies
+    (no city, the "Market"/"Unknown" placeholders, or a ZIP used as the
+    label — the API already filtered by postalCodes).
+    """
+    if not city or city == "Market" or city == "Unknown":
+        return None
+    if city.isdigit():
+        return None
+    return city.lower().strip()
+
+
+def in_city(listing: Dict, key: Optional[str]) -> bool:
+    """Exact, case-insensitive city match; everything matches when key is None."""
+    return key is None or (listing.get("city") or "").lower().strip() == key
+
+
+def is_rental(listing: Dict) -> bool:
+    """Rental/lease status, or a sale price too low to be a sale."""
+    status = (listing.get("status") or "").lower().strip()
+    if status in RENTAL_STATUSES:
+        return True
+    price = listing.get("close_price") or listing.get("list_price") or 0
+    try:
+        price = float(price)
+    except (TypeError, ValueError):
+        price = 0
+    return 0 < price < MIN_SALE_PRICE
+
+
+def iter_in_city(rows: Iterable[Dict], city: Optional[str]) -> Iterator[Dict]:
+    key = city_key(city)
+    return (r for r in rows if in_city(r, key))
+
+
+def iter_sales(rows: Iterable[Dict]) -> Iterator[Dict]:
+    return (r for r in rows if not is_rental(r))
+
+
+class BucketedListings:
+    """
+    Listings for one report, split by status in a single pass.
+
+    Behaves like a read-only list of every kept row (len, iteration,
+    indexing/slicing) so code that only needs "the listings" keeps working.
+    `frame` is the columnar view of `all` for metrics, built on first use.
+    `validated` counts the rows that passed validation, before the city
+    filter and rental guard (what filter_valid() used to return; the
+    elastic-widening threshold in tasks.py is measured on it).
+    """
+
+    __slots__ = ("city", "all", "active", "pending", "closed", "validated", "_frame")
+
+    def __init__(self, city: Optional[str] = None):
+        self.city = city_key(city)
+        self.validated = 0
+        self.all: List[Dict] = []
+        self.active: List[Dict] = []
+        self.pending: List[Dict] = []
+        self.closed: List[Dict] = []
+        self._frame: Optional[ListingFrame] = None
+
+    @property
+    def frame(self) -> ListingFrame:
+        if self._frame is None or self._frame.n != len(self.all):
+            self._frame = ListingFrame(self.all)
+        return self._frame
+
+    def add(self, row: Dict) -> None:
+        self.all.append(row)
+        status = row.get("status")
+        if status == "Active":
+            self.active.append(row)
+        elif status == "Pending":
+            self.pending.append(row)
+        elif status == "Closed":
+            self.closed.append(row)
+
+    def __len__(self) -> int:
+        return len(self.all)
+
+    def __iter__(self) -> Iterator[Dict]:
+        return iter(self.all)
+
+    def __getitem__(self, item):
+        return self.all[item]
+
+    def __repr__(self) -> str:
+        return (f"BucketedListings(city={self.city!r}, all={len(self.all)}, "
+                f"active={len(self.active)}, pending={len(self.pending)}, "
+                f"closed={len(self.closed)})")
+
+
+def bucket_listings(rows: Iterable[Dict], city: Optional[str] = None) -> BucketedListings:
+    """City-filter and bucket rows by status (no validation / rental guard)."""
+    out = BucketedListings(city)
+    key = out.city
+    add = out.add
+    for r in rows:
+        if in_city(r, key):
+            add(r)
+    return out
+
+
+def ensure_bucketed(listings: Iterable[Dict], city: Optional[str]) -> BucketedListings:
+    """
+    Builders' entry point: reuse the pipeline's buckets when they were made
+    for this city, otherwise bucket the plain list (old builder semantics:
+    city filter only).
+    """
+    if isinstance(listings, BucketedListings):
+        if listings.city == city_key(city) or city_key(city) is None:
+            return listings
+        return bucket_listings(listings.all, city)
+    return bucket_listings(listings, city)
+
+
+def _counted(rows: Iterable[Dict], out: BucketedListings) -> Iterator[Dict]:
+    for r in rows:
+        out.validated += 1
+        yield r
+
+
+def stream_listings(
+    rows: Iterable[Dict],
+    city: Optional[str] = None,
+    extract: bool = False,
+    exclude_rentals: bool = True,
+) -> BucketedListings:
+    """
+    Run the full chain in one pass and return the bucketed result.
+
+    - rows: extracted rows, or raw SimplyRETS dicts with extract=True
+    - exclude_rentals: drop lease/rent statuses and sub-$50k "sales"
+    """
+    out = BucketedListings(city)
+    it: Iterable[Dict] = PropertyDataExtractor(rows).iter_rows() if extract else rows
+    it = _counted(iter_valid(it), out)
+    it = iter_in_city(it, city)
+    if exclude_rentals:
+        it = iter_sales(it)
+
+    add = out.add
+    for r in it:
+        add(r)
+    return out
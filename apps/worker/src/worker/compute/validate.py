@@ -1,4 +1,4 @@
-from typing import Dict, List, Tuple, Optional
+from typing import Dict, Iterable, Iterator, List, Tuple, Optional
 from datetime import datetime, timezone
 
 _VALID_STATUSES = {'Active','Pending','Closed','Expired','Withdrawn','Temp Off Market'}
@@ -17,10 +17,11 @@ def validate_property(p: Dict) -> Tuple[bool, Optional[str]]:
         if ld > now: return False, "list_date"
     return True, None
 
-def filter_valid(rows: List[Dict]) -> List[Dict]:
-    ok=[] 
+def iter_valid(rows: Iterable[Dict]) -> Iterator[Dict]:
     for r in rows:
         good,_ = validate_property(r)
-        if good: ok.append(r)
-    return ok
+        if good: yield r
+
+def filter_valid(rows: List[Dict]) -> List[Dict]:
+    return list(iter_valid(rows))
 
@@ -1,9 +1,22 @@
-"""SendGrid email provider for sending schedule notifications."""
+"""
+SendGrid email provider for sending schedule notifications.
+
+- send_email(): one request, every recipient in one personalization (legacy).
+- send_email_batched(): one personalization per recipient — recipients don't
+  see each other and each can get their own substitutions (e.g. unsubscribe
+  link) — split into batches of SENDGRID_BATCH_SIZE (SendGrid's maximum is
+  1,000 personalizations per request). Batches are retried independently:
+  each retry round re-sends only the batches that failed transiently.
+
+Both reuse one pooled httpx.Client per process (reset in forked children).
+"""
 import os
 import time
 import logging
 import httpx
-from typing import List, Tuple
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from ...metrics import track_vendor_call
 
 logger = logging.getLogger(__name__)
 
@@ -11,6 +24,7 @@ SENDGRID_API_KEY = os.getenv("SENDGRID_API_KEY", "")
 SENDGRID_API_URL = "https://api.sendgrid.com/v3/mail/send"
 DEFAULT_FROM_NAME = os.getenv("DEFAULT_FROM_NAME", "Market Reports")
 DEFAULT_FROM_EMAIL = os.getenv("DEFAULT_FROM_EMAIL", "reports@example.com")
+SENDGRID_BATCH_SIZE = min(1000, int(os.getenv("SENDGRID_BATCH_SIZE", "1000")))
 
 # Retry configuration
 MAX_RETRIES = 3
@@ -18,6 +32,73 @@ RETRY_DELAY_BASE = 2.0  # Base delay in seconds (exponential backoff)
 RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
 
 
+class BatchResult(NamedTuple):
+    index: int
+    recipients: List[str]
+    status_code: int
+    response_text: str
+    message_id: Optional[str] = None
+    attempts: int = 0
+
+
+_client: Optional[httpx.Client] = None
+
+
+def _get_client() -> httpx.Client:
+    global _client
+    if _client is None:
+        _client = httpx.Client(
+            timeout=30.0,
+            limits=httpx.Limits(max_connections=4, max_keepalive_connections=2),
+        )
+    return _client
+
+
+def _reset_client() -> None:
+    # A prefork child must not share the parent's sockets
+    global _client
+    _client = None
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_client)
+
+
+def _headers() -> Dict[str, str]:
+    return {
+        "Authorization": f"Bearer {SENDGRID_API_KEY}",
+        "Content-Type": "application/json",
+    }
+
+
+def _post_once(payload: Dict) -> Tuple[int, str, Optional[str], bool]:
+    """One request: (status_code, response_text, message_id, retryable)."""
+    try:
+        with track_vendor_call("sendgrid") as call:
+            response = _get_client().post(SENDGRID_API_URL, json=payload, headers=_headers())
+            call["status"] = response.status_code
+        if response.status_code == 202:
+            return 202, "Email sent successfully", response.headers.get("X-Message-Id"), False
+        return (response.status_code, response.text, None,
+                response.status_code in RETRYABLE_STATUS_CODES)
+    except httpx.TimeoutException as e:
+        logger.warning(f"SendGrid timeout: {e}")
+        return 504, f"Timeout: {str(e)}", None, True
+    except httpx.RequestError as e:
+        logger.warning(f"SendGrid request error: {e}")
+        return 500, f"Request error: {str(e)}", None, True
+    except Exception as e:
+        logger.error(f"Unexpected error sending email: {e}")
+        # Don't retry on unexpected errors
+        return 500, f"Unexpected error: {str(e)}", None, False
+
+
+def _backoff(attempt: int) -> None:
+    delay = RETRY_DELAY_BASE * (2 ** (attempt - 1))  # Exponential backoff
+    logger.warning(f"Retry attempt {attempt}/{MAX_RETRIES} after {delay:.1f}s delay")
+    time.sleep(delay)
+
+
 def send_email(
     to_emails: List[str],
     subject: str,
@@ -72,56 +153,93 @@ def send_email(
         ],
     }
     
-    headers = {
-        "Authorization": f"Bearer {SENDGRID_API_KEY}",
-        "Content-Type": "application/json",
-    }
-    
-    last_error = None
-    last_status_code = 500
-    
+    logger.info(f"Sending email to {len(to_emails)} recipient(s): {to_emails}")
     for attempt in range(MAX_RETRIES + 1):
-        try:
-            if attempt == 0:
-                logger.info(f"Sending email to {len(to_emails)} recipient(s): {to_emails}")
-            else:
-                delay = RETRY_DELAY_BASE * (2 ** (attempt - 1))  # Exponential backoff
-                logger.warning(f"Retry attempt {attempt}/{MAX_RETRIES} after {delay:.1f}s delay")
-                time.sleep(delay)
-            
-            with httpx.Client(timeout=30.0) as client:
-                response = client.post(SENDGRID_API_URL, json=payload, headers=headers)
-                
-                if response.status_code == 202:
-                    logger.info(f"Email sent successfully to {to_emails}")
-                    return (202, "Email sent successfully")
-                
-                last_status_code = response.status_code
-                last_error = response.text
-                
-                # Only retry on transient errors
-                if response.status_code not in RETRYABLE_STATUS_CODES:
-                    logger.error(f"SendGrid error {response.status_code}: {last_error}")
-                    return (response.status_code, last_error)
-                
-                logger.warning(f"SendGrid returned {response.status_code}, will retry...")
-                    
-        except httpx.TimeoutException as e:
-            last_status_code = 504
-            last_error = f"Timeout: {str(e)}"
-            logger.warning(f"SendGrid timeout on attempt {attempt + 1}: {e}")
-        except httpx.RequestError as e:
-            last_status_code = 500
-            last_error = f"Request error: {str(e)}"
-            logger.warning(f"SendGrid request error on attempt {attempt + 1}: {e}")
-        except Exception as e:
-            last_status_code = 500
-            last_error = f"Unexpected error: {str(e)}"
-            logger.error(f"Unexpected error sending email: {e}")
-            # Don't retry on unexpected errors
-            return (500, last_error)
-    
+        if attempt:
+            _backoff(attempt)
+        status_code, text, _, retryable = _post_once(payload)
+        if status_code == 202:
+            logger.info(f"Email sent successfully to {to_emails}")
+            return (202, text)
+        if not retryable:
+            logger.error(f"SendGrid error {status_code}: {text}")
+            return (status_code, text)
+        logger.warning(f"SendGrid returned {status_code}, will retry...")
+
     # All retries exhausted
-    logger.error(f"SendGrid failed after {MAX_RETRIES} retries: {last_error}")
-    return (last_status_code, last_error)
+    logger.error(f"SendGrid failed after {MAX_RETRIES} retries: {text}")
+    return (status_code, text)
+
+
+def send_email_batched(
+    to_emails: List[str],
+    subject: str,
+    html_content: str,
+    from_name: str = None,
+    from_email: str = None,
+    substitutions: Optional[Callable[[str], Dict[str, str]]] = None,
+    batch_size: int = None,
+) -> List[BatchResult]:
+    """
+    Send one personalization per recipient, in batches of up to
+    SENDGRID_BATCH_SIZE, retrying only the batches that failed.
+
+    Args:
+        to_emails: Recipient email addresses
+        subject: Email subject line
+        html_content: HTML email body (may contain substitution tags)
+        from_name / from_email: Sender (default DEFAULT_FROM_*)
+        substitutions: recipient -> {tag: value}, applied to html_content
+            per recipient (e.g. {"-unsubscribe_url-": "https://..."})
+        batch_size: override SENDGRID_BATCH_SIZE (max 1,000)
+
+    Returns:
+        One BatchResult per batch, in order; status_code 202 = accepted.
+    """
+    if not SENDGRID_API_KEY:
+        logger.error("SENDGRID_API_KEY not set, cannot send email")
+        return [BatchResult(0, list(to_emails), 500, "SENDGRID_API_KEY not configured")]
+
+    if not to_emails:
+        logger.error("No recipients provided")
+        return [BatchResult(0, [], 400, "No recipients provided")]
+
+    size = max(1, min(batch_size or SENDGRID_BATCH_SIZE, 1000))
+    batches = [to_emails[i:i + size] for i in range(0, len(to_emails), size)]
+    sender = {"email": from_email or DEFAULT_FROM_EMAIL, "name": from_name or DEFAULT_FROM_NAME}
+    content = [{"type": "text/html", "value": html_content}]
+
+    def payload_for(batch: List[str]) -> Dict:
+        personalizations = []
+        for email in batch:
+            p = {"to": [{"email": email}], "subject": subject}
+            if substitutions is not None:
+                p["substitutions"] = substitutions(email)
+            personalizations.append(p)
+        return {"personalizations": personalizations, "from": sender, "content": content}
+
+    logger.info(f"Sending email to {len(to_emails)} recipient(s) in {len(batches)} batch(es)")
+    results: Dict[int, BatchResult] = {}
+    pending = list(range(len(batches)))
+    for attempt in range(MAX_RETRIES + 1):
+        if attempt:
+            _backoff(attempt)
+        retry = []
+        for i in pending:
+            status_code, text, message_id, retryable = _post_once(payload_for(batches[i]))
+            results[i] = BatchResult(i, batches[i], status_code, text, message_id, attempt + 1)
+            if retryable:
+                retry.append(i)
+            elif status_code != 202:
+                logger.error(f"SendGrid error {status_code} on batch {i + 1}/{len(batches)}: {text}")
+        if not retry:
+            break
+        logger.warning(f"SendGrid: {len(retry)}/{len(batches)} batch(es) failed transiently, will retry...")
+        pending = retry
 
+    failed = [r for r in results.values() if r.status_code != 202]
+    if failed:
+        logger.error(f"SendGrid: {len(failed)}/{len(batches)} batch(es) failed")
+    else:
+        logger.info(f"Email sent successfully to {len(to_emails)} recipient(s)")
+    return [results[i] for i in range(len(batches))]
@@ -0,0 +1,198 @@
+"""
+Set-based resolution of typed schedule recipients to email addresses.
+
+schedules.recipients (and the ad-hoc "Generate & Send" list) hold typed
+recipients as JSON strings:
+
+- {"type":"contact","id":"<contact_id>"}          -> contacts.email
+- {"type":"sponsored_agent","id":"<account_id>"}  -> first user of an account
+                                                     this account sponsors
+- {"type":"group","id":"<group_id>"}              -> the group's contact /
+                                                     sponsored_agent members
+- {"type":"manual_email","email":"<email>"}       -> used directly
+- plain strings                                   -> legacy manual emails
+
+Everything is parsed first, then resolved in at most four queries however
+many recipients or group members there are (groups, contacts, sponsored
+agents, email_suppressions) — one SELECT per contact / two per agent made a
+300-member group hundreds of round trips inside the email step. Suppression
+filtering, previously a separate query in email/send.py, happens in the same
+pass.
+
+Runs on the caller's cursor, so RLS (set_rls) applies as before. A failed
+suppression lookup doesn't block the email (same as send.py's check).
+"""
+
+import json
+import uuid
+from typing import Iterable, List, NamedTuple, Set
+
+
+class ResolvedRecipients(NamedTuple):
+    emails: List[str]      # deliverable, deduplicated, in recipient order
+    suppressed: List[str]  # resolved but on the account's suppression list
+
+
+def _valid_uuid(value) -> bool:
+    try:
+        uuid.UUID(str(value))
+        return True
+    except (ValueError, TypeError):
+        return False
+
+
+def _unique(values: Iterable[str]) -> List[str]:
+    return list(dict.fromkeys(values))
+
+
+def resolve_recipients(cur, account_id: str, recipients_raw: list) -> ResolvedRecipients:
+    """Resolve typed recipients; see the module docstring for the formats."""
+    # (kind, value) in recipient order, so emails come out in that order
+    order: List[tuple] = []
+    contact_ids: Set[str] = set()
+    agent_ids: Set[str] = set()
+    group_ids: List[str] = []
+
+    def add_member(kind: str, member_id) -> None:
+        if not member_id:
+            return
+        if not _valid_uuid(member_id):
+            print(f"⚠️  Invalid {kind} id {member_id!r}, skipping")
+            return
+        member_id = str(member_id)
+        order.append((kind, member_id))
+        (contact_ids if kind == "contact" else agent_ids).add(member_id)
+
+    for recipient_str in recipients_raw or []:
+        try:
+            # Try to parse as JSON
+            if recipient_str.startswith("{"):
+                recipient = json.loads(recipient_str)
+                recipient_type = recipient.get("type")
+
+                if recipient_type in ("contact", "sponsored_agent"):
+                    add_member(recipient_type, recipient.get("id"))
+                elif recipient_type == "group":
+                    group_id = recipient.get("id")
+                    if group_id and _valid_uuid(group_id):
+                        order.append(("group", str(group_id)))
+                        group_ids.append(str(group_id))
+                    elif group_id:
+                        print(f"⚠️  Invalid group id {group_id!r}, skipping")
+                elif recipient_type == "manual_email":
+                    # Use email directly
+                    if recipient.get("email"):
+                        order.append(("email", recipient["email"]))
+                else:
+                    print(f"⚠️  Unknown recipient type: {recipient_type}")
+            else:
+                # Legacy plain email string
+                order.append(("email", recipient_str))
+
+        except (json.JSONDecodeError, KeyError, TypeError, AttributeError) as e:
+            print(f"⚠️  Error parsing recipient '{recipient_str}': {e}")
+            # Treat as plain email if JSON parsing fails
+            if isinstance(recipient_str, str) and "@" in recipient_str:
+                order.append(("email", recipient_str))
+
+    # 1) Expand groups (owned by this account) into their members
+    members_by_group = {}
+    if group_ids:
+        cur.execute(
+            """
+            SELECT g.id::text, m.member_type, m.member_id::text
+            FROM contact_groups g
+            LEFT JOIN contact_group_members m
+              ON m.group_id = g.id AND m.account_id = g.account_id
+            WHERE g.id = ANY(%s::uuid[]) AND g.account_id = %s::uuid
+            """,
+            (_unique(group_ids), account_id),
+        )
+        for group_id, member_type, member_id in cur.fetchall():
+            members = members_by_group.setdefault(group_id, [])
+            if member_type in ("contact", "sponsored_agent") and member_id:
+                members.append((member_type, member_id))
+                (contact_ids if member_type == "contact" else agent_ids).add(member_id)
+
+    # 2) Contacts
+    contact_emails = {}
+    if contact_ids:
+        cur.execute(
+            """
+            SELECT id::text, email
+            FROM contacts
+            WHERE id = ANY(%s::uuid[]) AND account_id = %s::uuid
+            """,
+            (sorted(contact_ids), account_id),
+        )
+        contact_emails = {cid: email for cid, email in cur.fetchall()}
+
+    # 3) Sponsored agents: verify sponsorship, take each one's primary user email
+    agent_emails = {}
+    if agent_ids:
+        cur.execute(
+            """
+            SELECT DISTINCT ON (a.id) a.id::text, u.email
+            FROM accounts a
+            LEFT JOIN users u ON u.account_id = a.id
+            WHERE a.id = ANY(%s::uuid[])
+              AND a.sponsor_account_id = %s::uuid
+            ORDER BY a.id, u.created_at
+            """,
+            (sorted(agent_ids), account_id),
+        )
+        agent_emails = {aid: email for aid, email in cur.fetchall()}
+
+    def member_email(kind: str, member_id: str):
+        if kind == "contact":
+            email = contact_emails.get(member_id)
+            if not email:
+                print(f"⚠️  Contact {member_id} not found or has no email")
+            return email
+        if member_id not in agent_emails:
+            print(f"⚠️  Sponsored agent {member_id} not sponsored by {account_id}")
+            return None
+        email = agent_emails[member_id]
+        if not email:
+            print(f"⚠️  Sponsored agent {member_id} has no user email")
+        return email
+
+    emails: List[str] = []
+    for kind, value in order:
+        if kind == "email":
+            emails.append(value)
+        elif kind == "group":
+            if value not in members_by_group:
+                print(f"⚠️  Group {value} not found for account {account_id}")
+                continue
+            emails.extend(member_email(*member) for member in members_by_group[value])
+        else:
+            emails.append(member_email(kind, value))
+
+    # Deduplicate and filter empties
+    emails = _unique(e for e in emails if e and "@" in e)
+    if not emails:
+        return ResolvedRecipients([], [])
+
+    # 4) Suppression list (unsubscribes, bounces)
+    try:
+        cur.execute(
+            """
+            SELECT email
+            FROM email_suppressions
+            WHERE account_id = %s
+              AND email = ANY(%s)
+            """,
+            (account_id, emails),
+        )
+        suppressed = {row[0] for row in cur.fetchall()}
+    except Exception as e:
+        # Don't block the email — proceed with every recipient (as send.py did)
+        print(f"⚠️  Error checking suppressions: {e}, proceeding with all recipients")
+        suppressed = set()
+    if suppressed:
+        print(f"📭 Suppressed recipients: {sorted(suppressed)}")
+    return ResolvedRecipients(
+        [e for e in emails if e not in suppressed],
+        [e for e in emails if e in suppressed],
+    )
@@ -4,8 +4,9 @@ import logging
 import hashlib
 import hmac
 from typing import List, Tuple, Dict, Optional
+from urllib.parse import quote
 
-from .providers.sendgrid import send_email
+from .providers.sendgrid import BatchResult, send_email_batched
 from .template import schedule_email_html, schedule_email_subject
 
 logger = logging.getLogger(__name__)
@@ -33,6 +34,15 @@ def generate_unsubscribe_token(account_id: str, email: str) -> str:
     return signature
 
 
+# Replaced per recipient by SendGrid (personalizations[].substitutions)
+UNSUBSCRIBE_TAG = "-unsubscribe_url-"
+
+
+def unsubscribe_url_for(account_id: str, email: str) -> str:
+    token = generate_unsubscribe_token(account_id, email)
+    return f"{WEB_BASE}/api/v1/email/unsubscribe?token={token}&email={quote(email)}"
+
+
 def send_schedule_email(
     account_id: str,
     recipients: List[str],
@@ -44,6 +54,40 @@ def send_schedule_email(
 ) -> Tuple[int, str]:
     """
     Send a scheduled report notification email to recipients.
+
+    Same arguments as deliver_schedule_email(); returns one (status_code,
+    response_text) for the whole send: 202 when every batch was accepted,
+    otherwise the first failed batch's outcome.
+    """
+    batches = deliver_schedule_email(
+        account_id, recipients, payload, account_name=account_name,
+        db_conn=db_conn, brand=brand, account_type=account_type,
+    )
+    return summarize_batches(batches)
+
+
+def summarize_batches(batches: List[BatchResult]) -> Tuple[int, str]:
+    failed = [b for b in batches if b.status_code not in (200, 202)]
+    if not failed:
+        return (batches[0].status_code, batches[0].response_text)
+    if len(batches) > 1:
+        return (failed[0].status_code,
+                f"{len(failed)} of {len(batches)} batches failed: {failed[0].response_text}")
+    return (failed[0].status_code, failed[0].response_text)
+
+
+def deliver_schedule_email(
+    account_id: str,
+    recipients: List[str],
+    payload: Dict,
+    account_name: Optional[str] = None,
+    db_conn=None,
+    brand: Optional[Dict] = None,
+    account_type: str = "REGULAR",
+) -> List[BatchResult]:
+    """
+    Send a scheduled report notification email to recipients, one SendGrid
+    personalization (and unsubscribe link) per recipient, batched.
     
     Phase 30: Now supports white-label branding for affiliate accounts.
     V14: Sender-aware AI insights based on account_type.
@@ -63,16 +107,18 @@ def send_schedule_email(
             - total_shown: How many displayed (V14)
             - audience_key: Preset audience type (V14)
         account_name: Account name for personalization (optional)
-        db_conn: Database connection for suppression checking (optional)
+        db_conn: Database connection for suppression checking (optional; report
+            emails pass recipients already filtered by email.recipients)
         brand: Optional brand configuration for white-label output (Phase 30)
         account_type: "REGULAR" (agent) or "INDUSTRY_AFFILIATE" (title company) (V14)
     
     Returns:
-        Tuple of (status_code, response_text)
+        One BatchResult per SendGrid batch (a single result when nothing
+        was sent: no recipients, all suppressed, no PDF URL)
     """
     if not recipients:
         logger.warning("No recipients provided for schedule email")
-        return (400, "No recipients")
+        return [BatchResult(0, [], 400, "No recipients")]
     
     # Check suppression list if db_conn provided
     filtered_recipients = recipients[:]
@@ -96,7 +142,7 @@ def send_schedule_email(
                 
                 if not filtered_recipients:
                     logger.info(f"All {len(recipients)} recipient(s) suppressed, skipping email send")
-                    return (200, "All recipients suppressed")
+                    return [BatchResult(0, list(recipients), 200, "All recipients suppressed")]
                     
         except Exception as e:
             logger.warning(f"Error checking suppressions: {e}, proceeding with all recipients")
@@ -128,14 +174,11 @@ def send_schedule_email(
     
     if not pdf_url:
         logger.error("No PDF URL provided in payload")
-        return (400, "No PDF URL")
+        return [BatchResult(0, list(filtered_recipients), 400, "No PDF URL")]
     
-    # Generate unsubscribe URLs (one per recipient)
-    # For v1, we'll use the first recipient's token for all
-    # (In production, you'd send individual emails with unique tokens)
-    first_recipient = recipients[0]
-    unsub_token = generate_unsubscribe_token(account_id, first_recipient)
-    unsubscribe_url = f"{WEB_BASE}/api/v1/email/unsubscribe?token={unsub_token}&email={first_recipient}"
+    # Unsubscribe URLs: one per recipient, substituted by SendGrid into the
+    # shared HTML (each recipient has their own personalization)
+    unsubscribe_url = UNSUBSCRIBE_TAG
     
     # Generate email subject
     subject = schedule_email_subject(report_type, city, zip_codes)
@@ -164,11 +207,10 @@ def send_schedule_email(
     
     # Send email via provider
     logger.info(f"Sending schedule email to {len(filtered_recipients)} recipient(s): {filtered_recipients}")
-    status_code, response_text = send_email(
+    return send_email_batched(
         to_emails=filtered_recipients,
         subject=subject,
         html_content=html_content,
+        substitutions=lambda email: {UNSUBSCRIBE_TAG: unsubscribe_url_for(account_id, email)},
     )
-    
-    return (status_code, response_text)
 
@@ -0,0 +1,418 @@
+"""
+Normalized MLS listing store (Postgres) with incremental per-market sync.
+
+generate_report used to re-pull up to 2,500 raw listings from SimplyRETS on
+every run, even when a dozen schedules in the same city ran minutes earlier.
+Now:
+
+- sync_listing_store (Celery beat) walks every market (city or ZIP) that a
+  schedule or a recent report asked for, pulls only listings modified since
+  that market's watermark, and upserts the PropertyDataExtractor output into
+  mls_listings (migration 0054). Every LISTING_STORE_FULL_SYNC_S it does a full
+  pull instead, which also drops Active/Pending rows that left the feed.
+  A status that hits SYNC_LIMIT_PER_STATUS makes the pull partial: it's
+  logged, the rows are kept, but the watermark, the removal pass and the
+  full-sync timestamp are left alone.
+- load_listings() answers a SimplyRETS query dict (the same one built by
+  query_builders) from the store while every market it touches is fresh,
+  returning rows shaped exactly like PropertyDataExtractor.run() output,
+  in the query's sort order and from its offset. It returns None whenever
+  it can't serve the query faithfully — store disabled, market
+  stale/unknown, unsupported filter or sort, DB error — and the caller
+  falls back to the vendor.
+
+A miss registers the market in mls_sync_state, so the next beat picks it up
+and repeat cities stop touching the vendor rate limit.
+
+Watermark note: SimplyRETS' mindate filter is what we use for "modified
+since" (see query_builders: listDate/modifiedDate). The periodic full sync is
+the safety net for any status change the incremental window misses.
+"""
+
+import os
+from datetime import datetime, timedelta
+from decimal import Decimal
+from typing import Dict, List, Optional
+
+from .compute.extract import PropertyDataExtractor, _iso
+from .db import db_connection
+from .query_builders import build_market_snapshot
+from .vendors.simplyrets import iter_property_pages
+
+
+STORE_ENABLED = os.getenv("LISTING_STORE_ENABLED", "true").lower() == "true"
+MAX_AGE_S = int(os.getenv("LISTING_STORE_MAX_AGE_S", "1800"))            # serve reads only if synced within
+FULL_SYNC_S = int(os.getenv("LISTING_STORE_FULL_SYNC_S", "21600"))       # full re-pull every 6h
+HISTORY_DAYS = int(os.getenv("LISTING_STORE_HISTORY_DAYS", "365"))      # Closed history kept on full sync
+REQUESTED_WITHIN_DAYS = 14     # keep syncing markets a report asked for in this window
+SYNC_LIMIT_PER_STATUS = 5000   # per market, per status (Active/Pending/Closed)
+SYNC_STATUSES = ("Active", "Pending", "Closed")
+STALE_CLAIM_MINUTES = 10       # a sync claim older than this is considered abandoned
+
+# Columns returned to report builders — same keys as PropertyDataExtractor.run()
+_EXTRACT_COLUMNS = (
+    "mls_id", "list_date", "close_date", "status", "days_on_market",
+    "list_price", "close_price", "city", "zip_code", "property_type",
+    "property_subtype", "sqft", "price_per_sqft", "close_to_list_ratio",
+    "hero_photo_url", "bedrooms", "bathrooms", "street_address",
+)
+_STORE_COLUMNS = _EXTRACT_COLUMNS + ("raw_subtype", "modified_at")
+
+# Query-dict keys load_listings() knows how to answer locally
+_SUPPORTED_QUERY_KEYS = {
+    "status", "mindate", "maxdate", "postalCodes", "q", "type", "subtype",
+    "minprice", "maxprice", "minbeds", "minbaths", "limit", "offset", "sort", "vendor",
+}
+
+
+def market_keys(city: Optional[str] = None, zips: Optional[List[str]] = None) -> List[str]:
+    """
+    Store market keys for a report location: one 'zip:<ZIP>' per ZIP, else
+    'city:<lowercased city>'. [] when the location can't be keyed.
+    """
+    zips = [z.strip() for z in (zips or []) if z and z.strip()]
+    if zips:
+        return [f"zip:{z}" for z in zips]
+    city = (city or "").strip()
+    if not city or city in ("Unknown", "Market") or city.isdigit():
+        return []
+    return [f"city:{city.lower()}"]
+
+
+def _where_from_query(query: Dict, city: Optional[str], zips: Optional[List[str]]):
+    """
+    Translate a SimplyRETS query dict into a WHERE clause over mls_listings.
+
+    Returns (sql, args), or None when the query uses something the store
+    doesn't hold (e.g. non-RES types, which the sync never pulls).
+    """
+    if set(query) - _SUPPORTED_QUERY_KEYS:
+        return None
+    if (query.get("type") or "RES") != "RES":
+        return None
+    status = query.get("status")
+    if not status or "," in str(status):
+        return None
+
+    clauses = ["status = %s"]
+    args: list = [status]
+
+    zips = [z.strip() for z in (zips or []) if z and z.strip()]
+    if zips:
+        clauses.append("zip_code = ANY(%s)")
+        args.append(zips)
+    else:
+        clauses.append("lower(city) = %s")
+        args.append((city or "").strip().lower())
+
+    # Same window semantics the vendor applies: anything listed, closed or
+    # modified inside the window. Builders then filter on list/close dates.
+    if query.get("mindate"):
+        clauses.append("GREATEST(list_date, close_date, modified_at) >= %s::date")
+        args.append(query["mindate"])
+    if query.get("maxdate"):
+        clauses.append("LEAST(list_date, close_date, modified_at) < %s::date + 1")
+        args.append(query["maxdate"])
+    if query.get("subtype"):
+        clauses.append("raw_subtype = %s")
+        args.append(query["subtype"])
+    if query.get("minprice") is not None:
+        clauses.append("list_price >= %s")
+        args.append(int(query["minprice"]))
+    if query.get("maxprice") is not None:
+        clauses.append("list_price <= %s")
+        args.append(int(query["maxprice"]))
+    if query.get("minbeds") is not None:
+        clauses.append("bedrooms >= %s")
+        args.append(int(query["minbeds"]))
+    if query.get("minbaths") is not None:
+        clauses.append("bathrooms >= %s")
+        args.append(int(query["minbaths"]))
+    return " AND ".join(clauses), args
+
+
+# SimplyRETS sort fields the store can reproduce ("-" prefix = descending)
+_SORT_COLUMNS = {
+    "listDate": "list_date",
+    "closeDate": "close_date",
+    "daysOnMarket": "days_on_market",
+    "listPrice": "list_price",
+    "closePrice": "close_price",
+}
+# No sort: newest activity first (only matters when a market exceeds the limit)
+_DEFAULT_ORDER = "GREATEST(list_date, close_date, modified_at) DESC NULLS LAST"
+
+
+def _order_from_query(query: Dict) -> Optional[str]:
+    """
+    ORDER BY expression for the query's `sort`, or None when the store can't
+    reproduce the vendor's ordering (the caller then falls back to the vendor,
+    since a truncated result would be a different row set).
+    """
+    sort = query.get("sort")
+    if not sort:
+        return f"{_DEFAULT_ORDER}, mls_id"
+    desc = sort.startswith("-")
+    column = _SORT_COLUMNS.get(sort.lstrip("-"))
+    if column is None:
+        return None
+    return f"{column} {'DESC' if desc else 'ASC'} NULLS LAST, mls_id"
+
+
+def _note_requested(cur, city: Optional[str], zips: Optional[List[str]]) -> None:
+    """Register (or refresh) the markets a report asked for so the beat sync covers them."""
+    zips = [z.strip() for z in (zips or []) if z and z.strip()]
+    if zips:
+        rows = [(f"zip:{z}", None, z) for z in zips]
+    else:
+        rows = [(k, city.strip(), None) for k in market_keys(city)]
+    cur.executemany("""
+        INSERT INTO mls_sync_state (market_key, city, zip_code, last_requested_at)
+        VALUES (%s, %s, %s, NOW())
+        ON CONFLICT (market_key) DO UPDATE SET last_requested_at = NOW()
+    """, rows)
+
+
+def load_listings(
+    query: Dict,
+    city: Optional[str] = None,
+    zips: Optional[List[str]] = None,
+    limit: Optional[int] = None,
+) -> Optional[List[Dict]]:
+    """
+    Answer a SimplyRETS query from the listing store.
+
+    Returns PropertyDataExtractor-shaped rows, or None if the caller should
+    fetch from the vendor instead.
+    """
+    if not STORE_ENABLED:
+        return None
+    keys = market_keys(city, zips)
+    if not keys:
+        return None
+    where = _where_from_query(query, city, zips)
+    order_by = _order_from_query(query)
+    if where is None or order_by is None:
+        return None
+    where_sql, args = where
+    limit = int(limit or query.get("limit") or 1000)
+    offset = int(query.get("offset") or 0)
+
+    try:
+        with db_connection(autocommit=True) as conn:
+            with conn.cursor() as cur:
+                _note_requested(cur, city, zips)
+                cur.execute("""
+                    SELECT COUNT(*) FROM mls_sync_state
+                    WHERE market_key = ANY(%s)
+                      AND last_synced_at > NOW() - make_interval(secs => %s)
+                """, (keys, MAX_AGE_S))
+                if cur.fetchone()[0] < len(keys):
+                    return None
+
+                cur.execute(
+                    f"SELECT {', '.join(_EXTRACT_COLUMNS)} FROM mls_listings "
+                    f"WHERE {where_sql} "
+                    f"ORDER BY {order_by} "
+                    f"LIMIT %s OFFSET %s",
+                    (*args, limit, offset),
+                )
+                rows = cur.fetchall()
+    except Exception as e:
+        print(f"⚠️  listing_store: read failed, falling back to vendor: {e}")
+        return None
+
+    return [
+        {
+            col: float(val) if isinstance(val, Decimal) else val
+            for col, val in zip(_EXTRACT_COLUMNS, row)
+        }
+        for row in rows
+    ]
+
+
+def to_store_rows(raw: List[Dict]) -> List[Dict]:
+    """
+    Run PropertyDataExtractor over raw vendor listings and add the two
+    store-only fields it doesn't emit: raw SimplyRETS subType and modified.
+    """
+    vendor_fields = {
+        p.get("mlsId"): (
+            ((p.get("property") or {}).get("subType") or None),
+            _iso(p.get("modified")),
+        )
+        for p in raw
+    }
+    rows = []
+    for r in PropertyDataExtractor(raw).run():
+        if not r.get("mls_id"):
+            continue
+        raw_subtype, modified_at = vendor_fields.get(r["mls_id"], (None, None))
+        rows.append({**r, "mls_id": str(r["mls_id"]), "raw_subtype": raw_subtype,
+                     "modified_at": modified_at})
+    return rows
+
+
+def upsert_listings(cur, rows: List[Dict]) -> int:
+    """Upsert store rows; an older vendor copy never overwrites a newer one."""
+    if not rows:
+        return 0
+    cols = ", ".join(_STORE_COLUMNS)
+    placeholders = ", ".join(["%s"] * len(_STORE_COLUMNS))
+    updates = ", ".join(f"{c} = EXCLUDED.{c}" for c in _STORE_COLUMNS if c != "mls_id")
+    cur.executemany(
+        f"INSERT INTO mls_listings ({cols}, synced_at) VALUES ({placeholders}, NOW()) "
+        f"ON CONFLICT (mls_id) DO UPDATE SET {updates}, synced_at = NOW() "
+        f"WHERE mls_listings.modified_at IS NULL OR EXCLUDED.modified_at IS NULL "
+        f"OR EXCLUDED.modified_at >= mls_listings.modified_at",
+        [tuple(r.get(c) for c in _STORE_COLUMNS) for r in rows],
+    )
+    return len(rows)
+
+
+def _claim_market(cur, market_key: str):
+    cur.execute("""
+        UPDATE mls_sync_state
+        SET sync_started_at = NOW()
+        WHERE market_key = %s
+          AND (sync_started_at IS NULL
+               OR sync_started_at < NOW() - make_interval(mins => %s))
+        RETURNING city, zip_code, watermark, last_full_sync_at, NOW()
+    """, (market_key, STALE_CLAIM_MINUTES))
+    return cur.fetchone()
+
+
+def sync_market(market_key: str) -> Dict:
+    """
+    Sync one market into the store. Incremental (modified since watermark)
+    unless the market has never had, or is due for, a full pull.
+    """
+    with db_connection(autocommit=True) as conn:
+        with conn.cursor() as cur:
+            claim = _claim_market(cur, market_key)
+    if not claim:
+        return {"market": market_key, "skipped": "already_syncing"}
+
+    city, zip_code, watermark, last_full, claimed_at = claim
+    full = (
+        watermark is None
+        or last_full is None
+        or (claimed_at - last_full).total_seconds() >= FULL_SYNC_S
+    )
+    location = {"city": city, "zips": [zip_code] if zip_code else None}
+    if full:
+        since = (datetime.utcnow() - timedelta(days=HISTORY_DAYS)).date()
+    else:
+        # One day of overlap: mindate is date-granular and vendor clocks drift
+        since = (watermark - timedelta(days=1)).date()
+
+    try:
+        rows: List[Dict] = []
+        truncated: List[str] = []
+        for status in SYNC_STATUSES:
+            q = build_market_snapshot(location)
+            q.pop("maxdate", None)
+            q["status"] = status
+            if full and status != "Closed":
+                # Full pull: the whole current Active/Pending book, no window
+                q.pop("mindate", None)
+            else:
+                q["mindate"] = since.isoformat()
+            pulled = 0
+            for page in iter_property_pages(q, limit=SYNC_LIMIT_PER_STATUS,
+                                            caller="sync_listing_store"):
+                pulled += len(page)
+                rows.extend(to_store_rows(page))
+            if pulled >= SYNC_LIMIT_PER_STATUS:
+                truncated.append(status)
+
+        if truncated:
+            # The pull stopped at the cap, so it can't stand in for the whole
+            # market: keep the old watermark, skip the removal pass and don't
+            # count it as a full sync (the next beat tries again)
+            print(f"⚠️  listing_store: {market_key} hit SYNC_LIMIT_PER_STATUS="
+                  f"{SYNC_LIMIT_PER_STATUS} for {', '.join(truncated)}; "
+                  f"{'full' if full else 'incremental'} sync is partial")
+            new_watermark = watermark or datetime.utcnow()
+        else:
+            new_watermark = max(
+                [r["modified_at"] for r in rows if r.get("modified_at")] + ([watermark] if watermark else []),
+                default=None,
+            ) or datetime.utcnow()
+        complete_full = full and not truncated
+
+        with db_connection(autocommit=False) as conn:
+            with conn.cursor() as cur:
+                upserted = upsert_listings(cur, rows)
+                removed = 0
+                if complete_full:
+                    # Active/Pending rows the full pull didn't see have left the feed
+                    cur.execute("""
+                        DELETE FROM mls_listings
+                        WHERE status IN ('Active', 'Pending')
+                          AND synced_at < %s
+                          AND (zip_code = %s OR (%s::text IS NULL AND lower(city) = lower(%s)))
+                    """, (claimed_at, zip_code, zip_code, city))
+                    removed = cur.rowcount
+                cur.execute("""
+                    UPDATE mls_sync_state
+                    SET watermark = %s,
+                        last_synced_at = NOW(),
+                        last_full_sync_at = CASE WHEN %s THEN NOW() ELSE last_full_sync_at END,
+                        listing_count = (
+                            SELECT COUNT(*) FROM mls_listings
+                            WHERE zip_code = %s OR (%s::text IS NULL AND lower(city) = lower(%s))
+                        ),
+                        sync_started_at = NULL,
+                        last_error = NULL
+                    WHERE market_key = %s
+                """, (new_watermark, complete_full, zip_code, zip_code, city, market_key))
+            conn.commit()
+    except Exception as e:
+        with db_connection(autocommit=True) as conn:
+            with conn.cursor() as cur:
+                cur.execute("""
+                    UPDATE mls_sync_state
+                    SET sync_started_at = NULL, last_error = %s
+                    WHERE market_key = %s
+                """, (str(e)[:500], market_key))
+        raise
+
+    print(f"🗄️  listing_store: {market_key} {'full' if full else 'incremental'} sync "
+          f"upserted={upserted} removed={removed} since={since}")
+    return {"market": market_key, "full": full, "upserted": upserted, "removed": removed,
+            "truncated": truncated}
+
+
+def markets_to_sync() -> List[str]:
+    """
+    Markets covered by the beat sync: every active schedule's city/ZIPs plus
+    anything a report asked for in the last REQUESTED_WITHIN_DAYS.
+    """
+    with db_connection(autocommit=True) as conn:
+        with conn.cursor() as cur:
+            cur.execute("SELECT city, zip_codes FROM schedules WHERE active = TRUE")
+            for city, zip_codes in cur.fetchall():
+                _note_requested(cur, city, zip_codes)
+            cur.execute("""
+                SELECT market_key FROM mls_sync_state
+                WHERE last_requested_at > NOW() - make_interval(days => %s)
+                ORDER BY last_synced_at NULLS FIRST
+            """, (REQUESTED_WITHIN_DAYS,))
+            return [r[0] for r in cur.fetchall()]
+
+
+def sync_all_markets() -> Dict:
+    """Sync every tracked market; one market failing doesn't stop the rest."""
+    if not STORE_ENABLED:
+        return {"ok": True, "skipped": "disabled"}
+    synced, failed = 0, 0
+    for key in markets_to_sync():
+        try:
+            result = sync_market(key)
+            if not result.get("skipped"):
+                synced += 1
+        except Exception as e:
+            failed += 1
+            print(f"⚠️  listing_store: sync failed for {key}: {e}")
+    return {"ok": failed == 0, "synced": synced, "failed": failed}
@@ -19,15 +19,9 @@ Usage:
 import logging
 from typing import Any, Dict
 from pathlib import Path
-from jinja2 import Environment, FileSystemLoader, select_autoescape
 
 from worker.property_builder import compute_color_roles, _darken
-from worker.template_filters import (
-    format_currency,
-    format_currency_short,
-    format_number,
-    truncate,
-)
+from worker.template_env import get_environment
 from worker.ai_market_narrative import generate_market_pdf_narrative
 
 logger = logging.getLogger(__name__)
@@ -174,17 +168,9 @@ class MarketReportBuilder:
 
         self.layout: str = LAYOUT_MAP[self.report_type]
 
-        # Jinja2 environment rooted at templates/market/
-        self.env = Environment(
-            loader=FileSystemLoader(str(TEMPLATES_DIR)),
-            autoescape=select_autoescape(["html", "xml", "jinja2"]),
-            trim_blocks=True,
-            lstrip_blocks=True,
-        )
-        self.env.filters["format_currency"] = format_currency
-        self.env.filters["format_currency_short"] = format_currency_short
-        self.env.filters["format_number"] = format_number
-        self.env.filters["truncate"] = truncate
+        # Process-wide Jinja2 environment rooted at templates/market/
+        # (compiled templates are cached across reports — see template_env.py)
+        self.env = get_environment("market")
 
     # ── colour resolution ──────────────────────────────────────────────────
 
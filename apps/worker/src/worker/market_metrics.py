@@ -0,0 +1,288 @@
+"""
+Precomputed per-market report metrics (market_metrics_daily, migration 0056).
+
+Schedules for the same city and report type often fire in the same tick of
+schedules_tick.process_due_schedules, and every one of them rebuilt the same
+build_result_json output — the 15-minute report cache is keyed by the full
+params (schedule_id included), so they never shared it. Now:
+
+- precompute_all() (Celery beat, every MARKET_METRICS_INTERVAL_S) walks the
+  distinct report scopes of active schedules and, from the listing store,
+  materializes for today:
+    * unfiltered schedules: the builder output for (market, report type,
+      lookback), with its status counts and headline metrics
+    * preset (price_strategy) schedules: the 90-day pricing baseline
+      (compute_market_stats) per market and subtype
+- generate_report serves unfiltered runs straight from load_result(), and
+  resolves preset filters against load_market_stats() so only the filtered
+  listings are fetched per schedule. A run that computes either itself writes
+  it through (store_result / store_market_stats) for the rest of the tick.
+
+Rows are only served while younger than MARKET_METRICS_MAX_AGE_S (and from
+today), so they never lag the listing store by more than a beat interval.
+The precompute reads the listing store only — a market that isn't fresh there
+is skipped, never fetched from the vendor.
+"""
+
+import os
+import time
+from typing import Dict, List, Optional, Tuple
+
+from .cache import safe_json_dumps
+from .compute.pipeline import stream_listings
+from .db import db_connection
+from .filter_resolver import compute_market_stats
+from .listing_store import load_listings, market_keys
+from .query_builders import (
+    build_market_snapshot,
+    build_market_snapshot_closed,
+    build_market_snapshot_pending,
+    build_params,
+)
+from .report_builders import build_result_json
+
+MARKET_METRICS_ENABLED = os.getenv("MARKET_METRICS_ENABLED", "true").lower() == "true"
+MAX_AGE_S = int(os.getenv("MARKET_METRICS_MAX_AGE_S", "4500"))          # hourly job + slack
+RETENTION_DAYS = int(os.getenv("MARKET_METRICS_RETENTION_DAYS", "90"))
+BASELINE_LOOKBACK_DAYS = 90    # generate_report's pricing baseline window
+MARKET_STATS = "market_stats"  # report_type of baseline rows
+
+
+def report_city_label(city: Optional[str], zips: Optional[List[str]]) -> str:
+    """The display city generate_report uses (ZIP reports: the first ZIPs)."""
+    if not city and zips:
+        # For ZIP-based reports, use ZIP code(s) as the "city" label
+        # The _filter_by_city function knows to skip filtering when city is a ZIP
+        city = ", ".join(zips[:3]) + ("..." if len(zips) > 3 else "")
+    return city or "Unknown"  # Don't default to Houston - this indicates a problem
+
+
+def is_snapshot(report_type: Optional[str]) -> bool:
+    rt = (report_type or "market_snapshot").lower().replace("_", "-").replace(" ", "-")
+    return rt in ("market-snapshot", "snapshot")
+
+
+def report_queries(report_type: str, params: Dict) -> Dict[str, Tuple[Dict, int, Dict]]:
+    """
+    generate_report's listing queries, {name: (query, limit, location)}:
+    Market Snapshot queries Active, Closed and Pending separately (each
+    status needs its own query for accurate counts); the rest use one.
+    """
+    if is_snapshot(report_type):
+        return {
+            "active": (build_market_snapshot(params), 1000, params),
+            "closed": (build_market_snapshot_closed(params), 1000, params),
+            "pending": (build_market_snapshot_pending(params), 500, params),
+        }
+    return {"main": (build_params(report_type, params), 800, params)}
+
+
+def baseline_params(city: str, zips: Optional[List[str]], subtype: Optional[str]) -> Dict:
+    """Location + subtype only (no bed/bath filters), for a stable median."""
+    return {
+        "city": city,
+        "zips": zips,
+        "lookback_days": BASELINE_LOOKBACK_DAYS,
+        "filters": {"subtype": subtype} if subtype else {},
+    }
+
+
+def _market_key(city: Optional[str], zips: Optional[List[str]]) -> Optional[str]:
+    keys = market_keys(city, zips)
+    return ",".join(sorted(keys)) if keys else None
+
+
+# ── Reads ────────────────────────────────────────────────────────────────────
+
+def _load(market_key: str, city_label: str, report_type: str, lookback_days: int,
+          variant: str, column: str) -> Optional[Dict]:
+    try:
+        with db_connection(autocommit=True) as conn:
+            with conn.cursor() as cur:
+                cur.execute(f"""
+                    SELECT {column}
+                    FROM market_metrics_daily
+                    WHERE metric_date = CURRENT_DATE
+                      AND market_key = %s AND city_label = %s
+                      AND report_type = %s AND lookback_days = %s AND variant = %s
+                      AND computed_at > NOW() - make_interval(secs => %s)
+                """, (market_key, city_label, report_type, lookback_days, variant, MAX_AGE_S))
+                row = cur.fetchone()
+    except Exception as e:
+        print(f"⚠️  market_metrics: read failed, computing instead: {e}")
+        return None
+    return row[0] if row else None
+
+
+def load_result(report_type: str, city_label: str, city: Optional[str],
+                zips: Optional[List[str]], lookback_days: int) -> Optional[Dict]:
+    """Today's precomputed unfiltered result_json for this scope, or None."""
+    key = _market_key(city, zips)
+    if not MARKET_METRICS_ENABLED or not key:
+        return None
+    return _load(key, city_label, report_type, lookback_days, "", "result_json")
+
+
+def load_market_stats(city: Optional[str], zips: Optional[List[str]],
+                      subtype: Optional[str]) -> Optional[Dict]:
+    """Today's precomputed pricing baseline for this market/subtype, or None."""
+    key = _market_key(city, zips)
+    if not MARKET_METRICS_ENABLED or not key:
+        return None
+    return _load(key, "", MARKET_STATS, BASELINE_LOOKBACK_DAYS, subtype or "", "metrics")
+
+
+# ── Writes ───────────────────────────────────────────────────────────────────
+
+def _store(market_key: str, city_label: str, report_type: str, lookback_days: int,
+           variant: str, counts: Optional[Dict], metrics: Optional[Dict],
+           result: Optional[Dict], listing_count: int) -> None:
+    try:
+        with db_connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute("""
+                    INSERT INTO market_metrics_daily (
+                        metric_date, market_key, city_label, report_type, lookback_days, variant,
+                        counts, metrics, result_json, listing_count, computed_at
+                    )
+                    VALUES (CURRENT_DATE, %s, %s, %s, %s, %s, %s::jsonb, %s::jsonb, %s::jsonb, %s, NOW())
+                    ON CONFLICT (metric_date, market_key, city_label, report_type, lookback_days, variant)
+                    DO UPDATE SET counts = EXCLUDED.counts,
+                                  metrics = EXCLUDED.metrics,
+                                  result_json = EXCLUDED.result_json,
+                                  listing_count = EXCLUDED.listing_count,
+                                  computed_at = EXCLUDED.computed_at
+                """, (
+                    market_key, city_label, report_type, lookback_days, variant,
+                    safe_json_dumps(counts) if counts is not None else None,
+                    safe_json_dumps(metrics) if metrics is not None else None,
+                    safe_json_dumps(result) if result is not None else None,
+                    listing_count,
+                ))
+    except Exception as e:
+        print(f"⚠️  market_metrics: write failed (non-critical): {e}")
+
+
+def store_result(report_type: str, city_label: str, city: Optional[str],
+                 zips: Optional[List[str]], lookback_days: int, result: Dict,
+                 listing_count: int) -> None:
+    """Materialize an unfiltered result_json (from the beat job or a run)."""
+    key = _market_key(city, zips)
+    if not MARKET_METRICS_ENABLED or not key:
+        return
+    _store(key, city_label, report_type, lookback_days, "",
+           result.get("counts"), result.get("metrics"), result, listing_count)
+
+
+def store_market_stats(city: Optional[str], zips: Optional[List[str]],
+                       subtype: Optional[str], stats: Dict) -> None:
+    key = _market_key(city, zips)
+    if not MARKET_METRICS_ENABLED or not key:
+        return
+    _store(key, "", MARKET_STATS, BASELINE_LOOKBACK_DAYS, subtype or "",
+           None, stats, None, int(stats.get("count") or 0))
+
+
+# ── Precompute ───────────────────────────────────────────────────────────────
+
+def _load_from_store(queries: Dict[str, Tuple[Dict, int, Dict]]) -> Optional[Dict[str, List[Dict]]]:
+    rows_by_name = {}
+    for name, (query, limit, location) in queries.items():
+        rows = load_listings(query, city=location.get("city"), zips=location.get("zips"), limit=limit)
+        if rows is None:
+            return None  # market not fresh in the store — leave it to the runs
+        rows_by_name[name] = rows
+    return rows_by_name
+
+
+def precompute_result(report_type: str, city: Optional[str], zips: Optional[List[str]],
+                      lookback_days: int) -> bool:
+    """Build and store one unfiltered scope from the listing store. False if skipped."""
+    label = report_city_label(city, zips)
+    # Same params as a scheduled run (enqueue_report), minus the schedule link
+    params = {"city": city, "zips": zips, "lookback_days": lookback_days, "filters": {}}
+    t0 = time.perf_counter()
+    rows_by_name = _load_from_store(report_queries(report_type, params))
+    if rows_by_name is None:
+        return False
+    ms = round((time.perf_counter() - t0) * 1000, 1)
+    rows = [r for name in rows_by_name for r in rows_by_name[name]]
+    clean = stream_listings(rows, city=label)
+    result = build_result_json(report_type, clean, {
+        "city": label,
+        "lookback_days": lookback_days,
+        "generated_at": int(time.time()),
+        "filters": {},
+    })
+    result["fetch_timings"] = {
+        name: {"source": "market_metrics", "ms": ms, "count": len(r)}
+        for name, r in rows_by_name.items()
+    }
+    store_result(report_type, label, city, zips, lookback_days, result, len(clean))
+    return True
+
+
+def precompute_market_stats(city: Optional[str], zips: Optional[List[str]],
+                            subtype: Optional[str]) -> bool:
+    label = report_city_label(city, zips)
+    params = baseline_params(label, zips, subtype)
+    rows_by_name = _load_from_store({"baseline": (build_params("inventory", params), 500, params)})
+    if rows_by_name is None:
+        return False
+    store_market_stats(city, zips, subtype, compute_market_stats(rows_by_name["baseline"]))
+    return True
+
+
+def _active_scopes() -> List[Tuple[str, Optional[str], Optional[List[str]], int, Dict]]:
+    with db_connection(autocommit=True) as conn:
+        with conn.cursor() as cur:
+            cur.execute("""
+                SELECT DISTINCT report_type, city, zip_codes, COALESCE(lookback_days, 30),
+                       COALESCE(filters, '{}'::jsonb)
+                FROM schedules
+                WHERE active = TRUE
+            """)
+            return cur.fetchall()
+
+
+def precompute_all() -> Dict:
+    """Materialize today's metrics for every active schedule scope."""
+    if not MARKET_METRICS_ENABLED:
+        return {"ok": True, "skipped": "disabled"}
+    started = time.perf_counter()
+    done, skipped, failed = set(), 0, 0
+    for report_type, city, zips, lookback, filters in _active_scopes():
+        zips = list(zips) if zips else None
+        if filters.get("price_strategy"):
+            work = (MARKET_STATS, city, tuple(zips or ()), filters.get("subtype"))
+        elif not filters:
+            work = (report_type, city, tuple(zips or ()), lookback)
+        else:
+            continue  # plain filters: runs query the listing store directly
+        if work in done:
+            continue
+        done.add(work)
+        try:
+            if work[0] == MARKET_STATS:
+                ok = precompute_market_stats(city, zips, filters.get("subtype"))
+            else:
+                ok = precompute_result(report_type, city, zips, int(lookback))
+            skipped += 0 if ok else 1
+        except Exception as e:
+            failed += 1
+            print(f"⚠️  market_metrics: precompute failed for {work}: {e}")
+
+    try:
+        with db_connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute(
+                    "DELETE FROM market_metrics_daily WHERE metric_date < CURRENT_DATE - %s",
+                    (RETENTION_DAYS,),
+                )
+    except Exception as e:
+        print(f"⚠️  market_metrics: retention purge failed: {e}")
+
+    computed = len(done) - skipped - failed
+    print(f"📊 market_metrics: precomputed {computed}/{len(done)} scopes "
+          f"(skipped={skipped} failed={failed}) in {time.perf_counter() - started:.1f}s")
+    return {"ok": failed == 0, "computed": computed, "skipped": skipped, "failed": failed}
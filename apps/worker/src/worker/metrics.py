@@ -0,0 +1,247 @@
+"""
+Prometheus metrics for the worker (prometheus_client) — served by a sidecar.
+
+Twin of the API's api/metrics.py: the vendor metric names and buckets match
+so one dashboard covers both deployments (tell them apart by the scrape job).
+
+The worker runs Celery prefork, so every task executes in a child process.
+With WORKER_METRICS_PORT set, prometheus_client runs in multiprocess mode:
+each process writes its samples to WORKER_METRICS_DIR (PROMETHEUS_MULTIPROC_DIR)
+and the sidecar HTTP server — started in the main process — aggregates the
+files on /metrics. Counters and histograms of children that have exited are
+kept; the pool gauges are "livesum" and only count live children (a dead
+child's gauge files are dropped, see _LiveCollector). The directory is
+cleared when the worker starts.
+
+    mr_worker_task_duration_seconds{task, state}   histogram (state: SUCCESS, FAILURE, RETRY)
+    mr_worker_task_retries_total{task}             counter
+    mr_vendor_request_duration_seconds{vendor}     histogram
+    mr_vendor_requests_total{vendor, status}       counter (status="429" = rate limited)
+    mr_webhook_deliveries_total{status}            counter
+    mr_worker_db_pool_connections{state}           gauge    } worker/db.py pools,
+    mr_worker_db_pool_events_total{event}          counter  } summed over children
+
+Usage:
+    from .metrics import track_vendor_call
+
+    with track_vendor_call("pdfshift") as call:
+        resp = httpx.post(...)
+        call["status"] = resp.status_code
+
+WORKER_METRICS_PORT unset (default) disables the sidecar and the files.
+"""
+
+import os
+import re
+import sys
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional
+
+WORKER_METRICS_PORT = int(os.getenv("WORKER_METRICS_PORT", "0") or 0)
+WORKER_METRICS_DIR = os.getenv("WORKER_METRICS_DIR", "/tmp/mr_worker_metrics")
+
+if WORKER_METRICS_PORT:
+    # Must be set before prometheus_client is imported anywhere in the process
+    os.environ.setdefault("PROMETHEUS_MULTIPROC_DIR", WORKER_METRICS_DIR)
+    os.makedirs(os.environ["PROMETHEUS_MULTIPROC_DIR"], exist_ok=True)
+
+from prometheus_client import (  # noqa: E402
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    disable_created_metrics,
+    generate_latest,
+    multiprocess,
+    start_http_server,
+)
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+TASK_BUCKETS = (0.1, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0, 120.0, 300.0)
+
+CONTENT_TYPE = CONTENT_TYPE_LATEST
+
+# No *_created series: dashboards only use the counters themselves
+disable_created_metrics()
+
+
+def render(registry: CollectorRegistry = REGISTRY) -> str:
+    """Prometheus text exposition of a registry (default: this process)."""
+    return generate_latest(registry).decode()
+
+
+# ============================================================================
+# METRICS
+# ============================================================================
+
+VENDOR_REQUEST_SECONDS = Histogram(
+    "mr_vendor_request_duration_seconds", "Outbound vendor API call latency.", ("vendor",),
+    buckets=DEFAULT_BUCKETS,
+)
+VENDOR_REQUESTS = Counter(
+    "mr_vendor_requests_total", "Outbound vendor API calls by HTTP status (or 'error').",
+    ("vendor", "status"),
+)
+TASK_SECONDS = Histogram(
+    "mr_worker_task_duration_seconds", "Celery task run time by final state.",
+    ("task", "state"), buckets=TASK_BUCKETS,
+)
+TASK_RETRIES = Counter("mr_worker_task_retries_total", "Celery task retries.", ("task",))
+WEBHOOK_DELIVERIES = Counter(
+    "mr_webhook_deliveries_total",
+    "Webhook delivery attempts by outcome (delivered, retrying, failed, dead_letter).",
+    ("status",),
+)
+DB_POOL_CONNECTIONS = Gauge(
+    "mr_worker_db_pool_connections", "Worker pool connections by state (idle, checked_out).",
+    ("state",), multiprocess_mode="livesum",
+)
+DB_POOL_EVENTS = Counter(
+    "mr_worker_db_pool_events_total", "Worker pool connects / reuses / recycles / discards.",
+    ("event",),
+)
+
+
+@contextmanager
+def track_vendor_call(vendor: str) -> Iterator[Dict[str, Any]]:
+    """Time one vendor HTTP call; set call["status"] to the response status."""
+    call: Dict[str, Any] = {"status": None}
+    started = time.perf_counter()
+    try:
+        yield call
+    except Exception:
+        if call["status"] is None:
+            call["status"] = "error"
+        raise
+    finally:
+        VENDOR_REQUEST_SECONDS.labels(vendor=vendor).observe(time.perf_counter() - started)
+        VENDOR_REQUESTS.labels(vendor=vendor, status=call["status"] or "unknown").inc()
+
+
+# ── worker/db.py pool: copied into the metrics after each task ───────────────
+
+_POOL_EVENTS = ("connects", "reused", "recycled", "discarded")
+_pool_seen: Dict[str, int] = {}  # pool.stats already counted by this process
+
+
+def _db_pool():
+    db = sys.modules.get(f"{__package__}.db")  # never import (or create) the pool here
+    return getattr(db, "_pool", None)
+
+
+def sync_db_pool() -> None:
+    """Publish this process's pool state and new pool events. Never raises."""
+    try:
+        pool = _db_pool()
+        if pool is None:
+            return
+        health = pool.health()
+        for state in ("idle", "checked_out"):
+            DB_POOL_CONNECTIONS.labels(state=state).set(health[state])
+        for event in _POOL_EVENTS:
+            delta = health[event] - _pool_seen.get(event, 0)
+            if delta > 0:
+                DB_POOL_EVENTS.labels(event=event).inc(delta)
+            _pool_seen[event] = health[event]
+    except Exception as e:
+        print(f"⚠️  metrics: db pool sync failed (non-critical): {e}")
+
+
+# ── Celery task hooks (connected in app.py) ──────────────────────────────────
+
+_task_started: Dict[str, float] = {}
+
+
+def on_task_prerun(task_id: Optional[str] = None, **_kwargs) -> None:
+    if task_id:
+        _task_started[task_id] = time.perf_counter()
+
+
+def on_task_postrun(task_id: Optional[str] = None, task=None, state: Optional[str] = None,
+                    **_kwargs) -> None:
+    started = _task_started.pop(task_id, None)
+    if started is not None:
+        TASK_SECONDS.labels(task=getattr(task, "name", "unknown"),
+                            state=state or "unknown").observe(time.perf_counter() - started)
+    sync_db_pool()
+
+
+def on_task_retry(request=None, **_kwargs) -> None:
+    TASK_RETRIES.labels(task=getattr(request, "task", None) or "unknown").inc()
+
+
+def on_process_shutdown(**_kwargs) -> None:
+    """worker_process_shutdown: drop this child's live gauges."""
+    if WORKER_METRICS_PORT:
+        multiprocess.mark_process_dead(os.getpid())
+
+
+def _reset_after_fork() -> None:
+    """A forked child counts pool events from what it inherited, not from zero."""
+    _task_started.clear()
+    _pool_seen.clear()
+    pool = _db_pool()
+    if pool is not None:
+        _pool_seen.update({event: pool.stats[event] for event in _POOL_EVENTS})
+
+
+os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+# ── Prefork sidecar ──────────────────────────────────────────────────────────
+
+_LIVE_GAUGE_FILE = re.compile(r"^gauge_live\w*_(\d+)\.db$")
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class _LiveCollector(multiprocess.MultiProcessCollector):
+    """
+    MultiProcessCollector that first drops live gauges of dead processes —
+    children killed without a clean worker_process_shutdown (OOM, SIGKILL,
+    max-tasks-per-child recycling mid-crash) would otherwise keep inflating
+    the pool gauges. Counter and histogram files are kept and summed.
+    """
+
+    def collect(self):
+        for name in os.listdir(self._path):
+            match = _LIVE_GAUGE_FILE.match(name)
+            if match and not _pid_alive(int(match.group(1))):
+                multiprocess.mark_process_dead(int(match.group(1)), self._path)
+        return super().collect()
+
+
+def start_metrics_server():
+    """
+    Start the /metrics sidecar in the main worker process (worker_init),
+    clearing files left by a previous run. No-op unless WORKER_METRICS_PORT
+    is set.
+    """
+    if not WORKER_METRICS_PORT:
+        return None
+    path = os.environ["PROMETHEUS_MULTIPROC_DIR"]
+    try:
+        for name in os.listdir(path):
+            try:
+                os.remove(os.path.join(path, name))
+            except OSError:
+                pass
+        registry = CollectorRegistry()
+        _LiveCollector(registry, path)
+        server, _thread = start_http_server(WORKER_METRICS_PORT, registry=registry)
+    except Exception as e:
+        print(f"⚠️  metrics: sidecar not started on :{WORKER_METRICS_PORT}: {e}")
+        return None
+    print(f"📈 metrics: serving /metrics on :{WORKER_METRICS_PORT}")
+    return server
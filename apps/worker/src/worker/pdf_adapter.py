@@ -45,18 +45,15 @@ def _generate_via_playwright(url: str, output_path: str, wait_for_network: bool)
     Generate PDF using Playwright (local development).
     Requires: playwright package + chromium installed
     """
-    try:
-        from playwright.sync_api import sync_playwright
-    except ImportError:
+    if not _is_playwright_available():
         raise ImportError(
             "Playwright not installed. "
             "Run: pip install playwright && python -m playwright install chromium"
         )
+    from .browser_pool import render_with_retry
     
-    with sync_playwright() as p:
-        browser = p.chromium.launch()
-        page = browser.new_page(device_scale_factor=2)
-        
+    # Pooled, long-lived Chromium — each render only opens a page
+    def _render(page):
         wait_option = "networkidle" if wait_for_network else "domcontentloaded"
         page.goto(url, wait_until=wait_option)
         
@@ -74,8 +71,8 @@ def _generate_via_playwright(url: str, output_path: str, wait_for_network: bool)
                 "left": "0"
             }
         )
-        browser.close()
     
+    render_with_retry(_render, device_scale_factor=2)
     return True
 
 
@@ -179,10 +176,17 @@ def get_pdf_engine_info() -> dict:
         "engine": PDF_ENGINE,
         "api_configured": bool(PDF_API_URL and PDF_API_KEY),
         "api_url": PDF_API_URL if PDF_API_URL else None,
-        "playwright_available": _is_playwright_available()
+        "playwright_available": _is_playwright_available(),
+        "browser_pool": browser_pool_health(),
     }
 
 
+def browser_pool_health() -> Optional[dict]:
+    """This process's pooled Chromium state (None until the first Playwright render)."""
+    from .browser_pool import health
+    return health()
+
+
 def _is_playwright_available() -> bool:
     """Check if Playwright is installed and chromium is available."""
     try:
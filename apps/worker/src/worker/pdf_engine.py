@@ -26,6 +26,8 @@ import httpx
 from pathlib import Path
 from typing import Tuple, Optional
 
+from .metrics import track_vendor_call
+
 # Configuration
 PDF_ENGINE = os.getenv("PDF_ENGINE", "playwright").lower()
 PDFSHIFT_API_KEY = os.getenv("PDFSHIFT_API_KEY", "")
@@ -77,7 +79,7 @@ def render_pdf_playwright(
     # a follow-up. For now we accept the kwargs and ignore them so the
     # caller signature is consistent across backends.
     _ = (header_html, footer_html, header_start_at, footer_start_at)
-    from playwright.sync_api import sync_playwright
+    from .browser_pool import render_with_retry
     
     effective_base = print_base or PRINT_BASE
     print_url = f"{effective_base}/print/{run_id}"
@@ -85,10 +87,8 @@ def render_pdf_playwright(
     
     print(f"🎭 Rendering PDF with Playwright: {print_url}")
     
-    with sync_playwright() as p:
-        browser = p.chromium.launch(headless=True)
-        page = browser.new_page()
-        
+    # Pooled, long-lived Chromium — each render only opens a page
+    def _render(page):
         if html_content:
             # Render from HTML string
             page.set_content(html_content, wait_until="networkidle")
@@ -115,8 +115,8 @@ def render_pdf_playwright(
                 "left": "0"
             }
         )
-        
-        browser.close()
+    
+    render_with_retry(_render)
     
     print(f"✅ PDF generated: {pdf_path} ({os.path.getsize(pdf_path)} bytes)")
     return pdf_path, print_url
@@ -277,12 +277,14 @@ def render_pdf_pdfshift(
     print(f"🔑 Using API key: {PDFSHIFT_API_KEY[:10]}...{PDFSHIFT_API_KEY[-4:]}")
     print(f"📦 Payload: {payload}")
     
-    response = httpx.post(
-        PDFSHIFT_API_URL,
-        json=payload,
-        headers=headers,
-        timeout=120.0  # HTTP timeout for the API call itself
-    )
+    with track_vendor_call("pdfshift") as call:
+        response = httpx.post(
+            PDFSHIFT_API_URL,
+            json=payload,
+            headers=headers,
+            timeout=120.0  # HTTP timeout for the API call itself
+        )
+        call["status"] = response.status_code
     
     print(f"📊 PDFShift response: {response.status_code}")
     
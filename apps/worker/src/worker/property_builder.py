@@ -22,13 +22,7 @@ import logging
 import colorsys
 from typing import Dict, Any, List, Optional
 from pathlib import Path
-from jinja2 import Environment, FileSystemLoader, select_autoescape
-from worker.template_filters import (
-    format_currency as _fmt_currency,
-    format_currency_short as _fmt_currency_short,
-    format_number as _fmt_number,
-    truncate as _truncate_fn,
-)
+from worker.template_env import get_environment
 
 logger = logging.getLogger(__name__)
 
@@ -292,19 +286,9 @@ class PropertyReportBuilder:
         else:
             self.page_set = ["cover", "contents", "aerial", "property", "analysis", "comparables", "range"]
         
-        # Initialize Jinja2 environment - single directory for all templates
-        self.env = Environment(
-            loader=FileSystemLoader(str(TEMPLATES_DIR)),
-            autoescape=select_autoescape(['html', 'xml', 'jinja2']),
-            trim_blocks=True,
-            lstrip_blocks=True
-        )
-        
-        # Add custom filters (shared with MarketReportBuilder via template_filters.py)
-        self.env.filters['format_currency'] = _fmt_currency
-        self.env.filters['format_currency_short'] = _fmt_currency_short
-        self.env.filters['format_number'] = _fmt_number
-        self.env.filters['truncate'] = _truncate_fn
+        # Process-wide Jinja2 environment - single directory for all templates,
+        # filters shared with MarketReportBuilder (see template_env.py)
+        self.env = get_environment("property")
         
     @staticmethod
     def _format_currency(value: Any) -> str:
@@ -2,17 +2,23 @@
 Report builders for all 5 TrendyReports template types.
 
 Each builder takes:
-- listings: list of property dicts (from PropertyDataExtractor)
+- listings: list of property dicts (from PropertyDataExtractor), or the
+  BucketedListings produced by compute.pipeline.stream_listings — already
+  validated, city-filtered and split by status in one pass, so builders read
+  the buckets instead of re-scanning the list; metrics (medians, averages,
+  quartiles, per-status counts) are masks + reducers on the buckets'
+  columnar ListingFrame (compute.frame)
 - context: dict with city, lookback_days, etc.
 
 Returns:
 - result_json dict matching the shape expected by frontend templates
 """
 
-import statistics
 from typing import List, Dict, Any
 from datetime import datetime, timedelta, date
 
+from .compute.pipeline import ensure_bucketed, city_key, in_city, is_rental
+
 # NOTE:
 # Gallery/featured listing photos are proxied to R2 at runtime in `tasks.generate_report`
 # so cloud renderers (PDFShift) load images from our domain rather than MLS/CDN URLs.
@@ -31,14 +37,6 @@ def _format_date(d: date | datetime | None) -> str:
         d = d.date()
     return d.strftime("%b %d, %Y")
 
-def _median(vals: List[float]) -> float:
-    """Safe median calculation"""
-    return statistics.median(vals) if vals else 0.0
-
-def _average(vals: List[float]) -> float:
-    """Safe average calculation"""
-    return (sum(vals) / len(vals)) if vals else 0.0
-
 def _period_label(lookback_days: int) -> str:
     """Generate period label"""
     if lookback_days == 7:
@@ -72,9 +70,9 @@ def build_market_snapshot_result(listings: List[Dict], context: Dict) -> Dict:
     city = context.get("city", "Market")
     lookback_days = context.get("lookback_days", 30)
     
-    # Filter to only include listings from the requested city
+    # Only listings from the requested city, pre-split by status
     # (SimplyRETS q parameter may return nearby cities)
-    listings = _filter_by_city(listings, city)
+    buckets = ensure_bucketed(listings, city)
     
     # Constants for MOI calculation
     # 30.437 = average days per month (365.25 / 12)
@@ -87,13 +85,13 @@ def build_market_snapshot_result(listings: List[Dict], context: Dict) -> Dict:
     
     # Segment by status
     # Active: Current inventory (no date filter needed - these are current)
-    active = [l for l in listings if l.get("status") == "Active"]
+    active = buckets.active
     
     # Pending: Properties under contract (filter by list_date in period)
-    pending = [l for l in listings if l.get("status") == "Pending"]
+    pending = buckets.pending
     
     # All closed (before date filtering)
-    all_closed = [l for l in listings if l.get("status") == "Closed"]
+    all_closed = buckets.closed
     
     # Debug: Log close_date values to verify extraction
     print(f"📊 METRICS DEBUG: {len(all_closed)} total Closed listings found")
@@ -104,40 +102,23 @@ def build_market_snapshot_result(listings: List[Dict], context: Dict) -> Dict:
     
     # Closed: ONLY those with close_date within the lookback period
     # This is critical for accurate Closed Sales count
-    closed = []
-    for l in all_closed:
-        close_date = l.get("close_date")
-        if close_date:
-            try:
-                # Handle both timezone-aware and timezone-naive datetimes
-                if close_date.tzinfo is not None:
-                    close_date = close_date.replace(tzinfo=None)
-                if close_date >= cutoff_date:
-                    closed.append(l)
-            except Exception as e:
-                print(f"📊 METRICS DEBUG: Error comparing dates: {e}")
+    # (frame dates are timezone-naive; missing close_date never matches)
+    frame = buckets.frame
+    active_m = frame.status_is("Active")
+    closed_m = frame.all_of(frame.status_is("Closed"), frame.since("close_date", cutoff_date))
+    closed = frame.take(closed_m)
     
     print(f"📊 METRICS DEBUG: {len(closed)} Closed listings after date filter (cutoff={cutoff_date})")
     
     # New Listings: Active listings with list_date within the lookback period
-    new_listings = []
-    for l in active:
-        list_date = l.get("list_date")
-        if list_date:
-            try:
-                if list_date.tzinfo is not None:
-                    list_date = list_date.replace(tzinfo=None)
-                if list_date >= cutoff_date:
-                    new_listings.append(l)
-            except Exception as e:
-                print(f"📊 METRICS DEBUG: Error comparing list dates: {e}")
+    new_listings_count = frame.count(frame.all_of(active_m, frame.since("list_date", cutoff_date)))
     
     # Core metrics (using date-filtered closed listings)
-    median_close_price = _median([l["close_price"] for l in closed if l.get("close_price")])
-    median_list_price = _median([l["list_price"] for l in active if l.get("list_price")])
+    median_close_price = frame.median("close_price", closed_m)
+    median_list_price = frame.median("list_price", active_m)
     
     # Avg DOM: Use closed listings (days from list to close)
-    avg_dom = _average([l["days_on_market"] for l in closed if l.get("days_on_market")])
+    avg_dom = frame.mean("days_on_market", closed_m)
     
     # MOI: Active inventory / Closed sales per month
     # Per market_worker.py reference:
@@ -150,38 +131,27 @@ def build_market_snapshot_result(listings: List[Dict], context: Dict) -> Dict:
         moi = 99.9  # Very high if no closed sales (buyer's market indicator)
     
     # Close-to-list ratio (from closed sales)
-    ctl_ratios = [l["close_to_list_ratio"] for l in closed if l.get("close_to_list_ratio")]
-    ctl = _average(ctl_ratios) if ctl_ratios else 100.0
+    ctl = frame.mean("close_to_list_ratio", closed_m, default=100.0)
     
     # Property types (SFR, Condo, Townhome, etc.) - using property_subtype for better categorization
     # Note: If user filtered by subtype, we may only have one type. That's expected.
-    property_subtypes = {}
-    for listing in listings:
-        # Use property_subtype (mapped from SimplyRETS subType) for accurate breakdown
-        ptype = listing.get("property_subtype") or listing.get("property_type") or "Other"
-        if ptype not in property_subtypes:
-            property_subtypes[ptype] = []
-        property_subtypes[ptype].append(listing)
-    
+    # Types are frame subtype codes, in first-seen order
     by_type = []
-    for ptype, props in property_subtypes.items():
+    for code, ptype in enumerate(frame.subtype_labels):
+        group = frame.in_group(code)
         # Use date-filtered closed listings for accurate counts
-        closed_props = [
-            p for p in props 
-            if p.get("status") == "Closed" 
-            and p.get("close_date") 
-            and p["close_date"] >= cutoff_date
-        ]
-        active_props = [p for p in props if p.get("status") == "Active"]
-        
+        type_closed = frame.all_of(group, closed_m)
+        type_active = frame.all_of(group, active_m)
+        closed_count = frame.count(type_closed)
+        active_count = frame.count(type_active)
         # Include types that have either closed or active listings
-        if closed_props or active_props:
+        if closed_count or active_count:
             by_type.append({
                 "label": ptype,
-                "count": len(closed_props),  # Closed sales in period
-                "active_count": len(active_props),  # Current active inventory
-                "median_price": _median([p["close_price"] for p in closed_props if p.get("close_price")]) if closed_props else _median([p["list_price"] for p in active_props if p.get("list_price")]),
-                "avg_dom": _average([p["days_on_market"] for p in closed_props if p.get("days_on_market")]) if closed_props else _average([p["days_on_market"] for p in active_props if p.get("days_on_market")])
+                "count": closed_count,  # Closed sales in period
+                "active_count": active_count,  # Current active inventory
+                "median_price": frame.median("close_price", type_closed) if closed_count else frame.median("list_price", type_active),
+                "avg_dom": frame.mean("days_on_market", type_closed if closed_count else type_active)
             })
     
     # Price tiers (dynamic based on market)
@@ -189,47 +159,43 @@ def build_market_snapshot_result(listings: List[Dict], context: Dict) -> Dict:
     # - Median price: from Closed sales in period
     # - Closed count: from Closed sales in period
     # - MOI per tier: Active count in tier / Closed count in tier
-    if closed:
-        prices = sorted([l["close_price"] for l in closed if l.get("close_price")])
-        if prices:
-            # Dynamic tier boundaries based on actual market data
-            p25 = prices[len(prices) // 4] if len(prices) >= 4 else prices[0]
-            p50 = prices[len(prices) // 2]
-            p75 = prices[(3 * len(prices)) // 4] if len(prices) >= 4 else prices[-1]
-            
-            tiers = [
-                ("Entry", 0, p50),
-                ("Move-Up", p50, p75),
-                ("Luxury", p75, float('inf'))
-            ]
+    price_tiers = []
+    prices = frame.sorted_values("close_price", closed_m) if closed else []
+    if prices:
+        # Dynamic tier boundaries based on actual market data
+        p50 = prices[len(prices) // 2]
+        p75 = prices[(3 * len(prices)) // 4] if len(prices) >= 4 else prices[-1]
+        
+        tiers = [
+            ("Entry", 0, p50),
+            ("Move-Up", p50, p75),
+            ("Luxury", p75, float('inf'))
+        ]
+        
+        for label, min_price, max_price in tiers:
+            # Closed sales in this tier (already date-filtered)
+            tier_closed = frame.all_of(closed_m, frame.between("close_price", min_price, max_price))
+            # Active inventory in this tier
+            tier_active = frame.all_of(active_m, frame.between("list_price", min_price, max_price))
+            tier_closed_count = frame.count(tier_closed)
+            tier_active_count = frame.count(tier_active)
             
-            price_tiers = []
-            for label, min_price, max_price in tiers:
-                # Closed sales in this tier (already date-filtered)
-                tier_closed = [l for l in closed if min_price <= l.get("close_price", 0) < max_price]
-                # Active inventory in this tier
-                tier_active = [l for l in active if min_price <= l.get("list_price", 0) < max_price]
+            if tier_closed_count or tier_active_count:
+                # MOI per tier: Active / Monthly Sales Rate
+                # Per market_worker.py: Monthly Sales Rate = Closed × (30.437 / lookback)
+                if tier_closed_count:
+                    tier_monthly_rate = tier_closed_count * (AVG_DAYS_PER_MONTH / lookback_days)
+                    tier_moi = tier_active_count / tier_monthly_rate if tier_monthly_rate > 0 else 99.9
+                else:
+                    tier_moi = 99.9  # No closed sales in tier
                 
-                if tier_closed or tier_active:
-                    # MOI per tier: Active / Monthly Sales Rate
-                    # Per market_worker.py: Monthly Sales Rate = Closed × (30.437 / lookback)
-                    if tier_closed:
-                        tier_monthly_rate = len(tier_closed) * (AVG_DAYS_PER_MONTH / lookback_days)
-                        tier_moi = len(tier_active) / tier_monthly_rate if tier_monthly_rate > 0 else 99.9
-                    else:
-                        tier_moi = 99.9  # No closed sales in tier
-                    
-                    price_tiers.append({
-                        "label": label,
-                        "count": len(tier_closed),  # Closed sales in period
-                        "active_count": len(tier_active),  # Current active inventory
-                        "median_price": _median([l["close_price"] for l in tier_closed if l.get("close_price")]) if tier_closed else 0,
-                        "moi": round(tier_moi, 1)
-                    })
-        else:
-            price_tiers = []
-    else:
-        price_tiers = []
+                price_tiers.append({
+                    "label": label,
+                    "count": tier_closed_count,  # Closed sales in period
+                    "active_count": tier_active_count,  # Current active inventory
+                    "median_price": frame.median("close_price", tier_closed, default=0),
+                    "moi": round(tier_moi, 1)
+                })
     
     return {
         "report_type": "market_snapshot",
@@ -243,7 +209,7 @@ def build_market_snapshot_result(listings: List[Dict], context: Dict) -> Dict:
             "Active": len(active),           # Current active inventory
             "Pending": len(pending),         # Properties under contract
             "Closed": len(closed),           # Closed sales in period (date-filtered!)
-            "NewListings": len(new_listings), # New listings in period
+            "NewListings": new_listings_count, # New listings in period
         },
         
         # Metrics (all based on date-filtered data)
@@ -251,10 +217,10 @@ def build_market_snapshot_result(listings: List[Dict], context: Dict) -> Dict:
             "median_list_price": median_list_price,
             "median_close_price": median_close_price,
             "avg_dom": round(avg_dom, 1) if avg_dom else 0,
-            "avg_ppsf": round(_average([l.get("price_per_sqft") for l in active if l.get("price_per_sqft")]) or 0, 0),
+            "avg_ppsf": round(frame.mean("price_per_sqft", active_m) or 0, 0),
             "close_to_list_ratio": round(ctl, 1),
             "months_of_inventory": round(moi, 1),
-            "new_listings_count": len(new_listings),  # For core indicators
+            "new_listings_count": new_listings_count,  # For core indicators
         },
         
         # Breakdown data
@@ -282,24 +248,14 @@ def _filter_by_city(listings: List[Dict], city: str) -> List[Dict]:
     NOTE: When searching by ZIP code, city may be set to the ZIP itself (e.g., "91750").
     In this case, we skip city filtering since the API already filtered by postalCodes.
     """
-    if not city or city == "Market" or city == "Unknown":
+    # No filter for placeholders or a ZIP used as the label
+    # (the API already filtered by postalCodes parameter)
+    key = city_key(city)
+    if key is None:
         return listings
     
-    # Skip filtering if "city" is actually a ZIP code (all digits)
-    # The API already filtered by postalCodes parameter
-    if city.isdigit():
-        return listings
-    
-    city_lower = city.lower().strip()
-    
-    filtered = []
-    for l in listings:
-        listing_city = (l.get("city") or "").lower().strip()
-        # Exact match (case-insensitive)
-        if listing_city == city_lower:
-            filtered.append(l)
-    
-    return filtered
+    # Exact match (case-insensitive)
+    return [l for l in listings if in_city(l, key)]
 
 
 def _exclude_rentals(listings: List[Dict]) -> List[Dict]:
@@ -316,24 +272,9 @@ def _exclude_rentals(listings: List[Dict]) -> List[Dict]:
          typos in a sales dataset.
 
     Both conditions are independent — a listing is excluded if EITHER matches.
+    The same guard runs inline in compute.pipeline.stream_listings.
     """
-    RENTAL_STATUSES = {"lease", "for lease", "for rent", "rent"}
-    MIN_SALE_PRICE = 50_000   # anything below this is almost certainly a rental
-
-    result = []
-    for listing in listings:
-        status = (listing.get("status") or "").lower().strip()
-        if status in RENTAL_STATUSES:
-            continue
-        price = listing.get("close_price") or listing.get("list_price") or 0
-        try:
-            price = float(price)
-        except (TypeError, ValueError):
-            price = 0
-        if price > 0 and price < MIN_SALE_PRICE:
-            continue
-        result.append(listing)
-    return result
+    return [l for l in listings if not is_rental(l)]
 
 
 def build_new_listings_result(listings: List[Dict], context: Dict) -> Dict:
@@ -352,41 +293,26 @@ def build_new_listings_result(listings: List[Dict], context: Dict) -> Dict:
     
     # Filter to only include listings from the requested city
     # (SimplyRETS q parameter may return nearby cities)
-    city_filtered = _filter_by_city(listings, city)
+    buckets = ensure_bucketed(listings, city)
     
     # Calculate date cutoff for filtering
     cutoff_date = datetime.now() - timedelta(days=lookback_days)
     
     # Filter to active listings WITH DATE FILTERING
     # SimplyRETS API does NOT filter Active listings by mindate/maxdate reliably
-    # We must filter client-side by list_date
-    new_listings = []
-    for l in city_filtered:
-        if l.get("status") != "Active":
-            continue
-        list_date = l.get("list_date")
-        if list_date:
-            try:
-                # Handle both timezone-aware and timezone-naive datetimes
-                if hasattr(list_date, 'tzinfo') and list_date.tzinfo is not None:
-                    list_date = list_date.replace(tzinfo=None)
-                if list_date >= cutoff_date:
-                    new_listings.append(l)
-            except Exception as e:
-                print(f"📊 NEW_LISTINGS DEBUG: Error comparing dates: {e}")
-        else:
-            # No list_date - skip (shouldn't happen)
-            pass
+    # We must filter client-side by list_date (listings without one are skipped)
+    frame = buckets.frame
+    new_m = frame.all_of(frame.status_is("Active"), frame.since("list_date", cutoff_date))
     
-    print(f"📊 NEW_LISTINGS DEBUG: {len(new_listings)} listings after date filter (cutoff={cutoff_date.date()})")
+    # Sorted by list date descending
+    new_listings = frame.take_top(new_m, "list_date")
     
-    # Sort by list date descending
-    new_listings.sort(key=lambda x: x.get("list_date") or datetime.min, reverse=True)
+    print(f"📊 NEW_LISTINGS DEBUG: {len(new_listings)} listings after date filter (cutoff={cutoff_date.date()})")
     
     # Compute metrics
-    median_price = _median([l["list_price"] for l in new_listings if l.get("list_price")])
-    avg_dom = _average([l["days_on_market"] for l in new_listings if l.get("days_on_market")])
-    avg_ppsf = _average([l["price_per_sqft"] for l in new_listings if l.get("price_per_sqft")])
+    median_price = frame.median("list_price", new_m)
+    avg_dom = frame.mean("days_on_market", new_m)
+    avg_ppsf = frame.mean("price_per_sqft", new_m)
     
     return {
         "report_type": "new_listings",
@@ -430,48 +356,36 @@ def build_inventory_result(listings: List[Dict], context: Dict) -> Dict:
     lookback_days = context.get("lookback_days", 30)
     
     # Filter to only include listings from the requested city
-    listings = _filter_by_city(listings, city)
+    buckets = ensure_bucketed(listings, city)
     
     # Calculate date cutoff for filtering
     cutoff_date = datetime.now() - timedelta(days=lookback_days)
     
     # Active listings only - WITH DATE FILTERING
-    # Only include listings that were listed within the lookback period
-    active = []
-    for l in listings:
-        if l.get("status") != "Active":
-            continue
-        list_date = l.get("list_date")
-        if list_date:
-            try:
-                # Handle both timezone-aware and timezone-naive datetimes
-                if hasattr(list_date, 'tzinfo') and list_date.tzinfo is not None:
-                    list_date = list_date.replace(tzinfo=None)
-                if list_date >= cutoff_date:
-                    active.append(l)
-            except Exception as e:
-                print(f"📊 INVENTORY DEBUG: Error comparing dates: {e}")
-                # Include listing if we can't compare dates (fail-safe)
-                active.append(l)
-        else:
-            # No list_date - include anyway (shouldn't happen, but fail-safe)
-            active.append(l)
+    # Only include listings that were listed within the lookback period.
+    # No (or unusable) list_date - include anyway (shouldn't happen, but fail-safe)
+    frame = buckets.frame
+    active_m = frame.all_of(
+        frame.status_is("Active"),
+        frame.any_of(frame.since("list_date", cutoff_date), frame.missing("list_date")),
+    )
+    active_count = frame.count(active_m)
     
-    print(f"📊 INVENTORY DEBUG: {len(active)} Active listings after date filter (cutoff={cutoff_date})")
+    print(f"📊 INVENTORY DEBUG: {active_count} Active listings after date filter (cutoff={cutoff_date})")
     
     # New this month
     month_start = datetime.now().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-    new_this_month = [l for l in active if l.get("list_date") and l["list_date"] >= month_start]
+    new_this_month = frame.count(frame.all_of(active_m, frame.since("list_date", month_start)))
     
     # Closed for MOI calculation
-    closed = [l for l in listings if l.get("status") == "Closed"]
-    moi = (len(active) / len(closed)) * (lookback_days / 30) if closed else 0.0
+    closed = buckets.closed
+    moi = (active_count / len(closed)) * (lookback_days / 30) if closed else 0.0
     
     # Sort by DOM descending (longest on market first)
-    active_sorted = sorted(active, key=lambda x: x.get("days_on_market") or 0, reverse=True)
+    active_sorted = frame.take_top(active_m, "days_on_market")
     
     # Median DOM
-    median_dom = _median([l["days_on_market"] for l in active if l.get("days_on_market")])
+    median_dom = frame.median("days_on_market", active_m)
     
     return {
         "report_type": "inventory",
@@ -482,7 +396,7 @@ def build_inventory_result(listings: List[Dict], context: Dict) -> Dict:
         
         # Counts
         "counts": {
-            "Active": len(active),
+            "Active": active_count,
             "Pending": 0,
             "Closed": 0,
         },
@@ -491,7 +405,7 @@ def build_inventory_result(listings: List[Dict], context: Dict) -> Dict:
         "metrics": {
             "median_dom": round(median_dom, 1),
             "months_of_inventory": round(moi, 1),
-            "new_this_month": len(new_this_month),
+            "new_this_month": new_this_month,
         },
         
         # Listings for table
@@ -514,40 +428,27 @@ def build_closed_result(listings: List[Dict], context: Dict) -> Dict:
     lookback_days = context.get("lookback_days", 30)
     
     # Filter to only include listings from the requested city
-    listings = _filter_by_city(listings, city)
+    buckets = ensure_bucketed(listings, city)
     
     # Calculate date cutoff for filtering closed sales
     cutoff_date = datetime.now() - timedelta(days=lookback_days)
     
     # Filter closed listings by close_date within lookback period
     # API's mindate/maxdate filter by listDate, so we must filter by closeDate here
-    closed = []
-    for l in listings:
-        if l.get("status") != "Closed":
-            continue
-        close_date = l.get("close_date")
-        if close_date:
-            try:
-                # Handle both timezone-aware and timezone-naive datetimes
-                if hasattr(close_date, 'tzinfo') and close_date.tzinfo is not None:
-                    close_date = close_date.replace(tzinfo=None)
-                if close_date >= cutoff_date:
-                    closed.append(l)
-            except Exception as e:
-                print(f"📊 CLOSED DEBUG: Error comparing dates: {e}")
+    frame = buckets.frame
+    closed_m = frame.all_of(frame.status_is("Closed"), frame.since("close_date", cutoff_date))
     
-    print(f"📊 CLOSED DEBUG: {len(closed)} Closed listings after date filter (cutoff={cutoff_date})")
+    # Sorted by close date descending
+    closed_sorted = frame.take_top(closed_m, "close_date")
     
-    # Sort by close date descending
-    closed_sorted = sorted(closed, key=lambda x: x.get("close_date") or datetime.min, reverse=True)
+    print(f"📊 CLOSED DEBUG: {len(closed_sorted)} Closed listings after date filter (cutoff={cutoff_date})")
     
     # Metrics
-    median_price = _median([l["close_price"] for l in closed if l.get("close_price")])
-    avg_dom = _average([l["days_on_market"] for l in closed if l.get("days_on_market")])
+    median_price = frame.median("close_price", closed_m)
+    avg_dom = frame.mean("days_on_market", closed_m)
     
     # Close-to-list ratio
-    ctl_ratios = [l["close_to_list_ratio"] for l in closed if l.get("close_to_list_ratio")]
-    ctl = _average(ctl_ratios) if ctl_ratios else 100.0
+    ctl = frame.mean("close_to_list_ratio", closed_m, default=100.0)
     
     return {
         "report_type": "closed",
@@ -560,7 +461,7 @@ def build_closed_result(listings: List[Dict], context: Dict) -> Dict:
         "counts": {
             "Active": 0,
             "Pending": 0,
-            "Closed": len(closed),
+            "Closed": len(closed_sorted),
         },
         
         # Metrics
@@ -588,7 +489,8 @@ def build_price_bands_result(listings: List[Dict], context: Dict) -> Dict:
     lookback_days = context.get("lookback_days", 30)
     
     # Filter to only include listings from the requested city
-    listings = _filter_by_city(listings, city)
+    buckets = ensure_bucketed(listings, city)
+    listings = buckets.all
     
     # Use all listings for price band analysis
     if not listings:
@@ -603,19 +505,17 @@ def build_price_bands_result(listings: List[Dict], context: Dict) -> Dict:
             "price_bands": []
         }
     
-    # Get price range
-    prices = [l.get("list_price") or l.get("close_price") for l in listings if l.get("list_price") or l.get("close_price")]
-    if not prices:
-        prices = [0]
+    # Get price range ("price" = list price, else close price)
+    frame = buckets.frame
+    sorted_prices = frame.sorted_values("price") or [0]
+    n = len(sorted_prices)
     
-    min_price = min(prices)
-    max_price = max(prices)
-    median_price = _median(prices)
-    avg_dom = _average([l["days_on_market"] for l in listings if l.get("days_on_market")])
+    min_price = sorted_prices[0]
+    max_price = sorted_prices[-1]
+    median_price = frame.median("price", default=0)
+    avg_dom = frame.mean("days_on_market")
     
     # Define bands (use quartiles for dynamic banding)
-    sorted_prices = sorted(prices)
-    n = len(sorted_prices)
     
     def _format_band_price(val: float) -> str:
         """Format price for band labels: $500K, $1.2M, etc."""
@@ -625,7 +525,6 @@ def build_price_bands_result(listings: List[Dict], context: Dict) -> Dict:
             return f"${int(val/1000):,}K"
     
     if n >= 4:
-        p25 = sorted_prices[n // 4]
         p50 = sorted_prices[n // 2]
         p75 = sorted_prices[(3 * n) // 4]
         
@@ -643,22 +542,16 @@ def build_price_bands_result(listings: List[Dict], context: Dict) -> Dict:
     # Build bands
     bands = []
     for label, min_p, max_p in band_defs:
-        band_listings = [
-            l for l in listings 
-            if min_p <= (l.get("list_price") or l.get("close_price") or 0) < max_p
-        ]
+        band = frame.between("price", min_p, max_p)
+        band_count = frame.count(band)
         
-        if band_listings:
-            band_prices = [l.get("list_price") or l.get("close_price") for l in band_listings if l.get("list_price") or l.get("close_price")]
-            band_dom = [l["days_on_market"] for l in band_listings if l.get("days_on_market")]
-            band_ppsf = [l["price_per_sqft"] for l in band_listings if l.get("price_per_sqft")]
-            
+        if band_count:
             bands.append({
                 "label": label,
-                "count": len(band_listings),
-                "median_price": _median(band_prices) if band_prices else 0,
-                "avg_dom": round(_average(band_dom), 1) if band_dom else 0,
-                "avg_ppsf": round(_average(band_ppsf), 0) if band_ppsf else 0,
+                "count": band_count,
+                "median_price": frame.median("price", band, default=0),
+                "avg_dom": round(frame.mean("days_on_market", band, default=0), 1),
+                "avg_ppsf": round(frame.mean("price_per_sqft", band, default=0), 0),
             })
     
     # Find hottest and slowest bands
@@ -677,9 +570,9 @@ def build_price_bands_result(listings: List[Dict], context: Dict) -> Dict:
         
         # Counts
         "counts": {
-            "Active": len([l for l in listings if l.get("status") == "Active"]),
-            "Pending": len([l for l in listings if l.get("status") == "Pending"]),
-            "Closed": len([l for l in listings if l.get("status") == "Closed"]),
+            "Active": len(buckets.active),
+            "Pending": len(buckets.pending),
+            "Closed": len(buckets.closed),
         },
         
         # Metrics
@@ -727,26 +620,16 @@ def build_new_listings_gallery_result(listings: List[Dict], context: Dict) -> Di
     email_cap = get_email_listing_cap(audience_key)
     
     # Filter to only include listings from the requested city
-    listings = _filter_by_city(listings, city)
+    buckets = ensure_bucketed(listings, city)
     
     # Calculate date cutoff for filtering
     cutoff_date = datetime.now() - timedelta(days=lookback_days)
     
     # Get active listings WITH DATE FILTERING
     # SimplyRETS API does NOT filter Active listings by mindate/maxdate reliably
-    new_listings = []
-    for l in listings:
-        if l.get("status") != "Active":
-            continue
-        list_date = l.get("list_date")
-        if list_date:
-            try:
-                if hasattr(list_date, 'tzinfo') and list_date.tzinfo is not None:
-                    list_date = list_date.replace(tzinfo=None)
-                if list_date >= cutoff_date:
-                    new_listings.append(l)
-            except:
-                pass
+    frame = buckets.frame
+    new_m = frame.all_of(frame.status_is("Active"), frame.since("list_date", cutoff_date))
+    new_listings = frame.take(new_m)
     
     print(f"📊 GALLERY: {len(new_listings)} listings found, audience_email_cap={email_cap} (audience={audience_key})")
 
@@ -754,11 +637,7 @@ def build_new_listings_gallery_result(listings: List[Dict], context: Dict) -> Di
     # PDF can render every new listing. The email pipeline still caps to
     # `audience_email_cap` (exposed below) and PDF_CONFIG caps inside the
     # market builder for the PDF.
-    new_listings_sorted = sorted(
-        new_listings,
-        key=lambda x: x.get("list_date") or datetime.min,
-        reverse=True,
-    )
+    new_listings_sorted = frame.take_top(new_m, "list_date")
 
     # Format listings for gallery display
     gallery_listings = []
@@ -777,14 +656,14 @@ def build_new_listings_gallery_result(listings: List[Dict], context: Dict) -> Di
     
     # Calculate metrics from ALL new listings (not just the top 9 for display)
     # This provides accurate statistics for the email header cards
-    all_prices = [l.get("list_price") for l in new_listings if l.get("list_price")]
+    all_prices = frame.sorted_values("list_price", new_m)
     all_doms = [l.get("dom") for l in new_listings if l.get("dom") is not None]
     
     metrics = {
         "total_listings": len(new_listings),  # Total count (not capped)
-        "median_list_price": sorted(all_prices)[len(all_prices) // 2] if all_prices else None,
-        "min_price": min(all_prices) if all_prices else None,
-        "max_price": max(all_prices) if all_prices else None,
+        "median_list_price": all_prices[len(all_prices) // 2] if all_prices else None,
+        "min_price": all_prices[0] if all_prices else None,
+        "max_price": all_prices[-1] if all_prices else None,
         "avg_dom": sum(all_doms) / len(all_doms) if all_doms else None,
     }
     
@@ -855,15 +734,17 @@ def build_featured_listings_result(listings: List[Dict], context: Dict) -> Dict:
     lookback_days = context.get("lookback_days", 30)
     
     # Filter to only include listings from the requested city
-    listings = _filter_by_city(listings, city)
+    buckets = ensure_bucketed(listings, city)
     
     # Get active listings
-    active = [l for l in listings if l.get("status") == "Active"]
+    frame = buckets.frame
+    active_m = frame.status_is("Active")
+    active = buckets.active
     
     # Sort by list price desc (most expensive first).
     # PDF-COMPREHENSIVE Part 5: bumped from 12 → 15 so the PDF cap
     # (12 in PDF_CONFIG) has 3 spare to draw from.
-    featured = sorted(active, key=lambda x: x.get("list_price") or 0, reverse=True)[:15]
+    featured = frame.take_top(active_m, "list_price", limit=15)
 
     print(f"📊 FEATURED: {len(active)} active listings, showing top {len(featured)} by price")
     
@@ -922,7 +803,7 @@ def build_open_houses_result(properties: List[Dict], context: Dict) -> Dict:
     from datetime import datetime, timedelta, timezone
 
     city = context.get("city", "Market")
-    properties = _filter_by_city(properties, city)
+    properties = ensure_bucketed(properties, city).all
 
     today = datetime.now(timezone.utc).date()
     week_out = today + timedelta(days=7)
@@ -983,7 +864,8 @@ def build_result_json(report_type: str, listings: List[Dict], context: Dict) ->
     
     Args:
         report_type: One of 7 TrendyReports types (5 original + 2 gallery)
-        listings: Property data from PropertyDataExtractor
+        listings: Property data from PropertyDataExtractor (list), or
+            BucketedListings from compute.pipeline.stream_listings
         context: Dict with city, lookback_days, filters, etc.
     
     Returns:
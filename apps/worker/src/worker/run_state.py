@@ -0,0 +1,170 @@
+"""
+Batched report_generations / schedule_runs writes for generate_report.
+
+A run used to touch its report_generations row in separate round trips, each
+in its own transaction: 'processing' + input, a SELECT for the theme, the
+result_json save, 'completed' + URLs, and then schedule_runs and schedules in
+two more. During a schedule burst those short transactions pile up row locks
+on the hottest table we have.
+
+ReportRunState accumulates what a run has to persist and writes it in the
+fewest statements:
+
+- start():           'processing' + input_params, RETURNING theme_id / accent
+- set_result():      stage result_json in memory (no write)
+- complete():        result_json + 'completed' + URLs + processing_time_ms
+- finish_schedule(): one CTE — the schedule_run's final status + the schedule's
+                     failure-counter reset
+- skip_limit():      one CTE — 'skipped_limit' on both tables
+- fail():            one CTE — 'failed' (keeping a staged result_json) +
+                     failure counter and auto-pause; then the schedule_run's
+                     'failed' status in its own savepoint, non-critical as
+                     before, so an error there can't undo the run's status
+
+Every method is one pooled, RLS-scoped transaction — a single statement,
+except for fail()'s guarded schedule_runs update.
+"""
+
+from typing import Any, Optional, Tuple
+
+from .cache import safe_json_dumps
+from .db import db_conn
+
+# Consecutive failed runs after which a schedule is paused
+AUTO_PAUSE_FAILURES = 3
+
+
+class ReportRunState:
+    """Pending writes for one generate_report run (see module docstring)."""
+
+    def __init__(self, run_id: str, account_id: str, schedule_id: Optional[str] = None):
+        self.run_id = run_id
+        self.account_id = account_id
+        self.schedule_id = schedule_id
+        self._result_json: Optional[str] = None  # staged, not yet written
+
+    def start(self, params: dict) -> Tuple[Optional[int], Optional[str]]:
+        """Mark the run processing; returns the run's (theme_id, accent_color)."""
+        with db_conn(self.account_id) as (conn, cur):
+            cur.execute("""
+                UPDATE report_generations
+                SET status='processing', input_params=%s, source_vendor='simplyrets'
+                WHERE id=%s
+                RETURNING theme_id, accent_color
+            """, (safe_json_dumps(params or {}), self.run_id))
+            row = cur.fetchone()
+        return (row[0], row[1]) if row else (None, None)
+
+    def set_result(self, result: Any) -> None:
+        """Stage result_json; it is written by complete() (or fail())."""
+        self._result_json = safe_json_dumps(result)
+
+    def complete(self, html_url: Optional[str], json_url: Optional[str],
+                 pdf_url: Optional[str], processing_time_ms: int) -> None:
+        with db_conn(self.account_id) as (conn, cur):
+            cur.execute("""
+                UPDATE report_generations
+                SET status='completed',
+                    result_json=COALESCE(%s::jsonb, result_json),
+                    html_url=%s, json_url=%s, pdf_url=%s,
+                    processing_time_ms=%s
+                WHERE id=%s
+            """, (self._result_json, html_url, json_url, pdf_url, processing_time_ms, self.run_id))
+        self._result_json = None
+
+    def finish_schedule(self, run_status: Optional[str]) -> None:
+        """
+        Close out a scheduled run: set the newest queued schedule_run to
+        run_status (skipped when None — e.g. the email step never ran) and
+        reset the schedule's failure counter.
+        """
+        if not self.schedule_id:
+            return
+        reset = """
+            UPDATE schedules
+            SET consecutive_failures = 0,
+                last_error = NULL,
+                last_error_at = NULL
+            WHERE id = %s::uuid
+        """
+        with db_conn(self.account_id) as (conn, cur):
+            if run_status is None:
+                cur.execute(reset, (self.schedule_id,))
+                return
+            cur.execute("""
+                WITH run AS (
+                    UPDATE schedule_runs
+                    SET status = %s,
+                        report_run_id = %s,
+                        finished_at = NOW()
+                    WHERE id = (
+                        SELECT id
+                        FROM schedule_runs
+                        WHERE schedule_id = %s
+                          AND status = 'queued'
+                          AND started_at IS NULL
+                        ORDER BY created_at DESC
+                        LIMIT 1
+                    )
+                )
+            """ + reset, (run_status, self.run_id, self.schedule_id, self.schedule_id))
+
+    def skip_limit(self, message: str, processing_time_ms: int) -> None:
+        with db_conn(self.account_id) as (conn, cur):
+            cur.execute("""
+                WITH rg AS (
+                    UPDATE report_generations
+                    SET status='skipped_limit',
+                        error_message=%s,
+                        processing_time_ms=%s
+                    WHERE id=%s
+                )
+                UPDATE schedule_runs
+                SET status='skipped_limit', finished_at=NOW()
+                WHERE report_run_id=%s
+            """, (message, processing_time_ms, self.run_id, self.run_id))
+
+    def fail(self, error: str) -> Optional[int]:
+        """
+        Mark the run (and its schedule_run) failed, keeping any staged
+        result_json. For scheduled runs, bump the schedule's failure counter
+        and pause it at AUTO_PAUSE_FAILURES; returns the new count.
+        """
+        run_update = """
+            UPDATE report_generations
+            SET status='failed',
+                error=%s,
+                result_json=COALESCE(%s::jsonb, result_json)
+            WHERE id=%s
+        """
+        run_args = (error, self._result_json, self.run_id)
+        with db_conn(self.account_id) as (conn, cur):
+            if not self.schedule_id:
+                cur.execute(run_update, run_args)
+                return None
+            cur.execute("""
+                WITH rg AS (""" + run_update + """)
+                UPDATE schedules
+                SET consecutive_failures = consecutive_failures + 1,
+                    last_error = %s,
+                    last_error_at = NOW(),
+                    active = CASE WHEN consecutive_failures + 1 >= %s THEN false ELSE active END
+                WHERE id = %s::uuid
+                RETURNING consecutive_failures
+            """, (*run_args, error, AUTO_PAUSE_FAILURES, self.schedule_id))
+            row = cur.fetchone()
+
+            # Non-critical: a savepoint keeps a failure here from aborting
+            # (and rolling back) the run's 'failed' status above
+            try:
+                with conn.transaction():
+                    cur.execute("""
+                        UPDATE schedule_runs
+                        SET status = 'failed',
+                            error = %s,
+                            finished_at = NOW()
+                        WHERE report_run_id = %s::uuid
+                    """, (error, self.run_id))
+            except Exception as e:
+                print(f"⚠️  schedule_runs update failed for run {self.run_id}: {e}")
+        return row[0] if row else None
@@ -19,9 +19,9 @@ import httpx
 from datetime import datetime, timedelta, date
 from typing import Optional, Dict, Any
 from zoneinfo import ZoneInfo
-import psycopg
 import ssl
 from celery import Celery
+from .db import db_connection, set_rls
 from .limit_checker import check_usage_limit
 
 # Create a separate Celery instance for ticker (no result backend needed)
@@ -272,7 +272,7 @@ def enqueue_report(
     }
     
     # Resolve theme and accent from account defaults
-    with psycopg.connect(DATABASE_URL) as conn:
+    with db_connection() as conn:
         with conn.cursor() as cur:
             cur.execute("""
                 SELECT COALESCE(default_theme_id, 1), secondary_color
@@ -284,9 +284,9 @@ def enqueue_report(
             accent_color = acct[1] if acct else None
 
     # Create report_generation record first (worker expects run_id)
-    with psycopg.connect(DATABASE_URL) as conn:
+    with db_connection() as conn:
         with conn.cursor() as cur:
-            cur.execute(f"SET LOCAL app.current_account_id TO '{account_id}'")
+            set_rls(cur, account_id)
             cur.execute("""
                 INSERT INTO report_generations
                   (account_id, report_type, input_params, status, theme_id, accent_color)
@@ -320,7 +320,7 @@ def process_due_schedules():
     Stale locks (>5 minutes) are automatically released.
     """
     try:
-        with psycopg.connect(DATABASE_URL) as conn:
+        with db_connection() as conn:
             with conn.cursor() as cur:
                 # ATOMIC CLAIM: Update and return due schedules in one operation.
                 # This prevents race conditions when multiple tickers are running.
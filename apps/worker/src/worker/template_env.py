@@ -0,0 +1,126 @@
+"""
+Process-wide Jinja2 Environment Registry
+========================================
+
+PropertyReportBuilder and MarketReportBuilder used to build a new
+Environment (and FileSystemLoader) per report, so every render re-parsed and
+re-compiled the theme templates, their _base/ parents and macros.
+
+Now there is one Environment per template root per process:
+
+- Compiled templates stay in the Environment's in-memory cache between reports
+- A FileSystemBytecodeCache (JINJA_BYTECODE_CACHE_DIR) persists compiled
+  bytecode, so a restarted or replaced worker process skips compilation too
+- warmup() precompiles every template; the worker calls it from Celery's
+  worker_init signal (see app.py), before the prefork pool forks, so the
+  first report after a deploy is as fast as the hundredth
+
+Environments are configured identically to what the builders created before
+(autoescape, trim_blocks, lstrip_blocks, shared filters). Builders must not
+mutate a shared environment per report — pass per-report values as render
+context instead.
+
+Usage:
+    from worker.template_env import get_environment
+
+    env = get_environment("market")
+    html = env.get_template("market.jinja2").render(**ctx)
+"""
+
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional
+
+from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader, select_autoescape
+
+from worker.template_filters import (
+    format_currency,
+    format_currency_short,
+    format_number,
+    truncate,
+)
+
+logger = logging.getLogger(__name__)
+
+TEMPLATES_ROOT = Path(__file__).parent / "templates"
+
+# name -> template root (each builder's FileSystemLoader directory)
+TEMPLATE_ROOTS: Dict[str, Path] = {
+    "market": TEMPLATES_ROOT / "market",
+    "property": TEMPLATES_ROOT / "property",
+}
+
+JINJA_BYTECODE_CACHE_DIR = os.getenv("JINJA_BYTECODE_CACHE_DIR", "/tmp/mr_jinja_cache")
+# Templates only change on deploy (which restarts the worker); set false in
+# production to skip the per-render mtime check.
+JINJA_AUTO_RELOAD = os.getenv("JINJA_AUTO_RELOAD", "true").lower() == "true"
+TEMPLATE_WARMUP_ENABLED = os.getenv("TEMPLATE_WARMUP_ENABLED", "true").lower() == "true"
+
+_envs: Dict[str, Environment] = {}
+_lock = threading.Lock()
+
+
+def _bytecode_cache() -> Optional[FileSystemBytecodeCache]:
+    if not JINJA_BYTECODE_CACHE_DIR:
+        return None
+    try:
+        os.makedirs(JINJA_BYTECODE_CACHE_DIR, exist_ok=True)
+        return FileSystemBytecodeCache(JINJA_BYTECODE_CACHE_DIR)
+    except OSError as e:
+        logger.warning("Jinja bytecode cache unavailable (%s): %s", JINJA_BYTECODE_CACHE_DIR, e)
+        return None
+
+
+def _build(root: Path) -> Environment:
+    env = Environment(
+        loader=FileSystemLoader(str(root)),
+        autoescape=select_autoescape(["html", "xml", "jinja2"]),
+        trim_blocks=True,
+        lstrip_blocks=True,
+        bytecode_cache=_bytecode_cache(),
+        auto_reload=JINJA_AUTO_RELOAD,
+    )
+    env.filters["format_currency"] = format_currency
+    env.filters["format_currency_short"] = format_currency_short
+    env.filters["format_number"] = format_number
+    env.filters["truncate"] = truncate
+    return env
+
+
+def get_environment(name: str) -> Environment:
+    """The shared Environment for a template root ("market" or "property")."""
+    env = _envs.get(name)
+    if env is None:
+        with _lock:
+            env = _envs.get(name)
+            if env is None:
+                env = _envs[name] = _build(TEMPLATE_ROOTS[name])
+    return env
+
+
+def warmup() -> Dict[str, int]:
+    """
+    Compile every template of every registered root into the in-memory and
+    bytecode caches. Errors are logged per template and never raised.
+
+    Returns {root name: templates compiled}.
+    """
+    compiled: Dict[str, int] = {}
+    if not TEMPLATE_WARMUP_ENABLED:
+        return compiled
+    started = time.perf_counter()
+    for name in TEMPLATE_ROOTS:
+        env = get_environment(name)
+        count = 0
+        for template_name in env.list_templates(extensions=["jinja2", "html"]):
+            try:
+                env.get_template(template_name)
+                count += 1
+            except Exception as e:
+                logger.warning("Template warmup failed for %s/%s: %s", name, template_name, e)
+        compiled[name] = count
+    print(f"🔥 Templates warmed: {compiled} in {(time.perf_counter() - started) * 1000:.0f}ms")
+    return compiled
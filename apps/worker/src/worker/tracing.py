@@ -0,0 +1,136 @@
+"""
+Stage-level timing for report runs.
+
+generate_report used to record only a total processing_time_ms; where the
+time went was scattered across emoji print lines. A RunTrace collects nested
+spans for the run's stages and persists them, one row per span, to
+report_generation_stages (migration 0055), where the admin console reads
+p50/p95 per stage (GET /v1/admin/metrics/stages).
+
+    trace = RunTrace(run_id, account_id, report_type)
+
+    with trace.span("data_fetch"):
+        rows_by_name, timings = _load_extracted_many(queries, account_id)
+        trace.record_fetch_timings(timings)    # data_fetch.active, ...
+
+    with trace.span("pdf_render"):
+        ...
+
+    trace.flush()                             # one INSERT batch, never raises
+
+Stage names nest: a span opened inside another is stored as
+"parent.child" with its parent's path. A stage that runs more than once in a
+run (e.g. data_fetch for the baseline median and again for the report) is
+stored once per occurrence; the admin endpoint sums them per run.
+
+Set REPORT_STAGE_TRACING_ENABLED=false to keep timing in memory only.
+"""
+
+import os
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+
+from .cache import safe_json_dumps
+from .db import db_conn
+
+REPORT_STAGE_TRACING_ENABLED = os.getenv("REPORT_STAGE_TRACING_ENABLED", "true").lower() == "true"
+
+
+class RunTrace:
+    """Nested stage spans for one report run (see module docstring)."""
+
+    def __init__(self, run_id: str, account_id: str, report_type: Optional[str] = None):
+        self.run_id = run_id
+        self.account_id = account_id
+        self.report_type = report_type
+        self.spans: List[Dict[str, Any]] = []
+        self._t0 = time.perf_counter()
+        self._stack: List[str] = []  # dotted paths of the open spans
+        self._flushed = 0
+
+    def _path(self, stage: str) -> str:
+        return f"{self._stack[-1]}.{stage}" if self._stack else stage
+
+    def _add(self, path: str, started: float, duration_s: float, ok: bool,
+             detail: Optional[Dict[str, Any]]) -> None:
+        self.spans.append({
+            "stage": path,
+            "parent_stage": self._stack[-1] if self._stack else None,
+            "depth": len(self._stack),
+            "offset_ms": int((started - self._t0) * 1000),
+            "duration_ms": int(round(duration_s * 1000)),
+            "ok": ok,
+            "detail": detail or None,
+        })
+
+    @contextmanager
+    def span(self, stage: str, **detail: Any) -> Iterator[Dict[str, Any]]:
+        """
+        Time a stage. Yields the span's detail dict (add counts etc. to it);
+        an exception marks the span failed and propagates.
+        """
+        path = self._path(stage)
+        started = time.perf_counter()
+        self._stack.append(path)
+        ok = True
+        try:
+            yield detail
+        except BaseException:
+            ok = False
+            raise
+        finally:
+            self._stack.pop()
+            self._add(path, started, time.perf_counter() - started, ok, detail)
+
+    def record(self, stage: str, duration_ms: float, **detail: Any) -> None:
+        """Add a stage timed elsewhere (e.g. one of several concurrent fetches)."""
+        now = time.perf_counter()
+        self._add(self._path(stage), now - duration_ms / 1000.0, duration_ms / 1000.0, True, detail)
+
+    def record_fetch_timings(self, timings: Dict[str, Dict[str, Any]]) -> None:
+        """One child span per _load_extracted_many query ({name: {source, ms, count}})."""
+        for name, t in timings.items():
+            self.record(name, t.get("ms") or 0, source=t.get("source"), count=t.get("count"))
+
+    def durations(self) -> Dict[str, int]:
+        """Total ms per stage path, in first-seen order."""
+        totals: Dict[str, int] = {}
+        for s in sorted(self.spans, key=lambda s: s["offset_ms"]):
+            totals[s["stage"]] = totals.get(s["stage"], 0) + s["duration_ms"]
+        return totals
+
+    def summary(self) -> str:
+        return " ".join(
+            f"{stage}={ms}ms" for stage, ms in self.durations().items() if "." not in stage
+        )
+
+    def flush(self) -> None:
+        """Persist spans not yet written (one batch). Never fails the run."""
+        pending = self.spans[self._flushed:]
+        if not pending:
+            return
+        print(f"⏱️  REPORT RUN {self.run_id}: stages {self.summary()}")
+        if not REPORT_STAGE_TRACING_ENABLED:
+            self._flushed = len(self.spans)
+            return
+        try:
+            with db_conn(self.account_id) as (conn, cur):
+                cur.executemany("""
+                    INSERT INTO report_generation_stages (
+                        report_generation_id, account_id, report_type,
+                        stage, parent_stage, depth, started_offset_ms, duration_ms, ok, detail
+                    )
+                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s::jsonb)
+                """, [
+                    (
+                        self.run_id, self.account_id, self.report_type,
+                        s["stage"], s["parent_stage"], s["depth"], s["offset_ms"],
+                        s["duration_ms"], s["ok"],
+                        safe_json_dumps(s["detail"]) if s["detail"] else None,
+                    )
+                    for s in pending
+                ])
+            self._flushed = len(self.spans)
+        except Exception as e:
+            print(f"⚠️  REPORT RUN {self.run_id}: failed to persist stage timings (non-critical): {e}")
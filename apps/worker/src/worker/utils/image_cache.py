@@ -0,0 +1,186 @@
+"""
+Disk-backed LRU image cache shared by every task on a worker host.
+
+Property reports embed the same agent headshots, logos and theme assets on
+every run (embed_images_as_base64), and each one used to be re-downloaded.
+This cache keeps the fetched bytes on local disk so any worker process on
+the host can reuse them:
+
+- Keyed by normalized URL: scheme/host lowercased, fragment dropped, query
+  params sorted, and presigning params (X-Amz-*, AWSAccessKeyId/Signature/
+  Expires) stripped — a freshly re-signed R2 URL for the same object hits
+- TTL: entries older than IMAGE_CACHE_TTL_S are treated as misses
+- Size bound: when the directory grows past IMAGE_CACHE_MAX_MB the least
+  recently used files are evicted (mtime = written, atime = last hit)
+- Writes are atomic (temp file + os.replace), so concurrent processes never
+  read a half-written entry
+
+Every operation fails open: a cache error is a miss, never a failed report.
+
+Usage:
+    from .image_cache import image_cache
+
+    hit = image_cache.get(url)          # (bytes, content_type) or None
+    image_cache.put(url, data, "image/png")
+"""
+
+import hashlib
+import os
+import threading
+import time
+from typing import Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+IMAGE_CACHE_ENABLED = os.getenv("IMAGE_CACHE_ENABLED", "true").lower() == "true"
+IMAGE_CACHE_DIR = os.getenv("IMAGE_CACHE_DIR", "/tmp/mr_image_cache")
+IMAGE_CACHE_MAX_MB = int(os.getenv("IMAGE_CACHE_MAX_MB", "256"))
+IMAGE_CACHE_TTL_S = int(os.getenv("IMAGE_CACHE_TTL_S", "86400"))
+
+# Presigning params that change on every signature but not the object
+_SIGNATURE_PARAMS = {"awsaccesskeyid", "signature", "expires"}
+
+# Evict at most this often (a sweep lists the whole directory)
+_SWEEP_INTERVAL_S = 60.0
+
+
+def _unlink(path: str) -> None:
+    # Another worker process may have evicted it first
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def normalize_url(url: str) -> str:
+    """Cache identity of an image URL (signature params stripped, query sorted)."""
+    parts = urlsplit(url.strip())
+    query = sorted(
+        (k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+        if not k.lower().startswith("x-amz-") and k.lower() not in _SIGNATURE_PARAMS
+    )
+    return urlunsplit((
+        parts.scheme.lower(),
+        parts.netloc.lower(),
+        parts.path,
+        urlencode(query),
+        "",
+    ))
+
+
+class DiskImageCache:
+    """Size-bounded, TTL'd, LRU image cache in a local directory."""
+
+    def __init__(self, directory: str, max_bytes: int, ttl_s: int, enabled: bool = True):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.ttl_s = ttl_s
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._last_sweep = 0.0
+        self._written_since_sweep = 0
+        self.hits = 0
+        self.misses = 0
+
+    def _path(self, url: str) -> str:
+        digest = hashlib.sha256(normalize_url(url).encode("utf-8")).hexdigest()
+        return os.path.join(self.directory, digest[:2], digest + ".img")
+
+    def get(self, url: str) -> Optional[Tuple[bytes, str]]:
+        if not self.enabled or not url:
+            return None
+        path = self._path(url)
+        try:
+            st = os.stat(path)
+            if time.time() - st.st_mtime > self.ttl_s:
+                _unlink(path)
+                self.misses += 1
+                return None
+            with open(path, "rb") as f:
+                blob = f.read()
+            content_type, _, data = blob.partition(b"\n")
+            os.utime(path, (time.time(), st.st_mtime))  # LRU bump, keep write time
+            self.hits += 1
+            return data, content_type.decode("ascii")
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        except Exception as e:
+            print(f"⚠️  Image cache read failed ({type(e).__name__}: {e}) — treating as miss")
+            self.misses += 1
+            return None
+
+    def put(self, url: str, data: bytes, content_type: str) -> None:
+        if not self.enabled or not url or not data:
+            return
+        path = self._path(url)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(tmp, "wb") as f:
+                f.write(content_type.encode("ascii", "ignore") + b"\n" + data)
+            os.replace(tmp, path)
+        except Exception as e:
+            print(f"⚠️  Image cache write failed ({type(e).__name__}: {e})")
+            _unlink(tmp)
+            return
+        with self._lock:
+            self._written_since_sweep += len(data)
+            due = (
+                time.monotonic() - self._last_sweep >= _SWEEP_INTERVAL_S
+                or self._written_since_sweep >= self.max_bytes // 10
+            )
+            if due:
+                self._last_sweep = time.monotonic()
+                self._written_since_sweep = 0
+        if due:
+            self.sweep()
+
+    def sweep(self) -> None:
+        """Drop expired entries, then evict least-recently-used ones down to 90% of max."""
+        now = time.time()
+        entries = []
+        total = 0
+        try:
+            for sub in os.scandir(self.directory):
+                if not sub.is_dir():
+                    continue
+                for entry in os.scandir(sub.path):
+                    try:
+                        st = entry.stat()
+                    except FileNotFoundError:
+                        continue
+                    if entry.name.endswith(".tmp"):
+                        # Leftover from a crashed writer
+                        if now - st.st_mtime > 3600:
+                            _unlink(entry.path)
+                        continue
+                    if now - st.st_mtime > self.ttl_s:
+                        _unlink(entry.path)
+                        continue
+                    entries.append((st.st_atime, st.st_size, entry.path))
+                    total += st.st_size
+        except FileNotFoundError:
+            return
+        except Exception as e:
+            print(f"⚠️  Image cache sweep failed ({type(e).__name__}: {e})")
+            return
+
+        if total <= self.max_bytes:
+            return
+        target = int(self.max_bytes * 0.9)
+        evicted = 0
+        for _last_used, size, path in sorted(entries):
+            if total <= target:
+                break
+            _unlink(path)
+            total -= size
+            evicted += 1
+        print(f"🧹 Image cache: evicted {evicted} entries ({total // (1024 * 1024)}MB kept)")
+
+
+image_cache = DiskImageCache(
+    IMAGE_CACHE_DIR,
+    max_bytes=IMAGE_CACHE_MAX_MB * 1024 * 1024,
+    ttl_s=IMAGE_CACHE_TTL_S,
+    enabled=IMAGE_CACHE_ENABLED,
+)
@@ -12,6 +12,8 @@ Solution: Fetch images from our server and convert to base64 data URIs.
 This embeds the images directly in the HTML, ensuring they render in PDFShift.
 
 V2: Enhanced with retry logic, better headers, and rate limit handling.
+V3: Fetched images go through the host-wide disk cache (image_cache), and
+    fetch_images_as_base64 resolves a batch with cache misses fetched in parallel.
 """
 
 import base64
@@ -20,6 +22,8 @@ import time
 from typing import Optional, List, Dict
 from concurrent.futures import ThreadPoolExecutor, as_completed
 
+from .image_cache import image_cache
+
 # Timeout for image fetches (seconds)
 IMAGE_FETCH_TIMEOUT = 15.0
 
@@ -41,7 +45,7 @@ USER_AGENTS = [
 ]
 
 
-def fetch_image_as_base64(url: str, retry_count: int = 0) -> Optional[str]:
+def fetch_image_as_base64(url: str, retry_count: int = 0, use_cache: bool = True) -> Optional[str]:
     """
     Fetch an image URL and convert to base64 data URI.
     
@@ -50,6 +54,8 @@ def fetch_image_as_base64(url: str, retry_count: int = 0) -> Optional[str]:
     Args:
         url: Image URL to fetch
         retry_count: Current retry attempt
+        use_cache: Look the URL up in image_cache first (False when the
+            caller has already missed on it)
         
     Returns:
         Base64 data URI string (e.g., "data:image/jpeg;base64,/9j/4AAQ...")
@@ -62,6 +68,12 @@ def fetch_image_as_base64(url: str, retry_count: int = 0) -> Optional[str]:
     if url.startswith("data:"):
         return url
     
+    if retry_count == 0 and use_cache:
+        cached = image_cache.get(url)
+        if cached:
+            data, content_type = cached
+            return f"data:{content_type};base64,{base64.b64encode(data).decode('utf-8')}"
+    
     # Rotate user agent based on retry count
     user_agent = USER_AGENTS[retry_count % len(USER_AGENTS)]
     
@@ -136,6 +148,7 @@ def fetch_image_as_base64(url: str, retry_count: int = 0) -> Optional[str]:
                 return None
             
             data_uri = f"data:{content_type};base64,{image_data}"
+            image_cache.put(url, response.content, content_type)
             
             print(f"✅ Image OK ({len(response.content)//1024}KB): {url[:50]}...")
             return data_uri
@@ -155,6 +168,43 @@ def fetch_image_as_base64(url: str, retry_count: int = 0) -> Optional[str]:
         return None
 
 
+def fetch_images_as_base64(urls: List[str], max_workers: int = MAX_CONCURRENT_FETCHES) -> Dict[str, Optional[str]]:
+    """
+    Resolve a batch of image URLs to base64 data URIs.
+    
+    Cache hits are served straight from the disk cache; misses are fetched
+    in parallel (max_workers at a time) and cached for the next report.
+    
+    Returns:
+        {url: data URI, or None if the fetch failed}
+    """
+    results: Dict[str, Optional[str]] = {}
+    misses = []
+    for url in dict.fromkeys(urls):
+        if not url or url.startswith("data:"):
+            results[url] = url or None
+            continue
+        cached = image_cache.get(url)
+        if cached:
+            data, content_type = cached
+            results[url] = f"data:{content_type};base64,{base64.b64encode(data).decode('utf-8')}"
+        else:
+            misses.append(url)
+    
+    if misses:
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(misses)))) as pool:
+            futures = {pool.submit(fetch_image_as_base64, url, use_cache=False): url for url in misses}
+            for future in as_completed(futures):
+                try:
+                    results[futures[future]] = future.result()
+                except Exception as e:
+                    print(f"❌ Unexpected error processing {futures[future][:50]}...: {e}")
+                    results[futures[future]] = None
+    
+    print(f"🖼️  Resolved {len(results)} images ({len(results) - len(misses)} cached, {len(misses)} fetched)")
+    return results
+
+
 def convert_listings_photos_to_base64(listings: List[Dict], photo_key: str = "hero_photo_url") -> List[Dict]:
     """
     Convert all listing photos to base64 data URIs.
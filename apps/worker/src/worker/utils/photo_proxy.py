@@ -13,19 +13,28 @@ Solution:
 Notes:
 - We intentionally return presigned URLs (default 7 days) so the bucket can stay private.
 - If R2 is not configured, we gracefully fall back to the original URL.
+- Objects are content-addressed by the SHA-256 of the source URL
+  (report-photos/shared/<aa>/<sha256>) and shared across runs and accounts:
+  a HEAD hit skips both the MLS download and the R2 PUT, so a hero photo
+  featured by a dozen schedules is fetched and stored once.
+- A report's photos are proxied concurrently (PHOTO_PROXY_CONCURRENCY) over a
+  pooled HTTP client and one R2 client per process.
 """
 
 from __future__ import annotations
 
+import hashlib
 import os
+import threading
 import time
-import uuid
+from concurrent.futures import ThreadPoolExecutor
 from io import BytesIO
 from typing import Optional, Dict, List, Tuple
 
 import boto3
 import httpx
 from botocore.client import Config
+from botocore.exceptions import ClientError
 
 
 # Feature flag to enable/disable photo proxy (disabled by default until debugged)
@@ -45,6 +54,10 @@ PRESIGN_EXPIRES_S = int(os.getenv("R2_PRESIGN_EXPIRES_S", "604800"))
 IMAGE_FETCH_TIMEOUT = float(os.getenv("PHOTO_PROXY_FETCH_TIMEOUT_S", "15.0"))
 MAX_RETRIES = int(os.getenv("PHOTO_PROXY_MAX_RETRIES", "2"))
 RETRY_DELAY_S = float(os.getenv("PHOTO_PROXY_RETRY_DELAY_S", "1.0"))
+CONCURRENCY = int(os.getenv("PHOTO_PROXY_CONCURRENCY", "8"))
+
+# Shared, content-addressed photo objects (see photo_key)
+SHARED_PREFIX = "report-photos/shared"
 
 # User agents (look like real browsers)
 USER_AGENTS = [
@@ -71,18 +84,87 @@ def _r2_configured() -> bool:
     return configured
 
 
+_clients_lock = threading.Lock()
+_r2_client = None
+_http_client: Optional[httpx.Client] = None
+_clients_pid: Optional[int] = None
+
+
+def _reset_clients_after_fork() -> None:
+    global _r2_client, _http_client, _clients_pid
+    if _clients_pid != os.getpid():
+        _r2_client = _http_client = None
+        _clients_pid = os.getpid()
+
+
 def _get_r2_client():
-    # R2 is S3-compatible, but uses a custom endpoint and "auto" region
-    return boto3.client(
-        "s3",
-        endpoint_url=R2_ENDPOINT,
-        aws_access_key_id=R2_ACCESS_KEY_ID,
-        aws_secret_access_key=R2_SECRET_ACCESS_KEY,
-        region_name="auto",
-        config=Config(signature_version="s3v4"),
+    """One R2 client per process (boto3 clients are thread-safe once built)."""
+    global _r2_client
+    with _clients_lock:
+        _reset_clients_after_fork()
+        if _r2_client is None:
+            # R2 is S3-compatible, but uses a custom endpoint and "auto" region
+            _r2_client = boto3.client(
+                "s3",
+                endpoint_url=R2_ENDPOINT,
+                aws_access_key_id=R2_ACCESS_KEY_ID,
+                aws_secret_access_key=R2_SECRET_ACCESS_KEY,
+                region_name="auto",
+                config=Config(
+                    signature_version="s3v4",
+                    max_pool_connections=max(CONCURRENCY * 2, 10),
+                ),
+            )
+        return _r2_client
+
+
+def _get_http_client() -> httpx.Client:
+    """Pooled photo-fetch client, one per process."""
+    global _http_client
+    with _clients_lock:
+        _reset_clients_after_fork()
+        if _http_client is None:
+            _http_client = httpx.Client(
+                timeout=IMAGE_FETCH_TIMEOUT,
+                follow_redirects=True,
+                http2=False,  # Some CDNs behave oddly with HTTP/2
+                limits=httpx.Limits(
+                    max_connections=max(CONCURRENCY * 2, 10),
+                    max_keepalive_connections=max(CONCURRENCY, 5),
+                ),
+            )
+        return _http_client
+
+
+def photo_key(url: str) -> str:
+    """R2 key for a source photo URL — the same MLS photo always maps to the same object."""
+    digest = hashlib.sha256(url.encode("utf-8")).hexdigest()
+    return f"{SHARED_PREFIX}/{digest[:2]}/{digest}"
+
+
+def _presign(key: str) -> str:
+    return _get_r2_client().generate_presigned_url(
+        "get_object",
+        Params={"Bucket": R2_BUCKET_NAME, "Key": key},
+        ExpiresIn=PRESIGN_EXPIRES_S,
     )
 
 
+def r2_object_exists(key: str) -> bool:
+    """HEAD the key. Errors other than not-found count as missing (we just re-upload)."""
+    try:
+        _get_r2_client().head_object(Bucket=R2_BUCKET_NAME, Key=key)
+        return True
+    except ClientError as e:
+        code = str(e.response.get("Error", {}).get("Code", ""))
+        if code not in ("404", "NoSuchKey", "NotFound"):
+            print(f"⚠️  R2 HEAD failed for {key}: {code or e}")
+        return False
+    except Exception as e:
+        print(f"⚠️  R2 HEAD failed for {key}: {type(e).__name__}: {e}")
+        return False
+
+
 def _guess_ext_and_content_type(resp: httpx.Response) -> Tuple[str, str]:
     content_type = (resp.headers.get("content-type") or "image/jpeg").split(";")[0].strip().lower()
     # Reasonable mapping for common MLS images
@@ -120,26 +202,21 @@ def fetch_image_bytes(url: str, retry_count: int = 0) -> Optional[Tuple[bytes, s
         pass
 
     try:
-        with httpx.Client(
-            timeout=IMAGE_FETCH_TIMEOUT,
-            follow_redirects=True,
-            http2=False,  # Some CDNs behave oddly with HTTP/2
-        ) as client:
-            resp = client.get(
-                url,
-                headers={
-                    "User-Agent": user_agent,
-                    "Accept": "image/avif,image/webp,image/apng,image/svg+xml,image/*,*/*;q=0.8",
-                    "Accept-Language": "en-US,en;q=0.9",
-                    "Accept-Encoding": "gzip, deflate, br",
-                    "Referer": referer,
-                    "Sec-Fetch-Dest": "image",
-                    "Sec-Fetch-Mode": "no-cors",
-                    "Sec-Fetch-Site": "cross-site",
-                    "Cache-Control": "no-cache",
-                    "Connection": "keep-alive",
-                },
-            )
+        resp = _get_http_client().get(
+            url,
+            headers={
+                "User-Agent": user_agent,
+                "Accept": "image/avif,image/webp,image/apng,image/svg+xml,image/*,*/*;q=0.8",
+                "Accept-Language": "en-US,en;q=0.9",
+                "Accept-Encoding": "gzip, deflate, br",
+                "Referer": referer,
+                "Sec-Fetch-Dest": "image",
+                "Sec-Fetch-Mode": "no-cors",
+                "Sec-Fetch-Site": "cross-site",
+                "Cache-Control": "no-cache",
+                "Connection": "keep-alive",
+            },
+        )
 
         # Rate limit / forbidden patterns
         if resp.status_code in (429, 403) and retry_count < MAX_RETRIES:
@@ -194,55 +271,66 @@ def upload_photo_bytes_to_r2(content: bytes, content_type: str, key: str) -> str
         ExtraArgs={"ContentType": content_type},
     )
 
-    presigned_url = s3_client.generate_presigned_url(
-        "get_object",
-        Params={"Bucket": R2_BUCKET_NAME, "Key": key},
-        ExpiresIn=PRESIGN_EXPIRES_S,
-    )
+    presigned_url = _presign(key)
     print(f"✅ Photo uploaded to R2: {key}")
     return presigned_url
 
 
-def proxy_photo_url_to_r2(url: str, account_id: str, run_id: str, idx: int) -> str:
+def _proxy_one(url: str, idx: int) -> Tuple[str, str]:
     """
-    Fetch photo from MLS/CDN and return an R2 presigned URL.
-    Falls back to original URL on any failure.
+    Proxy one photo URL. Returns (url_to_use, outcome) where outcome is
+    "reused" (already in R2), "uploaded", "skipped" or "failed".
     """
     if not url:
         print(f"📷 Photo {idx}: empty URL, skipping")
-        return ""
+        return "", "skipped"
 
     # Check if already an R2 URL (avoid re-proxying)
     if "r2.cloudflarestorage.com" in url:
         print(f"📷 Photo {idx}: already R2 URL, skipping")
-        return url
+        return url, "skipped"
 
     # Check if data URI (already embedded)
     if url.startswith("data:"):
         print(f"📷 Photo {idx}: data URI, skipping")
-        return url
+        return url, "skipped"
 
     if not _r2_configured():
         # Not configured in this environment; keep original URL.
         # Note: _r2_configured() already logs which vars are missing
-        return url
+        return url, "skipped"
+
+    key = photo_key(url)
+    if r2_object_exists(key):
+        try:
+            return _presign(key), "reused"
+        except Exception as e:
+            print(f"⚠️  R2 presign failed for photo {idx}, re-uploading: {type(e).__name__}: {e}")
 
     fetched = fetch_image_bytes(url)
     if not fetched:
         print(f"📷 Photo {idx}: fetch failed, keeping original URL")
-        return url
-
-    content, content_type, ext = fetched
-    # Keep photo keys grouped by report run for easy debugging/cleanup.
-    key = f"report-photos/{account_id}/{run_id}/{idx}-{uuid.uuid4().hex}{ext}"
+        return url, "failed"
 
+    content, content_type, _ext = fetched
     try:
         r2_url = upload_photo_bytes_to_r2(content, content_type, key)
         print(f"📷 Photo {idx}: SUCCESS → R2 URL generated")
-        return r2_url
+        return r2_url, "uploaded"
     except Exception as e:
         print(f"⚠️  R2 upload failed for photo {idx}, using original URL: {type(e).__name__}: {e}")
-        return url
+        return url, "failed"
+
+
+def proxy_photo_url_to_r2(url: str, account_id: str, run_id: str, idx: int) -> str:
+    """
+    Fetch photo from MLS/CDN and return an R2 presigned URL.
+    Falls back to original URL on any failure.
+
+    The object is shared across runs and accounts (see photo_key), so
+    account_id / run_id no longer shape the key.
+    """
+    return _proxy_one(url, idx)[0]
 
 
 def proxy_report_photos_inplace(result_json: Dict, account_id: str, run_id: str) -> Dict:
@@ -274,19 +362,38 @@ def proxy_report_photos_inplace(result_json: Dict, account_id: str, run_id: str)
         print(f"📷 Skipping photo proxy - R2 not configured, keeping {len(listings)} original MLS URLs")
         return result_json
 
-    print(f"📷 R2 configured ✓ - Proxying {len(listings)} listing photos to R2...")
-    success_count = 0
+    # Each distinct source URL is proxied once, CONCURRENCY at a time
+    first_idx: Dict[str, int] = {}
     for i, listing in enumerate(listings):
         if not isinstance(listing, dict):
             print(f"📷 Listing {i}: not a dict, skipping")
             continue
-        url = listing.get("hero_photo_url") or ""
-        new_url = proxy_photo_url_to_r2(url, account_id=account_id, run_id=run_id, idx=i)
-        if new_url != url and "r2.cloudflarestorage.com" in new_url:
+        first_idx.setdefault(listing.get("hero_photo_url") or "", i)
+
+    print(f"📷 R2 configured ✓ - Proxying {len(first_idx)} distinct photos for {len(listings)} listings "
+          f"(concurrency={CONCURRENCY})...")
+    started = time.perf_counter()
+    urls = list(first_idx)
+    with ThreadPoolExecutor(max_workers=max(1, min(CONCURRENCY, len(urls))),
+                            thread_name_prefix="photo-proxy") as pool:
+        outcomes = dict(zip(urls, pool.map(lambda u: _proxy_one(u, first_idx[u]), urls)))
+
+    counts: Dict[str, int] = {}
+    for _new_url, outcome in outcomes.values():
+        counts[outcome] = counts.get(outcome, 0) + 1
+
+    success_count = 0
+    for listing in listings:
+        if not isinstance(listing, dict):
+            continue
+        new_url, outcome = outcomes[listing.get("hero_photo_url") or ""]
+        if "r2.cloudflarestorage.com" in new_url and outcome in ("reused", "uploaded"):
             success_count += 1
         listing["hero_photo_url"] = new_url
 
     result_json[listings_key] = listings
-    print(f"📷 Photo proxy complete: {success_count}/{len(listings)} uploaded to R2 (key='{listings_key}')")
+    print(f"📷 Photo proxy complete: {success_count}/{len(listings)} on R2 "
+          f"(distinct photos: uploaded={counts.get('uploaded', 0)}, "
+          f"reused={counts.get('reused', 0)}, failed={counts.get('failed', 0)}) in {(time.perf_counter() - started) * 1000:.0f}ms "
+          f"(key='{listings_key}')")
     return result_json
-
@@ -0,0 +1,221 @@
+"""
+Shared SimplyRETS rate limiter (Redis token bucket).
+
+SimplyRETS enforces ONE request budget per credential (60 rpm + burst), but
+every Celery prefork child, every market-trends thread and every API worker
+used to run its own in-process limiter — each one believing it owned the
+whole budget. Under a Monday-morning schedule burst that produced 429 storms.
+
+This module keeps a single token bucket in Redis, refilled and debited by an
+atomic Lua script, that the worker and the API both acquire from:
+
+- Global bucket: SIMPLYRETS_RPM tokens/minute, capacity SIMPLYRETS_BURST.
+- Fair share: accounts that requested within the last SIMPLYRETS_FAIR_WINDOW_S
+  seconds each get an equal slice of the rate, so one affiliate's 40-schedule
+  burst cannot starve a single agent's interactive report.
+- Wait metrics: time spent waiting for a token is recorded per caller in
+  Redis (mr:ratelimit:<name>:wait:<caller>) and readable via wait_stats().
+
+The API keeps its own async copy of this script in
+api/services/vendor_rate_limit.py (separate deployments) — the Lua source and
+Redis key layout MUST stay identical so both sides share the same bucket.
+
+If Redis is unreachable the limiter degrades to the local per-process
+fallback limiter instead of failing the report.
+"""
+
+import logging
+import os
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Optional, Tuple
+
+from ..redis_utils import create_redis_connection
+
+logger = logging.getLogger(__name__)
+
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+FAIR_WINDOW_S = float(os.getenv("SIMPLYRETS_FAIR_WINDOW_S", "15"))
+MAX_SLEEP_S = 2.0          # re-check the bucket at least this often while waiting
+SHARED_ACCOUNT = "_shared"  # bucket slice for calls with no account context
+
+# KEYS[1] global bucket hash, KEYS[2] active-accounts zset, KEYS[3] account bucket hash
+# ARGV[1] rate (tokens/sec), ARGV[2] burst, ARGV[3] account id, ARGV[4] fair window (ms)
+# Returns {granted (0|1), wait_ms, active_accounts}
+TOKEN_BUCKET_LUA = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+local rate = tonumber(ARGV[1]) / 1000.0
+local burst = tonumber(ARGV[2])
+local account = ARGV[3]
+local window = tonumber(ARGV[4])
+
+redis.call('ZADD', KEYS[2], now, account)
+redis.call('ZREMRANGEBYSCORE', KEYS[2], '-inf', now - window)
+redis.call('PEXPIRE', KEYS[2], window * 2)
+local active = math.max(1, redis.call('ZCARD', KEYS[2]))
+
+local share_rate = rate / active
+local share_cap = math.max(1, burst / active)
+
+local function refill(key, r, cap)
+  local vals = redis.call('HMGET', key, 'tokens', 'ts')
+  local tokens = tonumber(vals[1]) or cap
+  local ts = tonumber(vals[2]) or now
+  return math.min(cap, tokens + math.max(0, now - ts) * r)
+end
+
+local g = refill(KEYS[1], rate, burst)
+local a = refill(KEYS[3], share_rate, share_cap)
+
+local granted = 0
+local wait = 0
+if g >= 1 and a >= 1 then
+  g = g - 1
+  a = a - 1
+  granted = 1
+else
+  local wait_g = 0
+  local wait_a = 0
+  if g < 1 then wait_g = math.ceil((1 - g) / rate) end
+  if a < 1 then wait_a = math.ceil((1 - a) / share_rate) end
+  wait = math.max(wait_g, wait_a)
+end
+
+redis.call('HSET', KEYS[1], 'tokens', g, 'ts', now)
+redis.call('HSET', KEYS[3], 'tokens', a, 'ts', now)
+local ttl = math.ceil(burst / rate) * 2 + 1000
+redis.call('PEXPIRE', KEYS[1], ttl)
+redis.call('PEXPIRE', KEYS[3], math.max(ttl, window * 2))
+return {granted, wait, active}
+"""
+
+_scope: ContextVar[Tuple[Optional[str], Optional[str]]] = ContextVar(
+    "vendor_rate_limit_scope", default=(None, None)
+)
+
+
+@contextmanager
+def rate_limit_scope(account_id: Optional[str] = None, caller: Optional[str] = None):
+    """
+    Attribute vendor calls made inside this block to an account and caller.
+
+    Used where the account is known higher up the stack than the fetch
+    (e.g. PropertyReportBuilder → market_trends → fetch_properties). Explicit
+    account_id/caller arguments to acquire() still win over the scope.
+    """
+    token = _scope.set((account_id, caller))
+    try:
+        yield
+    finally:
+        _scope.reset(token)
+
+
+class SharedTokenBucket:
+    """
+    Cross-process token bucket stored in Redis.
+
+    acquire() blocks until a token is granted and returns the seconds waited.
+    """
+
+    def __init__(self, name: str, rpm: int, burst: int, fallback=None,
+                 default_caller: str = "worker"):
+        self.name = name
+        self.rate = max(rpm, 1) / 60.0
+        self.burst = max(burst, 1)
+        self.fallback = fallback
+        self.default_caller = default_caller
+        self._redis = None
+        self._script = None
+        self._degraded = False
+
+    def _key(self, *parts: str) -> str:
+        return ":".join(("mr:ratelimit", self.name) + parts)
+
+    def _get_script(self):
+        if self._script is None:
+            self._redis = create_redis_connection(REDIS_URL)
+            self._script = self._redis.register_script(TOKEN_BUCKET_LUA)
+        return self._script
+
+    def acquire(self, account_id: Optional[str] = None, caller: Optional[str] = None) -> float:
+        scope_account, scope_caller = _scope.get()
+        account = str(account_id or scope_account or SHARED_ACCOUNT)
+        caller = caller or scope_caller or self.default_caller
+
+        started = time.perf_counter()
+        while True:
+            try:
+                granted, wait_ms, _active = self._get_script()(
+                    keys=[
+                        self._key("bucket"),
+                        self._key("active"),
+                        self._key("acct", account),
+                    ],
+                    args=[self.rate, self.burst, account, int(FAIR_WINDOW_S * 1000)],
+                )
+            except Exception as e:
+                if not self._degraded:
+                    logger.warning(
+                        "Shared %s limiter unavailable, using local limiter: %s", self.name, e
+                    )
+                    self._degraded = True
+                if self.fallback is not None:
+                    self.fallback.acquire()
+                break
+
+            if self._degraded:
+                logger.info("Shared %s limiter recovered", self.name)
+                self._degraded = False
+            if int(granted):
+                break
+            # Small jitter so waiting workers don't all re-check on the same tick
+            time.sleep(min(int(wait_ms) / 1000.0, MAX_SLEEP_S) + random.uniform(0, 0.05))
+
+        waited = time.perf_counter() - started
+        self._record_wait(caller, waited)
+        return waited
+
+    def _record_wait(self, caller: str, waited: float) -> None:
+        """Accumulate per-caller wait metrics. Never raises."""
+        if waited >= 1.0:
+            logger.info("%s limiter: caller=%s waited %.2fs for a token", self.name, caller, waited)
+        if self._redis is None or self._degraded:
+            return
+        try:
+            key = self._key("wait", caller)
+            pipe = self._redis.pipeline(transaction=False)
+            pipe.sadd(self._key("callers"), caller)
+            pipe.hincrby(key, "calls", 1)
+            if waited >= 0.01:
+                pipe.hincrby(key, "waited_calls", 1)
+                pipe.hincrbyfloat(key, "wait_ms_total", round(waited * 1000, 1))
+            pipe.execute()
+        except Exception as e:
+            logger.debug("%s limiter: failed to record wait metrics: %s", self.name, e)
+
+    def wait_stats(self) -> Dict[str, Dict[str, float]]:
+        """
+        Per-caller wait metrics: calls, waited_calls, wait_ms_total, avg_wait_ms.
+        Returns {} when Redis is unavailable.
+        """
+        try:
+            self._get_script()
+            callers = self._redis.smembers(self._key("callers"))
+            stats: Dict[str, Dict[str, float]] = {}
+            for raw in callers:
+                caller = raw.decode() if isinstance(raw, bytes) else raw
+                h = self._redis.hgetall(self._key("wait", caller))
+                h = {
+                    (k.decode() if isinstance(k, bytes) else k): float(v)
+                    for k, v in h.items()
+                }
+                calls = h.get("calls", 0.0)
+                h["avg_wait_ms"] = round(h.get("wait_ms_total", 0.0) / calls, 1) if calls else 0.0
+                stats[caller] = h
+            return stats
+        except Exception as e:
+            logger.debug("%s limiter: failed to read wait metrics: %s", self.name, e)
+            return {}
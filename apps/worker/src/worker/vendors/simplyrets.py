@@ -1,9 +1,16 @@
 import os, time, math
+import contextvars
+import importlib.util
+import threading
 from collections import deque
-from typing import Dict, List, Optional
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
 import base64
 import httpx
 
+from ..metrics import track_vendor_call
+from .rate_limit import SharedTokenBucket
+
 BASE = os.getenv("SIMPLYRETS_BASE_URL", "https://api.simplyrets.com")
 USER = os.getenv("SIMPLYRETS_USERNAME", "simplyrets")
 PASS = os.getenv("SIMPLYRETS_PASSWORD", "simplyrets")
@@ -11,50 +18,92 @@ RPM  = int(os.getenv("SIMPLYRETS_RPM", "60"))
 BURST = int(os.getenv("SIMPLYRETS_BURST", "10"))
 TIMEOUT = float(os.getenv("SIMPLYRETS_TIMEOUT_S", "25"))
 MAX_RESULTS = int(os.getenv("SIMPLYRETS_MAX_RESULTS", "1000"))
+PAGE_SIZE = 500  # SimplyRETS max page size
+PAGE_CONCURRENCY = int(os.getenv("SIMPLYRETS_PAGE_CONCURRENCY", "3"))
+# HTTP/2 needs the optional `h2` package (httpx[http2]); fall back to HTTP/1.1 keep-alive
+HTTP2 = importlib.util.find_spec("h2") is not None
 
 AUTH = "Basic " + base64.b64encode(f"{USER}:{PASS}".encode()).decode()
 
 class RateLimiter:
     """
     Token-bucket-ish limiter: keep a minute window (docs: 60 rpm + burst).
+
+    Per-process only — used as the fallback when the shared Redis bucket
+    (see vendors/rate_limit.py) is unreachable.
     """
     def __init__(self, rpm: int = 60, burst: int = 10):
         self.window = 60.0
         self.rpm = rpm
         self.burst = burst
         self.times = deque()
+        # fetch_many() calls acquire() from several threads at once
+        self._lock = threading.Lock()
 
     def acquire(self):
-        now = time.time()
-        # purge old
-        while self.times and (now - self.times[0]) > self.window:
-            self.times.popleft()
-        # hard cap: rpm; soft burst allowance
-        if len(self.times) >= max(self.rpm, self.burst):
-            wait = self.window - (now - self.times[0])
-            if wait > 0:
-                time.sleep(wait)
-        self.times.append(time.time())
-
-_limiter = RateLimiter(RPM, BURST)
+        with self._lock:
+            now = time.time()
+            # purge old
+            while self.times and (now - self.times[0]) > self.window:
+                self.times.popleft()
+            # hard cap: rpm; soft burst allowance
+            if len(self.times) >= max(self.rpm, self.burst):
+                wait = self.window - (now - self.times[0])
+                if wait > 0:
+                    time.sleep(wait)
+            self.times.append(time.time())
+
+# Budget is shared with every other worker process and the API via Redis.
+_limiter = SharedTokenBucket("simplyrets", RPM, BURST, fallback=RateLimiter(RPM, BURST))
+
+_client_lock = threading.Lock()
+_shared_client: Optional[httpx.Client] = None
+_shared_client_pid: Optional[int] = None
 
 def _client() -> httpx.Client:
-    return httpx.Client(
-        base_url=BASE,
-        headers={
-            "Authorization": AUTH,
-            "Accept": "application/json",
-            "Content-Type": "application/json",
-        },
-        timeout=TIMEOUT
-    )
+    """
+    Long-lived pooled client, one per process.
+
+    Reused across fetches so repeat calls skip the TLS handshake. Keyed on
+    the PID so a Celery prefork child never reuses sockets inherited from
+    its parent.
+    """
+    global _shared_client, _shared_client_pid
+    with _client_lock:
+        if _shared_client is None or _shared_client_pid != os.getpid():
+            _shared_client = httpx.Client(
+                base_url=BASE,
+                headers={
+                    "Authorization": AUTH,
+                    "Accept": "application/json",
+                    "Content-Type": "application/json",
+                },
+                timeout=TIMEOUT,
+                http2=HTTP2,
+                limits=httpx.Limits(
+                    max_connections=max(PAGE_CONCURRENCY * 4, 10),
+                    max_keepalive_connections=max(PAGE_CONCURRENCY * 2, 5),
+                ),
+            )
+            _shared_client_pid = os.getpid()
+        return _shared_client
 
-def _request_with_retries(c: httpx.Client, path: str, params: Dict, max_retries: int = 3):
+def _check_deadline(deadline: Optional[float]):
+    """Raise TimeoutError once a time.monotonic() deadline has passed."""
+    if deadline is not None and time.monotonic() >= deadline:
+        raise TimeoutError("SimplyRETS fetch deadline exceeded")
+
+def _request_with_retries(c: httpx.Client, path: str, params: Dict, max_retries: int = 3,
+                          account_id: Optional[str] = None, caller: Optional[str] = None,
+                          deadline: Optional[float] = None):
     backoff = 1.0
     for attempt in range(max_retries + 1):
-        _limiter.acquire()
+        _check_deadline(deadline)
+        _limiter.acquire(account_id=account_id, caller=caller)
         try:
-            resp = c.get(path, params=params)
+            with track_vendor_call("simplyrets") as call:
+                resp = c.get(path, params=params)
+                call["status"] = resp.status_code
             if resp.status_code == 429:
                 # rate limited — exponential backoff
                 time.sleep(backoff * 2)
@@ -72,38 +121,170 @@ def _request_with_retries(c: httpx.Client, path: str, params: Dict, max_retries:
         except httpx.HTTPError:
             raise
     # final try
-    r = c.get(path, params=params)
+    _check_deadline(deadline)
+    _limiter.acquire(account_id=account_id, caller=caller)
+    with track_vendor_call("simplyrets") as call:
+        r = c.get(path, params=params)
+        call["status"] = r.status_code
     r.raise_for_status()
     return r
 
-def fetch_properties(params: Dict, limit: Optional[int] = None) -> List[Dict]:
+def _total_count(resp: httpx.Response) -> Optional[int]:
+    """SimplyRETS reports the full match count in X-Total-Count (when the feed supports it)."""
+    try:
+        return int(resp.headers["X-Total-Count"])
+    except (KeyError, ValueError):
+        return None
+
+def iter_property_pages(params: Dict, limit: Optional[int] = None, *,
+                        account_id: Optional[str] = None, caller: Optional[str] = None,
+                        concurrency: Optional[int] = None,
+                        deadline: Optional[float] = None) -> Iterator[List[Dict]]:
+    """
+    GET /properties, yielding one page (list of property dicts) at a time, in offset order.
+
+    The first page is fetched alone. If it comes back full, the follow-up
+    pages are requested concurrently (up to `concurrency` in flight, default
+    SIMPLYRETS_PAGE_CONCURRENCY) and yielded as soon as each is next in line,
+    so callers can extract page 1 while pages 2..n are still landing. Without
+    an X-Total-Count header the follow-ups go out in waves and stop at the
+    first short page, so we never burn many limiter tokens on empty offsets.
+    With a `deadline` (time.monotonic()), no request starts after it passes
+    and no in-flight page is waited on past it: either raises TimeoutError.
+    """
+    total_limit = limit or MAX_RESULTS
+    concurrency = max(1, concurrency or PAGE_CONCURRENCY)
+    c = _client()
+
+    def _page(offset: int, size: int) -> List[Dict]:
+        q = {**params, "limit": size, "offset": offset}
+        return _request_with_retries(
+            c, "/properties", q, account_id=account_id, caller=caller, deadline=deadline
+        ).json() or []
+
+    first_size = min(PAGE_SIZE, total_limit)
+    resp = _request_with_retries(
+        c, "/properties", {**params, "limit": first_size, "offset": 0},
+        account_id=account_id, caller=caller, deadline=deadline,
+    )
+    first = resp.json() or []
+    if first:
+        yield first
+    if len(first) < first_size:
+        return
+
+    known_total = _total_count(resp)
+    end = min(total_limit, known_total) if known_total is not None else total_limit
+    offsets = [(o, min(PAGE_SIZE, end - o)) for o in range(first_size, end, PAGE_SIZE)]
+
+    executor = ThreadPoolExecutor(max_workers=concurrency)
+    try:
+        i = 0
+        while i < len(offsets):
+            wave = offsets[i:] if known_total is not None else offsets[i:i + concurrency]
+            futures = [
+                (size, executor.submit(contextvars.copy_context().run, _page, offset, size))
+                for offset, size in wave
+            ]
+            i += len(wave)
+            for size, fut in futures:
+                try:
+                    batch = fut.result(
+                        timeout=None if deadline is None else max(0.0, deadline - time.monotonic())
+                    )
+                except FutureTimeoutError:
+                    # A page still in flight at the deadline is dropped, not waited on
+                    raise TimeoutError("SimplyRETS fetch deadline exceeded") from None
+                if batch:
+                    yield batch
+                if len(batch) < size:
+                    return
+    finally:
+        # Caller stopped early or a page failed: don't leave queued pages spending tokens
+        executor.shutdown(wait=False, cancel_futures=True)
+
+def fetch_properties(params: Dict, limit: Optional[int] = None, *,
+                     account_id: Optional[str] = None, caller: Optional[str] = None) -> List[Dict]:
     """
-    GET /properties with paging.
+    GET /properties with paging (see iter_property_pages).
     - params: SimplyRETS query params (e.g., {'q':'San Diego','status':'Active,Pending,Closed',...})
     - limit: safety limit across pages (defaults to SIMPLYRETS_MAX_RESULTS)
+    - account_id / caller: attribution for the shared rate limiter (fair share +
+      wait metrics). Default to the enclosing rate_limit_scope(), if any.
     Returns a list of property dicts.
     """
-    out: List[Dict] = []
-    offset = 0
-    page_max = 500
     total_limit = limit or MAX_RESULTS
-    with _client() as c:
-        while True:
-            page_size = min(page_max, total_limit - len(out))
-            if page_size <= 0:
-                break
-            q = {**params, "limit": page_size, "offset": offset}
-            resp = _request_with_retries(c, "/properties", q)
-            batch = resp.json()
-            if not batch:
-                break
-            out.extend(batch)
-            if len(batch) < page_size:
-                break
-            offset += page_size
-            if len(out) >= total_limit:
-                break
-    return out
+    out: List[Dict] = []
+    for page in iter_property_pages(params, limit=total_limit, account_id=account_id, caller=caller):
+        out.extend(page)
+    return out[:total_limit]
+
+def fetch_many(queries: Dict[str, Tuple[Dict, Optional[int]]], *,
+               account_id: Optional[str] = None, caller: Optional[str] = None,
+               max_workers: int = 4, timeout: float = 120.0,
+               page_transform: Optional[Callable[[List[Dict]], List[Dict]]] = None,
+               ) -> Tuple[Dict[str, List[Dict]], Dict[str, Dict]]:
+    """
+    Run several independent fetch_properties() queries concurrently.
+    - queries: {name: (params, limit)}, e.g. {"active": (q1, 1000), "closed": (q2, 1000)}
+    - every request still goes through the shared limiter, so fan-out only
+      spends budget faster when the bucket has tokens; it never bypasses it.
+    - timeout: overall deadline in seconds. When it passes, fetch_many raises
+      TimeoutError without waiting for stragglers; their threads start no
+      further requests (a request already in flight runs out its own
+      SIMPLYRETS_TIMEOUT_S in the background).
+    - page_transform: optional per-page function (e.g. extraction) applied as
+      each page lands, so it overlaps with the pages still in flight.
+    Returns (results, timings): {name: [property dicts, or transformed rows]} and
+    {name: {"ms": wall time, "count": rows}}. The first failing query's
+    exception is re-raised after the others finish (or the deadline passes).
+    """
+    results: Dict[str, List[Dict]] = {}
+    timings: Dict[str, Dict] = {}
+    if not queries:
+        return results, timings
+
+    deadline = time.monotonic() + timeout
+
+    def _run(name: str, params: Dict, limit: Optional[int]):
+        t0 = time.perf_counter()
+        total_limit = limit or MAX_RESULTS
+        rows: List[Dict] = []
+        fetched = 0
+        for page in iter_property_pages(params, limit=total_limit, account_id=account_id,
+                                        caller=caller, deadline=deadline):
+            page = page[:total_limit - fetched]
+            fetched += len(page)
+            rows.extend(page_transform(page) if page_transform else page)
+        return name, rows, round((time.perf_counter() - t0) * 1000, 1)
+
+    error: Optional[BaseException] = None
+    executor = ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(queries))))
+    try:
+        # copy_context() carries the caller's rate_limit_scope into each thread
+        futures = [
+            (name, executor.submit(contextvars.copy_context().run, _run, name, params, limit))
+            for name, (params, limit) in queries.items()
+        ]
+        for query_name, fut in futures:
+            try:
+                name, rows, ms = fut.result(timeout=max(0.0, deadline - time.monotonic()))
+            except FutureTimeoutError:
+                error = error or TimeoutError(
+                    f"SimplyRETS query {query_name!r} exceeded the {timeout}s deadline"
+                )
+                continue
+            except Exception as e:
+                error = error or e
+                continue
+            results[name] = rows
+            timings[name] = {"ms": ms, "count": len(rows)}
+    finally:
+        # Don't wait on stragglers past the deadline (a `with` block would)
+        executor.shutdown(wait=False, cancel_futures=True)
+    if error is not None:
+        raise error
+    return results, timings
 
 # Convenience: a tiny helper for Market Snapshot queries
 def build_market_snapshot_params(city: str, lookback_days: int = 30) -> Dict:
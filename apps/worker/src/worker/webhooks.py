@@ -0,0 +1,283 @@
+"""
+Outbound webhook delivery (deliver_webhook_event task, migration 0058).
+
+generate_report used to post to every active webhook serially, 5 s timeout
+each, opening a DB connection per delivery log row — a slow customer endpoint
+held up report completion. Now the report task only enqueues the event
+(tasks._deliver_webhooks → WEBHOOK_QUEUE) and dispatch() delivers it:
+
+- Concurrent: one httpx.AsyncClient, every endpoint at once
+  (WEBHOOK_CONCURRENCY overall per dispatch).
+- Per-endpoint cap: at most WEBHOOK_ENDPOINT_CONCURRENCY requests in flight
+  to one webhook across all worker processes (Redis counter). Over the cap,
+  that endpoint's delivery is deferred WEBHOOK_DEFER_S without using up an
+  attempt.
+- Retry with backoff: timeouts, connection errors, 429 and 5xx are retried
+  after WEBHOOK_RETRY_BASE_S * 4^(attempt-1); other responses are final.
+  After WEBHOOK_MAX_ATTEMPTS the delivery is dead-lettered
+  (status = 'dead_letter').
+- Circuit breaker: WEBHOOK_BREAKER_THRESHOLD consecutive timeouts /
+  connection errors open an endpoint's circuit for WEBHOOK_BREAKER_COOLDOWN_S.
+  While it is open, attempts are recorded as failed without a request.
+- Batched log: every attempt of a dispatch goes to webhook_deliveries in
+  one INSERT batch.
+
+Redis state fails OPEN: without Redis, deliveries run uncapped and without
+the breaker.
+"""
+
+import asyncio
+import hashlib
+import hmac
+import os
+import time
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+import httpx
+
+from .db import db_conn
+from .metrics import WEBHOOK_DELIVERIES, track_vendor_call
+from .redis_utils import create_redis_connection
+
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+WEBHOOK_QUEUE = os.getenv("WEBHOOK_QUEUE", "webhooks")
+WEBHOOK_TIMEOUT_S = float(os.getenv("WEBHOOK_TIMEOUT_S", "5"))
+WEBHOOK_CONCURRENCY = int(os.getenv("WEBHOOK_CONCURRENCY", "20"))
+WEBHOOK_ENDPOINT_CONCURRENCY = int(os.getenv("WEBHOOK_ENDPOINT_CONCURRENCY", "2"))
+WEBHOOK_MAX_ATTEMPTS = int(os.getenv("WEBHOOK_MAX_ATTEMPTS", "5"))
+WEBHOOK_RETRY_BASE_S = float(os.getenv("WEBHOOK_RETRY_BASE_S", "30"))   # 30s, 2m, 8m, 32m
+WEBHOOK_DEFER_S = float(os.getenv("WEBHOOK_DEFER_S", "10"))
+WEBHOOK_BREAKER_THRESHOLD = int(os.getenv("WEBHOOK_BREAKER_THRESHOLD", "5"))
+WEBHOOK_BREAKER_COOLDOWN_S = int(os.getenv("WEBHOOK_BREAKER_COOLDOWN_S", "300"))
+
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+_PREFIX = "mr:webhooks"
+
+
+class Outcome(NamedTuple):
+    hook_id: str
+    status_code: Optional[int]
+    ms: int
+    error: Optional[str]
+    unreachable: bool = False   # timeout / connection error (feeds the breaker)
+
+
+def sign(secret: str, body: bytes, ts: str) -> str:
+    mac = hmac.new(secret.encode(), msg=(ts + ".").encode() + body, digestmod=hashlib.sha256)
+    return "sha256=" + mac.hexdigest()
+
+
+def retry_delay(attempt: int) -> float:
+    """Seconds to wait before attempt + 1."""
+    return WEBHOOK_RETRY_BASE_S * (4 ** (attempt - 1))
+
+
+def _retryable(outcome: Outcome) -> bool:
+    return outcome.status_code is None or outcome.status_code in RETRYABLE_STATUS_CODES
+
+
+# ── Redis: endpoint caps + circuit breaker ───────────────────────────────────
+
+_redis = None
+
+
+def _get_redis():
+    global _redis
+    if _redis is None:
+        _redis = create_redis_connection(REDIS_URL)
+    return _redis
+
+
+def _reset_after_fork() -> None:
+    global _redis
+    _redis = None
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def _circuit_open(hook_id: str) -> bool:
+    try:
+        return bool(_get_redis().exists(f"{_PREFIX}:breaker:{hook_id}:open"))
+    except Exception as e:
+        print(f"⚠️  webhooks: breaker check failed (delivering anyway): {e}")
+        return False
+
+
+def _acquire_slot(hook_id: str) -> bool:
+    key = f"{_PREFIX}:inflight:{hook_id}"
+    try:
+        r = _get_redis()
+        inflight = r.incr(key)
+        # Self-heals if a worker dies holding a slot
+        r.expire(key, int(WEBHOOK_TIMEOUT_S * 2) + 1)
+        if inflight > WEBHOOK_ENDPOINT_CONCURRENCY:
+            r.decr(key)
+            return False
+    except Exception as e:
+        print(f"⚠️  webhooks: endpoint cap unavailable (delivering anyway): {e}")
+    return True
+
+
+def _release_slot(hook_id: str) -> None:
+    try:
+        _get_redis().decr(f"{_PREFIX}:inflight:{hook_id}")
+    except Exception:
+        pass
+
+
+def _record_breaker(outcome: Outcome) -> None:
+    failures_key = f"{_PREFIX}:breaker:{outcome.hook_id}:failures"
+    try:
+        r = _get_redis()
+        if not outcome.unreachable:
+            r.delete(failures_key)
+            return
+        failures = r.incr(failures_key)
+        r.expire(failures_key, WEBHOOK_BREAKER_COOLDOWN_S * 4)
+        if failures >= WEBHOOK_BREAKER_THRESHOLD:
+            r.set(f"{_PREFIX}:breaker:{outcome.hook_id}:open", failures,
+                  ex=WEBHOOK_BREAKER_COOLDOWN_S)
+            print(f"🔌 webhooks: circuit open for {outcome.hook_id} "
+                  f"after {failures} consecutive timeouts/errors")
+    except Exception as e:
+        print(f"⚠️  webhooks: breaker update failed: {e}")
+
+
+# ── Delivery ─────────────────────────────────────────────────────────────────
+
+def load_hooks(account_id: str, hook_ids: Optional[List[str]] = None) -> List[Tuple[str, str, str]]:
+    """Active (id, url, secret) for the account, optionally only these ids."""
+    with db_conn(account_id) as (conn, cur):
+        if hook_ids:
+            cur.execute(
+                "SELECT id::text, url, secret FROM webhooks "
+                "WHERE is_active=TRUE AND id = ANY(%s::uuid[])",
+                (hook_ids,),
+            )
+        else:
+            cur.execute("SELECT id::text, url, secret FROM webhooks WHERE is_active=TRUE")
+        return cur.fetchall()
+
+
+async def _post_all(hooks, event: str, body: bytes, event_id: str) -> List[Outcome]:
+    limit = asyncio.Semaphore(max(1, WEBHOOK_CONCURRENCY))
+
+    async def post(client: httpx.AsyncClient, hook_id: str, url: str, secret: str) -> Outcome:
+        async with limit:
+            ts = str(int(time.time()))
+            started = time.perf_counter()
+            status_code, error, unreachable = None, None, False
+            try:
+                with track_vendor_call("webhook") as call:
+                    resp = await client.post(
+                        url,
+                        content=body,
+                        headers={
+                            "Content-Type": "application/json",
+                            "X-Market-Reports-Event": event,
+                            "X-Market-Reports-Timestamp": ts,
+                            "X-Market-Reports-Signature": sign(secret, body, ts),
+                            "X-Market-Reports-Delivery": event_id,
+                        },
+                    )
+                    call["status"] = resp.status_code
+                status_code = resp.status_code
+            except (httpx.TimeoutException, httpx.TransportError) as e:
+                error, unreachable = f"{type(e).__name__}: {e}", True
+            except Exception as e:
+                error = str(e)
+            return Outcome(hook_id, status_code, int((time.perf_counter() - started) * 1000),
+                           error, unreachable)
+
+    async with httpx.AsyncClient(timeout=WEBHOOK_TIMEOUT_S) as client:
+        return await asyncio.gather(*(post(client, *hook) for hook in hooks))
+
+
+def _status(outcome: Outcome, attempt: int) -> str:
+    if outcome.status_code is not None and 200 <= outcome.status_code < 300:
+        return "delivered"
+    if not _retryable(outcome):
+        return "failed"
+    return "retrying" if attempt < WEBHOOK_MAX_ATTEMPTS else "dead_letter"
+
+
+def _log(account_id: str, event: str, body: bytes, event_id: str, attempt: int,
+         outcomes: List[Outcome]) -> None:
+    rows = [
+        (account_id, o.hook_id, event, body.decode(), o.status_code, o.ms, o.error,
+         _status(o, attempt), attempt, event_id)
+        for o in outcomes
+    ]
+    try:
+        with db_conn(account_id) as (conn, cur):
+            cur.executemany("""
+                INSERT INTO webhook_deliveries (
+                    account_id, webhook_id, event, payload, response_status, response_ms, error,
+                    status, attempt, event_id
+                )
+                VALUES (%s, %s, %s, %s::jsonb, %s, %s, %s, %s, %s, %s)
+            """, rows)
+    except Exception as e:
+        print(f"⚠️  webhooks: failed to log {len(rows)} deliveries (non-critical): {e}")
+
+
+def dispatch(
+    account_id: str,
+    event: str,
+    body: str,
+    event_id: str,
+    hook_ids: Optional[List[str]] = None,
+    attempt: int = 1,
+    reschedule: Optional[Callable[[List[str], int, float], None]] = None,
+) -> Dict:
+    """
+    Deliver one event (attempt `attempt`) to the account's active webhooks,
+    or only `hook_ids` on a retry. reschedule(hook_ids, attempt, countdown)
+    queues the follow-ups: retries (attempt + 1) and cap deferrals (same
+    attempt).
+    """
+    hooks = load_hooks(account_id, hook_ids)
+    if not hooks:
+        return {"delivered": 0, "retrying": 0, "failed": 0, "dead_letter": 0, "deferred": 0}
+
+    payload = body.encode()
+    send, skipped, deferred = [], [], []
+    for hook in hooks:
+        if _circuit_open(hook[0]):
+            skipped.append(Outcome(hook[0], None, 0, "circuit open"))
+        elif _acquire_slot(hook[0]):
+            send.append(hook)
+        else:
+            deferred.append(hook[0])
+
+    try:
+        outcomes = asyncio.run(_post_all(send, event, payload, event_id)) if send else []
+    finally:
+        for hook in send:
+            _release_slot(hook[0])
+
+    for outcome in outcomes:
+        _record_breaker(outcome)
+    outcomes += skipped
+    _log(account_id, event, payload, event_id, attempt, outcomes)
+
+    summary = {"delivered": 0, "retrying": 0, "failed": 0, "dead_letter": 0, "deferred": len(deferred)}
+    retry = []
+    for outcome in outcomes:
+        status = _status(outcome, attempt)
+        summary[status] += 1
+        WEBHOOK_DELIVERIES.labels(status=status).inc()
+        if status == "retrying":
+            retry.append(outcome.hook_id)
+        elif status == "dead_letter":
+            print(f"☠️  webhooks: {event} to {outcome.hook_id} dead-lettered after "
+                  f"{attempt} attempts: {outcome.error or outcome.status_code}")
+
+    if reschedule is not None:
+        if retry:
+            reschedule(retry, attempt + 1, retry_delay(attempt))
+        if deferred:
+            reschedule(deferred, attempt, WEBHOOK_DEFER_S)
+    return summary
@@ -0,0 +1,62 @@
+-- Migration 0054: Normalized MLS listing store + per-market sync watermarks.
+--
+-- generate_report used to re-pull up to 2,500 raw listings from SimplyRETS on
+-- every run, even when a dozen schedules in the same city ran minutes apart.
+-- The worker's sync_listing_store beat task now keeps PropertyDataExtractor
+-- output for each synced market (city or ZIP) here, pulling only listings
+-- modified since the market's watermark, and generate_report reads from this
+-- table while the market is fresh.
+--
+-- Shared MLS data (no account_id), so no RLS.
+-- Idempotent: IF NOT EXISTS throughout.
+
+CREATE TABLE IF NOT EXISTS mls_listings (
+    mls_id              TEXT PRIMARY KEY,
+    status              TEXT,
+    list_date           TIMESTAMP,
+    close_date          TIMESTAMP,
+    modified_at         TIMESTAMP,                  -- vendor listing.modified (watermark source)
+    days_on_market      INT,
+    list_price          BIGINT,
+    close_price         BIGINT,
+    city                TEXT,
+    zip_code            TEXT,
+    property_type       TEXT,                       -- SimplyRETS type (RES, CND, ...)
+    property_subtype    TEXT,                       -- display subtype from the extractor (SFR, Condo, ...)
+    raw_subtype         TEXT,                       -- SimplyRETS subType, for query filters
+    sqft                INT,
+    price_per_sqft      NUMERIC(12, 2),
+    close_to_list_ratio NUMERIC(7, 2),
+    hero_photo_url      TEXT,
+    bedrooms            INT,
+    bathrooms           NUMERIC(4, 1),
+    street_address      TEXT,
+    synced_at           TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS idx_mls_listings_city_status
+    ON mls_listings (lower(city), status);
+
+CREATE INDEX IF NOT EXISTS idx_mls_listings_zip_status
+    ON mls_listings (zip_code, status);
+
+CREATE INDEX IF NOT EXISTS idx_mls_listings_modified
+    ON mls_listings (modified_at DESC);
+
+-- One row per synced market. market_key is 'city:<lowercased city>' or 'zip:<ZIP>'.
+CREATE TABLE IF NOT EXISTS mls_sync_state (
+    market_key          TEXT PRIMARY KEY,
+    city                TEXT,
+    zip_code            TEXT,
+    watermark           TIMESTAMP,                  -- max(modified_at) seen for this market
+    last_synced_at      TIMESTAMPTZ,                -- last successful sync (full or incremental)
+    last_full_sync_at   TIMESTAMPTZ,
+    last_requested_at   TIMESTAMPTZ DEFAULT NOW(),  -- last report that wanted this market
+    sync_started_at     TIMESTAMPTZ,                -- claim marker so overlapping beats don't double-sync
+    listing_count       INT DEFAULT 0,
+    last_error          TEXT,
+    created_at          TIMESTAMPTZ DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS idx_mls_sync_state_requested
+    ON mls_sync_state (last_requested_at DESC);
@@ -0,0 +1,48 @@
+-- Migration 0055: Per-stage timings for report runs.
+--
+-- generate_report only recorded a total processing_time_ms. The worker's
+-- RunTrace (worker/tracing.py) now writes one row per stage span — limit
+-- check, data fetch (and each concurrent query under it), extract, build,
+-- photo proxy, AI narrative, HTML render, image embed, PDF render, R2 upload,
+-- email, webhooks — so the admin console can show p50/p95 per stage
+-- (GET /v1/admin/metrics/stages).
+--
+-- stage is a dotted path ('data_fetch.closed'); parent_stage is the enclosing
+-- span's path. A stage can appear more than once per run.
+--
+-- Idempotent: IF NOT EXISTS throughout.
+
+CREATE TABLE IF NOT EXISTS report_generation_stages (
+    id                    BIGSERIAL PRIMARY KEY,
+    report_generation_id  UUID NOT NULL REFERENCES report_generations(id) ON DELETE CASCADE,
+    account_id            UUID NOT NULL,
+    report_type           TEXT,
+    stage                 TEXT NOT NULL,
+    parent_stage          TEXT,
+    depth                 SMALLINT NOT NULL DEFAULT 0,
+    started_offset_ms     INT,                      -- ms from run start
+    duration_ms           INT NOT NULL,
+    ok                    BOOLEAN NOT NULL DEFAULT TRUE,
+    detail                JSONB,                    -- e.g. {"source": "simplyrets", "count": 812}
+    created_at            TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS idx_report_generation_stages_created
+    ON report_generation_stages (created_at DESC, stage);
+
+CREATE INDEX IF NOT EXISTS idx_report_generation_stages_run
+    ON report_generation_stages (report_generation_id);
+
+-- Same account scoping (with admin bypass) as report_generations
+ALTER TABLE report_generation_stages ENABLE ROW LEVEL SECURITY;
+
+DROP POLICY IF EXISTS report_generation_stages_rls ON report_generation_stages;
+CREATE POLICY report_generation_stages_rls ON report_generation_stages
+  FOR ALL USING (
+    account_id = current_setting('app.current_account_id', true)::uuid
+    OR current_setting('app.current_user_role', true) = 'ADMIN'
+  )
+  WITH CHECK (
+    account_id = current_setting('app.current_account_id', true)::uuid
+    OR current_setting('app.current_user_role', true) = 'ADMIN'
+  );
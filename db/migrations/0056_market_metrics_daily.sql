@@ -0,0 +1,35 @@
+-- Migration 0056: Precomputed per-market report metrics.
+--
+-- Schedules for the same city and report type often fire in the same tick,
+-- and each one rebuilt identical build_result_json output; the 15-minute
+-- report cache is keyed by the full params (schedule_id included), so two
+-- schedules never shared it. The worker's precompute_market_metrics beat task
+-- now materializes, per market / report type / lookback, the unfiltered
+-- builder output (plus its status counts and headline metrics) and the
+-- market-adaptive pricing baseline from the listing store (0054).
+-- generate_report serves unfiltered runs from here and resolves preset
+-- filters against the stored baseline, fetching only the filtered listings.
+--
+-- One row per day per key; older days are kept for trends and purged after
+-- MARKET_METRICS_RETENTION_DAYS.
+--
+-- Shared MLS data (no account_id), so no RLS.
+-- Idempotent: IF NOT EXISTS throughout.
+
+CREATE TABLE IF NOT EXISTS market_metrics_daily (
+    metric_date     DATE NOT NULL,
+    market_key      TEXT NOT NULL,                  -- listing store keys: 'city:irvine' / 'zip:92618,zip:92620'
+    city_label      TEXT NOT NULL DEFAULT '',       -- the report's display city (builders echo it)
+    report_type     TEXT NOT NULL,                  -- or 'market_stats' for the pricing baseline
+    lookback_days   INT NOT NULL,
+    variant         TEXT NOT NULL DEFAULT '',       -- market_stats: the subtype filter, if any
+    counts          JSONB,                          -- status buckets, e.g. {"Active": 120, "Closed": 41}
+    metrics         JSONB,                          -- headline metrics / baseline medians
+    result_json     JSONB,                          -- full unfiltered builder output
+    listing_count   INT,
+    computed_at     TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    PRIMARY KEY (metric_date, market_key, city_label, report_type, lookback_days, variant)
+);
+
+CREATE INDEX IF NOT EXISTS idx_market_metrics_daily_computed
+    ON market_metrics_daily (computed_at DESC);
@@ -0,0 +1,21 @@
+-- Migration 0057: Per-batch outcomes in email_log.
+--
+-- Report emails used to go out as ONE SendGrid request with every recipient
+-- in a single personalization (everyone on one To: line, one retry unit).
+-- They are now sent one personalization per recipient, up to 1,000 per
+-- request (SENDGRID_BATCH_SIZE), retrying only the batches that failed, and
+-- each batch is logged as its own email_log row: to_emails holds that
+-- batch's recipients, response_code/status/error its final outcome.
+--
+-- Single-batch sends (almost all of them) still write one row, with
+-- batch_index 0 and batch_count 1. Rows written before this migration keep
+-- NULLs.
+--
+-- Idempotent: IF NOT EXISTS throughout.
+
+ALTER TABLE email_log ADD COLUMN IF NOT EXISTS batch_index INT;          -- 0-based within the send
+ALTER TABLE email_log ADD COLUMN IF NOT EXISTS batch_count INT;          -- batches in the send
+ALTER TABLE email_log ADD COLUMN IF NOT EXISTS attempts INT;             -- provider requests made for this batch
+ALTER TABLE email_log ADD COLUMN IF NOT EXISTS provider_message_id TEXT; -- SendGrid X-Message-Id
+
+COMMENT ON COLUMN email_log.batch_index IS 'Batch number within one send (per-recipient SendGrid personalizations, up to 1,000 per batch)';
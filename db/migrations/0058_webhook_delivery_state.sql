@@ -0,0 +1,27 @@
+-- Migration 0058: Delivery state for outbound webhooks.
+--
+-- Webhooks were posted serially inside generate_report (5 s timeout each,
+-- one connection per log insert), so a slow customer endpoint delayed report
+-- completion. The report task now only enqueues the event; the
+-- deliver_webhook_event task (WEBHOOK_QUEUE) posts to every endpoint
+-- concurrently, retries with backoff, and writes all of an attempt's rows
+-- in one batch. Each row is still one attempt; the new columns say where the
+-- delivery stands:
+--
+--   status      delivered | retrying | failed (non-retryable response)
+--               | dead_letter (WEBHOOK_MAX_ATTEMPTS exhausted)
+--   attempt     1-based attempt number
+--   event_id    shared by every attempt (and endpoint) of one event; also
+--               sent as X-Market-Reports-Delivery for receiver dedupe
+--
+-- Rows written before this migration keep NULLs.
+-- Idempotent: IF NOT EXISTS throughout.
+
+ALTER TABLE webhook_deliveries ADD COLUMN IF NOT EXISTS status TEXT;
+ALTER TABLE webhook_deliveries ADD COLUMN IF NOT EXISTS attempt INT;
+ALTER TABLE webhook_deliveries ADD COLUMN IF NOT EXISTS event_id TEXT;
+
+-- Dead-letter review: the few rows per account that need attention
+CREATE INDEX IF NOT EXISTS idx_webhook_deliveries_dead_letter
+    ON webhook_deliveries (account_id, created_at DESC)
+    WHERE status = 'dead_letter';
@@ -0,0 +1,63 @@
+"""
+Unit tests for the Playwright browser pool (worker.browser_pool).
+
+No Chromium — the browser is a fake. Verifies:
+ 1. A context is reused for renders with the same options, but every
+    checkout starts without the previous render's cookies or permissions
+ 2. The page's web storage is cleared before the page is closed, even when
+    the render failed
+
+Run with:  pytest tests/test_browser_pool.py -v
+"""
+
+import os
+import sys
+import time
+import unittest
+from unittest.mock import MagicMock
+
+# ── Ensure worker source is on the path ───────────────────────────────────────
+WORKER_SRC = os.path.join(
+    os.path.dirname(__file__), "..", "apps", "worker", "src"
+)
+if WORKER_SRC not in sys.path:
+    sys.path.insert(0, WORKER_SRC)
+
+from worker import browser_pool  # noqa: E402
+
+
+def _pool():
+    pool = browser_pool.BrowserPool()
+    pool._browser = MagicMock()
+    pool._browser.is_connected.return_value = True
+    pool._launched_at = time.monotonic()
+    pool._browser.new_context.side_effect = lambda **_opts: MagicMock()
+    return pool
+
+
+class TestBrowserPoolIsolation(unittest.TestCase):
+    def test_context_reused_but_cleared_per_checkout(self):
+        pool = _pool()
+        with pool.page(device_scale_factor=2):
+            pass
+        with pool.page(device_scale_factor=2):
+            pass
+
+        pool._browser.new_context.assert_called_once_with(device_scale_factor=2)
+        context = pool._contexts[(("device_scale_factor", 2),)][0]
+        self.assertEqual(context.clear_cookies.call_count, 2)
+        self.assertEqual(context.clear_permissions.call_count, 2)
+
+    def test_storage_cleared_before_close_on_failure(self):
+        pool = _pool()
+        with self.assertRaises(ValueError):
+            with pool.page() as page:
+                page.is_closed.return_value = False
+                raise ValueError("render failed")
+
+        page.evaluate.assert_called_once_with(browser_pool._CLEAR_STORAGE_JS)
+        page.close.assert_called_once()
+
+
+if __name__ == "__main__":
+    unittest.main()
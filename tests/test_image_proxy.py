@@ -0,0 +1,47 @@
+"""
+Unit tests for batch image resolution (worker.utils.image_proxy).
+
+No network or disk cache — both are fakes. Verifies:
+ 1. fetch_images_as_base64 serves cache hits without fetching, and looks
+    each miss up in image_cache exactly once (the fetch doesn't re-check it)
+
+Run with:  pytest tests/test_image_proxy.py -v
+"""
+
+import os
+import sys
+import unittest
+from unittest.mock import MagicMock, patch
+
+# ── Ensure worker source is on the path ───────────────────────────────────────
+WORKER_SRC = os.path.join(
+    os.path.dirname(__file__), "..", "apps", "worker", "src"
+)
+if WORKER_SRC not in sys.path:
+    sys.path.insert(0, WORKER_SRC)
+
+from worker.utils import image_proxy  # noqa: E402
+
+
+class TestFetchImagesAsBase64(unittest.TestCase):
+    def test_each_miss_is_looked_up_once(self):
+        cache = MagicMock()
+        cache.get.side_effect = lambda url: (b"hit", "image/png") if url == "https://a/hit" else None
+        image = b"\xff" * 2048
+        response = MagicMock(status_code=200, content=image, headers={"content-type": "image/jpeg"})
+        client = MagicMock()
+        client.__enter__.return_value.get.return_value = response
+
+        with patch.object(image_proxy, "image_cache", cache), \
+                patch.object(image_proxy.httpx, "Client", return_value=client):
+            results = image_proxy.fetch_images_as_base64(["https://a/hit", "https://a/miss"])
+
+        self.assertEqual(results["https://a/hit"], "data:image/png;base64,aGl0")
+        self.assertTrue(results["https://a/miss"].startswith("data:image/jpeg;base64,"))
+        self.assertEqual([c.args[0] for c in cache.get.call_args_list],
+                         ["https://a/hit", "https://a/miss"])
+        cache.put.assert_called_once_with("https://a/miss", image, "image/jpeg")
+
+
+if __name__ == "__main__":
+    unittest.main()
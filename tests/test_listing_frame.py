@@ -0,0 +1,127 @@
+"""
+Unit tests for the columnar ListingFrame (worker.compute.frame).
+
+Verifies:
+ 1. Reducers match the list-of-dicts math they replaced (statistics.median,
+    sum/len, the `if l.get(x)` guard)
+ 2. The NumPy and pure-Python paths return identical, plain-Python results
+ 3. Date masks treat missing dates as non-matching and strip timezones
+
+Run with:  pytest tests/test_listing_frame.py -v
+"""
+
+import os
+import statistics
+import sys
+import unittest
+from datetime import datetime, timedelta, timezone
+from unittest.mock import patch
+
+# ── Ensure worker source is on the path ───────────────────────────────────────
+WORKER_SRC = os.path.join(
+    os.path.dirname(__file__), "..", "apps", "worker", "src"
+)
+if WORKER_SRC not in sys.path:
+    sys.path.insert(0, WORKER_SRC)
+
+from worker.compute import frame as frame_mod  # noqa: E402
+from worker.compute.frame import ListingFrame  # noqa: E402
+
+NOW = datetime(2025, 6, 1)
+
+
+def _rows():
+    return [
+        {"status": "Active", "list_price": 500_000, "days_on_market": 10,
+         "price_per_sqft": 410.5, "list_date": NOW - timedelta(days=3),
+         "property_subtype": "SFR"},
+        {"status": "Active", "list_price": 0, "days_on_market": None,
+         "list_date": None, "property_subtype": "Condo"},
+        {"status": "Active", "list_price": 725_000, "days_on_market": 40,
+         "price_per_sqft": 512.25, "list_date": NOW - timedelta(days=20),
+         "property_subtype": "SFR"},
+        {"status": "Closed", "list_price": 600_000, "close_price": 610_000,
+         "close_to_list_ratio": 101.67, "days_on_market": 21,
+         "close_date": (NOW - timedelta(days=5)).replace(tzinfo=timezone.utc)},
+        {"status": "Closed", "list_price": 400_000, "close_price": 390_000,
+         "close_to_list_ratio": 97.5, "days_on_market": 0,
+         "close_date": NOW - timedelta(days=45)},
+        {"status": "Pending", "list_price": 810_000, "days_on_market": 7},
+        {"status": "Expired", "list_price": 300_000},
+    ]
+
+
+class _FrameCases:
+    def test_median_matches_statistics(self):
+        f = ListingFrame(_rows())
+        active = f.status_is("Active")
+        self.assertEqual(f.median("list_price", active),
+                         statistics.median([500_000, 725_000]))
+        self.assertEqual(f.median("list_price"),
+                         statistics.median([500_000, 725_000, 600_000, 400_000, 810_000, 300_000]))
+
+    def test_odd_median_of_ints_stays_int(self):
+        f = ListingFrame(_rows())
+        m = f.median("list_price", f.any_of(f.status_is("Closed"), f.status_is("Pending")))
+        self.assertEqual(m, 600_000)
+        self.assertIsInstance(m, int)
+
+    def test_zero_and_missing_values_are_skipped(self):
+        f = ListingFrame(_rows())
+        # DOM 0 and None don't count, same as `if l.get("days_on_market")`
+        self.assertEqual(f.mean("days_on_market"), (10 + 40 + 21 + 7) / 4)
+        self.assertEqual(f.count(f.has("list_price")), 6)
+
+    def test_defaults_when_empty(self):
+        f = ListingFrame(_rows())
+        pending = f.status_is("Pending")
+        self.assertEqual(f.median("close_price", pending), 0.0)
+        self.assertEqual(f.mean("close_to_list_ratio", pending, default=100.0), 100.0)
+        self.assertIsNone(f.min("close_price", pending))
+
+    def test_since_strips_timezone_and_skips_missing(self):
+        f = ListingFrame(_rows())
+        cutoff = NOW - timedelta(days=30)
+        self.assertEqual(f.count(f.since("close_date", cutoff)), 1)
+        self.assertEqual(f.count(f.since("list_date", cutoff)), 2)
+        self.assertEqual(f.count(f.missing("list_date")), 5)
+
+    def test_price_falls_back_to_close_price(self):
+        rows = [{"status": "Closed", "list_price": None, "close_price": 450_000}]
+        f = ListingFrame(rows)
+        self.assertEqual(f.values("price"), [450_000])
+
+    def test_take_top_is_stable_descending(self):
+        rows = [{"mls_id": i, "list_price": p} for i, p in enumerate([5, 9, None, 9, 1])]
+        f = ListingFrame(rows)
+        top = f.take_top(f.everything(), "list_price", limit=4)
+        self.assertEqual([r["mls_id"] for r in top], [1, 3, 0, 4])
+
+    def test_subtype_groups_in_first_seen_order(self):
+        f = ListingFrame(_rows())
+        self.assertEqual(f.subtype_labels, ["SFR", "Condo", "Other"])
+        self.assertEqual(f.count(f.in_group(0)), 2)
+
+    def test_results_are_plain_python(self):
+        f = ListingFrame(_rows())
+        for v in (f.median("price_per_sqft"), f.mean("list_price"), f.max("sqft") or 0,
+                  f.count(f.everything())):
+            self.assertIn(type(v), (int, float))
+        for v in f.sorted_values("list_price"):
+            self.assertIs(type(v), int)
+
+
+@unittest.skipIf(frame_mod.np is None, "numpy not installed")
+class TestListingFrameNumpy(_FrameCases, unittest.TestCase):
+    pass
+
+
+class TestListingFramePurePython(_FrameCases, unittest.TestCase):
+    def setUp(self):
+        patcher = patch.object(frame_mod, "np", None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,214 @@
+"""
+Unit tests for the single-pass listing pipeline (worker.compute.pipeline).
+
+Verifies:
+ 1. city_key: no filter for "Market" / "Unknown" / a ZIP used as the label;
+    otherwise a trimmed, lowercased city
+ 2. is_rental / stream_listings: lease statuses and sub-$50k "sales" are
+    excluded; every kept row lands in `all` and its status bucket
+ 3. ensure_bucketed reuses buckets made for the same city and re-buckets
+    (city filter only) when a different city is passed
+ 4. `validated` counts rows that passed validation before the city filter
+    and rental guard (the elastic-widening threshold in tasks.py)
+ 5. The snapshot's property-type breakdown groups by subtype and status
+ 6. Parity: on a committed 300-row fixture, every builder produces exactly
+    the output of the plain-list builders as they were before the pipeline
+    (fixtures/listings_pipeline_parity_expected.json, generated from that
+    code with the same frozen clock) — for a plain list and for the
+    pipeline's buckets (rental guard off, as the old builders had none)
+
+Run with:  pytest tests/test_listing_pipeline.py -v
+"""
+
+import datetime as _dt
+import json
+import os
+import sys
+import types
+import unittest
+from contextlib import ExitStack, contextmanager
+from unittest.mock import patch
+
+# ── Ensure worker source is on the path ───────────────────────────────────────
+WORKER_SRC = os.path.join(
+    os.path.dirname(__file__), "..", "apps", "worker", "src"
+)
+if WORKER_SRC not in sys.path:
+    sys.path.insert(0, WORKER_SRC)
+
+from worker import report_builders  # noqa: E402
+from worker.compute import pipeline  # noqa: E402
+from worker.compute.validate import filter_valid  # noqa: E402
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures")
+FIXED_NOW = _dt.datetime(2026, 3, 15, 12, 0, 0)   # the fixture's dates are relative to this
+CONTEXTS = {
+    "irvine": {"city": "Irvine", "lookback_days": 30},
+    "zip": {"city": "92618", "lookback_days": 30},
+    "market": {"city": "Market", "lookback_days": 90},
+}
+REPORT_TYPES = ("market_snapshot", "new_listings", "inventory", "closed", "price_bands",
+                "open_houses", "new_listings_gallery", "featured_listings")
+
+
+# ── Frozen clock (builders call datetime.now(); some import datetime locally) ─
+
+class _FrozenMeta(type):
+    def __instancecheck__(cls, obj):
+        return isinstance(obj, _dt.datetime)
+
+
+class _FrozenDatetime(_dt.datetime, metaclass=_FrozenMeta):
+    @classmethod
+    def now(cls, tz=None):
+        return FIXED_NOW.replace(tzinfo=tz) if tz else FIXED_NOW
+
+
+@contextmanager
+def frozen_clock():
+    shim = types.ModuleType("datetime")
+    shim.__dict__.update(_dt.__dict__)
+    shim.datetime = _FrozenDatetime
+    with ExitStack() as stack:
+        stack.enter_context(patch.dict(sys.modules, {"datetime": shim}))
+        for name, mod in list(sys.modules.items()):
+            if name.startswith("worker") and getattr(mod, "datetime", None) is _dt.datetime:
+                stack.enter_context(patch.object(mod, "datetime", _FrozenDatetime))
+        yield
+
+
+def load_rows():
+    """Fresh extracted rows (builders may annotate them) with parsed dates."""
+    with open(os.path.join(FIXTURES, "listings_pipeline_parity.json")) as f:
+        rows = json.load(f)
+    for r in rows:
+        for col in ("list_date", "close_date"):
+            if r[col]:
+                r[col] = _dt.datetime.fromisoformat(r[col])
+    return rows
+
+
+def as_json(result):
+    return json.loads(json.dumps(result, sort_keys=True, default=str))
+
+
+def _row(mls_id, status="Active", city="Irvine", price=500_000, subtype="SFR", **extra):
+    return {"mls_id": mls_id, "status": status, "city": city, "list_price": price,
+            "property_subtype": subtype, **extra}
+
+
+class TestCityKey(unittest.TestCase):
+    def test_placeholders_and_zip_mean_no_filter(self):
+        for city in (None, "", "Market", "Unknown", "92618"):
+            self.assertIsNone(pipeline.city_key(city), city)
+
+    def test_city_is_normalized(self):
+        self.assertEqual(pipeline.city_key(" Irvine "), "irvine")
+        self.assertTrue(pipeline.in_city({"city": "IRVINE "}, "irvine"))
+        self.assertFalse(pipeline.in_city({"city": "Tustin"}, "irvine"))
+        self.assertTrue(pipeline.in_city({"city": None}, None))
+
+
+class TestStreamListings(unittest.TestCase):
+    def test_rentals_are_excluded(self):
+        self.assertTrue(pipeline.is_rental({"status": "For Lease"}))
+        self.assertTrue(pipeline.is_rental({"status": "Closed", "close_price": 3_500}))
+        self.assertTrue(pipeline.is_rental({"status": "Active", "list_price": "2500"}))
+        self.assertFalse(pipeline.is_rental({"status": "Active", "list_price": None}))
+        self.assertFalse(pipeline.is_rental({"status": "Active", "list_price": "n/a"}))
+
+        out = pipeline.stream_listings([_row(1), _row(2, price=2_800)], city="Irvine")
+        self.assertEqual([r["mls_id"] for r in out], [1])
+        kept = pipeline.stream_listings([_row(2, price=2_800)], city="Irvine",
+                                        exclude_rentals=False)
+        self.assertEqual(len(kept), 1)
+
+    def test_buckets_by_status_without_copying(self):
+        rows = [_row(1), _row(2, "Pending"), _row(3, "Closed"), _row(4, "Expired"),
+                _row(5, city="Tustin"), _row(6, "Bogus")]
+        out = pipeline.stream_listings(rows, city="Irvine")
+        self.assertEqual([r["mls_id"] for r in out.all], [1, 2, 3, 4])
+        self.assertEqual([r["mls_id"] for r in out.active], [1])
+        self.assertEqual([r["mls_id"] for r in out.pending], [2])
+        self.assertEqual([r["mls_id"] for r in out.closed], [3])
+        self.assertIs(out.active[0], rows[0])
+        self.assertEqual(out[1:3], out.all[1:3])
+
+    def test_validated_counts_before_city_and_rental_filters(self):
+        rows = [_row(1), _row(2, city="Tustin"), _row(3, price=1_000), _row(4, "Bogus")]
+        out = pipeline.stream_listings(iter(rows), city="Irvine")
+        self.assertEqual(len(out), 1)
+        self.assertEqual(out.validated, 3)   # what len(filter_valid(rows)) used to be
+        self.assertEqual(out.validated, len(filter_valid(rows)))
+
+    def test_extract_from_raw(self):
+        raw = [{"mlsId": 7, "listPrice": 600000, "mls": {"status": "Closed"},
+                "address": {"city": "Irvine"}, "sales": {"closePrice": 610000}}]
+        out = pipeline.stream_listings(raw, city="Irvine", extract=True)
+        self.assertEqual([r["mls_id"] for r in out.closed], [7])
+
+
+class TestEnsureBucketed(unittest.TestCase):
+    def test_same_city_reuses_buckets(self):
+        out = pipeline.stream_listings([_row(1), _row(2, "Closed")], city="Irvine")
+        self.assertIs(pipeline.ensure_bucketed(out, " irvine"), out)
+        self.assertIs(pipeline.ensure_bucketed(out, "Market"), out)   # no filter to apply
+
+    def test_different_city_rebuckets(self):
+        out = pipeline.stream_listings([_row(1), _row(2, "Closed"), _row(3, city="Tustin")],
+                                       city=None)
+        tustin = pipeline.ensure_bucketed(out, "Tustin")
+        self.assertIsNot(tustin, out)
+        self.assertEqual(tustin.city, "tustin")
+        self.assertEqual([r["mls_id"] for r in tustin.active], [3])
+        self.assertEqual(tustin.closed, [])
+
+    def test_plain_list_gets_city_filter_only(self):
+        rows = [_row(1), _row(2, price=1_000), _row(3, city="Tustin")]
+        out = pipeline.ensure_bucketed(rows, "Irvine")
+        self.assertEqual([r["mls_id"] for r in out], [1, 2])   # no rental guard here
+
+
+class TestPropertyTypeBreakdown(unittest.TestCase):
+    def test_snapshot_groups_by_subtype_and_status(self):
+        recent = FIXED_NOW - _dt.timedelta(days=5)
+        rows = [
+            _row(1, subtype="SFR"), _row(2, subtype="SFR"),
+            _row(3, "Closed", subtype="SFR", close_price=800_000, close_date=recent),
+            _row(4, "Closed", subtype="Condo", close_price=400_000, close_date=recent),
+            _row(5, "Pending", subtype="Townhome"),
+        ]
+        with frozen_clock():
+            result = report_builders.build_result_json(
+                "market_snapshot", pipeline.stream_listings(rows, city="Irvine"),
+                {"city": "Irvine", "lookback_days": 30})
+        by_type = result["by_property_type"]
+        self.assertEqual(list(by_type), ["SFR", "Condo"])    # Pending-only types are left out
+        self.assertEqual((by_type["SFR"]["count"], by_type["SFR"]["active_count"]), (1, 2))
+        self.assertEqual((by_type["Condo"]["count"], by_type["Condo"]["active_count"]), (1, 0))
+
+
+class TestBuilderParity(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        with open(os.path.join(FIXTURES, "listings_pipeline_parity_expected.json")) as f:
+            cls.expected = json.load(f)
+
+    def _check(self, make_input):
+        for ctx_name, context in CONTEXTS.items():
+            for report_type in REPORT_TYPES:
+                with self.subTest(context=ctx_name, report_type=report_type), frozen_clock():
+                    result = report_builders.build_result_json(
+                        report_type, make_input(context), dict(context))
+                    self.assertEqual(as_json(result), self.expected[ctx_name][report_type])
+
+    def test_plain_list_matches_old_builders(self):
+        self._check(lambda context: filter_valid(load_rows()))
+
+    def test_pipeline_buckets_match_old_builders(self):
+        self._check(lambda context: pipeline.stream_listings(
+            load_rows(), city=context["city"], exclude_rentals=False))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,176 @@
+"""
+Unit tests for the normalized MLS listing store (worker.listing_store).
+
+No database — cursors are fakes that record SQL. Verifies:
+ 1. market_keys: one key per ZIP, else the lowercased city; unkeyable
+    locations give []
+ 2. _where_from_query translates the vendor query semantics (status,
+    location, date window, price/beds/baths, subtype) and refuses queries
+    the store can't answer (unknown keys, non-RES, multi-status)
+ 3. _order_from_query reproduces the vendor sort, refusing unknown sorts
+ 4. load_listings falls back (None) without a DB read for unsupported
+    queries, and applies the query's sort and offset
+ 5. sync_market: a status that hits SYNC_LIMIT_PER_STATUS keeps the old
+    watermark, skips the removal pass and doesn't count as a full sync
+
+Run with:  pytest tests/test_listing_store.py -v
+"""
+
+import os
+import sys
+import unittest
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from unittest.mock import MagicMock, patch
+
+# ── Ensure worker source is on the path ───────────────────────────────────────
+WORKER_SRC = os.path.join(
+    os.path.dirname(__file__), "..", "apps", "worker", "src"
+)
+if WORKER_SRC not in sys.path:
+    sys.path.insert(0, WORKER_SRC)
+
+from worker import listing_store as store  # noqa: E402
+
+
+def _fake_db(fetchone=None, fetchall=()):
+    """db_connection replacement; returns (patcher_target, executed SQL list)."""
+    executed = []
+    cur = MagicMock()
+    cur.execute.side_effect = lambda sql, args=None: executed.append((sql, args))
+    cur.executemany.side_effect = lambda sql, rows: executed.append((sql, rows))
+    cur.fetchone.side_effect = fetchone or (lambda: (1,))
+    cur.fetchall.return_value = list(fetchall)
+    cur.rowcount = 0
+    conn = MagicMock()
+    conn.cursor.return_value.__enter__.return_value = cur
+
+    @contextmanager
+    def db_connection(autocommit=True):
+        yield conn
+
+    return db_connection, executed
+
+
+class TestMarketKeys(unittest.TestCase):
+    def test_zips_take_precedence(self):
+        self.assertEqual(store.market_keys("Irvine", [" 92618", "92620 ", ""]),
+                         ["zip:92618", "zip:92620"])
+
+    def test_city_is_lowercased(self):
+        self.assertEqual(store.market_keys(" Irvine "), ["city:irvine"])
+
+    def test_unkeyable_locations(self):
+        for city in (None, "", "Unknown", "Market", "92618"):
+            self.assertEqual(store.market_keys(city), [])
+
+
+class TestWhereFromQuery(unittest.TestCase):
+    def test_city_status_and_window(self):
+        sql, args = store._where_from_query(
+            {"status": "Closed", "mindate": "2026-01-01", "maxdate": "2026-01-31",
+             "type": "RES", "limit": 1000, "offset": 0},
+            "Irvine", None,
+        )
+        self.assertIn("status = %s", sql)
+        self.assertIn("lower(city) = %s", sql)
+        self.assertIn("GREATEST(list_date, close_date, modified_at) >= %s::date", sql)
+        self.assertIn("LEAST(list_date, close_date, modified_at) < %s::date + 1", sql)
+        self.assertEqual(args, ["Closed", "irvine", "2026-01-01", "2026-01-31"])
+
+    def test_zips_and_filters(self):
+        sql, args = store._where_from_query(
+            {"status": "Active", "postalCodes": "92618", "subtype": "SingleFamilyResidence",
+             "minprice": "500000", "maxprice": 900000, "minbeds": 3, "minbaths": "2"},
+            "Irvine", ["92618"],
+        )
+        self.assertIn("zip_code = ANY(%s)", sql)
+        self.assertNotIn("lower(city)", sql)
+        self.assertEqual(args, ["Active", ["92618"], "SingleFamilyResidence",
+                                500000, 900000, 3, 2])
+
+    def test_unanswerable_queries(self):
+        for query in (
+            {"status": "Active", "cities": "Irvine"},   # unknown key
+            {"status": "Active", "type": "RNT"},        # rentals are never synced
+            {"status": "Active,Pending"},               # multi-status
+            {},                                         # no status
+        ):
+            self.assertIsNone(store._where_from_query(query, "Irvine", None), query)
+
+
+class TestOrderFromQuery(unittest.TestCase):
+    def test_vendor_sorts(self):
+        self.assertEqual(store._order_from_query({"sort": "-closeDate"}),
+                         "close_date DESC NULLS LAST, mls_id")
+        self.assertEqual(store._order_from_query({"sort": "daysOnMarket"}),
+                         "days_on_market ASC NULLS LAST, mls_id")
+
+    def test_default_and_unknown(self):
+        self.assertTrue(store._order_from_query({}).startswith(store._DEFAULT_ORDER))
+        self.assertIsNone(store._order_from_query({"sort": "-lotSize"}))
+
+
+class TestLoadListings(unittest.TestCase):
+    def test_unsupported_query_falls_back_without_db(self):
+        db_connection = MagicMock()
+        with patch.object(store, "db_connection", db_connection):
+            self.assertIsNone(store.load_listings({"status": "Active", "cities": "x"}, "Irvine"))
+            self.assertIsNone(store.load_listings({"status": "Active", "sort": "-lotSize"},
+                                                  "Irvine"))
+        db_connection.assert_not_called()
+
+    def test_sort_and_offset_are_applied(self):
+        db_connection, executed = _fake_db()
+        with patch.object(store, "db_connection", db_connection):
+            rows = store.load_listings(
+                {"status": "Active", "sort": "daysOnMarket", "offset": 500, "limit": 500},
+                "Irvine",
+            )
+        self.assertEqual(rows, [])
+        sql, args = executed[-1]
+        self.assertIn("ORDER BY days_on_market ASC NULLS LAST, mls_id LIMIT %s OFFSET %s", sql)
+        self.assertEqual(args[-2:], (500, 500))
+
+    def test_stale_market_falls_back(self):
+        db_connection, _ = _fake_db(fetchone=lambda: (0,))
+        with patch.object(store, "db_connection", db_connection):
+            self.assertIsNone(store.load_listings({"status": "Active"}, "Irvine"))
+
+
+class TestSyncTruncation(unittest.TestCase):
+    def _sync(self, page_size):
+        watermark = datetime(2026, 1, 1)
+        claim = ("Irvine", None, watermark, datetime.utcnow() - timedelta(days=2),
+                 datetime.utcnow())
+        db_connection, executed = _fake_db(fetchone=lambda: claim)
+
+        def pages(q, limit=None, caller=None):
+            yield [{"mlsId": f"{q['status']}-{i}"} for i in range(page_size)]
+
+        with patch.object(store, "db_connection", db_connection), \
+                patch.object(store, "iter_property_pages", pages), \
+                patch.object(store, "to_store_rows", lambda page: []), \
+                patch.object(store, "SYNC_LIMIT_PER_STATUS", 3):
+            result = store.sync_market("city:irvine")
+        update = next(args for sql, args in executed if "SET watermark" in sql)
+        deleted = any("DELETE FROM mls_listings" in sql for sql, _ in executed)
+        return result, update, deleted, watermark
+
+    def test_full_sync_under_the_cap(self):
+        result, update, deleted, _ = self._sync(page_size=2)
+        self.assertTrue(result["full"])
+        self.assertEqual(result["truncated"], [])
+        self.assertTrue(deleted)
+        self.assertIs(update[1], True)          # last_full_sync_at advances
+
+    def test_capped_full_sync_is_partial(self):
+        result, update, deleted, watermark = self._sync(page_size=3)
+        self.assertEqual(result["truncated"], ["Active", "Pending", "Closed"])
+        self.assertFalse(deleted)               # unseen rows may still be live
+        self.assertIs(update[1], False)         # not counted as a full sync
+        self.assertEqual(update[0], watermark)  # watermark unchanged
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,133 @@
+"""
+Unit tests for per-market metric precomputation (worker.market_metrics).
+
+The listing store and database are patched — verifies:
+ 1. Precompute builds the same result a run would from the same rows, and
+    stores it under the market's store keys with its status counts
+ 2. A market that isn't fresh in the listing store is skipped (no vendor call)
+ 3. precompute_all() computes each distinct scope once: unfiltered schedules
+    get a result, preset schedules a pricing baseline, other filters nothing
+ 4. Runs read only today's, fresh rows
+
+Run with:  pytest tests/test_market_metrics.py -v
+"""
+
+import json
+import os
+import sys
+import unittest
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from unittest.mock import MagicMock, patch
+
+# ── Ensure worker source is on the path ───────────────────────────────────────
+WORKER_SRC = os.path.join(
+    os.path.dirname(__file__), "..", "apps", "worker", "src"
+)
+if WORKER_SRC not in sys.path:
+    sys.path.insert(0, WORKER_SRC)
+
+from worker import market_metrics as mm  # noqa: E402
+from worker.compute.pipeline import stream_listings  # noqa: E402
+from worker.report_builders import build_result_json  # noqa: E402
+
+
+def _row(status, price, days_ago, mls_id):
+    when = datetime.now() - timedelta(days=days_ago)
+    return {
+        "mls_id": mls_id, "status": status, "city": "Irvine", "zip_code": "92618",
+        "list_price": price, "close_price": price if status == "Closed" else None,
+        "list_date": when - timedelta(days=20), "close_date": when if status == "Closed" else None,
+        "days_on_market": 20, "property_type": "RES", "property_subtype": "SFR",
+        "sqft": 2000, "price_per_sqft": price / 2000, "close_to_list_ratio": 99.0,
+        "hero_photo_url": None, "bedrooms": 3, "bathrooms": 2.0, "street_address": "1 Main St",
+    }
+
+
+STORE_ROWS = {
+    "Active": [_row("Active", 1_000_000, 5, "a1"), _row("Active", 1_200_000, 40, "a2")],
+    "Closed": [_row("Closed", 950_000, 10, "c1"), _row("Closed", 1_100_000, 12, "c2")],
+    "Pending": [_row("Pending", 990_000, 3, "p1")],
+}
+
+
+def _fake_load_listings(query, city=None, zips=None, limit=None):
+    return list(STORE_ROWS.get(query.get("status"), []))
+
+
+class TestMarketMetrics(unittest.TestCase):
+    def setUp(self):
+        self.executed = []  # (sql, args) per statement
+        self.fetchone = None
+        self.fetchall = []
+
+        @contextmanager
+        def fake_db_connection(autocommit=False):
+            conn = MagicMock()
+            cur = conn.cursor.return_value.__enter__.return_value
+            cur.execute.side_effect = lambda sql, args=None: self.executed.append((" ".join(sql.split()), args))
+            cur.fetchone.side_effect = lambda: self.fetchone
+            cur.fetchall.side_effect = lambda: self.fetchall
+            yield conn
+
+        for target, value in (
+            ("db_connection", fake_db_connection),
+            ("load_listings", _fake_load_listings),
+            ("MARKET_METRICS_ENABLED", True),
+        ):
+            patcher = patch.object(mm, target, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def _inserts(self):
+        return [args for sql, args in self.executed if sql.startswith("INSERT INTO market_metrics_daily")]
+
+    def test_precompute_matches_a_run(self):
+        self.assertTrue(mm.precompute_result("market_snapshot", "Irvine", None, 30))
+        (args,) = self._inserts()
+        market_key, city_label, report_type, lookback, variant, counts, _metrics, result, n = args
+        self.assertEqual((market_key, city_label, report_type, lookback, variant),
+                         ("city:irvine", "Irvine", "market_snapshot", 30, ""))
+
+        rows = STORE_ROWS["Active"] + STORE_ROWS["Closed"] + STORE_ROWS["Pending"]
+        expected = build_result_json("market_snapshot", stream_listings(rows, city="Irvine"),
+                                     {"city": "Irvine", "lookback_days": 30, "filters": {}})
+        stored = json.loads(result)
+        self.assertEqual(stored["counts"], expected["counts"])
+        self.assertEqual(stored["metrics"], expected["metrics"])
+        self.assertEqual(json.loads(counts), expected["counts"])
+        self.assertEqual(n, 5)
+
+    def test_stale_market_is_skipped(self):
+        with patch.object(mm, "load_listings", return_value=None):
+            self.assertFalse(mm.precompute_result("market_snapshot", "Irvine", None, 30))
+        self.assertEqual(self._inserts(), [])
+
+    def test_precompute_all_dedupes_scopes(self):
+        self.fetchall = [
+            ("market_snapshot", "Irvine", None, 30, {}),
+            ("market_snapshot", "Irvine", None, 30, {}),                           # same scope
+            ("new_listings", "Irvine", None, 30, {"price_strategy": {"mode": "x"}, "subtype": "SingleFamilyResidence"}),
+            ("new_listings", "Irvine", None, 30, {"minbeds": 3}),                  # plain filter
+        ]
+        summary = mm.precompute_all()
+        self.assertEqual(summary, {"ok": True, "computed": 2, "skipped": 0, "failed": 0})
+        kinds = [(args[2], args[4]) for args in self._inserts()]
+        self.assertEqual(kinds, [("market_snapshot", ""), ("market_stats", "SingleFamilyResidence")])
+        self.assertTrue(any(sql.startswith("DELETE FROM market_metrics_daily WHERE metric_date <")
+                            for sql, _ in self.executed))
+
+    def test_reads_only_fresh_rows_for_today(self):
+        self.fetchone = ({"counts": {"Active": 2}},)
+        result = mm.load_result("market_snapshot", "92618", None, ["92618"], 30)
+        self.assertEqual(result, {"counts": {"Active": 2}})
+        sql, args = self.executed[-1]
+        self.assertIn("metric_date = CURRENT_DATE", sql)
+        self.assertIn("computed_at > NOW() - make_interval(secs => %s)", sql)
+        self.assertEqual(args[:5], ("zip:92618", "92618", "market_snapshot", 30, ""))
+
+        self.assertIsNone(mm.load_result("market_snapshot", "Unknown", None, None, 30))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,131 @@
+"""
+Unit tests for the R2 photo proxy (worker.utils.photo_proxy).
+
+No network or R2 — the S3 client and the photo fetch are fakes. Verifies:
+ 1. photo_key is content-addressed on the source URL: the same photo always
+    maps to the same shared object, different photos never collide
+ 2. A photo already in R2 (HEAD hit) is presigned, not downloaded or
+    uploaded again — and a URL shared by several listings is proxied once
+ 3. A failed upload falls back to the original MLS URL
+ 4. Uploads run on a pool bounded by PHOTO_PROXY_CONCURRENCY
+
+Run with:  pytest tests/test_photo_proxy.py -v
+"""
+
+import os
+import sys
+import threading
+import time
+import unittest
+from unittest.mock import patch
+
+from botocore.exceptions import ClientError
+
+# ── Ensure worker source is on the path ───────────────────────────────────────
+WORKER_SRC = os.path.join(
+    os.path.dirname(__file__), "..", "apps", "worker", "src"
+)
+if WORKER_SRC not in sys.path:
+    sys.path.insert(0, WORKER_SRC)
+
+from worker.utils import photo_proxy  # noqa: E402
+
+PHOTO = b"\xff\xd8" + b"\x00" * 4096
+
+
+class _StubS3:
+    """Just enough of a boto3 S3 client: an in-memory bucket."""
+
+    def __init__(self, existing=(), fail_uploads=False, upload_delay=0.0):
+        self.objects = {key: PHOTO for key in existing}
+        self.fail_uploads = fail_uploads
+        self.upload_delay = upload_delay
+        self.uploads = []
+        self.in_flight = self.max_in_flight = 0
+        self._lock = threading.Lock()
+
+    def head_object(self, Bucket, Key):
+        if Key not in self.objects:
+            raise ClientError({"Error": {"Code": "404"}}, "HeadObject")
+        return {"ContentLength": len(self.objects[Key])}
+
+    def upload_fileobj(self, Fileobj, Bucket, Key, ExtraArgs=None):
+        with self._lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            time.sleep(self.upload_delay)
+            if self.fail_uploads:
+                raise ClientError({"Error": {"Code": "500"}}, "PutObject")
+            self.uploads.append(Key)
+            self.objects[Key] = Fileobj.read()
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+    def generate_presigned_url(self, op, Params, ExpiresIn):
+        return f"https://acct.r2.cloudflarestorage.com/{Params['Bucket']}/{Params['Key']}?sig=1"
+
+
+class TestPhotoProxy(unittest.TestCase):
+    def setUp(self):
+        self.fetched = []
+
+        def fake_fetch(url, retry_count=0):
+            self.fetched.append(url)
+            return PHOTO, "image/jpeg", ".jpg"
+
+        for name, value in (("PHOTO_PROXY_ENABLED", True), ("R2_ACCOUNT_ID", "acct"),
+                            ("R2_ACCESS_KEY_ID", "key"), ("R2_SECRET_ACCESS_KEY", "secret"),
+                            ("R2_BUCKET_NAME", "market-reports")):
+            patcher = patch.object(photo_proxy, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        patcher = patch.object(photo_proxy, "fetch_image_bytes", side_effect=fake_fetch)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _run(self, s3, urls):
+        result = {"listings": [{"hero_photo_url": u} for u in urls]}
+        with patch.object(photo_proxy, "_get_r2_client", return_value=s3):
+            photo_proxy.proxy_report_photos_inplace(result, "account-1234", "run-5678")
+        return [listing["hero_photo_url"] for listing in result["listings"]]
+
+    def test_same_photo_same_key(self):
+        a = photo_proxy.photo_key("https://cdn.mls/photos/1.jpg")
+        self.assertEqual(a, photo_proxy.photo_key("https://cdn.mls/photos/1.jpg"))
+        self.assertNotEqual(a, photo_proxy.photo_key("https://cdn.mls/photos/2.jpg"))
+        digest = a.rsplit("/", 1)[1]
+        self.assertEqual(a, f"{photo_proxy.SHARED_PREFIX}/{digest[:2]}/{digest}")
+
+        # Two runs (and accounts) land on the same object
+        s3 = _StubS3()
+        first = self._run(s3, ["https://cdn.mls/photos/1.jpg"])
+        second = self._run(s3, ["https://cdn.mls/photos/1.jpg"])
+        self.assertEqual(first, second)
+        self.assertEqual(s3.uploads, [a])
+
+    def test_existing_object_not_uploaded_again(self):
+        url = "https://cdn.mls/photos/1.jpg"
+        s3 = _StubS3(existing=[photo_proxy.photo_key(url)])
+        urls = self._run(s3, [url, url, "https://cdn.mls/photos/2.jpg"])
+
+        self.assertTrue(all("r2.cloudflarestorage.com" in u for u in urls))
+        self.assertEqual(urls[0], urls[1])
+        self.assertEqual(self.fetched, ["https://cdn.mls/photos/2.jpg"])
+        self.assertEqual(s3.uploads, [photo_proxy.photo_key("https://cdn.mls/photos/2.jpg")])
+
+    def test_failed_upload_keeps_original_url(self):
+        urls = ["https://cdn.mls/photos/1.jpg", "https://cdn.mls/photos/2.jpg"]
+        self.assertEqual(self._run(_StubS3(fail_uploads=True), urls), urls)
+
+    def test_upload_pool_is_bounded(self):
+        s3 = _StubS3(upload_delay=0.05)
+        with patch.object(photo_proxy, "CONCURRENCY", 2):
+            self._run(s3, [f"https://cdn.mls/photos/{i}.jpg" for i in range(6)])
+        self.assertEqual(len(s3.uploads), 6)
+        self.assertEqual(s3.max_in_flight, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
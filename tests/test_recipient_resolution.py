@@ -0,0 +1,107 @@
+"""
+Unit tests for set-based recipient resolution (worker.email.recipients).
+
+The cursor is a fake that answers by table — verifies:
+ 1. A schedule with a 300-member group resolves in a fixed number of queries
+ 2. Contacts, sponsored agents (sponsorship checked), groups and manual
+    emails resolve in recipient order, deduplicated
+ 3. Suppressed addresses are split out in the same pass
+ 4. Invalid ids and foreign groups are skipped, not fatal
+
+Run with:  pytest tests/test_recipient_resolution.py -v
+"""
+
+import json
+import os
+import sys
+import unittest
+import uuid
+
+# ── Ensure worker source is on the path ───────────────────────────────────────
+WORKER_SRC = os.path.join(
+    os.path.dirname(__file__), "..", "apps", "worker", "src"
+)
+if WORKER_SRC not in sys.path:
+    sys.path.insert(0, WORKER_SRC)
+
+from worker.email.recipients import resolve_recipients  # noqa: E402
+
+ACCOUNT = str(uuid.uuid4())
+GROUP = str(uuid.uuid4())
+AGENT = str(uuid.uuid4())
+UNSPONSORED = str(uuid.uuid4())
+CONTACTS = {str(uuid.uuid4()): f"c{i}@example.com" for i in range(300)}
+FIRST_CONTACT = next(iter(CONTACTS))
+
+
+class FakeCursor:
+    def __init__(self, suppressed=()):
+        self.queries = []
+        self.suppressed = set(suppressed)
+        self._rows = []
+
+    def execute(self, sql, args=None):
+        self.queries.append(sql)
+        if "FROM contact_groups" in sql:
+            ids, _acct = args
+            members = [(GROUP, "contact", cid) for cid in CONTACTS]
+            members.append((GROUP, "sponsored_agent", AGENT))
+            self._rows = members if GROUP in ids else []
+        elif "FROM contacts" in sql:
+            self._rows = [(cid, CONTACTS[cid]) for cid in args[0] if cid in CONTACTS]
+        elif "FROM accounts" in sql:
+            self._rows = [(AGENT, "agent@example.com")] if AGENT in args[0] else []
+        elif "FROM email_suppressions" in sql:
+            self._rows = [(e,) for e in args[1] if e in self.suppressed]
+        else:
+            raise AssertionError(f"unexpected query: {sql}")
+
+    def fetchall(self):
+        return self._rows
+
+
+def _typed(kind, **fields):
+    return json.dumps({"type": kind, **fields})
+
+
+class TestResolveRecipients(unittest.TestCase):
+    def test_large_group_uses_a_fixed_number_of_queries(self):
+        cur = FakeCursor()
+        emails, suppressed = resolve_recipients(cur, ACCOUNT, [_typed("group", id=GROUP)])
+        self.assertEqual(len(emails), 301)
+        self.assertEqual(suppressed, [])
+        self.assertEqual(len(cur.queries), 4)  # groups, contacts, agents, suppressions
+
+    def test_mixed_recipients_in_order_and_deduplicated(self):
+        cur = FakeCursor()
+        emails, _ = resolve_recipients(cur, ACCOUNT, [
+            "legacy@example.com",
+            _typed("sponsored_agent", id=AGENT),
+            _typed("sponsored_agent", id=UNSPONSORED),      # not ours
+            _typed("contact", id=FIRST_CONTACT),
+            _typed("manual_email", email="legacy@example.com"),
+        ])
+        self.assertEqual(emails, ["legacy@example.com", "agent@example.com", "c0@example.com"])
+
+    def test_suppressed_are_split_out(self):
+        cur = FakeCursor(suppressed={"c0@example.com"})
+        emails, suppressed = resolve_recipients(cur, ACCOUNT, [
+            _typed("contact", id=FIRST_CONTACT), "ok@example.com",
+        ])
+        self.assertEqual(emails, ["ok@example.com"])
+        self.assertEqual(suppressed, ["c0@example.com"])
+
+    def test_bad_ids_and_foreign_groups_are_skipped(self):
+        cur = FakeCursor()
+        emails, _ = resolve_recipients(cur, ACCOUNT, [
+            _typed("contact", id="not-a-uuid"),
+            _typed("group", id=str(uuid.uuid4())),
+            _typed("carrier_pigeon", id="x"),
+            "{broken json but@example.com",
+        ])
+        self.assertEqual(emails, ["{broken json but@example.com"])
+        self.assertFalse(any("FROM contacts" in q for q in cur.queries))
+
+
+if __name__ == "__main__":
+    unittest.main()
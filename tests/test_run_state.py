@@ -0,0 +1,159 @@
+"""
+Unit tests for generate_report's batched run-state writes (worker.run_state).
+
+db_conn is patched with a recording cursor — verifies:
+ 1. Every ReportRunState method is one connection, RLS-scoped to the run's
+    account, and (fail() aside) exactly one statement
+ 2. result_json is staged in memory and written with the completed status
+    (or kept by fail())
+ 3. Scheduled runs close out schedule_runs + schedules in one CTE, and only
+    touch the schedule_run when its status is known
+ 4. fail() updates schedule_runs in its own savepoint: an error there is
+    swallowed and can't roll back the run's 'failed' status
+
+Run with:  pytest tests/test_run_state.py -v
+"""
+
+import json
+import os
+import sys
+import unittest
+from contextlib import contextmanager
+from unittest.mock import MagicMock, patch
+
+# ── Ensure worker source is on the path ───────────────────────────────────────
+WORKER_SRC = os.path.join(
+    os.path.dirname(__file__), "..", "apps", "worker", "src"
+)
+if WORKER_SRC not in sys.path:
+    sys.path.insert(0, WORKER_SRC)
+
+from worker import run_state as run_state_mod  # noqa: E402
+from worker.run_state import ReportRunState  # noqa: E402
+
+
+class TestReportRunState(unittest.TestCase):
+    def setUp(self):
+        self.checkouts = []  # (account_id, cursor) per db_conn()
+        self.fetchone = None
+        self.savepoints = []  # "released" / "rolled back" per conn.transaction()
+
+        @contextmanager
+        def savepoint():
+            try:
+                yield
+            except Exception:
+                self.savepoints.append("rolled back")
+                raise
+            self.savepoints.append("released")
+
+        @contextmanager
+        def fake_db_conn(account_id=None, autocommit=False):
+            cur = MagicMock()
+            cur.fetchone.return_value = self.fetchone
+            conn = MagicMock()
+            conn.transaction.side_effect = savepoint
+            self.checkouts.append((account_id, cur))
+            yield conn, cur
+
+        patcher = patch.object(run_state_mod, "db_conn", fake_db_conn)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _db_conn_with(self, execute):
+        fake_db_conn = run_state_mod.db_conn
+
+        @contextmanager
+        def wrapped(account_id=None, autocommit=False):
+            with fake_db_conn(account_id, autocommit) as (conn, cur):
+                cur.execute.side_effect = execute
+                yield conn, cur
+        return wrapped
+
+    def _statements(self):
+        _, cur = self.checkouts[-1]
+        return [(" ".join(c.args[0].split()), c.args[1]) for c in cur.execute.call_args_list]
+
+    def _only_statement(self):
+        self.assertEqual(len(self.checkouts), 1)
+        account_id, cur = self.checkouts[0]
+        self.assertEqual(account_id, "acct-1")
+        self.assertEqual(cur.execute.call_count, 1)
+        sql, args = cur.execute.call_args.args
+        return " ".join(sql.split()), args
+
+    def test_start_returns_theme(self):
+        self.fetchone = (4, "#123456")
+        state = ReportRunState("run-1", "acct-1")
+        self.assertEqual(state.start({"city": "Irvine"}), (4, "#123456"))
+        sql, args = self._only_statement()
+        self.assertIn("SET status='processing'", sql)
+        self.assertIn("RETURNING theme_id, accent_color", sql)
+        self.assertEqual(json.loads(args[0]), {"city": "Irvine"})
+
+    def test_result_json_written_with_completion(self):
+        state = ReportRunState("run-1", "acct-1")
+        state.set_result({"counts": {"Active": 3}})
+        self.assertEqual(self.checkouts, [])  # staged only
+
+        state.complete("html", "json", "pdf", 1234)
+        sql, args = self._only_statement()
+        self.assertIn("status='completed'", sql)
+        self.assertIn("result_json=COALESCE(%s::jsonb, result_json)", sql)
+        self.assertEqual(json.loads(args[0]), {"counts": {"Active": 3}})
+        self.assertEqual(args[1:], ("html", "json", "pdf", 1234, "run-1"))
+
+    def test_finish_schedule_is_one_cte(self):
+        state = ReportRunState("run-1", "acct-1", schedule_id="sched-1")
+        state.finish_schedule("completed")
+        sql, args = self._only_statement()
+        self.assertTrue(sql.startswith("WITH run AS ( UPDATE schedule_runs"))
+        self.assertIn("UPDATE schedules SET consecutive_failures = 0", sql)
+        self.assertEqual(args, ("completed", "run-1", "sched-1", "sched-1"))
+
+    def test_finish_schedule_without_status_only_resets(self):
+        state = ReportRunState("run-1", "acct-1", schedule_id="sched-1")
+        state.finish_schedule(None)
+        sql, _ = self._only_statement()
+        self.assertNotIn("schedule_runs", sql)
+
+    def test_fail_keeps_staged_result_and_counts_failures(self):
+        self.fetchone = (3,)
+        state = ReportRunState("run-1", "acct-1", schedule_id="sched-1")
+        state.set_result({"partial": True})
+        self.assertEqual(state.fail("boom"), 3)
+        self.assertEqual(len(self.checkouts), 1)
+        (sql, args), (sr_sql, sr_args) = self._statements()
+        self.assertIn("UPDATE report_generations", sql)
+        self.assertIn("consecutive_failures = consecutive_failures + 1", sql)
+        self.assertNotIn("schedule_runs", sql)
+        self.assertEqual(json.loads(args[1]), {"partial": True})
+        self.assertIn(run_state_mod.AUTO_PAUSE_FAILURES, args)
+        self.assertIn("UPDATE schedule_runs SET status = 'failed'", sr_sql)
+        self.assertEqual(sr_args, ("boom", "run-1"))
+        self.assertEqual(self.savepoints, ["released"])
+
+    def test_fail_survives_schedule_runs_error(self):
+        self.fetchone = (1,)
+        state = ReportRunState("run-1", "acct-1", schedule_id="sched-1")
+
+        def execute(sql, args=None):
+            if "schedule_runs" in sql:
+                raise RuntimeError("schedule_runs is locked")
+
+        with patch.object(run_state_mod, "db_conn", self._db_conn_with(execute)):
+            self.assertEqual(state.fail("boom"), 1)   # no exception escapes
+        self.assertEqual(self.savepoints, ["rolled back"])
+        sql, _ = self._statements()[0]
+        self.assertIn("SET status='failed'", sql)   # ran first, outside the savepoint
+
+    def test_fail_unscheduled_run(self):
+        state = ReportRunState("run-1", "acct-1")
+        self.assertIsNone(state.fail("boom"))
+        sql, args = self._only_statement()
+        self.assertNotIn("schedules", sql)
+        self.assertEqual(args, ("boom", None, "run-1"))
+
+
+if __name__ == "__main__":
+    unittest.main()
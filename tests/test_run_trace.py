@@ -0,0 +1,109 @@
+"""
+Unit tests for report-run stage timing (worker.tracing).
+
+db_conn is patched with a recording cursor — verifies:
+ 1. Nested spans are stored as dotted paths with their parent and depth
+ 2. An exception marks the span failed and still propagates
+ 3. _load_extracted_many timings become child spans of data_fetch
+ 4. flush() writes pending spans in one executemany, once, and never raises
+
+Run with:  pytest tests/test_run_trace.py -v
+"""
+
+import json
+import os
+import sys
+import unittest
+from contextlib import contextmanager
+from unittest.mock import MagicMock, patch
+
+# ── Ensure worker source is on the path ───────────────────────────────────────
+WORKER_SRC = os.path.join(
+    os.path.dirname(__file__), "..", "apps", "worker", "src"
+)
+if WORKER_SRC not in sys.path:
+    sys.path.insert(0, WORKER_SRC)
+
+from worker import tracing as tracing_mod  # noqa: E402
+from worker.tracing import RunTrace  # noqa: E402
+
+
+class TestRunTrace(unittest.TestCase):
+    def setUp(self):
+        self.checkouts = []  # (account_id, cursor) per db_conn()
+        self.fail_with = None
+
+        @contextmanager
+        def fake_db_conn(account_id=None, autocommit=False):
+            if self.fail_with:
+                raise self.fail_with
+            cur = MagicMock()
+            self.checkouts.append((account_id, cur))
+            yield MagicMock(), cur
+
+        for target, value in (("db_conn", fake_db_conn), ("REPORT_STAGE_TRACING_ENABLED", True)):
+            patcher = patch.object(tracing_mod, target, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_nested_spans(self):
+        trace = RunTrace("run-1", "acct-1", "market_snapshot")
+        with trace.span("data_fetch"):
+            with trace.span("closed", count=3) as detail:
+                detail["source"] = "simplyrets"
+        by_stage = {s["stage"]: s for s in trace.spans}
+        self.assertEqual(set(by_stage), {"data_fetch", "data_fetch.closed"})
+        child = by_stage["data_fetch.closed"]
+        self.assertEqual(child["parent_stage"], "data_fetch")
+        self.assertEqual(child["depth"], 1)
+        self.assertEqual(child["detail"], {"count": 3, "source": "simplyrets"})
+        self.assertIsNone(by_stage["data_fetch"]["parent_stage"])
+
+    def test_exception_marks_span_failed(self):
+        trace = RunTrace("run-1", "acct-1")
+        with self.assertRaises(RuntimeError):
+            with trace.span("pdf_render"):
+                raise RuntimeError("boom")
+        self.assertFalse(trace.spans[0]["ok"])
+        with trace.span("email"):
+            pass
+        self.assertEqual(trace.spans[1]["stage"], "email")  # stack unwound
+
+    def test_fetch_timings_and_durations(self):
+        trace = RunTrace("run-1", "acct-1")
+        for _ in range(2):
+            with trace.span("data_fetch"):
+                trace.record_fetch_timings({
+                    "active": {"source": "cache", "ms": 12, "count": 40},
+                    "closed": {"source": "simplyrets", "ms": 250, "count": 90},
+                })
+        durations = trace.durations()
+        self.assertEqual(durations["data_fetch.closed"], 500)
+        self.assertEqual(durations["data_fetch.active"], 24)
+        self.assertEqual(trace.summary().split("=")[0], "data_fetch")
+
+    def test_flush_writes_pending_once(self):
+        trace = RunTrace("run-1", "acct-1", "market_snapshot")
+        with trace.span("build", listings=5):
+            pass
+        trace.flush()
+        trace.flush()  # nothing new
+        self.assertEqual(len(self.checkouts), 1)
+        account_id, cur = self.checkouts[0]
+        self.assertEqual(account_id, "acct-1")
+        sql, rows = cur.executemany.call_args.args
+        self.assertIn("INSERT INTO report_generation_stages", sql)
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0][:4], ("run-1", "acct-1", "market_snapshot", "build"))
+        self.assertEqual(json.loads(rows[0][-1]), {"listings": 5})
+
+    def test_flush_never_raises(self):
+        self.fail_with = Exception("connection refused")
+        trace = RunTrace("run-1", "acct-1")
+        with trace.span("limit_check"):
+            pass
+        trace.flush()  # logged, not raised
+
+
+if __name__ == "__main__":
+    unittest.main()
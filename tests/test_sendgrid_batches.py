@@ -0,0 +1,80 @@
+"""
+Unit tests for batched SendGrid delivery (worker.email.providers.sendgrid).
+
+The pooled HTTP client is a mock — verifies:
+ 1. Recipients are split into batches with one personalization each, and
+    per-recipient substitutions (unsubscribe links) are attached
+ 2. Only batches that failed transiently are retried
+ 3. A non-retryable batch failure is reported without retrying it
+ 4. Batch outcomes summarize to one (status, text) for the run
+
+Run with:  pytest tests/test_sendgrid_batches.py -v
+"""
+
+import os
+import sys
+import unittest
+from unittest.mock import MagicMock, patch
+
+# ── Ensure worker source is on the path ───────────────────────────────────────
+WORKER_SRC = os.path.join(
+    os.path.dirname(__file__), "..", "apps", "worker", "src"
+)
+if WORKER_SRC not in sys.path:
+    sys.path.insert(0, WORKER_SRC)
+
+from worker.email import send  # noqa: E402
+from worker.email.providers import sendgrid  # noqa: E402
+
+
+def _response(status, text="", message_id=None):
+    return MagicMock(status_code=status, text=text,
+                     headers={"X-Message-Id": message_id} if message_id else {})
+
+
+class TestSendGridBatches(unittest.TestCase):
+    def setUp(self):
+        self.client = MagicMock()
+        for target, value in (
+            ("SENDGRID_API_KEY", "test-key"),
+            ("_get_client", lambda: self.client),
+            ("_backoff", lambda attempt: None),
+        ):
+            patcher = patch.object(sendgrid, target, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def _payloads(self):
+        return [c.kwargs["json"] for c in self.client.post.call_args_list]
+
+    def test_one_personalization_per_recipient(self):
+        self.client.post.return_value = _response(202, message_id="m1")
+        emails = [f"r{i}@example.com" for i in range(5)]
+        results = sendgrid.send_email_batched(
+            emails, "Subject", "<a href='-u-'>x</a>", batch_size=2,
+            substitutions=lambda email: {"-u-": f"https://unsub/{email}"},
+        )
+        self.assertEqual([r.recipients for r in results],
+                         [emails[:2], emails[2:4], emails[4:]])
+        first = self._payloads()[0]["personalizations"]
+        self.assertEqual(first[0], {"to": [{"email": "r0@example.com"}], "subject": "Subject",
+                                    "substitutions": {"-u-": "https://unsub/r0@example.com"}})
+        self.assertTrue(all(r.status_code == 202 and r.message_id == "m1" for r in results))
+
+    def test_only_failed_batches_are_retried(self):
+        self.client.post.side_effect = [_response(202), _response(429, "slow down"), _response(202)]
+        results = sendgrid.send_email_batched(["a@x.com", "b@x.com"], "S", "<p/>", batch_size=1)
+        self.assertEqual([(r.status_code, r.attempts) for r in results], [(202, 1), (202, 2)])
+        retried = self._payloads()[2]["personalizations"][0]["to"]
+        self.assertEqual(retried, [{"email": "b@x.com"}])
+
+    def test_permanent_failure_is_not_retried(self):
+        self.client.post.side_effect = [_response(400, "bad address"), _response(202)]
+        results = sendgrid.send_email_batched(["a@x.com", "b@x.com"], "S", "<p/>", batch_size=1)
+        self.assertEqual([r.status_code for r in results], [400, 202])
+        self.assertEqual(self.client.post.call_count, 2)
+        self.assertEqual(send.summarize_batches(results), (400, "1 of 2 batches failed: bad address"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,76 @@
+"""
+Unit tests for SimplyRETS multi-query fetching (worker.vendors.simplyrets).
+
+No network — iter_property_pages / the HTTP client are fakes. Verifies:
+ 1. fetch_many returns per-query rows and timings, applying page_transform
+ 2. The timeout is a real deadline: fetch_many raises TimeoutError on time
+    instead of waiting for a hung query, and the query starts no new requests
+ 3. No request (or limiter token) is spent once the deadline has passed
+
+Run with:  pytest tests/test_simplyrets_fetch_many.py -v
+"""
+
+import os
+import sys
+import time
+import unittest
+from unittest.mock import MagicMock, patch
+
+# ── Ensure worker source is on the path ───────────────────────────────────────
+WORKER_SRC = os.path.join(
+    os.path.dirname(__file__), "..", "apps", "worker", "src"
+)
+if WORKER_SRC not in sys.path:
+    sys.path.insert(0, WORKER_SRC)
+
+from worker.vendors import simplyrets as sr  # noqa: E402
+
+
+def _pages(pages_by_q, delay=0.0, started=None):
+    def fake(params, limit=None, *, account_id=None, caller=None, concurrency=None, deadline=None):
+        for page in pages_by_q[params["q"]]:
+            sr._check_deadline(deadline)
+            if started is not None:
+                started.append(params["q"])
+            time.sleep(delay)
+            yield page
+    return fake
+
+
+class TestFetchMany(unittest.TestCase):
+    def test_results_and_timings_per_query(self):
+        pages = {"a": [[{"id": 1}, {"id": 2}], [{"id": 3}]], "b": [[{"id": 9}]]}
+        with patch.object(sr, "iter_property_pages", _pages(pages)):
+            results, timings = sr.fetch_many(
+                {"active": ({"q": "a"}, 2), "closed": ({"q": "b"}, None)},
+                page_transform=lambda page: [r["id"] for r in page],
+            )
+        self.assertEqual(results, {"active": [1, 2], "closed": [9]})
+        self.assertEqual(timings["active"]["count"], 2)
+        self.assertIn("ms", timings["closed"])
+
+    def test_timeout_is_a_real_deadline(self):
+        started = []
+        pages = {"slow": [[{"id": i}] for i in range(50)], "fast": [[{"id": 0}]]}
+        with patch.object(sr, "iter_property_pages", _pages(pages, delay=0.1, started=started)):
+            t0 = time.monotonic()
+            with self.assertRaises(TimeoutError):
+                sr.fetch_many({"slow": ({"q": "slow"}, None), "fast": ({"q": "fast"}, None)},
+                              timeout=0.3)
+            self.assertLess(time.monotonic() - t0, 1.0)
+            # The straggler stops at its next page instead of running on
+            time.sleep(0.3)
+            self.assertLess(started.count("slow"), 6)
+
+    def test_no_request_after_the_deadline(self):
+        client = MagicMock()
+        with patch.object(sr, "_limiter") as limiter:
+            with self.assertRaises(TimeoutError):
+                sr._request_with_retries(client, "/properties", {},
+                                         deadline=time.monotonic() - 1)
+        limiter.acquire.assert_not_called()
+        client.get.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()
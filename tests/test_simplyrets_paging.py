@@ -0,0 +1,107 @@
+"""
+Unit tests for SimplyRETS paging (worker.vendors.simplyrets.iter_property_pages).
+
+No network — the HTTP client and rate limiter are fakes. Verifies:
+ 1. Pages are yielded in offset order even when later pages land first
+ 2. With X-Total-Count, follow-up pages stop at the total (last page sized
+    to the remainder) instead of probing empty offsets
+ 3. A page still in flight at the deadline is dropped with TimeoutError
+    rather than blocking the caller
+
+Run with:  pytest tests/test_simplyrets_paging.py -v
+"""
+
+import os
+import sys
+import threading
+import time
+import unittest
+from unittest.mock import patch
+
+# ── Ensure worker source is on the path ───────────────────────────────────────
+WORKER_SRC = os.path.join(
+    os.path.dirname(__file__), "..", "apps", "worker", "src"
+)
+if WORKER_SRC not in sys.path:
+    sys.path.insert(0, WORKER_SRC)
+
+from worker.vendors import simplyrets as sr  # noqa: E402
+
+
+class _FakeResponse:
+    def __init__(self, rows, total=None):
+        self.status_code = 200
+        self._rows = rows
+        self.headers = {} if total is None else {"X-Total-Count": str(total)}
+
+    def json(self):
+        return self._rows
+
+    def raise_for_status(self):
+        pass
+
+
+class _FakeClient:
+    """Serves `total` rows as {"id": n}; later offsets answer sooner."""
+
+    def __init__(self, total, send_total=True, hang_offsets=()):
+        self.total = total
+        self.send_total = send_total
+        self.hang_offsets = set(hang_offsets)
+        self.release = threading.Event()
+        self.requests = []
+        self._lock = threading.Lock()
+
+    def get(self, path, params):
+        offset, size = params["offset"], params["limit"]
+        with self._lock:
+            self.requests.append((offset, size))
+        if offset in self.hang_offsets:
+            self.release.wait(5)
+        elif offset:
+            time.sleep(max(0.0, 0.05 - offset / 50_000))
+        rows = [{"id": n} for n in range(offset, min(offset + size, self.total))]
+        return _FakeResponse(rows, self.total if self.send_total else None)
+
+
+def _pages(client, params=None, **kwargs):
+    with patch.object(sr, "_client", return_value=client), patch.object(sr, "_limiter"):
+        return list(sr.iter_property_pages(params or {"q": "x"}, **kwargs))
+
+
+class TestIterPropertyPages(unittest.TestCase):
+    def test_pages_in_offset_order(self):
+        client = _FakeClient(total=1900)
+        pages = _pages(client, limit=5000, concurrency=3)
+        self.assertEqual([p[0]["id"] for p in pages], [0, 500, 1000, 1500])
+        self.assertEqual([r["id"] for p in pages for r in p], list(range(1900)))
+        self.assertEqual(client.requests[0], (0, 500))   # the first page goes out alone
+
+    def test_stops_at_total_count(self):
+        client = _FakeClient(total=1200)
+        pages = _pages(client, limit=5000)
+        self.assertEqual(sum(len(p) for p in pages), 1200)
+        self.assertEqual(sorted(client.requests), [(0, 500), (500, 500), (1000, 200)])
+
+    def test_without_total_count_stops_at_first_short_page(self):
+        client = _FakeClient(total=1200, send_total=False)
+        pages = _pages(client, limit=5000, concurrency=2)
+        self.assertEqual(sum(len(p) for p in pages), 1200)
+        self.assertEqual(sorted(o for o, _ in client.requests), [0, 500, 1000])
+
+    def test_page_past_deadline_is_dropped(self):
+        client = _FakeClient(total=1500, hang_offsets={500})
+        self.addCleanup(client.release.set)
+        seen = []
+        t0 = time.monotonic()
+        with patch.object(sr, "_client", return_value=client), patch.object(sr, "_limiter"):
+            with self.assertRaises(TimeoutError):
+                for page in sr.iter_property_pages({"q": "x"}, limit=5000,
+                                                   deadline=time.monotonic() + 0.3):
+                    seen.append(page[0]["id"])
+        self.assertLess(time.monotonic() - t0, 1.0)
+        self.assertEqual(seen, [0])     # nothing after the hung page is yielded
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,128 @@
+"""
+Unit tests for the comp-search SpatialIndex (worker.compute.spatial).
+
+Verifies:
+ 1. within() / nearest() return exactly what a brute-force haversine scan
+    over every item returns (same items, same order, ties by input order)
+ 2. The NumPy and pure-Python paths agree
+ 3. Items without (non-zero) coordinates are never returned
+ 4. The API copy (api/services/spatial.py) is identical to the worker's
+
+Run with:  pytest tests/test_spatial_index.py -v
+"""
+
+import os
+import random
+import sys
+import unittest
+from unittest.mock import patch
+
+# ── Ensure worker source is on the path ───────────────────────────────────────
+WORKER_SRC = os.path.join(
+    os.path.dirname(__file__), "..", "apps", "worker", "src"
+)
+if WORKER_SRC not in sys.path:
+    sys.path.insert(0, WORKER_SRC)
+
+from worker.compute import spatial as spatial_mod  # noqa: E402
+from worker.compute.spatial import SpatialIndex, haversine_miles, listing_coords  # noqa: E402
+
+SUBJECT = (34.1008, -117.7678)  # La Verne, CA
+
+
+def _listings(n=2000, seed=7):
+    rng = random.Random(seed)
+    rows = []
+    for i in range(n):
+        # ~county-sized spread around the subject
+        rows.append({"mlsId": i, "geo": {
+            "lat": SUBJECT[0] + rng.uniform(-0.6, 0.6),
+            "lng": SUBJECT[1] + rng.uniform(-0.6, 0.6),
+        }})
+    rows[5]["geo"] = {"lat": None, "lng": -117.7}
+    rows[9]["geo"] = {"lat": 0, "lng": 0}
+    rows[11]["geo"] = {}
+    rows[12]["geo"] = dict(rows[13]["geo"])  # exact tie with 13
+    return rows
+
+
+def _brute(rows, radius=None):
+    out = []
+    for pos, row in enumerate(rows):
+        c = listing_coords(row)
+        if c is None:
+            continue
+        d = haversine_miles(SUBJECT[0], SUBJECT[1], *c)
+        if radius is None or d <= radius:
+            out.append((pos, d))
+    out.sort(key=lambda p: (p[1], p[0]))
+    return out
+
+
+class _SpatialCases:
+    def assertHits(self, got, want):
+        self.assertEqual([p for p, _ in got], [p for p, _ in want])
+        for (_, a), (_, b) in zip(got, want):
+            self.assertAlmostEqual(a, b, places=9)
+
+    def test_within_matches_brute_force(self):
+        rows = _listings()
+        index = SpatialIndex(rows)
+        for radius in (0.25, 1.0, 3.0, 12.5, 500.0):
+            self.assertHits(index.within(*SUBJECT, radius), _brute(rows, radius))
+
+    def test_nearest_matches_brute_force(self):
+        rows = _listings()
+        index = SpatialIndex(rows)
+        for k in (1, 15, 300, 5000):
+            self.assertHits(index.nearest(*SUBJECT, k=k), _brute(rows)[:k])
+        self.assertHits(index.nearest(*SUBJECT, k=50, max_radius=1.0), _brute(rows, 1.0)[:50])
+
+    def test_ties_keep_input_order(self):
+        rows = _listings()
+        hits = [p for p, _ in SpatialIndex(rows).within(*SUBJECT, 500.0)]
+        self.assertLess(hits.index(12), hits.index(13))
+
+    def test_unlocated_are_never_returned(self):
+        rows = _listings()
+        index = SpatialIndex(rows)
+        self.assertEqual(index.unlocated, [5, 9, 11])
+        self.assertEqual(index.located, len(rows) - 3)
+        returned = {p for p, _ in index.within(*SUBJECT, 10_000.0)}
+        self.assertFalse(returned & {5, 9, 11})
+        dists = index.distances(*SUBJECT)
+        self.assertIsNone(dists[5])
+        self.assertIsInstance(dists[0], float)
+
+    def test_empty_index(self):
+        index = SpatialIndex([{"geo": {}}])
+        self.assertEqual(index.within(*SUBJECT, 5.0), [])
+        self.assertEqual(index.nearest(*SUBJECT, k=3), [])
+
+
+@unittest.skipIf(spatial_mod.np is None, "numpy not installed")
+class TestSpatialIndexNumpy(_SpatialCases, unittest.TestCase):
+    pass
+
+
+class TestSpatialIndexPurePython(_SpatialCases, unittest.TestCase):
+    def setUp(self):
+        patcher = patch.object(spatial_mod, "np", None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+
+class TestApiCopyInSync(unittest.TestCase):
+    def test_api_copy_matches_worker_module(self):
+        root = os.path.join(os.path.dirname(__file__), "..", "apps")
+        with open(os.path.join(root, "worker", "src", "worker", "compute", "spatial.py")) as f:
+            worker_src = f.read()
+        with open(os.path.join(root, "api", "src", "api", "services", "spatial.py")) as f:
+            api_src = f.read()
+        # Only the "which copy is this" docstring paragraph may differ
+        strip = lambda src: src[src.index("NumPy is a dependency"):]  # noqa: E731
+        self.assertEqual(strip(worker_src), strip(api_src))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,102 @@
+"""
+Unit tests for the shared Jinja2 environments (worker.template_env).
+
+Template roots and the bytecode cache point at temp dirs. Verifies:
+ 1. get_environment returns the same Environment for repeated calls with
+    the same root name, and a separate one per root
+ 2. warmup compiles every template in the root, so a later get_template is
+    served from the cache without compiling again
+ 3. A fresh process (new Environment) loads the warmed templates from the
+    bytecode cache instead of compiling them
+ 4. Warmup also compiles the real market/property template trees
+
+Run with:  pytest tests/test_template_env.py -v
+"""
+
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+# ── Ensure worker source is on the path ───────────────────────────────────────
+WORKER_SRC = os.path.join(
+    os.path.dirname(__file__), "..", "apps", "worker", "src"
+)
+if WORKER_SRC not in sys.path:
+    sys.path.insert(0, WORKER_SRC)
+
+from worker import template_env  # noqa: E402
+
+TEMPLATES = {
+    "_base/base.jinja2": "<html>{% block body %}{% endblock %}</html>",
+    "market.jinja2": "{% extends '_base/base.jinja2' %}{% block body %}{{ price | format_currency }}{% endblock %}",
+    "macros.html": "{% macro stat(v) %}<b>{{ v }}</b>{% endmacro %}",
+}
+
+
+class TestTemplateEnv(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        root = Path(tmp.name) / "market"
+        for name, source in TEMPLATES.items():
+            (root / name).parent.mkdir(parents=True, exist_ok=True)
+            (root / name).write_text(source)
+        (Path(tmp.name) / "property").mkdir()
+
+        for patcher in (
+            patch.object(template_env, "TEMPLATE_ROOTS",
+                         {"market": root, "property": Path(tmp.name) / "property"}),
+            patch.object(template_env, "JINJA_BYTECODE_CACHE_DIR", os.path.join(tmp.name, "bcc")),
+            patch.object(template_env, "TEMPLATE_WARMUP_ENABLED", True),
+            patch.dict(template_env._envs, clear=True),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def _count_compiles(self, env):
+        return patch.object(env, "compile", wraps=env.compile)
+
+    def test_same_environment_per_root(self):
+        env = template_env.get_environment("market")
+        self.assertIs(template_env.get_environment("market"), env)
+        self.assertIsNot(template_env.get_environment("property"), env)
+
+    def test_warmup_compiles_every_template_once(self):
+        env = template_env.get_environment("market")
+        with self._count_compiles(env) as compile_:
+            self.assertEqual(template_env.warmup(), {"market": 3, "property": 0})
+            self.assertEqual(compile_.call_count, len(TEMPLATES))
+
+            html = env.get_template("market.jinja2").render(price=500000)
+            for name in TEMPLATES:
+                env.get_template(name)
+            self.assertEqual(compile_.call_count, len(TEMPLATES))
+        self.assertIn("$500,000", html)
+
+    def test_new_process_loads_bytecode_instead_of_compiling(self):
+        template_env.warmup()
+        template_env._envs.clear()      # as a freshly started worker would
+        env = template_env.get_environment("market")
+        with self._count_compiles(env) as compile_:
+            env.get_template("market.jinja2")
+        compile_.assert_not_called()
+
+
+class TestWarmupRealTemplates(unittest.TestCase):
+    def test_every_shipped_template_compiles(self):
+        with tempfile.TemporaryDirectory() as bcc, \
+                patch.object(template_env, "JINJA_BYTECODE_CACHE_DIR", bcc), \
+                patch.object(template_env, "TEMPLATE_WARMUP_ENABLED", True), \
+                patch.dict(template_env._envs, clear=True):
+            compiled = template_env.warmup()
+            for name in template_env.TEMPLATE_ROOTS:
+                env = template_env.get_environment(name)
+                self.assertEqual(compiled[name],
+                                 len(env.list_templates(extensions=["jinja2", "html"])))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,151 @@
+"""
+Unit tests for outbound webhook delivery (worker.webhooks).
+
+HTTP goes through httpx.MockTransport, Redis is a small in-memory fake and
+the database is patched — verifies:
+ 1. Endpoints are posted concurrently and all attempts are logged in one batch,
+    with delivered / retrying / failed outcomes and retries for the failed
+    hooks only
+ 2. The last attempt dead-letters instead of retrying
+ 3. Repeated timeouts open an endpoint's circuit; while open, no request is made
+ 4. An endpoint at its in-flight cap is deferred without using an attempt
+
+Run with:  pytest tests/test_webhook_dispatch.py -v
+"""
+
+import os
+import sys
+import unittest
+from contextlib import contextmanager
+from unittest.mock import MagicMock, patch
+
+import httpx
+
+# ── Ensure worker source is on the path ───────────────────────────────────────
+WORKER_SRC = os.path.join(
+    os.path.dirname(__file__), "..", "apps", "worker", "src"
+)
+if WORKER_SRC not in sys.path:
+    sys.path.insert(0, WORKER_SRC)
+
+from worker import webhooks  # noqa: E402
+
+HOOKS = [
+    ("hook-ok", "https://ok.example/hook", "s1"),
+    ("hook-503", "https://busy.example/hook", "s2"),
+    ("hook-400", "https://bad.example/hook", "s3"),
+]
+
+
+class FakeRedis:
+    def __init__(self):
+        self.data = {}
+
+    def incr(self, key):
+        self.data[key] = int(self.data.get(key, 0)) + 1
+        return self.data[key]
+
+    def decr(self, key):
+        self.data[key] = int(self.data.get(key, 0)) - 1
+        return self.data[key]
+
+    def expire(self, key, seconds):
+        return True
+
+    def exists(self, key):
+        return int(key in self.data)
+
+    def set(self, key, value, ex=None):
+        self.data[key] = value
+
+    def delete(self, key):
+        self.data.pop(key, None)
+
+
+def _handler(request):
+    if "timeout" in request.url.host:
+        raise httpx.ConnectTimeout("timed out", request=request)
+    status = {"ok.example": 200, "busy.example": 503, "bad.example": 400}[request.url.host]
+    assert request.headers["X-Market-Reports-Signature"].startswith("sha256=")
+    return httpx.Response(status)
+
+
+class TestWebhookDispatch(unittest.TestCase):
+    def setUp(self):
+        self.redis = FakeRedis()
+        self.rows = []
+        self.requests = []
+        self.hooks = list(HOOKS)
+        real_client = httpx.AsyncClient
+
+        def handler(request):
+            self.requests.append(str(request.url))
+            return _handler(request)
+
+        @contextmanager
+        def fake_db_conn(account_id=None, autocommit=False):
+            conn, cur = MagicMock(), MagicMock()
+            cur.executemany.side_effect = lambda sql, rows: self.rows.extend(rows)
+            cur.fetchall.side_effect = lambda: self.hooks
+            yield conn, cur
+
+        for target, value in (
+            ("_get_redis", lambda: self.redis),
+            ("db_conn", fake_db_conn),
+        ):
+            patcher = patch.object(webhooks, target, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        patcher = patch.object(
+            webhooks.httpx, "AsyncClient",
+            lambda **kw: real_client(transport=httpx.MockTransport(handler), **kw),
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.reschedule = MagicMock()
+
+    def _dispatch(self, attempt=1):
+        return webhooks.dispatch("acct-1", "report.completed", '{"event": "x"}', "evt-1",
+                                 attempt=attempt, reschedule=self.reschedule)
+
+    def test_concurrent_delivery_logged_in_one_batch(self):
+        summary = self._dispatch()
+        self.assertEqual(summary, {"delivered": 1, "retrying": 1, "failed": 1,
+                                   "dead_letter": 0, "deferred": 0})
+        self.assertEqual(len(self.requests), 3)
+        statuses = {row[1]: (row[4], row[7], row[8]) for row in self.rows}
+        self.assertEqual(statuses, {
+            "hook-ok": (200, "delivered", 1),
+            "hook-503": (503, "retrying", 1),
+            "hook-400": (400, "failed", 1),
+        })
+        self.reschedule.assert_called_once_with(["hook-503"], 2, webhooks.retry_delay(1))
+        # in-flight slots released
+        self.assertTrue(all(v == 0 for k, v in self.redis.data.items() if ":inflight:" in k))
+
+    def test_last_attempt_dead_letters(self):
+        summary = self._dispatch(attempt=webhooks.WEBHOOK_MAX_ATTEMPTS)
+        self.assertEqual(summary["dead_letter"], 1)
+        self.reschedule.assert_not_called()
+
+    def test_breaker_opens_after_repeated_timeouts(self):
+        self.hooks = [("hook-slow", "https://timeout.example/hook", "s")]
+        for _ in range(webhooks.WEBHOOK_BREAKER_THRESHOLD):
+            self._dispatch()
+        self.assertEqual(len(self.requests), webhooks.WEBHOOK_BREAKER_THRESHOLD)
+
+        self._dispatch()
+        self.assertEqual(len(self.requests), webhooks.WEBHOOK_BREAKER_THRESHOLD)  # no request
+        self.assertEqual(self.rows[-1][6], "circuit open")
+
+    def test_endpoint_cap_defers_without_an_attempt(self):
+        self.hooks = [HOOKS[0]]
+        self.redis.data["mr:webhooks:inflight:hook-ok"] = webhooks.WEBHOOK_ENDPOINT_CONCURRENCY
+        summary = self._dispatch(attempt=2)
+        self.assertEqual(summary["deferred"], 1)
+        self.assertEqual(self.requests, [])
+        self.reschedule.assert_called_once_with(["hook-ok"], 2, webhooks.WEBHOOK_DEFER_S)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,134 @@
+"""
+Unit tests for the worker's per-process connection pool (worker.db).
+
+Connections are fakes (psycopg.connect is patched) — verifies:
+ 1. Sequential checkouts reuse one warm connection
+ 2. Nested checkouts open a second one; the idle set stays bounded
+ 3. Commit on success, rollback on error, and a dirty transaction is
+    rolled back before the connection is kept
+ 4. Expired / broken / dead connections are never handed out again
+ 5. A forked child never reuses the parent's connections
+ 6. set_rls / db_conn(account_id) issue the API's SET LOCAL statements
+
+Run with:  pytest tests/test_worker_db_pool.py -v
+"""
+
+import os
+import sys
+import unittest
+from unittest.mock import MagicMock, patch
+
+# ── Ensure worker source is on the path ───────────────────────────────────────
+WORKER_SRC = os.path.join(
+    os.path.dirname(__file__), "..", "apps", "worker", "src"
+)
+if WORKER_SRC not in sys.path:
+    sys.path.insert(0, WORKER_SRC)
+
+from psycopg.pq import TransactionStatus  # noqa: E402
+
+from worker import db as db_mod  # noqa: E402
+from worker.db import ConnectionPool  # noqa: E402
+
+
+def _fake_conn():
+    conn = MagicMock()
+    conn.closed = False
+    conn.broken = False
+    conn.autocommit = False
+    conn.info.transaction_status = TransactionStatus.IDLE
+    return conn
+
+
+class TestConnectionPool(unittest.TestCase):
+    def setUp(self):
+        self.opened = []
+
+        def connect(_conninfo):
+            conn = _fake_conn()
+            self.opened.append(conn)
+            return conn
+
+        patcher = patch.object(db_mod.psycopg, "connect", side_effect=connect)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.pool = ConnectionPool("postgresql://test", max_idle_conns=2)
+        patcher = patch.object(db_mod, "_pool", self.pool)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_sequential_steps_reuse_one_connection(self):
+        for _ in range(6):
+            with db_mod.db_connection(autocommit=True) as conn:
+                conn.execute("SELECT 1")
+        self.assertEqual(len(self.opened), 1)
+        self.assertEqual(self.pool.stats["reused"], 5)
+
+    def test_nested_checkouts_and_bounded_idle(self):
+        with db_mod.db_connection() as a:
+            with db_mod.db_connection() as b:
+                with db_mod.db_connection() as c:
+                    self.assertEqual(len({id(a), id(b), id(c)}), 3)
+        self.assertEqual(self.pool.health()["idle"], 2)
+        self.assertEqual(self.pool.health()["checked_out"], 0)
+        self.assertEqual(sum(1 for c in self.opened if c.close.called), 1)
+
+    def test_commit_on_success_rollback_on_error(self):
+        with db_mod.db_connection() as conn:
+            pass
+        conn.commit.assert_called_once()
+
+        with self.assertRaises(RuntimeError):
+            with db_mod.db_connection() as conn:
+                raise RuntimeError("boom")
+        conn.rollback.assert_called()
+        self.assertEqual(self.pool.health()["idle"], 1)
+
+    def test_dirty_transaction_rolled_back_before_reuse(self):
+        conn = self.pool.getconn()
+        conn.info.transaction_status = TransactionStatus.INTRANS
+        self.pool.putconn(conn)
+        conn.rollback.assert_called_once()
+        self.assertIs(self.pool.getconn(), conn)
+
+    def test_broken_or_expired_connections_are_dropped(self):
+        conn = self.pool.getconn()
+        conn.broken = True
+        self.pool.putconn(conn)
+        self.assertEqual(self.pool.health()["idle"], 0)
+
+        self.pool.max_lifetime_s = 0
+        conn = self.pool.getconn()
+        self.pool.putconn(conn)
+        self.assertEqual(self.pool.health()["idle"], 0)
+        conn.close.assert_called()
+
+    def test_dead_idle_connection_fails_health_check(self):
+        self.pool.check_after_s = 0
+        conn = self.pool.getconn()
+        self.pool.putconn(conn)
+        conn.execute.side_effect = Exception("server closed the connection")
+        fresh = self.pool.getconn()
+        self.assertIsNot(fresh, conn)
+        self.assertEqual(len(self.opened), 2)
+
+    def test_forked_child_does_not_reuse_parent_connections(self):
+        conn = self.pool.getconn()
+        self.pool.putconn(conn)
+        with patch.object(db_mod.os, "getpid", return_value=os.getpid() + 1):
+            child = self.pool.getconn()
+        self.assertIsNot(child, conn)
+        conn.close.assert_not_called()  # the parent's socket is left alone
+
+    def test_db_conn_sets_rls(self):
+        with db_mod.db_conn("acct-1") as (conn, cur):
+            pass
+        stmts = [c.args[0] for c in cur.execute.call_args_list]
+        self.assertEqual(len(stmts), 1)
+        self.assertIn("app.current_account_id", stmts[0].as_string(None))
+        self.assertIn("'acct-1'", stmts[0].as_string(None))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,142 @@
+"""
+Unit tests for the worker's Prometheus metrics (worker.metrics).
+
+Verifies:
+ 1. Task hooks time tasks by name and final state, and count retries
+ 2. Pool events are counted from the pool's own stats, once each, and a
+    forked child doesn't re-count what it inherited from the parent
+ 3. The sidecar (multiprocess mode) sums counters over prefork children —
+    including ones that have exited — while a dead child's pool gauges are
+    dropped
+
+Run with:  pytest tests/test_worker_metrics.py -v
+"""
+
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import textwrap
+import unittest
+from types import SimpleNamespace
+from unittest.mock import patch
+
+# ── Ensure worker source is on the path ───────────────────────────────────────
+WORKER_SRC = os.path.join(
+    os.path.dirname(__file__), "..", "apps", "worker", "src"
+)
+if WORKER_SRC not in sys.path:
+    sys.path.insert(0, WORKER_SRC)
+
+from worker import metrics  # noqa: E402
+
+
+def _value(name, **labels):
+    return metrics.REGISTRY.get_sample_value(name, labels) or 0
+
+
+class _FakePool:
+    def __init__(self, **stats):
+        self.stats = {"connects": 0, "reused": 0, "recycled": 0, "discarded": 0, **stats}
+        self.idle = 0
+        self.checked_out = 0
+
+    def health(self):
+        return {"idle": self.idle, "checked_out": self.checked_out, **self.stats}
+
+
+class TestWorkerMetrics(unittest.TestCase):
+    def setUp(self):
+        metrics._pool_seen.clear()
+        self.addCleanup(metrics._pool_seen.clear)
+
+    def test_task_hooks(self):
+        task = SimpleNamespace(name="hooks_task")
+        metrics.on_task_prerun(task_id="t1", task=task)
+        metrics.on_task_postrun(task_id="t1", task=task, state="SUCCESS")
+        metrics.on_task_retry(request=SimpleNamespace(task="hooks_task"))
+
+        self.assertEqual(_value("mr_worker_task_duration_seconds_count",
+                                task="hooks_task", state="SUCCESS"), 1)
+        self.assertEqual(_value("mr_worker_task_retries_total", task="hooks_task"), 1)
+        self.assertIn('mr_worker_task_retries_total{task="hooks_task"} 1.0', metrics.render())
+
+    def test_pool_events_counted_once(self):
+        pool = _FakePool(connects=2, reused=5)
+        pool.idle = 2
+        before = _value("mr_worker_db_pool_events_total", event="reused")
+        with patch.object(metrics, "_db_pool", return_value=pool):
+            metrics.sync_db_pool()
+            metrics.sync_db_pool()          # nothing new since the last task
+            pool.stats["reused"] += 3
+            metrics.sync_db_pool()
+        self.assertEqual(_value("mr_worker_db_pool_events_total", event="reused") - before, 8)
+        self.assertEqual(_value("mr_worker_db_pool_connections", state="idle"), 2)
+
+    def test_fork_does_not_recount_inherited_events(self):
+        pool = _FakePool(connects=7)
+        before = _value("mr_worker_db_pool_events_total", event="connects")
+        with patch.object(metrics, "_db_pool", return_value=pool):
+            metrics._reset_after_fork()     # the child inherits connects=7
+            pool.stats["connects"] += 1
+            metrics.sync_db_pool()
+        self.assertEqual(_value("mr_worker_db_pool_events_total", event="connects") - before, 1)
+
+
+# Runs in a fresh interpreter: multiprocess mode is chosen at import time
+_SIDECAR_SCRIPT = textwrap.dedent("""
+    import os, sys, urllib.request
+    sys.path.insert(0, sys.argv[1])
+    from worker import metrics
+
+    def child(idle, exit_now):
+        metrics.TASK_RETRIES.labels(task="child_task").inc()
+        metrics.DB_POOL_CONNECTIONS.labels(state="idle").set(idle)
+        if exit_now:
+            os._exit(0)
+        os.write(ready_w, b"x")
+        os.read(stop_r, 1)
+        os._exit(0)
+
+    server = metrics.start_metrics_server()
+    ready_r, ready_w = os.pipe()
+    stop_r, stop_w = os.pipe()
+
+    dead = os.fork()
+    if dead == 0:
+        child(idle=5, exit_now=True)
+    os.waitpid(dead, 0)                 # exited without worker_process_shutdown
+    live = os.fork()
+    if live == 0:
+        child(idle=1, exit_now=False)
+    os.read(ready_r, 1)
+
+    url = "http://127.0.0.1:%d/metrics" % server.server_port
+    print(urllib.request.urlopen(url, timeout=5).read().decode())
+    os.write(stop_w, b"x")
+    os.waitpid(live, 0)
+""")
+
+
+class TestSidecar(unittest.TestCase):
+    def test_sidecar_sums_children_and_drops_dead_gauges(self):
+        tmp = tempfile.mkdtemp()
+        with socket.socket() as s:  # port 0 means "disabled", so pick a free one
+            s.bind(("127.0.0.1", 0))
+            port = s.getsockname()[1]
+        env = {**os.environ, "WORKER_METRICS_PORT": str(port), "WORKER_METRICS_DIR": tmp}
+        env.pop("PROMETHEUS_MULTIPROC_DIR", None)
+        with tempfile.NamedTemporaryFile("w", suffix=".py", delete=False) as f:
+            f.write(_SIDECAR_SCRIPT)
+        self.addCleanup(os.remove, f.name)
+
+        out = subprocess.run([sys.executable, f.name, os.path.abspath(WORKER_SRC)], env=env,
+                             capture_output=True, text=True, timeout=30)
+        self.assertEqual(out.returncode, 0, out.stderr)
+        self.assertIn('mr_worker_task_retries_total{task="child_task"} 2.0', out.stdout)
+        self.assertIn('mr_worker_db_pool_connections{state="idle"} 1.0', out.stdout)
+
+
+if __name__ == "__main__":
+    unittest.main()